@@ -1,10 +1,9 @@
 import os
-from asgiref.wsgi import WsgiToAsgi
-from django.core.wsgi import get_wsgi_application
 
 # Ensure Django settings are set for the runtime
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "org_management.settings")
 
-# Create the Django WSGI application, then adapt it to ASGI for Vercel
-_django_wsgi_app = get_wsgi_application()
-app = WsgiToAsgi(_django_wsgi_app)
+# Serve the WSGI application: every request, sync views included, gets its own
+# thread. Under ASGI all sync views of a process share a single thread; the
+# async endpoints (core.views.api) still run, through async_to_sync.
+from org_management.wsgi import application as app  # noqa: E402
@@ -8,11 +8,14 @@ from django.shortcuts import render, redirect
 from django.urls import reverse
 from django.apps import apps
 from django.db import transaction
-from django.http import HttpResponseForbidden
+from django.http import FileResponse, Http404, HttpResponseForbidden
 from django.contrib.sessions.models import Session
 import os
 import shutil
 
+from . import profiling, slow_queries
+from .models import SlowQuery
+
 
 # Keep admin minimal: only Users, Groups (default) and Permissions
 admin.site.register(Permission)
@@ -324,3 +327,90 @@ def clean_all_data_view(request):
 		'admin/clean_all_data_confirm.html',
 		_build_context(request, _default_cleanup_options()),
 	)
+
+
+
+def request_profiles_view(request):
+	"""Admin list of stored request profiles plus a fresh token to capture more.
+
+	Superusers only. Captures are written by RequestProfilerMiddleware when
+	REQUEST_PROFILER_ENABLED is set.
+	"""
+	if not request.user.is_active or not request.user.is_superuser:
+		return HttpResponseForbidden('Only superusers may view request profiles.')
+	context = {
+		**admin.site.each_context(request),
+		'title': 'Request profiles',
+		'enabled': getattr(settings, 'REQUEST_PROFILER_ENABLED', False),
+		'captures': profiling.list_captures(),
+		'max_captures': getattr(settings, 'REQUEST_PROFILER_MAX_CAPTURES', 50),
+		'token': profiling.make_profile_token(request.user),
+		'token_max_age_minutes': profiling.TOKEN_MAX_AGE // 60,
+		'query_param': profiling.QUERY_PARAM,
+	}
+	return render(request, 'admin/request_profiles.html', context)
+
+
+def request_profile_detail_view(request, capture_id):
+	"""Show one capture: cProfile summary and the SQL timeline."""
+	if not request.user.is_active or not request.user.is_superuser:
+		return HttpResponseForbidden('Only superusers may view request profiles.')
+	capture = profiling.load_capture(capture_id)
+	if capture is None:
+		raise Http404('Profile not found')
+	context = {
+		**admin.site.each_context(request),
+		'title': f"Profile {capture['id']}",
+		'capture': capture,
+	}
+	return render(request, 'admin/request_profile_detail.html', context)
+
+
+def request_profile_download_view(request, capture_id):
+	"""Download the raw pstats file (open with snakeviz or ``python -m pstats``)."""
+	if not request.user.is_active or not request.user.is_superuser:
+		return HttpResponseForbidden('Only superusers may view request profiles.')
+	path = profiling.capture_path(capture_id, '.prof')
+	if path is None:
+		raise Http404('Profile not found')
+	return FileResponse(path.open('rb'), as_attachment=True, filename=path.name)
+
+
+
+def slow_queries_view(request):
+	"""Admin report of captured slow queries aggregated by fingerprint and by view.
+
+	Superusers only. ``?view=<url name>`` narrows the report to one view and
+	POST with ``action=clear`` empties the log.
+	"""
+	if not request.user.is_active or not request.user.is_superuser:
+		return HttpResponseForbidden('Only superusers may view the slow query log.')
+
+	if request.method == 'POST' and request.POST.get('action') == 'clear':
+		deleted, _details = SlowQuery.objects.all().delete()
+		messages.success(request, f'Cleared {deleted} slow query record(s).')
+		return redirect(reverse('admin-slow-queries'))
+
+	queryset = SlowQuery.objects.all()
+	view_filter = (request.GET.get('view') or '').strip()
+	if view_filter:
+		queryset = queryset.filter(view_name=view_filter)
+
+	fingerprint_filter = (request.GET.get('fingerprint') or '').strip()
+	samples = []
+	if fingerprint_filter:
+		samples = list(queryset.filter(fingerprint=fingerprint_filter).order_by('-duration_ms')[:10])
+
+	context = {
+		**admin.site.each_context(request),
+		'title': 'Slow queries',
+		'threshold_ms': slow_queries.threshold_ms(),
+		'max_rows': getattr(settings, 'SLOW_QUERY_LOG_MAX_ROWS', 5000),
+		'total_rows': queryset.count(),
+		'by_fingerprint': slow_queries.aggregate_by_fingerprint(queryset),
+		'by_view': slow_queries.aggregate_by_view(queryset),
+		'view_filter': view_filter,
+		'fingerprint_filter': fingerprint_filter,
+		'samples': samples,
+	}
+	return render(request, 'admin/slow_queries.html', context)
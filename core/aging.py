@@ -0,0 +1,211 @@
+"""
+Aging reports: outstanding balances bucketed by how long they have been open.
+
+``receivables`` ages what customers owe. A customer's payments are applied to
+their finalized sales oldest first (by ``finalized_at``), the same FIFO order
+``customer_add_payment`` allocates in, so a sale is open for whatever part of
+it is not covered by the customer's payments after the older sales are paid.
+The whole report is one SQL statement: a running total per customer (a
+window function) against the customer's total paid gives each sale's open
+amount, which is then summed per bucket and customer. Nothing is loaded into
+Python per sale or per payment.
+
+Sales finalized and payments dated after the as-of date are left out, so a
+past date shows the receivables as they stood then.
+
+``payables`` ages what is owed to suppliers: each purchase's unpaid part
+(``price - paid_amount``) by ``purchase_date``. ``paid_amount`` is the
+purchase's current total, so payables are always as of today.
+
+Results are cached per model version (``core.cache``) and per as-of date.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connections, router
+from django.utils import timezone
+
+from . import cache as model_cache
+
+# (key, label, minimum age in days)
+BUCKETS = (
+    ('current', '0–29 days', 0),
+    ('days_30', '30–59 days', 30),
+    ('days_60', '60–89 days', 60),
+    ('days_90', '90+ days', 90),
+)
+BUCKET_KEYS = tuple(key for key, _label, _days in BUCKETS)
+
+CENT = Decimal('0.01')
+
+
+def money(value):
+    """Round a SQL sum to cents; SQLite returns floats for decimal sums."""
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def bucket_cutoffs(as_of):
+    """Boundary dates between consecutive buckets: a date on or before ``cutoffs[i]`` is in bucket ``i + 1`` or older."""
+    return [as_of - timedelta(days=days) for _key, _label, days in BUCKETS[1:]]
+
+
+def bucket_columns_sql(date_column, amount_column):
+    """``SUM(CASE ...)`` select columns splitting ``amount_column`` into BUCKETS by ``date_column``.
+
+    Its parameters come from ``bucket_params``. Rows with no date fall into the
+    oldest bucket.
+    """
+    columns = []
+    for index, key in enumerate(BUCKET_KEYS):
+        conditions = []
+        if index < len(BUCKET_KEYS) - 1:
+            conditions.append(f'{date_column} > %s')
+        if index > 0:
+            conditions.append(f'{date_column} <= %s')
+        if index == len(BUCKET_KEYS) - 1:
+            conditions[-1] = f'({conditions[-1]} OR {date_column} IS NULL)'
+        columns.append(f"SUM(CASE WHEN {' AND '.join(conditions)} THEN {amount_column} ELSE 0 END) AS {key}")
+    return ',\n       '.join(columns)
+
+
+def bucket_params(as_of):
+    """Parameters for ``bucket_columns_sql``: each bucket's lower and upper cutoff, in column order."""
+    cutoffs = bucket_cutoffs(as_of)
+    params = []
+    for index in range(len(BUCKET_KEYS)):
+        if index < len(BUCKET_KEYS) - 1:
+            params.append(cutoffs[index])
+        if index > 0:
+            params.append(cutoffs[index - 1])
+    return params
+
+
+def build_report(rows, fields):
+    """``{'rows': [...], 'totals': {...}}`` from ``(*fields, *BUCKET_KEYS)`` tuples, dropping settled rows."""
+    report_rows = []
+    totals = dict.fromkeys((*BUCKET_KEYS, 'total'), Decimal('0.00'))
+    for row in rows:
+        entry = dict(zip(fields, row[:len(fields)]))
+        buckets = [money(value) for value in row[len(fields):]]
+        entry.update(zip(BUCKET_KEYS, buckets))
+        entry['amounts'] = buckets
+        entry['total'] = sum(buckets, Decimal('0.00'))
+        if entry['total'] <= 0:
+            continue
+        for key in (*BUCKET_KEYS, 'total'):
+            totals[key] += entry[key]
+        report_rows.append(entry)
+    report_rows.sort(key=lambda entry: entry['total'], reverse=True)
+    return {'rows': report_rows, 'totals': totals}
+
+
+def _run(model, sql, params):
+    connection = connections[router.db_for_read(model)]
+    params = [connection.ops.adapt_datefield_value(p) if isinstance(p, date) else p for p in params]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+RECEIVABLE_FIELDS = ('pk', 'customer_id', 'name', 'company')
+
+
+def _receivables_sql(as_of):
+    from .models import Customer, Sale, SalePayment
+
+    sale = Sale._meta.db_table
+    payment = SalePayment._meta.db_table
+    customer = Customer._meta.db_table
+    sql = f"""
+WITH paid AS (
+    SELECT s.customer_id, SUM(p.amount) AS amount
+    FROM {payment} p JOIN {sale} s ON s.id = p.sale_id
+    WHERE s.status = 'finalized' AND p.payment_date <= %s
+    GROUP BY s.customer_id
+),
+billed AS (
+    SELECT s.customer_id, s.finalized_date, s.total_amount,
+           SUM(s.total_amount) OVER (
+               PARTITION BY s.customer_id ORDER BY s.finalized_at, s.id
+               ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+           ) - COALESCE(paid.amount, 0) AS unpaid_to_date
+    FROM {sale} s LEFT JOIN paid ON paid.customer_id = s.customer_id
+    WHERE s.status = 'finalized' AND (s.finalized_date <= %s OR s.finalized_date IS NULL)
+),
+open_sales AS (
+    SELECT customer_id, finalized_date,
+           CASE WHEN unpaid_to_date >= total_amount THEN total_amount
+                WHEN unpaid_to_date > 0 THEN unpaid_to_date
+                ELSE 0 END AS open_amount
+    FROM billed
+)
+SELECT c.id, c.customer_id, c.name, c.company,
+       {bucket_columns_sql('o.finalized_date', 'o.open_amount')}
+FROM open_sales o JOIN {customer} c ON c.id = o.customer_id
+WHERE o.open_amount > 0
+GROUP BY c.id, c.customer_id, c.name, c.company
+"""
+    return sql, [as_of, as_of, *bucket_params(as_of)]
+
+
+def _compute_receivables(as_of):
+    from .models import Sale
+
+    sql, params = _receivables_sql(as_of)
+    report = build_report(_run(Sale, sql, params), RECEIVABLE_FIELDS)
+    report['as_of'] = as_of
+    return report
+
+
+def receivables(as_of=None):
+    """Customer receivables aged by sale finalization date as of ``as_of`` (default: today).
+
+    Returns ``{'as_of', 'rows', 'totals'}``; each row has the customer's
+    ``pk``, ``customer_id``, ``name``, ``company``, one amount per bucket and
+    ``total`` (plus ``amounts``, the bucket amounts in order), largest total first. Customers with nothing open are left out.
+    """
+    as_of = as_of or timezone.localdate()
+    return model_cache.get_or_compute(
+        'receivables_aging', ('Sale', 'SalePayment', 'Customer'),
+        lambda: _compute_receivables(as_of), as_of.isoformat(),
+    )
+
+
+PAYABLE_FIELDS = ('pk', 'name', 'phone')
+
+
+def _payables_sql(as_of):
+    from .models import Supplier, SupplierPurchase
+
+    purchase = SupplierPurchase._meta.db_table
+    supplier = Supplier._meta.db_table
+    sql = f"""
+SELECT sp.id, sp.name, sp.phone,
+       {bucket_columns_sql('p.purchase_date', '(p.price - p.paid_amount)')}
+FROM {purchase} p JOIN {supplier} sp ON sp.id = p.supplier_id
+WHERE p.price > p.paid_amount
+GROUP BY sp.id, sp.name, sp.phone
+"""
+    return sql, bucket_params(as_of)
+
+
+def _compute_payables(as_of):
+    from .models import SupplierPurchase
+
+    sql, params = _payables_sql(as_of)
+    report = build_report(_run(SupplierPurchase, sql, params), PAYABLE_FIELDS)
+    report['as_of'] = as_of
+    return report
+
+
+def payables():
+    """Supplier payables aged by purchase date, as of today.
+
+    Same shape as ``receivables``; rows carry the supplier's ``pk``, ``name`` and ``phone``.
+    """
+    as_of = timezone.localdate()
+    return model_cache.get_or_compute(
+        'payables_aging', ('SupplierPurchase', 'Supplier'),
+        lambda: _compute_payables(as_of), as_of.isoformat(),
+    )
@@ -0,0 +1,39 @@
+"""
+Concurrent database work for async views.
+
+Django's async ORM methods (``acount()``, ``aaggregate()``, ...) hand every
+query to the request's single thread-sensitive executor, so
+``asyncio.gather`` over them still runs one query at a time. ``gather`` below
+runs each independent callable in its own worker thread with its own
+connection instead, which is what lets the dashboard's counts overlap.
+
+With ``ASYNC_DB_PARALLEL`` off (always the case in test runs, where the data
+lives in one uncommitted transaction only the test's own connection can see)
+the callables run one after another on the request's thread.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+
+def _in_worker(func):
+    def run():
+        # Worker threads are pooled: honour CONN_MAX_AGE/health checks around each use.
+        close_old_connections()
+        try:
+            return func()
+        finally:
+            close_old_connections()
+    return run
+
+
+async def gather(*funcs):
+    """Run zero-argument ORM callables concurrently; results keep the argument order."""
+    if not getattr(settings, 'ASYNC_DB_PARALLEL', False):
+        return [await sync_to_async(func)() for func in funcs]
+    return list(await asyncio.gather(
+        *(sync_to_async(_in_worker(func), thread_sensitive=False)() for func in funcs)
+    ))
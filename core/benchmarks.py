@@ -0,0 +1,338 @@
+"""
+View latency benchmarks and per-view query budgets.
+
+Seeds a deterministic dataset, drives the hot views through the Django test
+client and records wall time and query counts. Used by the
+``benchmark_views`` management command (baseline comparison) and by
+``core/tests/test_query_budgets.py`` (query budgets in the regular test run).
+
+``measure_import_time`` covers cold start instead: it boots the serverless
+entry point in a fresh interpreter under ``python -X importtime``
+(``benchmark_imports`` command, ``core/tests/test_import_time.py``).
+"""
+
+import itertools
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import (
+    Customer, InventoryItem, Expense, Sale, SaleItem, SalePayment,
+    Supplier, SupplierPurchase, SupplierPurchasePayment,
+)
+
+DEFAULT_BASELINE_PATH = Path(settings.BASE_DIR) / 'benchmarks' / 'view_baseline.json'
+
+# Wall time may drift by this fraction (plus an absolute slack for very fast
+# views) before a benchmark run is reported as a regression.
+DEFAULT_TOLERANCE = 0.25
+WALL_SLACK_MS = 5.0
+
+# Upper bound on queries per view against the scale=1 dataset. Exceeding a
+# budget usually means an N+1 slipped into a view or its template.
+QUERY_BUDGETS = {
+    'dashboard': 19,
+    'sale_list': 28,
+    'sale_list_item_type': 31,
+    'customer_detail': 22,
+    'inventory_list': 6,
+    'ledger': 7,
+    'expense_list': 8,
+    'supplier_list': 5,
+    'export_excel': 7,
+    'customer_report_excel': 5,
+    'sales_export_csv': 126,
+    'sales_export_pdf': 250,
+    'sale_payments_export': 4,
+    'sale_payments_export_pdf': 10,
+}
+
+SALE_LIST_FILTERS = {
+    'status': ['', 'finalized', 'draft'],
+    'item_type': ['', 'inventory', 'machine'],
+    'dates': [False, True],
+}
+
+
+def seed_benchmark_data(scale=1):
+    """Create a deterministic dataset sized by ``scale`` and return lookup ids.
+
+    Sales are created through the models (not bulk inserts) so totals, ledger
+    entries and sequence numbers follow the same code paths as production.
+    """
+    User = get_user_model()
+    admin, _ = User.objects.get_or_create(
+        username='bench_admin',
+        defaults={'is_superuser': True, 'is_staff': True},
+    )
+    if not admin.has_usable_password():
+        admin.set_password('bench-pass')
+        admin.save()
+
+    customers = [
+        Customer.objects.create(name=f'Bench Customer {i}', phone=f'0170000{i:04d}', company=f'Co {i % 7}')
+        for i in range(25 * scale)
+    ]
+    inventory = [
+        InventoryItem.objects.create(
+            part_name=f'Bench Part {i}',
+            part_code=f'BP-{i:05d}',
+            category=f'cat-{i % 5}',
+            quantity=Decimal('100000'),
+            box_count=1000,
+            unit_price=Decimal('10.00') + i,
+            minimum_stock=5 if i % 4 else 200000,
+        )
+        for i in range(30 * scale)
+    ]
+
+    statuses = ['finalized', 'finalized', 'finalized', 'draft', 'quote']
+    sales = []
+    for i in range(100 * scale):
+        sale = Sale.objects.create(
+            customer=customers[i % len(customers)],
+            created_by=admin,
+            status='draft',
+        )
+        SaleItem.objects.create(
+            sale=sale,
+            item_type='inventory',
+            inventory_item=inventory[i % len(inventory)],
+            quantity=Decimal(1 + i % 3),
+            unit_price=inventory[i % len(inventory)].unit_price,
+        )
+        if i % 3 == 0:
+            SaleItem.objects.create(
+                sale=sale,
+                item_type='non_inventory',
+                description=f'Machine: Model {i % 6} - bench',
+                quantity=Decimal('1'),
+                unit_price=Decimal('500.00'),
+            )
+        status = statuses[i % len(statuses)]
+        if status == 'finalized':
+            sale.finalize(user=admin)
+            if i % 2 == 0:
+                SalePayment.objects.create(sale=sale, amount=(sale.total_amount / 2).quantize(Decimal('0.01')))
+        elif status == 'quote':
+            sale.status = 'quote'
+            sale.save(update_fields=['status', 'updated_at'])
+        sales.append(sale)
+
+    today = timezone.localdate()
+    for i in range(40 * scale):
+        Expense.objects.create(
+            date=today - timedelta(days=i % 45),
+            category='utilities' if i % 2 else 'transport',
+            description=f'Bench expense {i}',
+            amount=Decimal('25.00') + i,
+        )
+
+    for i in range(8 * scale):
+        supplier = Supplier.objects.create(name=f'Bench Supplier {i}', phone=f'0180000{i:04d}')
+        for j in range(4):
+            purchase = SupplierPurchase.objects.create(
+                supplier=supplier,
+                product_name=f'Bench stock {j}',
+                price=Decimal('1000.00'),
+            )
+            if j % 2 == 0:
+                SupplierPurchasePayment.objects.create(purchase=purchase, amount=Decimal('400.00'))
+                purchase.paid_amount = Decimal('400.00')
+                purchase.save(update_fields=['paid_amount', 'updated_at'])
+
+    finalized = next(s for s in sales if s.status == 'finalized')
+    return {
+        'user': admin,
+        'customer_id': customers[0].pk,
+        'sale_id': finalized.pk,
+    }
+
+
+def hot_view_requests(fixtures):
+    """Yield ``(label, budget_key, url, params)`` for every benchmarked request."""
+    yield 'dashboard', 'dashboard', reverse('dashboard'), {}
+
+    today = timezone.localdate()
+    for status, item_type, dates in itertools.product(*SALE_LIST_FILTERS.values()):
+        params = {}
+        if status:
+            params['status'] = status
+        if item_type:
+            params['item_type'] = item_type
+        # Labels stay date-independent so they keep matching the baseline file.
+        label = 'sale_list[' + ','.join(f'{k}={v}' for k, v in params.items())
+        if dates:
+            params['start_date'] = (today - timedelta(days=30)).isoformat()
+            params['end_date'] = today.isoformat()
+            label += ',last_30_days' if status or item_type else 'last_30_days'
+        label += ']'
+        budget_key = 'sale_list_item_type' if item_type else 'sale_list'
+        yield label, budget_key, reverse('sale_list'), params
+
+    yield 'customer_detail', 'customer_detail', reverse('customer_detail', args=[fixtures['customer_id']]), {}
+    yield 'inventory_list', 'inventory_list', reverse('inventory_list'), {}
+    yield 'ledger', 'ledger', reverse('ledger'), {}
+    yield 'expense_list', 'expense_list', reverse('expense_list'), {}
+    yield 'supplier_list', 'supplier_list', reverse('supplier_list'), {}
+    yield 'export_excel', 'export_excel', reverse('export_excel'), {}
+    yield 'customer_report_excel', 'customer_report_excel', reverse('customer_report_excel'), {}
+    yield 'sales_export_csv', 'sales_export_csv', reverse('sales_export_csv'), {}
+    yield 'sales_export_pdf', 'sales_export_pdf', reverse('sales_export_pdf'), {}
+    yield 'sale_payments_export', 'sale_payments_export', reverse('sale_payments_export', args=[fixtures['sale_id']]), {}
+    yield 'sale_payments_export_pdf', 'sale_payments_export_pdf', reverse('sale_payments_export_pdf', args=[fixtures['sale_id']]), {}
+
+
+class QueryLogOverflow(RuntimeError):
+    """A measured request ran more queries than ``connection.queries_log`` holds."""
+
+
+def measure_view(client, url, params=None, repeat=1):
+    """Return ``(status_code, query_count, median_wall_ms)`` for a GET request.
+
+    Raises ``QueryLogOverflow`` rather than report a query count it could not see.
+    """
+    timings = []
+    query_count = 0
+    status_code = None
+    for _ in range(max(1, repeat)):
+        # CaptureQueriesContext disconnects the per-request reset_queries, so
+        # the log would fill up across requests and capture nothing once full.
+        reset_queries()
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = client.get(url, params or {})
+            # Streaming responses do their work while being consumed.
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+            timings.append((time.perf_counter() - started) * 1000)
+        if len(connection.queries_log) >= connection.queries_log.maxlen:
+            raise QueryLogOverflow(f'{url}: more than {connection.queries_log.maxlen} queries in one request')
+        status_code = response.status_code
+        query_count = len(ctx.captured_queries)
+    return status_code, query_count, statistics.median(timings)
+
+
+def run_view_benchmarks(client, fixtures, repeat=3):
+    """Benchmark every hot view and return ``{label: result}``."""
+    results = {}
+    for label, budget_key, url, params in hot_view_requests(fixtures):
+        status_code, queries, wall_ms = measure_view(client, url, params, repeat=repeat)
+        results[label] = {
+            'budget_key': budget_key,
+            'status': status_code,
+            'queries': queries,
+            'wall_ms': round(wall_ms, 2),
+        }
+    return results
+
+
+def load_baseline(path=DEFAULT_BASELINE_PATH):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with path.open() as fh:
+        return json.load(fh).get('views', {})
+
+
+def write_baseline(results, path=DEFAULT_BASELINE_PATH, scale=1):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        'scale': scale,
+        'views': {
+            label: {'queries': row['queries'], 'wall_ms': row['wall_ms']}
+            for label, row in sorted(results.items())
+        },
+    }
+    with path.open('w') as fh:
+        json.dump(payload, fh, indent=2, sort_keys=True)
+        fh.write('\n')
+
+
+def find_regressions(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Compare a run against the baseline and budgets; return readable problems."""
+    problems = []
+    for label, row in results.items():
+        if row['status'] != 200:
+            problems.append(f'{label}: HTTP {row["status"]}')
+        budget = QUERY_BUDGETS.get(row['budget_key'])
+        if budget is not None and row['queries'] > budget:
+            problems.append(f'{label}: {row["queries"]} queries exceeds budget of {budget}')
+        base = baseline.get(label)
+        if not base:
+            continue
+        if row['queries'] > base['queries']:
+            problems.append(f'{label}: {row["queries"]} queries (baseline {base["queries"]})')
+        allowed_ms = base['wall_ms'] * (1 + tolerance) + WALL_SLACK_MS
+        if row['wall_ms'] > allowed_ms:
+            problems.append(f'{label}: {row["wall_ms"]:.1f} ms (baseline {base["wall_ms"]:.1f} ms, allowed {allowed_ms:.1f} ms)')
+    return problems
+
+
+# What a cold serverless instance imports before it can answer: the ASGI entry
+# point plus the URLconf (loaded by the first request).
+COLD_START_SCRIPT = "import api.index; from django.urls import reverse; reverse('dashboard')"
+
+# Loaded by the requests that need them, never at startup.
+COLD_START_DEFERRED_MODULES = ('openpyxl', 'reportlab', 'core.views.')
+
+# Cumulative import time of the cold-start script. Generous, since the test run
+# shares the machine with everything else; the deferred-module check above is
+# the precise guard.
+IMPORT_TIME_BUDGET_MS = 1500
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+
+def measure_import_time(script=COLD_START_SCRIPT):
+    """Run ``script`` under ``python -X importtime`` in a fresh interpreter.
+
+    Returns ``{'total_ms': ..., 'modules': {name: (self_ms, cumulative_ms)}}``;
+    ``total_ms`` is the sum of every module's own import time.
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'org_management.settings'))
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f'Cold-start script failed:\n{proc.stderr[-2000:]}')
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, _indent, name = match.groups()
+            modules[name] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+    return {
+        'total_ms': sum(self_ms for self_ms, _cumulative in modules.values()),
+        'modules': modules,
+    }
+
+
+def deferred_modules_loaded(modules):
+    """Modules from COLD_START_DEFERRED_MODULES that the cold start imported anyway.
+
+    A prefix ending in ``.`` matches submodules only (``core.views.`` allows the
+    lazy ``core.views`` package itself); otherwise the package and its submodules.
+    """
+    def _deferred(name, prefix):
+        if prefix.endswith('.'):
+            return name.startswith(prefix)
+        return name == prefix or name.startswith(prefix + '.')
+
+    return sorted(name for name in modules if any(_deferred(name, prefix) for prefix in COLD_START_DEFERRED_MODULES))
@@ -0,0 +1,133 @@
+"""
+Model-version cache invalidation.
+
+Every tracked model has a version counter in the cache that ``core.signals``
+bumps on ``post_save``/``post_delete``. Cached values are stored under keys
+that embed the versions of the models they were computed from, so a write to
+any of those models makes the old entries unreachable immediately and they
+simply age out. Nothing relies on guessing a TTL.
+
+Queryset ``update()``/``bulk_create()`` and raw SQL skip signals; code that
+writes that way must call ``bump_versions`` itself.
+
+The counters only invalidate what is cached in the same cache, so values are
+cached only with a configured backend (``CACHE_BACKEND``); without one
+``get_or_compute`` computes every time. ``shared()`` tells whether every process
+sees the same cache, which anything that must not lag behind a write in another
+process (such as authorization) requires.
+"""
+
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import metrics
+from .db_router import primary_reads
+
+TRACKED_MODELS = (
+    'Customer', 'Sale', 'SaleItem', 'SalePayment', 'InventoryItem', 'Expense', 'LedgerEntry', 'Supplier', 'SupplierPurchase',
+)
+
+# Cached values outlive their versions only as garbage; this bounds how long.
+DEFAULT_TIMEOUT = 60 * 60
+
+_VERSION_KEY = 'modelver:{}'
+
+_DUMMY_BACKEND = 'django.core.cache.backends.dummy.DummyCache'
+_PER_PROCESS_BACKENDS = (_DUMMY_BACKEND, 'django.core.cache.backends.locmem.LocMemCache')
+
+
+def enabled():
+    """Whether a cache backend is configured at all."""
+    return settings.CACHES['default']['BACKEND'] != _DUMMY_BACKEND
+
+
+def shared():
+    """Whether the configured cache is seen by every process (file, redis, ...)."""
+    return settings.CACHES['default']['BACKEND'] not in _PER_PROCESS_BACKENDS
+
+
+def _initial_version():
+    # Seed from the clock (microseconds) so a counter that was evicted and
+    # recreated never reuses a version older cached values may be stored under:
+    # that would take more than one write per microsecond since the old seed.
+    return time.time_ns() // 1000
+
+
+def model_versions(*labels):
+    """Current version of each model label, e.g. ``{'Sale': 17, ...}``."""
+    keys = {label: _VERSION_KEY.format(label) for label in labels}
+    found = cache.get_many(list(keys.values()))
+    versions = {}
+    for label, key in keys.items():
+        if key in found:
+            versions[label] = found[key]
+        else:
+            initial = _initial_version()
+            cache.add(key, initial, timeout=None)
+            versions[label] = cache.get(key, initial)
+    return versions
+
+
+def _bump(label):
+    key = _VERSION_KEY.format(label)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), timeout=None)
+
+
+def bump_versions(*labels):
+    """Invalidate everything cached against ``labels``.
+
+    Bumps now (so the writing request stops seeing stale values) and again on
+    commit (so a value computed by another request from pre-commit data and
+    stored under the intermediate version is discarded too).
+    """
+    if not enabled():
+        return
+    for label in labels:
+        _bump(label)
+    transaction.on_commit(lambda: [_bump(label) for label in labels])
+
+
+def versioned_key(name, labels, *parts):
+    versions = model_versions(*labels)
+    version_part = '.'.join(f'{label}{versions[label]}' for label in labels)
+    extra = ':'.join(str(part) for part in parts)
+    return f'{name}:{version_part}:{extra}' if extra else f'{name}:{version_part}'
+
+
+def get_or_compute(name, depends_on, compute, *key_parts, timeout=DEFAULT_TIMEOUT):
+    """Return the cached result of ``compute()`` for the current model versions.
+
+    ``key_parts`` distinguish variants (date, filters, user scope) of the same value.
+    ``compute`` reads from the primary even inside a ``use_replica`` view.
+    """
+    if not enabled():
+        return compute()
+    key = versioned_key(name, depends_on, *key_parts)
+    sentinel = object()
+    value = cache.get(key, sentinel)
+    if value is not sentinel:
+        metrics.record_cache(name, hit=True)
+        return value
+    metrics.record_cache(name, hit=False)
+    # The key carries the primary's versions, so the value must come from there too.
+    with primary_reads():
+        value = compute()
+    cache.set(key, value, timeout)
+    return value
+
+
+def cached_by_versions(name, depends_on, timeout=DEFAULT_TIMEOUT):
+    """Decorator form of ``get_or_compute``; positional arguments become key parts."""
+    def decorator(func):
+        @wraps(func)
+        def _wrapped(*args):
+            return get_or_compute(name, depends_on, lambda: func(*args), *args, timeout=timeout)
+        return _wrapped
+    return decorator
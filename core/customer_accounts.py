@@ -0,0 +1,124 @@
+"""
+Per-customer account totals.
+
+Customer pages, receipts and exports used to add up every finalized sale and
+its payments on each request. ``CustomerAccount`` keeps those sums (billed,
+paid, due, last sale and last payment date) in one row per customer, so they
+are a single lookup and ``customer_list`` can sort and filter by what is due.
+
+``core.signals`` calls ``refresh`` whenever a sale, sale item or sale payment
+is saved or deleted, inside the writer's transaction, so the row commits or
+rolls back together with the change. ``refresh`` recomputes the customer's
+totals rather than applying a delta, so it is idempotent and any drift is
+corrected by the next write. Queryset ``update()``/``bulk_create()`` and raw
+SQL skip signals; ``manage.py verify_customer_accounts --repair`` rebuilds the
+rows after those.
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Max, Sum
+
+FIELDS = ('total_amount', 'total_paid', 'total_due', 'last_sale_date', 'last_payment_date')
+
+# Sale fields the account depends on; saves that touch none of them are skipped.
+SALE_FIELDS = frozenset({'status', 'total_amount', 'customer', 'customer_id', 'finalized_at', 'finalized_date'})
+
+
+def empty_totals():
+    return {
+        'total_amount': Decimal('0.00'),
+        'total_paid': Decimal('0.00'),
+        'total_due': Decimal('0.00'),
+        'last_sale_date': None,
+        'last_payment_date': None,
+    }
+
+
+def compute(sale_model, payment_model, customer_ids=None):
+    """Totals of finalized sales and their payments, keyed by customer id.
+
+    Customers without finalized sales are absent from the result. Takes the
+    model classes as arguments so data migrations can pass their historical models.
+    """
+    sales = sale_model.objects.filter(status='finalized')
+    payments = payment_model.objects.filter(sale__status='finalized')
+    if customer_ids is not None:
+        sales = sales.filter(customer_id__in=customer_ids)
+        payments = payments.filter(sale__customer_id__in=customer_ids)
+
+    totals = {}
+    for row in sales.values('customer_id').annotate(billed=Sum('total_amount'), last=Max('finalized_date')).order_by():
+        account = totals.setdefault(row['customer_id'], empty_totals())
+        account['total_amount'] = row['billed'] or Decimal('0.00')
+        account['last_sale_date'] = row['last']
+    for row in payments.values('sale__customer_id').annotate(paid=Sum('amount'), last=Max('payment_date')).order_by():
+        account = totals.setdefault(row['sale__customer_id'], empty_totals())
+        account['total_paid'] = row['paid'] or Decimal('0.00')
+        account['last_payment_date'] = row['last']
+    for account in totals.values():
+        account['total_due'] = account['total_amount'] - account['total_paid']
+    return totals
+
+
+def refresh(customer_id):
+    """Recompute and store one customer's account row; returns it.
+
+    The row is locked before the totals are read, so concurrent writers for the
+    same customer take turns and the last one to commit sees the other's change.
+    """
+    from .models import CustomerAccount, Sale, SalePayment
+
+    with transaction.atomic():
+        account, _created = CustomerAccount.objects.select_for_update().get_or_create(customer_id=customer_id)
+        values = compute(Sale, SalePayment, [customer_id]).get(customer_id) or empty_totals()
+        changed = [field for field, value in values.items() if getattr(account, field) != value]
+        if changed:
+            for field in changed:
+                setattr(account, field, values[field])
+            account.save(update_fields=[*changed, 'updated_at'])
+    return account
+
+
+def account_for(customer):
+    """The customer's account row, created on first use for customers that predate it."""
+    from .models import CustomerAccount
+
+    try:
+        return customer.account
+    except CustomerAccount.DoesNotExist:
+        return refresh(customer.pk)
+
+
+def verify(customer_model, account_model, sale_model, payment_model, repair=False, batch_size=500):
+    """Compare every stored account with freshly computed totals.
+
+    Returns ``{customer_id: {field: (stored, expected)}}`` for the accounts that
+    differ; a missing account row is reported with ``None`` as the stored value.
+    With ``repair`` the differing rows are rewritten and missing ones created.
+    """
+    expected = compute(sale_model, payment_model)
+    stored = {account.customer_id: account for account in account_model.objects.all()}
+
+    mismatches = {}
+    to_update, to_create = [], []
+    for customer_id in customer_model.objects.order_by('pk').values_list('pk', flat=True).iterator():
+        values = expected.get(customer_id) or empty_totals()
+        account = stored.get(customer_id)
+        if account is None:
+            mismatches[customer_id] = {field: (None, value) for field, value in values.items()}
+            to_create.append(account_model(customer_id=customer_id, **values))
+            continue
+        diff = {field: (getattr(account, field), value) for field, value in values.items() if getattr(account, field) != value}
+        if diff:
+            mismatches[customer_id] = diff
+            for field, (_stored, value) in diff.items():
+                setattr(account, field, value)
+            to_update.append(account)
+
+    if repair:
+        with transaction.atomic():
+            account_model.objects.bulk_create(to_create, batch_size=batch_size)
+            account_model.objects.bulk_update(to_update, list(FIELDS), batch_size=batch_size)
+    return mismatches
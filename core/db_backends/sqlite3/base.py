@@ -0,0 +1,17 @@
+"""
+SQLite backend that opens write transactions with ``BEGIN IMMEDIATE``.
+
+A plain ``BEGIN`` takes the write lock lazily at the first write statement;
+if another connection got there first the transaction can only fail with
+"database is locked", because SQLite cannot wait for a lock upgrade without
+risking a deadlock. ``BEGIN IMMEDIATE`` takes the write lock up front, so
+concurrent writers queue on ``busy_timeout`` instead. Per-connection PRAGMAs
+are applied by the ``connection_created`` hook in ``core.signals``.
+"""
+
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
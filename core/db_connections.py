@@ -0,0 +1,92 @@
+"""
+Per-view Postgres statement timeouts.
+
+Views are tagged with a timeout class (``@statement_timeout('pos')``,
+``@statement_timeout('export')``; untagged views are ``default``) and
+``StatementTimeoutMiddleware`` makes ``DB_STATEMENT_TIMEOUTS[class]`` the
+current timeout for the request. Each Postgres connection carries an execute
+wrapper that sends ``SET statement_timeout`` before the next statement
+whenever the connection's value differs, so persistent connections
+(``CONN_MAX_AGE``) only pay for it when the class changes, and connections
+used from ``sync_to_async`` threads or while a streaming export generates its
+body get the right value too.
+
+A ``SET`` sent inside a transaction is undone by Postgres if that transaction
+(or the savepoint around it) rolls back, e.g. on ``InsufficientStock`` in an
+atomic view. The value is then only remembered once the transaction commits:
+an ``on_commit`` marker that a rollback discards tells the wrapper to send the
+``SET`` again.
+
+Session-level ``SET`` would leak between clients behind pgbouncer in
+transaction pooling mode, so the middleware is disabled when ``DB_PGBOUNCER``
+is set; configure the timeout on the database role instead.
+"""
+
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+DEFAULT_CLASS = 'default'
+
+_current_timeout = ContextVar('statement_timeout_ms', default=None)
+
+
+def statement_timeout(kind):
+    """Tag a view with a statement-timeout class from ``DB_STATEMENT_TIMEOUTS``.
+
+    ``functools.wraps`` copies the tag onto any decorator applied above this one.
+    """
+    def decorator(view_func):
+        view_func.statement_timeout = kind
+        return view_func
+    return decorator
+
+
+def timeout_for(view_func):
+    timeouts = getattr(settings, 'DB_STATEMENT_TIMEOUTS', {})
+    kind = getattr(view_func, 'statement_timeout', DEFAULT_CLASS)
+    return timeouts.get(kind, timeouts.get(DEFAULT_CLASS))
+
+
+def enabled():
+    if getattr(settings, 'DB_PGBOUNCER', False) or not getattr(settings, 'DB_STATEMENT_TIMEOUTS', None):
+        return False
+    return any(conn.vendor == 'postgresql' for conn in connections.all())
+
+
+def _set_was_rolled_back(connection):
+    marker = connection.statement_timeout_commit
+    # A rollback drops the marker from the pending on_commit callbacks; a commit runs it.
+    return marker is not None and all(entry[1] is not marker for entry in connection.run_on_commit)
+
+
+def _apply_current_timeout(execute, sql, params, many, context):
+    timeout_ms = _current_timeout.get()
+    connection = context['connection']
+    if _set_was_rolled_back(connection):
+        connection.statement_timeout_ms = connection.statement_timeout_commit = None
+    if timeout_ms is not None and connection.statement_timeout_ms != timeout_ms:
+        # The raw cursor, so this statement doesn't pass through the wrappers again.
+        context['cursor'].cursor.execute('SET statement_timeout = %s', [int(timeout_ms)])
+        connection.statement_timeout_ms = timeout_ms
+        if connection.in_atomic_block:
+            def committed():
+                connection.statement_timeout_commit = None
+
+            connection.statement_timeout_commit = committed
+            connection.on_commit(committed)
+    return execute(sql, params, many, context)
+
+
+def activate(timeout_ms):
+    """Use ``timeout_ms`` for the statements of the current request."""
+    _current_timeout.set(timeout_ms)
+
+
+def apply_on_connect(connection):
+    """``connection_created`` hook: a fresh connection starts at the server default."""
+    connection.statement_timeout_ms = None
+    connection.statement_timeout_commit = None
+    if connection.vendor == 'postgresql' and enabled() and _apply_current_timeout not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_apply_current_timeout)
@@ -0,0 +1,130 @@
+"""
+Optional read-replica routing.
+
+When a ``replica`` database alias is configured, views decorated with
+``use_replica`` send their reads there; everything else (and every write)
+stays on ``default``. Replication is asynchronous, so a user who has just
+written something is kept on the primary for ``REPLICA_LAG_GUARD_SECONDS``:
+``ReplicaLagGuardMiddleware`` stamps the session on every unsafe request and
+``use_replica`` checks that stamp before switching.
+
+Values cached against model versions (``core.cache``) are computed under
+``primary_reads``: a lagging replica read stored under a version that already
+counts a write would be served to everyone until the next write.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+LAST_WRITE_SESSION_KEY = '_last_write_at'
+
+_reads_on_replica = ContextVar('reads_on_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def recently_wrote(request):
+    """True while the user's own last write may not have replicated yet."""
+    session = getattr(request, 'session', None)
+    if session is None:
+        return False
+    last_write = session.get(LAST_WRITE_SESSION_KEY)
+    if last_write is None:
+        return False
+    return time.time() - last_write < getattr(settings, 'REPLICA_LAG_GUARD_SECONDS', 10)
+
+
+def mark_write(request):
+    session = getattr(request, 'session', None)
+    if session is not None:
+        session[LAST_WRITE_SESSION_KEY] = time.time()
+
+
+@contextmanager
+def primary_reads():
+    """Read from ``default`` inside a ``use_replica`` view."""
+    token = _reads_on_replica.set(False)
+    try:
+        yield
+    finally:
+        _reads_on_replica.reset(token)
+
+
+class ReplicaRouter:
+    """Routes reads to the replica only inside ``use_replica``; writes always go to default."""
+
+    def db_for_read(self, model, **hints):
+        if _reads_on_replica.get() and replica_configured():
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives schema changes through replication.
+        if db == REPLICA_ALIAS:
+            return False
+        return None
+
+
+def use_replica(view_func):
+    """Serve a read-only view from the replica unless the user wrote recently.
+
+    Streaming responses keep reading from the replica while their body is generated.
+    Async views are supported; their ``sync_to_async`` queries inherit the switch.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _async_wrapped(request, *args, **kwargs):
+            if not replica_configured() or await sync_to_async(recently_wrote)(request):
+                return await view_func(request, *args, **kwargs)
+            token = _reads_on_replica.set(True)
+            try:
+                return await view_func(request, *args, **kwargs)
+            finally:
+                _reads_on_replica.reset(token)
+        return _async_wrapped
+
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        if not replica_configured() or recently_wrote(request):
+            return view_func(request, *args, **kwargs)
+
+        token = _reads_on_replica.set(True)
+        try:
+            response = view_func(request, *args, **kwargs)
+        finally:
+            _reads_on_replica.reset(token)
+
+        if getattr(response, 'streaming', False):
+            content = response.streaming_content
+
+            def _replica_content():
+                # Switch only while each chunk is produced, never across a yield.
+                iterator = iter(content)
+                while True:
+                    token = _reads_on_replica.set(True)
+                    try:
+                        chunk = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        _reads_on_replica.reset(token)
+                    yield chunk
+
+            response.streaming_content = _replica_content()
+        return response
+    return _wrapped
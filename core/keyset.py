@@ -0,0 +1,100 @@
+"""
+Keyset (cursor) pagination for append-mostly tables, newest first.
+
+``Paginator`` counts the whole table and reads ``OFFSET n`` rows to reach
+page n, so the ledger and stock history pages got slower as those tables
+grew. Here a page is the ``per_page`` rows after (or before) the last row
+already shown, ordered by ``(<timestamp field>, id)`` descending::
+
+    WHERE timestamp < %s OR (timestamp = %s AND id < %s)
+    ORDER BY timestamp DESC, id DESC LIMIT per_page + 1
+
+With an index on the same columns this is one index range scan whatever the
+position, so the 5,000th page costs the same as the first. One extra row is
+fetched to know whether there is a next page; nothing is counted.
+
+Cursors are opaque URL-safe strings. A request that is not a valid cursor
+starts at the newest row.
+"""
+
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(value, pk, direction):
+    payload = json.dumps([value.isoformat(), pk, direction], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """``(value, pk, direction)`` from ``encode_cursor``, or None for anything else."""
+    if not token:
+        return None
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        value, pk, direction = json.loads(payload)
+        value = parse_datetime(value)
+    except (ValueError, TypeError):
+        return None
+    if value is None or not isinstance(pk, int) or direction not in ('next', 'prev'):
+        return None
+    return value, pk, direction
+
+
+class KeysetPage:
+    """One page of rows with the cursors to the pages on either side of it."""
+
+    def __init__(self, object_list, field, has_next, has_previous):
+        self.object_list = object_list
+        self.field = field
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def _cursor(self, row, direction):
+        return encode_cursor(getattr(row, self.field), row.pk, direction)
+
+    @property
+    def next_cursor(self):
+        return self._cursor(self.object_list[-1], 'next') if self.has_next and self.object_list else None
+
+    @property
+    def previous_cursor(self):
+        return self._cursor(self.object_list[0], 'prev') if self.has_previous and self.object_list else None
+
+
+def paginate(queryset, field, cursor=None, per_page=20):
+    """The page of ``queryset`` (newest ``field`` first) that ``cursor`` points at."""
+    decoded = decode_cursor(cursor)
+    if decoded is None:
+        rows = list(queryset.order_by(f'-{field}', '-pk')[:per_page + 1])
+        return KeysetPage(rows[:per_page], field, has_next=len(rows) > per_page, has_previous=False)
+
+    value, pk, direction = decoded
+    if direction == 'next':
+        after = Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk})
+        rows = list(queryset.filter(after).order_by(f'-{field}', '-pk')[:per_page + 1])
+        return KeysetPage(rows[:per_page], field, has_next=len(rows) > per_page, has_previous=True)
+
+    before = Q(**{f'{field}__gt': value}) | Q(**{field: value, 'pk__gt': pk})
+    rows = list(queryset.filter(before).order_by(field, 'pk')[:per_page + 1])
+    page = rows[:per_page]
+    page.reverse()
+    return KeysetPage(page, field, has_next=True, has_previous=len(rows) > per_page)
+
+
+def page_json(page, serialize):
+    """The JSON body for infinite scroll: serialized rows and the next cursor."""
+    return {
+        'results': [serialize(row) for row in page.object_list],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
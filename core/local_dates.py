@@ -0,0 +1,75 @@
+"""
+Stored local business dates.
+
+Filtering a timestamp by calendar day (``finalized_at__date=today``) converts
+every row to ``TIME_ZONE`` (Asia/Dhaka) before comparing, so no index on the
+timestamp can be used. ``Sale`` therefore also stores the local date of its
+timestamps (``created_date``, ``finalized_date``), set in ``Sale.save()``, and
+day/month filters compare those indexed columns with plain ranges
+(``month_range``).
+
+Writes that bypass ``save()`` (queryset ``update()``, ``bulk_create()``, raw
+SQL) must set the date columns themselves; ``manage.py backfill_local_dates``
+recomputes them for existing rows, e.g. after changing ``TIME_ZONE``.
+"""
+
+from datetime import date, timedelta
+
+from django.utils import timezone
+
+# Stored date column -> timestamp it is derived from.
+SALE_DATE_FIELDS = {'created_date': 'created_at', 'finalized_date': 'finalized_at'}
+
+
+def local_date(value):
+    """The ``TIME_ZONE`` calendar date of an aware datetime (``None`` stays ``None``)."""
+    return timezone.localdate(value) if value is not None else None
+
+
+def apply(instance, fields=SALE_DATE_FIELDS):
+    """Set each date column from its timestamp; returns the columns that changed."""
+    changed = []
+    for date_field, source in fields.items():
+        value = local_date(getattr(instance, source))
+        if getattr(instance, date_field) != value:
+            setattr(instance, date_field, value)
+            changed.append(date_field)
+    return changed
+
+
+def with_date_fields(update_fields, fields=SALE_DATE_FIELDS):
+    """``update_fields`` plus the date column of every timestamp it saves."""
+    update_fields = list(update_fields)
+    for date_field, source in fields.items():
+        if source in update_fields and date_field not in update_fields:
+            update_fields.append(date_field)
+    return update_fields
+
+
+def month_range(year, month):
+    """``(first day, first day of the next month)`` for a half-open ``__gte``/``__lt`` filter."""
+    first = date(year, month, 1)
+    return first, (first + timedelta(days=32)).replace(day=1)
+
+
+def backfill(model, fields=SALE_DATE_FIELDS, batch_size=1000, dry_run=False):
+    """Recompute the date columns of every row of ``model``; returns how many rows changed.
+
+    Takes the model class as an argument so data migrations can pass their historical model.
+    """
+    changed_rows = []
+    updated = 0
+    columns = [*fields.values(), *fields]
+    for instance in model.objects.only(*columns).order_by('pk').iterator(chunk_size=batch_size):
+        if apply(instance, fields):
+            changed_rows.append(instance)
+        if len(changed_rows) >= batch_size:
+            updated += _flush(model, changed_rows, fields, dry_run)
+            changed_rows = []
+    return updated + _flush(model, changed_rows, fields, dry_run)
+
+
+def _flush(model, rows, fields, dry_run):
+    if rows and not dry_run:
+        model.objects.bulk_update(rows, list(fields))
+    return len(rows)
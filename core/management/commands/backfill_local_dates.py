@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import local_dates
+from core.cache import bump_versions
+from core.models import Sale
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the stored local business dates (Sale.created_date, Sale.finalized_date) from "
+        "their timestamps. Needed after writes that bypass save() or a TIME_ZONE change."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk update (default: 1000).')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many rows would change.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            changed = local_dates.backfill(Sale, batch_size=options['batch_size'], dry_run=options['dry_run'])
+            if changed and not options['dry_run']:
+                bump_versions('Sale')
+        verb = 'would change' if options['dry_run'] else 'updated'
+        self.stdout.write(self.style.SUCCESS(f'Sales {verb}: {changed}'))
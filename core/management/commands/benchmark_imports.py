@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure cold-start import time of the serverless entry point with python -X importtime "
+        "and fail if it exceeds the budget or imports modules that should load lazily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help='Show the N slowest modules by cumulative time (default: 20).')
+        parser.add_argument('--budget-ms', type=float, default=benchmarks.IMPORT_TIME_BUDGET_MS,
+                            help=f'Total import time budget in ms (default: {benchmarks.IMPORT_TIME_BUDGET_MS}).')
+
+    def handle(self, *args, **options):
+        result = benchmarks.measure_import_time()
+        modules = result['modules']
+
+        slowest = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)[:options['top']]
+        width = max((len(name) for name, _times in slowest), default=6)
+        self.stdout.write(f"{'module'.ljust(width)}  self_ms  cumulative_ms")
+        for name, (self_ms, cumulative_ms) in slowest:
+            self.stdout.write(f"{name.ljust(width)}  {self_ms:>7.1f}  {cumulative_ms:>13.1f}")
+        self.stdout.write(f"Total import time: {result['total_ms']:.1f} ms across {len(modules)} modules")
+
+        problems = []
+        if result['total_ms'] > options['budget_ms']:
+            problems.append(f"Import time {result['total_ms']:.1f} ms exceeds the {options['budget_ms']:.0f} ms budget")
+        deferred = benchmarks.deferred_modules_loaded(modules)
+        if deferred:
+            problems.append(f"Imported at startup but should load lazily: {', '.join(deferred[:10])}")
+        if problems:
+            for problem in problems:
+                self.stderr.write(problem)
+            raise CommandError('Cold-start import check failed.')
+        self.stdout.write(self.style.SUCCESS('Cold start within budget.'))
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the hot views against a seeded throwaway database. Records wall time "
+        "and query counts, compares them to the committed baseline and fails on regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=1, help='Dataset size multiplier (default: 1).')
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per view; the median is reported (default: 5).')
+        parser.add_argument('--baseline', default=str(benchmarks.DEFAULT_BASELINE_PATH), help='Baseline JSON file.')
+        parser.add_argument('--tolerance', type=float, default=benchmarks.DEFAULT_TOLERANCE,
+                            help='Allowed relative wall-time increase before failing (default: 0.25).')
+        parser.add_argument('--update-baseline', action='store_true', help='Write this run as the new baseline.')
+
+    def handle(self, *args, **options):
+        scale = options['scale']
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(
+                SECURE_SSL_REDIRECT=False,
+                STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+            ):
+                fixtures = benchmarks.seed_benchmark_data(scale=scale)
+                client = Client()
+                client.force_login(fixtures['user'])
+                try:
+                    results = benchmarks.run_view_benchmarks(client, fixtures, repeat=options['repeat'])
+                except benchmarks.QueryLogOverflow as exc:
+                    raise CommandError(str(exc))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        width = max(len(label) for label in results)
+        self.stdout.write(f"{'view'.ljust(width)}  status  queries  wall_ms")
+        for label, row in results.items():
+            self.stdout.write(f"{label.ljust(width)}  {row['status']:>6}  {row['queries']:>7}  {row['wall_ms']:>7.1f}")
+
+        if options['update_baseline']:
+            benchmarks.write_baseline(results, options['baseline'], scale=scale)
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}"))
+            return
+
+        baseline = benchmarks.load_baseline(options['baseline'])
+        if not baseline:
+            self.stdout.write(self.style.WARNING('No baseline found; only query budgets were checked.'))
+        problems = benchmarks.find_regressions(results, baseline, tolerance=options['tolerance'])
+        if problems:
+            for problem in problems:
+                self.stderr.write(problem)
+            raise CommandError(f'{len(problems)} benchmark regression(s) detected.')
+        self.stdout.write(self.style.SUCCESS('No regressions against baseline and query budgets.'))
@@ -0,0 +1,84 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+
+from core import stress
+
+
+async def _request(host, port, path, headers):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        lines = [f'GET {path} HTTP/1.1', f'Host: {host}:{port}', 'Connection: close', *headers, '', '']
+        writer.write('\r\n'.join(lines).encode('latin-1'))
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def _run(url, headers, requests, concurrency):
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    samples = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                status = await _request(parts.hostname, parts.port or 80, path, headers)
+                outcome = 'ok' if status == 200 else f'http_{status}'
+            except OSError as exc:
+                outcome = type(exc).__name__
+            samples.append((parts.path, (time.perf_counter() - started) * 1000, outcome))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Local HTTP load generator: sends GET requests to a running server (runserver, gunicorn "
+        "or an ASGI server) with N concurrent connections and reports throughput and latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Full URL, e.g. http://127.0.0.1:8000/api/dashboard/metrics/')
+        parser.add_argument('--requests', type=int, default=500, help='Total requests (default: 500).')
+        parser.add_argument('--concurrency', type=int, default=20, help='Concurrent connections (default: 20).')
+        parser.add_argument('--user', help='Send a session cookie for this username (session created in this database).')
+
+    def handle(self, *args, **options):
+        if not options['url'].startswith('http://'):
+            raise CommandError('Only plain http:// URLs are supported.')
+        headers = []
+        if options['user']:
+            try:
+                user = get_user_model().objects.get(username=options['user'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User {options['user']!r} not found.")
+            session = SessionStore()
+            session['_auth_user_id'] = str(user.pk)
+            session['_auth_user_backend'] = settings.AUTHENTICATION_BACKENDS[0]
+            session['_auth_user_hash'] = user.get_session_auth_hash()
+            session.create()
+            headers.append(f'Cookie: {settings.SESSION_COOKIE_NAME}={session.session_key}')
+
+        samples, elapsed = asyncio.run(_run(options['url'], headers, options['requests'], options['concurrency']))
+        summary = stress.summarize(samples, elapsed)
+
+        self.stdout.write(
+            f"{summary['operations']} requests in {summary['elapsed_s']:.2f}s, concurrency {options['concurrency']}: "
+            f"{summary['throughput_ops_s']:.1f} ok req/s"
+        )
+        self.stdout.write(f"outcomes: {summary['outcomes']}")
+        for path, row in summary['latency_ms'].items():
+            self.stdout.write(f"{path}  p50 {row['p50']:.1f} ms  p99 {row['p99']:.1f} ms")
@@ -0,0 +1,73 @@
+import hashlib
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.finders import get_finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+HASH_FILE = '.collectstatic-hash'
+
+
+def pending_migrations(database=DEFAULT_DB_ALIAS):
+    """Migrations not yet applied to ``database`` (reads django_migrations only)."""
+    executor = MigrationExecutor(connections[database])
+    return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+
+def static_sources_hash():
+    """Hash of every file collectstatic would copy, plus the storage backend in use."""
+    digest = hashlib.sha1(getattr(settings, 'STATICFILES_STORAGE', '').encode())
+    files = {}
+    for finder in get_finders():
+        for path, storage in finder.list(['CVS', '.*', '*~']):
+            # First finder wins, as in collectstatic.
+            files.setdefault(path, storage)
+    for path in sorted(files):
+        digest.update(path.encode())
+        with files[path].open(path) as handle:
+            for chunk in iter(lambda: handle.read(64 * 1024), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stored_hash(static_root):
+    try:
+        return (static_root / HASH_FILE).read_text().strip()
+    except OSError:
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Container start-up in one process: migrate only when migrations are pending and "
+        "collectstatic only when the static sources changed since the last collection."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias (default: default).')
+        parser.add_argument('--force', action='store_true', help='Run migrate and collectstatic unconditionally.')
+        parser.add_argument('--skip-static', action='store_true', help='Only check migrations.')
+
+    def handle(self, *args, **options):
+        database = options['database']
+        plan = pending_migrations(database)
+        if plan or options['force']:
+            self.stdout.write(f'{len(plan)} migration(s) pending; migrating...')
+            call_command('migrate', database=database, interactive=False, verbosity=options['verbosity'])
+        else:
+            self.stdout.write('No pending migrations.')
+
+        if options['skip_static']:
+            return
+
+        static_root = Path(settings.STATIC_ROOT)
+        current = static_sources_hash()
+        if not options['force'] and current == _stored_hash(static_root):
+            self.stdout.write('Static files unchanged; skipping collectstatic.')
+            return
+        self.stdout.write('Static files changed; collecting...')
+        call_command('collectstatic', interactive=False, verbosity=options['verbosity'])
+        (static_root / HASH_FILE).write_text(current + '\n')
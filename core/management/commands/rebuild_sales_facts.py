@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import sales_facts
+from core.models import DailySalesFact, Sale, SaleItem, SalePayment
+
+
+def _date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'Invalid date {value!r}; use YYYY-MM-DD.')
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the daily sales facts (DailySalesFact) from finalized sales, their items and payments. "
+        "Needed after writes that skip signals, such as queryset update() or raw SQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', help='First finalized date to rebuild (YYYY-MM-DD; default: all).')
+        parser.add_argument('--to', dest='end', help='Last finalized date to rebuild (YYYY-MM-DD; default: all).')
+
+    def handle(self, *args, **options):
+        start = _date(options['start']) if options['start'] else None
+        end = _date(options['end']) if options['end'] else None
+        written = sales_facts.rebuild(Sale, SaleItem, SalePayment, DailySalesFact, start=start, end=end)
+        self.stdout.write(self.style.SUCCESS(f'Daily sales facts written: {written}'))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Periodic SQLite maintenance: checkpoint the WAL back into the database file and "
+        "refresh query-planner statistics (PRAGMA optimize). Run it from cron, e.g. hourly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias (default: default).')
+        parser.add_argument('--mode', choices=['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'], default='TRUNCATE',
+                            help='wal_checkpoint mode (default: TRUNCATE, which also shrinks the -wal file).')
+        parser.add_argument('--vacuum', action='store_true', help='Also VACUUM the database (takes an exclusive lock).')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            self.stdout.write(f"Database '{options['database']}' is {connection.vendor}; nothing to do.")
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+            if journal_mode.lower() == 'wal':
+                cursor.execute(f"PRAGMA wal_checkpoint({options['mode']})")
+                busy, log_frames, checkpointed = cursor.fetchone()
+                if busy:
+                    raise CommandError(
+                        f'Checkpoint could not complete: database busy ({checkpointed}/{log_frames} frames copied). Try again later.'
+                    )
+                self.stdout.write(f'WAL checkpoint ({options["mode"]}): {checkpointed}/{log_frames} frames copied.')
+            else:
+                self.stdout.write(f'Journal mode is {journal_mode}; skipping WAL checkpoint.')
+
+            cursor.execute('PRAGMA optimize')
+            self.stdout.write('PRAGMA optimize done.')
+
+            if options['vacuum']:
+                cursor.execute('VACUUM')
+                self.stdout.write('VACUUM done.')
+
+        self.stdout.write(self.style.SUCCESS('SQLite maintenance complete.'))
@@ -0,0 +1,99 @@
+import logging
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from core import stress
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent sale creation, finalization and payment workloads at a throwaway "
+        "database and report throughput, p50/p99 latency, lock errors and invariant violations."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['thread', 'process'], default='thread',
+                            help='Worker pool type (default: thread).')
+        parser.add_argument('--concurrency', type=int, default=8, help='Number of workers (default: 8).')
+        parser.add_argument('--ops', type=int, default=400, help='Total operations across all workers (default: 400).')
+        parser.add_argument('--workload', action='append', choices=stress.WORKLOADS,
+                            help='Workload to include; repeat for several (default: all).')
+        parser.add_argument('--hot-customers', type=int, default=3, help='Customers contended by payments (default: 3).')
+        parser.add_argument('--hot-items', type=int, default=3, help='Inventory rows contended by finalize (default: 3).')
+        parser.add_argument('--verbose-errors', action='store_true', help='Print tracebacks for unexpected errors.')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['ops'] < 1:
+            raise CommandError('--concurrency and --ops must be positive.')
+
+        # In-memory SQLite cannot be shared across processes or opened by
+        # several writers, so point the throwaway database at a temp file.
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        temp_path = None
+        if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+            fd, temp_path = tempfile.mkstemp(prefix='stress_pos_', suffix='.sqlite3')
+            os.close(fd)
+            test_settings['NAME'] = temp_path
+
+        # Failed requests are counted below; don't dump every lock error's traceback.
+        request_logger = logging.getLogger('django.request')
+        request_logger_disabled = request_logger.disabled
+        request_logger.disabled = not options['verbose_errors']
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(
+                SECURE_SSL_REDIRECT=False,
+                STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+            ):
+                seed = stress.seed_stress_data(
+                    hot_customers=options['hot_customers'],
+                    hot_items=options['hot_items'],
+                    drafts=options['ops'],
+                    finalized=max(10, options['ops'] // 4),
+                )
+                samples, elapsed = stress.run_stress(
+                    seed,
+                    workloads=options['workload'] or stress.WORKLOADS,
+                    ops=options['ops'],
+                    concurrency=options['concurrency'],
+                    mode=options['mode'],
+                    verbose=options['verbose_errors'],
+                )
+                summary = stress.summarize(samples, elapsed)
+                violations = stress.check_invariants(seed)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            request_logger.disabled = request_logger_disabled
+            if temp_path:
+                test_settings.pop('NAME', None)
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+        self.stdout.write(
+            f"{connection.vendor} / {options['mode']} x{options['concurrency']}: "
+            f"{summary['operations']} ops in {summary['elapsed_s']:.2f}s "
+            f"({summary['throughput_ops_s']:.1f} ok ops/s)"
+        )
+        self.stdout.write(f"{'workload'.ljust(18)}  {'ok':>5}  {'p50 ms':>8}  {'p99 ms':>8}")
+        for workload, row in summary['latency_ms'].items():
+            self.stdout.write(f"{workload.ljust(18)}  {row['count']:>5}  {row['p50']:>8.1f}  {row['p99']:>8.1f}")
+
+        self.stdout.write('Outcomes: ' + ', '.join(f'{k}={v}' for k, v in sorted(summary['outcomes'].items())))
+        lock_errors = sum(summary['outcomes'].get(k, 0) for k in ('deadlock', 'lock_timeout', 'serialization_failure'))
+        if lock_errors:
+            self.stdout.write(self.style.WARNING(f'{lock_errors} operation(s) failed on lock contention.'))
+
+        if violations:
+            for check, rows in violations.items():
+                self.stderr.write(f'{check}: {len(rows)} violation(s)')
+                for row in rows[:10]:
+                    self.stderr.write(f'  {row}')
+            raise CommandError(f'{sum(len(r) for r in violations.values())} invariant violation(s) detected.')
+        self.stdout.write(self.style.SUCCESS('All invariants hold.'))
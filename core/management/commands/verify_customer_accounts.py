@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import customer_accounts
+from core.models import Customer, CustomerAccount, Sale, SalePayment
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the stored per-customer account totals (CustomerAccount) with the customer's "
+        "finalized sales and payments, and with --repair rewrite the rows that differ."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help='Rewrite differing rows and create missing ones.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per bulk write (default: 500).')
+
+    def handle(self, *args, **options):
+        mismatches = customer_accounts.verify(
+            Customer, CustomerAccount, Sale, SalePayment,
+            repair=options['repair'], batch_size=options['batch_size'],
+        )
+        for customer_id, diff in mismatches.items():
+            details = ', '.join(f'{field}: {stored} -> {expected}' for field, (stored, expected) in diff.items())
+            self.stdout.write(f'Customer {customer_id}: {details}')
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('All customer accounts match.'))
+        elif options['repair']:
+            self.stdout.write(self.style.SUCCESS(f'Customer accounts repaired: {len(mismatches)}'))
+        else:
+            raise CommandError(f'{len(mismatches)} customer account(s) differ; run with --repair to fix them.')
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import supplier_accounts
+from core.models import Supplier, SupplierAccount, SupplierPurchase
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the stored per-supplier purchase totals (SupplierAccount) with the supplier's "
+        "purchases, and with --repair rewrite the rows that differ."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help='Rewrite differing rows and create missing ones.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per bulk write (default: 500).')
+
+    def handle(self, *args, **options):
+        mismatches = supplier_accounts.verify(
+            Supplier, SupplierAccount, SupplierPurchase,
+            repair=options['repair'], batch_size=options['batch_size'],
+        )
+        for supplier_id, diff in mismatches.items():
+            details = ', '.join(f'{field}: {stored} -> {expected}' for field, (stored, expected) in diff.items())
+            self.stdout.write(f'Supplier {supplier_id}: {details}')
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('All supplier accounts match.'))
+        elif options['repair']:
+            self.stdout.write(self.style.SUCCESS(f'Supplier accounts repaired: {len(mismatches)}'))
+        else:
+            raise CommandError(f'{len(mismatches)} supplier account(s) differ; run with --repair to fix them.')
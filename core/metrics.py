@@ -0,0 +1,151 @@
+"""
+Prometheus metrics.
+
+``prometheus_client`` is optional: without it every helper below is a no-op
+and ``/metrics`` answers 404. When ``PROMETHEUS_MULTIPROC_DIR`` is set (as in
+the Docker/gunicorn setup) each worker writes its samples to mmap files in
+that directory and ``/metrics`` aggregates them, so counters cover all
+workers rather than whichever one served the scrape.
+"""
+
+import importlib.util
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+_HAS_PROMETHEUS = importlib.util.find_spec('prometheus_client') is not None
+
+if _HAS_PROMETHEUS:
+    from prometheus_client import Counter, Histogram
+
+    REQUEST_LATENCY = Histogram(
+        'orgms_request_duration_seconds',
+        'Request latency by URL name.',
+        ['view', 'method', 'status'],
+        buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    )
+    REQUEST_QUERIES = Histogram(
+        'orgms_request_db_queries',
+        'Database queries per request by URL name.',
+        ['view'],
+        buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+    )
+    CACHE_REQUESTS = Counter(
+        'orgms_cache_requests_total',
+        'Application cache lookups by cache name and result (hit/miss).',
+        ['cache', 'result'],
+    )
+    EXPORT_DURATION = Histogram(
+        'orgms_export_duration_seconds',
+        'Time spent building an export response.',
+        ['export'],
+        buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+    )
+    LEDGER_WRITE_FAILURES = Counter(
+        'orgms_ledger_write_failures_total',
+        'Ledger writes that failed and were only logged.',
+        ['source'],
+    )
+    LOCK_WAIT = Histogram(
+        'orgms_lock_wait_seconds',
+        'Time spent acquiring row locks (select_for_update).',
+        ['lock'],
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    )
+    DB_CONNECTIONS = Counter(
+        'orgms_db_connections_total',
+        'Database connections used by requests: opened for the request (new) or kept from an earlier one (reused).',
+        ['alias', 'result'],
+    )
+
+
+def enabled():
+    return _HAS_PROMETHEUS
+
+
+def observe_request(view, method, status, seconds, queries):
+    if not _HAS_PROMETHEUS:
+        return
+    REQUEST_LATENCY.labels(view, method, str(status)).observe(seconds)
+    REQUEST_QUERIES.labels(view).observe(queries)
+
+
+def record_connections(open_before, open_after):
+    """Count each connection a request used as ``new`` or ``reused`` (CONN_MAX_AGE)."""
+    if not _HAS_PROMETHEUS:
+        return
+    for alias in open_after:
+        DB_CONNECTIONS.labels(alias, 'reused' if alias in open_before else 'new').inc()
+
+
+def record_cache(cache, hit):
+    if _HAS_PROMETHEUS:
+        CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def ledger_write_failed(source):
+    if _HAS_PROMETHEUS:
+        LEDGER_WRITE_FAILURES.labels(source).inc()
+
+
+@contextmanager
+def lock_wait(lock):
+    """Time the statement that acquires ``lock`` (wrap only the locking query)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if _HAS_PROMETHEUS:
+            LOCK_WAIT.labels(lock).observe(time.perf_counter() - started)
+
+
+def timed_export(name):
+    """View decorator recording how long an export takes to build.
+
+    Streaming responses are timed until the body has been sent.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            started = time.perf_counter()
+            response = view_func(request, *args, **kwargs)
+            if not _HAS_PROMETHEUS:
+                return response
+            if getattr(response, 'streaming', False):
+                content = response.streaming_content
+
+                def _timed_content():
+                    try:
+                        yield from content
+                    finally:
+                        EXPORT_DURATION.labels(name).observe(time.perf_counter() - started)
+
+                response.streaming_content = _timed_content()
+            else:
+                EXPORT_DURATION.labels(name).observe(time.perf_counter() - started)
+            return response
+        return _wrapped
+    return decorator
+
+
+def render_latest():
+    """Return ``(body, content_type)`` for the current metrics, aggregating workers if configured."""
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead(pid):
+    """gunicorn ``child_exit`` hook: drop a dead worker's live gauges."""
+    if _HAS_PROMETHEUS and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:21
+
+from django.db import migrations, models
+import django.utils.timezone
+
+from core import local_dates
+
+
+def backfill_sale_dates(apps, schema_editor):
+    local_dates.backfill(apps.get_model('core', 'Sale'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0045_slowquery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='created_date',
+            field=models.DateField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='finalized_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='sale',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['status', 'finalized_date'], name='core_sale_status_fin_date'),
+        ),
+        migrations.RunPython(backfill_sale_dates, migrations.RunPython.noop),
+    ]
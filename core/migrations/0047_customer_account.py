@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from core import customer_accounts
+
+
+def build_customer_accounts(apps, schema_editor):
+    customer_accounts.verify(
+        apps.get_model('core', 'Customer'),
+        apps.get_model('core', 'CustomerAccount'),
+        apps.get_model('core', 'Sale'),
+        apps.get_model('core', 'SalePayment'),
+        repair=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0046_sale_local_dates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerAccount',
+            fields=[
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='account', serialize=False, to='core.customer')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_due', models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=14)),
+                ('last_sale_date', models.DateField(blank=True, null=True)),
+                ('last_payment_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Customer Account',
+                'verbose_name_plural': 'Customer Accounts',
+            },
+        ),
+        migrations.RunPython(build_customer_accounts, migrations.RunPython.noop),
+    ]
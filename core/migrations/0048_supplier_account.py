@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from core import supplier_accounts
+
+
+def build_supplier_accounts(apps, schema_editor):
+    supplier_accounts.verify(
+        apps.get_model('core', 'Supplier'),
+        apps.get_model('core', 'SupplierAccount'),
+        apps.get_model('core', 'SupplierPurchase'),
+        repair=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0047_customer_account'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplierAccount',
+            fields=[
+                ('supplier', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='account', serialize=False, to='core.supplier')),
+                ('purchase_count', models.PositiveIntegerField(default=0)),
+                ('total_purchased', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_due', models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=14)),
+                ('oldest_unpaid_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Supplier Account',
+                'verbose_name_plural': 'Supplier Accounts',
+            },
+        ),
+        migrations.RunPython(build_supplier_accounts, migrations.RunPython.noop),
+    ]
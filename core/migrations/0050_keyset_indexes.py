@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0049_sale_customer_fifo_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['timestamp', 'id'], name='core_ledger_ts_id'),
+        ),
+        migrations.AddIndex(
+            model_name='stockhistory',
+            index=models.Index(fields=['item', 'created_at', 'id'], name='core_stockhist_item_created'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from core import sales_facts
+
+
+def build_sales_facts(apps, schema_editor):
+    sales_facts.rebuild(
+        apps.get_model('core', 'Sale'),
+        apps.get_model('core', 'SaleItem'),
+        apps.get_model('core', 'SalePayment'),
+        apps.get_model('core', 'DailySalesFact'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0050_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('item_type', models.CharField(choices=[('inventory', 'Inventory'), ('non_inventory', 'Machine')], max_length=20)),
+                ('sale_count', models.PositiveIntegerField(default=0)),
+                ('quantity', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.customer')),
+            ],
+            options={
+                'verbose_name': 'Daily Sales Fact',
+                'verbose_name_plural': 'Daily Sales Facts',
+                'indexes': [models.Index(fields=['date', 'item_type'], name='core_salesfact_date_type'), models.Index(fields=['created_by', 'date'], name='core_salesfact_user_date'), models.Index(fields=['customer', 'date'], name='core_salesfact_cust_date')],
+            },
+        ),
+        migrations.RunPython(build_sales_facts, migrations.RunPython.noop),
+    ]
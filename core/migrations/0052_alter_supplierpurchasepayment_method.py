@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0051_daily_sales_fact'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='supplierpurchasepayment',
+            name='method',
+            field=models.CharField(choices=[('lc', 'LC'), ('check', 'Cheque'), ('tt', 'TT'), ('cash', 'Cash'), ('bank', 'Bank')], default='cash', max_length=20),
+        ),
+    ]
@@ -7,6 +7,8 @@ from django.utils import timezone
 import uuid
 from django.conf import settings
 
+from . import local_dates, metrics, stock
+
 logger = logging.getLogger(__name__)
 
 # Allowed file extensions for bill claim attachments
@@ -232,10 +234,14 @@ class Sale(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     notes = models.TextField(blank=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='created_sales')
-    created_at = models.DateTimeField(auto_now_add=True)
+    # A default rather than auto_now_add, so save() can derive created_date from it.
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
     finalized_at = models.DateTimeField(null=True, blank=True)
     finalized_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='finalized_sales')
+    # Local (TIME_ZONE) dates of created_at/finalized_at, kept in sync by save(); see core.local_dates.
+    created_date = models.DateField(null=True, editable=False, db_index=True)
+    finalized_date = models.DateField(null=True, blank=True, editable=False)
 
     # Stored total for quick filtering; recomputed via recalc_total() when needed
     total_amount = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(0)], default=0)
@@ -244,10 +250,23 @@ class Sale(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Sale'
         verbose_name_plural = 'Sales'
+        indexes = [
+            models.Index(fields=['status', 'finalized_date'], name='core_sale_status_fin_date'),
+            # A customer's finalized sales oldest first: FIFO payment allocation.
+            models.Index(fields=['customer', 'status', 'finalized_at'], name='core_sale_cust_status_fin'),
+        ]
 
     def __str__(self):
         return f"{self.sale_number} - {self.customer.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        sale = super().from_db(db, field_names, values)
+        # The stored status, so the save signals can skip sales that never were finalized.
+        if 'status' in field_names:
+            sale._db_status = sale.status
+        return sale
+
     def save(self, *args, **kwargs):
         if not self.sale_number:
             today = timezone.now().date()
@@ -255,16 +274,22 @@ class Sale(models.Model):
 
             # Use a singleton sequence row for global (never-reset) serials.
             with transaction.atomic():
-                seq, _created = SaleIdSequence.objects.select_for_update().get_or_create(
-                    pk=1,
-                    defaults={'date': today, 'sequence_num': 0}
-                )
+                with metrics.lock_wait('sale_sequence'):
+                    seq, _created = SaleIdSequence.objects.select_for_update().get_or_create(
+                        pk=1,
+                        defaults={'date': today, 'sequence_num': 0}
+                    )
                 seq.sequence_num += 1
                 serial = seq.sequence_num
                 seq.save(update_fields=['sequence_num'])
 
             self.sale_number = f"{formatted_date}-FE-{serial:04d}"  # zero-padded 4-digit serial
+        local_dates.apply(self)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = local_dates.with_date_fields(kwargs['update_fields'])
         super().save(*args, **kwargs)
+        if kwargs.get('update_fields') is None or 'status' in kwargs['update_fields']:
+            self._db_status = self.status
 
     def recalc_total(self, save=True):
         total = sum((item.line_total for item in self.items.all()), start=0)
@@ -290,58 +315,24 @@ class Sale(models.Model):
         """
         if self.status == 'finalized':
             raise ValueError("Sale already finalized")
+        # Serialize concurrent finalize attempts on the same sale; the loser sees
+        # the committed status instead of decrementing stock a second time.
+        with metrics.lock_wait('finalize'):
+            current_status = Sale.objects.select_for_update().values_list('status', flat=True).get(pk=self.pk)
+        if current_status == 'finalized':
+            raise ValueError("Sale already finalized")
 
-        low_stock_items = []
-        for item in self.items.select_related('inventory_item'):
-            if item.item_type == 'inventory' and item.inventory_item:
-                inv = item.inventory_item
-                # Validate boxes if provided
-                if (item.boxes or 0) > 0:
-                    if inv.box_count < item.boxes:
-                        raise ValueError(f"Insufficient box stock for {inv.part_name} ({inv.part_code}). Available boxes: {inv.box_count}, required: {item.boxes}")
-                # Validate unit quantity
-                if inv.quantity < item.quantity:
-                    raise ValueError(f"Insufficient unit stock for {inv.part_name} ({inv.part_code}). Available: {inv.quantity}, required: {item.quantity}")
-
-                # Reduce box count separately
-                if (item.boxes or 0) > 0:
-                    prev_boxes = inv.box_count
-                    inv.box_count = prev_boxes - item.boxes
-                    inv.save(update_fields=['box_count', 'updated_at'])
-
-                    StockHistory.objects.create(
-                        item=inv,
-                        transaction_type='out',
-                        quantity=0,
-                        previous_quantity=0,
-                        new_quantity=0,
-                        box_quantity=item.boxes,
-                        previous_box_quantity=prev_boxes,
-                        new_box_quantity=inv.box_count,
-                        reason=f"Sale {self.sale_number} (boxes)",
-                        created_by=(getattr(user, 'username', '') or '')
-                    )
-
-                # Reduce loose-unit quantity
-                previous = inv.quantity
-                inv.quantity = previous - item.quantity
-                inv.save(update_fields=['quantity', 'updated_at'])
-
-                StockHistory.objects.create(
-                    item=inv,
-                    transaction_type='out',
-                    quantity=item.quantity,
-                    previous_quantity=previous,
-                    new_quantity=inv.quantity,
-                    box_quantity=0,
-                    previous_box_quantity=0,
-                    new_box_quantity=0,
-                    reason=f"Sale {self.sale_number}",
-                    created_by=(getattr(user, 'username', '') or '')
-                )
-
-                if inv.is_low_stock:
-                    low_stock_items.append(inv)
+        movements = [
+            stock.Movement(
+                item.inventory_item, -item.quantity, -(item.boxes or 0), 'out', f"Sale {self.sale_number}",
+            )
+            for item in self.items.select_related('inventory_item')
+            if item.item_type == 'inventory' and item.inventory_item
+        ]
+        stock.apply(movements, user=user)
+        # The last instance of each item carries its final quantity.
+        items = {movement.item.pk: movement.item for movement in movements}
+        low_stock_items = [inv for inv in items.values() if inv.is_low_stock]
 
         self.status = 'finalized'
         self.finalized_at = timezone.now()
@@ -416,10 +407,13 @@ class SalePayment(models.Model):
     def __str__(self):
         return f"{self.receipt_number} - {self.sale.sale_number}"
 
+    @staticmethod
+    def new_receipt_number():
+        return f"RCPT-{timezone.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:6].upper()}"
+
     def save(self, *args, **kwargs):
         if not self.receipt_number:
-            today = timezone.now()
-            self.receipt_number = f"RCPT-{today.strftime('%Y%m%d')}-{uuid.uuid4().hex[:6].upper()}"
+            self.receipt_number = self.new_receipt_number()
         super().save(*args, **kwargs)
 
 
@@ -468,6 +462,59 @@ class CustomerPaymentAllocation(models.Model):
         return f"{self.batch.batch_ref} -> {self.sale.sale_number}: {self.amount}"
 
 
+class CustomerAccount(models.Model):
+    """Running totals of a customer's finalized sales and their payments.
+
+    Kept in step with sales and sale payments by core.customer_accounts.
+    """
+
+    customer = models.OneToOneField('Customer', on_delete=models.CASCADE, primary_key=True, related_name='account')
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_due = models.DecimalField(max_digits=14, decimal_places=2, default=0, db_index=True)
+    last_sale_date = models.DateField(null=True, blank=True)
+    last_payment_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Customer Account'
+        verbose_name_plural = 'Customer Accounts'
+
+    def __str__(self):
+        return f"{self.customer_id}: due {self.total_due}"
+
+
+class DailySalesFact(models.Model):
+    """Finalized sales per local day, salesperson, customer and item type.
+
+    Rebuilt slice by slice from the sales by core.sales_facts; reporting reads
+    these rows instead of scanning sales, items and payments.
+    """
+
+    date = models.DateField()
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    customer = models.ForeignKey('Customer', on_delete=models.CASCADE, related_name='+')
+    item_type = models.CharField(max_length=20, choices=SaleItem.ITEM_TYPE_CHOICES)
+    sale_count = models.PositiveIntegerField(default=0)
+    quantity = models.DecimalField(max_digits=14, decimal_places=3, default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # The sales' payments, prorated by this item type's share of each sale.
+    paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Daily Sales Fact'
+        verbose_name_plural = 'Daily Sales Facts'
+        indexes = [
+            models.Index(fields=['date', 'item_type'], name='core_salesfact_date_type'),
+            models.Index(fields=['created_by', 'date'], name='core_salesfact_user_date'),
+            models.Index(fields=['customer', 'date'], name='core_salesfact_cust_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.item_type}: {self.amount}"
+
+
 class BillClaim(models.Model):
     """Model for Employee Bill Claims"""
     STATUS_CHOICES = [
@@ -527,6 +574,10 @@ class StockHistory(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Stock History'
         verbose_name_plural = 'Stock History'
+        indexes = [
+            # Keyset pagination of an item's history (core.keyset).
+            models.Index(fields=['item', 'created_at', 'id'], name='core_stockhist_item_created'),
+        ]
     
     def __str__(self):
         return f"{self.item.part_name} - {self.transaction_type} ({self.quantity})"
@@ -560,6 +611,10 @@ class LedgerEntry(models.Model):
         ordering = ["-timestamp"]
         verbose_name = "Ledger Entry"
         verbose_name_plural = "Ledger Entries"
+        indexes = [
+            # Keyset pagination of the ledger page (core.keyset).
+            models.Index(fields=['timestamp', 'id'], name='core_ledger_ts_id'),
+        ]
 
     def __str__(self):
         return f"{self.timestamp:%Y-%m-%d %H:%M} {self.entry_type} {self.amount} ({self.source})"
@@ -605,6 +660,25 @@ class SupplierPurchase(models.Model):
         return (self.price or 0) - (self.paid_amount or 0)
 
 
+class SupplierAccount(models.Model):
+    """Running totals of a supplier's purchases, kept in step by core.supplier_accounts."""
+
+    supplier = models.OneToOneField(Supplier, on_delete=models.CASCADE, primary_key=True, related_name='account')
+    purchase_count = models.PositiveIntegerField(default=0)
+    total_purchased = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_due = models.DecimalField(max_digits=14, decimal_places=2, default=0, db_index=True)
+    oldest_unpaid_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Supplier Account'
+        verbose_name_plural = 'Supplier Accounts'
+
+    def __str__(self):
+        return f"{self.supplier_id}: due {self.total_due}"
+
+
 class SupplierPurchasePayment(models.Model):
     METHOD_CHOICES = [
         ('lc', 'LC'),
@@ -637,8 +711,33 @@ class SupplierPurchasePayment(models.Model):
         if self.method in {'lc', 'check', 'tt', 'bank'} and not (self.reference_number or '').strip():
             raise ValidationError({'reference_number': 'Reference number is required for this payment method.'})
 
+    @staticmethod
+    def new_receipt_number():
+        return f"SPAY-{timezone.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:6].upper()}"
+
     def save(self, *args, **kwargs):
         if not self.receipt_number:
-            now = timezone.now()
-            self.receipt_number = f"SPAY-{now.strftime('%Y%m%d')}-{uuid.uuid4().hex[:6].upper()}"
+            self.receipt_number = self.new_receipt_number()
         super().save(*args, **kwargs)
+
+
+class SlowQuery(models.Model):
+    """SQL statement that exceeded SLOW_QUERY_THRESHOLD_MS during a request.
+    Written off the request path by core.slow_queries; capped at
+    SLOW_QUERY_LOG_MAX_ROWS rows (oldest rows are trimmed).
+    """
+    fingerprint = models.CharField(max_length=16, db_index=True)
+    normalized_sql = models.TextField()
+    sql = models.TextField(blank=True)
+    view_name = models.CharField(max_length=200, blank=True, db_index=True)
+    duration_ms = models.FloatField()
+    stack = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Slow Query'
+        verbose_name_plural = 'Slow Queries'
+
+    def __str__(self):
+        return f"{self.view_name or '-'} {self.duration_ms:.1f}ms {self.fingerprint}"
@@ -0,0 +1,94 @@
+"""
+Paginator for list pages that avoids a ``COUNT(*)`` on every request.
+
+``CountedPaginator`` gets its total in the cheapest way that is still good
+enough for "page 3 of 40":
+
+1. a count the view already computed (``count=``), e.g. from an aggregate it
+   runs anyway;
+2. on PostgreSQL, the planner's row estimate once it is at least
+   ``PAGINATION_ESTIMATE_THRESHOLD`` rows: ``pg_class.reltuples`` for an
+   unfiltered table, the top plan node's ``Plan Rows`` from ``EXPLAIN`` for a
+   filtered one. Such a count is marked ``estimated`` and the page shows it as
+   approximate. Smaller results are counted exactly, which is cheap for them;
+3. otherwise the exact count, cached under the versions of every model the
+   query reads (``core.cache``), so it is recomputed only after one of them
+   is written. Queries that join a model without a version counter are
+   counted on every request, as before.
+"""
+
+import hashlib
+import json
+
+from django.apps import apps
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+from . import cache as model_cache
+
+
+def _labels(queryset):
+    """Names of the models ``queryset`` reads, or None if one of them has no version counter."""
+    tables = {model._meta.db_table: model.__name__ for model in apps.get_app_config('core').get_models()}
+    labels = {queryset.model.__name__}
+    for join in queryset.query.alias_map.values():
+        label = tables.get(join.table_name)
+        if label is None:
+            return None
+        labels.add(label)
+    if not labels.issubset(model_cache.TRACKED_MODELS):
+        return None
+    return tuple(sorted(labels))
+
+
+def _query_key(queryset):
+    sql, params = queryset.query.clone().sql_with_params()
+    return hashlib.sha1(f'{queryset.db}:{sql}:{params!r}'.encode()).hexdigest()
+
+
+def planner_estimate(queryset):
+    """PostgreSQL's estimate of the rows ``queryset`` returns, or None on other backends."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    query = queryset.query
+    if not query.where and len(query.alias_map) <= 1 and not query.distinct and not query.low_mark and query.high_mark is None:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        # -1 until the table is first analyzed.
+        return row[0] if row and row[0] >= 0 else None
+    plan = json.loads(queryset.explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class CountedPaginator(Paginator):
+    """``Paginator`` whose count comes from the view, the planner or the model-version cache (see module doc)."""
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._known_count = count
+        self.estimated = False
+
+    @cached_property
+    def count(self):
+        if self._known_count is not None:
+            return self._known_count
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return Paginator.count.func(self)
+
+        threshold = getattr(settings, 'PAGINATION_ESTIMATE_THRESHOLD', 0)
+        if threshold:
+            estimate = planner_estimate(queryset)
+            if estimate is not None and estimate >= threshold:
+                self.estimated = True
+                return estimate
+
+        labels = _labels(queryset)
+        if labels is None:
+            return queryset.count()
+        return model_cache.get_or_compute('list_count', labels, queryset.count, _query_key(queryset))
@@ -0,0 +1,206 @@
+"""
+FIFO allocation of one payment across several open documents.
+
+A customer-level payment is split over the customer's finalized sales that
+still have something due, oldest first (by ``finalized_at``). Only those
+sales are loaded: one query, through the (customer, status, finalized_at)
+index, with each sale's paid total computed by a subquery rather than by
+prefetching its payments. The split is computed in memory and the
+``SalePayment``, ``CustomerPaymentAllocation`` and ``LedgerEntry`` rows are
+written with one ``bulk_create`` each.
+
+``bulk_create`` sends no ``post_save``. That skips the ledger signal, which
+would only repeat the ledger rows written here, but also skips the customer
+account and daily sales fact refreshes and cache invalidation the signals
+normally do, so ``allocate_customer_payment`` does them itself once per
+payment rather than once per row.
+
+Callers hold the customer row lock (``select_for_update``) for the whole
+read-split-write, as every sale payment view does, so no other payment for
+the customer can change the dues in between.
+
+A supplier-level payment is split the same way over the supplier's purchases
+with ``price > paid_amount``, oldest ``purchase_date`` first, read and locked
+in one query. The ``SupplierPurchasePayment`` and ``LedgerEntry`` rows are
+bulk-inserted, and every purchase's ``paid_amount`` is raised by its share in
+one ``UPDATE ... SET paid_amount = paid_amount + CASE id WHEN ...``, instead
+of re-aggregating and saving each purchase. The supplier account refresh and
+cache invalidation that signals would do are again done once at the end.
+"""
+
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import cache as model_cache
+from . import customer_accounts, metrics, sales_facts, supplier_accounts
+
+logger = logging.getLogger(__name__)
+
+_MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def fifo_split(amount, dues):
+    """``[(item, allocated)]`` taking ``amount`` from ``[(item, due)]`` in order until it runs out."""
+    allocations = []
+    remaining = amount
+    for item, due in dues:
+        if remaining <= 0:
+            break
+        allocated = min(remaining, due)
+        if allocated > 0:
+            allocations.append((item, allocated))
+            remaining -= allocated
+    return allocations
+
+
+def due_sales(customer):
+    """The customer's finalized sales with a positive due, oldest first, each with ``due_amount`` set."""
+    from .models import Sale, SalePayment
+
+    paid = (
+        SalePayment.objects.filter(sale=OuterRef('pk'))
+        .order_by().values('sale').annotate(total=Sum('amount')).values('total')
+    )
+    sales = (
+        Sale.objects.filter(customer=customer, status='finalized')
+        .annotate(paid_amount=Coalesce(Subquery(paid, output_field=_MONEY), Value(Decimal('0')), output_field=_MONEY))
+        .filter(total_amount__gt=F('paid_amount'))
+        .only('id', 'sale_number', 'status', 'customer', 'created_by', 'total_amount', 'finalized_at', 'finalized_date')
+        .order_by('finalized_at', 'id')
+    )
+    result = []
+    for sale in sales:
+        # Re-check in Decimal: SQLite compares the sums as floats.
+        sale.due_amount = (sale.total_amount or Decimal('0')) - (sale.paid_amount or Decimal('0'))
+        if sale.due_amount > 0:
+            result.append(sale)
+    return result
+
+
+def _bulk_ledger(entries, source, reference):
+    """Insert ledger rows without letting a failure undo the payments they mirror."""
+    from .models import LedgerEntry
+
+    try:
+        with transaction.atomic():
+            LedgerEntry.objects.bulk_create(entries)
+    except Exception:
+        logger.exception('Non-blocking ledger write failure for %s %s', source, reference)
+        metrics.ledger_write_failed(source)
+
+
+def allocate_customer_payment(batch, sales, notes):
+    """Split ``batch.total_amount`` over ``sales`` (from ``due_sales``) and write every row in bulk.
+
+    Returns the created ``SalePayment`` rows. The caller checks that the
+    amount does not exceed the sales' total due.
+    """
+    from .models import CustomerPaymentAllocation, LedgerEntry, SalePayment
+
+    split = fifo_split(batch.total_amount, [(sale, sale.due_amount) for sale in sales])
+    payments = [
+        SalePayment(
+            sale=sale,
+            receipt_number=SalePayment.new_receipt_number(),
+            amount=allocated,
+            payment_date=batch.payment_date,
+            method=batch.method,
+            notes=f"{notes} [Batch:{batch.batch_ref}]",
+        )
+        for sale, allocated in split
+    ]
+    SalePayment.objects.bulk_create(payments)
+    if any(payment.pk is None for payment in payments):
+        # Backends that cannot return ids from a bulk insert.
+        ids = dict(
+            SalePayment.objects.filter(receipt_number__in=[p.receipt_number for p in payments])
+            .values_list('receipt_number', 'id')
+        )
+        for payment in payments:
+            payment.pk = ids[payment.receipt_number]
+
+    CustomerPaymentAllocation.objects.bulk_create([
+        CustomerPaymentAllocation(batch=batch, sale=payment.sale, sale_payment=payment, amount=payment.amount)
+        for payment in payments
+    ])
+    _bulk_ledger([
+        LedgerEntry(
+            entry_type='credit',
+            source='sale_payment',
+            reference=payment.receipt_number,
+            description=f"Payment for {payment.sale.sale_number}",
+            amount=payment.amount,
+        )
+        for payment in payments
+    ], 'sale_payment', batch.batch_ref)
+
+    customer_accounts.refresh(batch.customer_id)
+    sales_facts.refresh_slices(sales_facts.slice_of(payment.sale) for payment in payments)
+    model_cache.bump_versions('SalePayment', 'LedgerEntry')
+    return payments
+
+
+def due_purchases(supplier):
+    """The supplier's purchases with something still due, oldest first, locked for update."""
+    from .models import SupplierPurchase
+
+    return list(
+        SupplierPurchase.objects.select_for_update()
+        .filter(supplier=supplier, price__gt=F('paid_amount'))
+        .only('id', 'supplier_id', 'price', 'paid_amount', 'purchase_date')
+        .order_by('purchase_date', 'id')
+    )
+
+
+def allocate_supplier_payment(supplier, purchases, amount, payment_date, method, reference_number='', notes=''):
+    """Split ``amount`` over ``purchases`` (from ``due_purchases``) with bulk writes.
+
+    Returns the created ``SupplierPurchasePayment`` rows. The caller holds the
+    supplier row lock and checks that the amount does not exceed the total due.
+    """
+    from .models import LedgerEntry, SupplierPurchase, SupplierPurchasePayment
+
+    split = fifo_split(amount, [(purchase, purchase.due) for purchase in purchases])
+    if not split:
+        return []
+    payments = [
+        SupplierPurchasePayment(
+            purchase=purchase,
+            receipt_number=SupplierPurchasePayment.new_receipt_number(),
+            amount=allocated,
+            payment_date=payment_date,
+            method=method,
+            reference_number=reference_number,
+            notes=notes,
+        )
+        for purchase, allocated in split
+    ]
+    SupplierPurchasePayment.objects.bulk_create(payments)
+
+    SupplierPurchase.objects.filter(pk__in=[purchase.pk for purchase, _allocated in split]).update(
+        paid_amount=F('paid_amount') + Case(
+            *(When(pk=purchase.pk, then=Value(allocated)) for purchase, allocated in split),
+            output_field=_MONEY,
+        ),
+        updated_at=timezone.now(),
+    )
+
+    _bulk_ledger([
+        LedgerEntry(
+            entry_type='debit',
+            source='supplier_payment',
+            reference=payment.receipt_number,
+            description=f"Payment to {supplier.name}",
+            amount=payment.amount,
+        )
+        for payment in payments
+    ], 'supplier_payment', supplier.pk)
+
+    supplier_accounts.refresh(supplier.pk)
+    model_cache.bump_versions('SupplierPurchase', 'LedgerEntry')
+    return payments
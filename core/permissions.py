@@ -1,17 +1,48 @@
+from collections import defaultdict
 from functools import wraps
+from django.contrib.auth import get_user_model
 from django.contrib.auth.views import redirect_to_login
 from django.core.exceptions import PermissionDenied
 
+from . import cache as model_cache
+
 ROLE_OWNER = 'Owner'
 ROLE_MANAGER = 'Manager'
 ROLE_FINANCE = 'Finance'
 ROLE_EMPLOYEE = 'Employee'
 
 
+def _compute_role_map():
+    members = defaultdict(set)
+    for group_name, user_id in get_user_model().objects.filter(groups__isnull=False).values_list('groups__name', 'pk'):
+        members[group_name].add(user_id)
+    return {group_name: frozenset(user_ids) for group_name, user_ids in members.items()}
+
+
+def role_map() -> dict:
+    """``{group name: frozenset of user ids}``, cached until a group or membership changes."""
+    return model_cache.get_or_compute('role_map', ('Group',), _compute_role_map)
+
+
+def _group_names(user):
+    # Memoized on the user object (request.user lives for one request), so one
+    # query per request; core.signals drops it when this object's groups change.
+    names = getattr(user, '_group_names', None)
+    if names is None:
+        names = user._group_names = frozenset(user.groups.values_list('name', flat=True))
+    return names
+
+
 def user_in_group(user, group_name: str) -> bool:
     if not user.is_authenticated:
         return False
-    return user.is_superuser if group_name == ROLE_OWNER else user.groups.filter(name=group_name).exists()
+    if group_name == ROLE_OWNER:
+        return user.is_superuser
+    # A revoked role must take effect in every process at once, which only a
+    # cache shared by all of them (and invalidated by the revoke) guarantees.
+    if model_cache.shared():
+        return user.pk in role_map().get(group_name, ())
+    return group_name in _group_names(user)
 
 
 def user_has_any_role(user, roles) -> bool:
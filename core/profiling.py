@@ -0,0 +1,177 @@
+"""
+On-demand request profiling.
+
+A superuser opts a single request in by sending a signed token (see
+``make_profile_token``) as the ``X-Profile-Token`` header or the ``_profile``
+query parameter. ``RequestProfilerMiddleware`` then runs the view under
+cProfile, records every SQL statement with its offset and duration and
+stores the capture in a bounded on-disk ring buffer under
+``REQUEST_PROFILER_DIR``. Captures are browsed from the admin.
+"""
+
+import io
+import json
+import os
+import pstats
+import re
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.utils import timezone
+
+TOKEN_SALT = 'core.profiling'
+TOKEN_MAX_AGE = 60 * 60
+HEADER_NAME = 'HTTP_X_PROFILE_TOKEN'
+QUERY_PARAM = '_profile'
+
+_CAPTURE_ID_RE = re.compile(r'^\d{8}-\d{12}-[0-9a-f]{6}$')
+
+
+def profiler_dir():
+    return Path(getattr(settings, 'REQUEST_PROFILER_DIR', Path(settings.BASE_DIR) / 'profiles'))
+
+
+def make_profile_token(user):
+    """Signed, time-limited token that lets ``user`` profile their own requests."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(str(user.pk))
+
+
+def wants_profile(request):
+    """True when an active superuser sent a valid, unexpired profile token."""
+    token = request.META.get(HEADER_NAME) or request.GET.get(QUERY_PARAM)
+    if not token:
+        return False
+    user = getattr(request, 'user', None)
+    if not (user and user.is_active and user.is_superuser):
+        return False
+    try:
+        return signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=TOKEN_MAX_AGE) == str(user.pk)
+    except signing.BadSignature:
+        return False
+
+
+class SQLTimeline:
+    """``execute_wrapper`` hook that records each statement relative to request start."""
+
+    def __init__(self, started):
+        self.started = started
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        began = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': context['connection'].alias,
+                'offset_ms': round((began - self.started) * 1000, 3),
+                'duration_ms': round((time.perf_counter() - began) * 1000, 3),
+                'sql': sql,
+                'many': many,
+            })
+
+
+def profile_request(request, get_response):
+    """Run ``get_response`` under cProfile and the SQL timeline; store the capture."""
+    import cProfile
+
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    timeline = SQLTimeline(started)
+    with ExitStack() as stack:
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(timeline))
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    duration_ms = (time.perf_counter() - started) * 1000
+
+    capture_id = save_capture(request, response, profiler, timeline.queries, duration_ms)
+    response['X-Profile-Id'] = capture_id
+    return response
+
+
+def save_capture(request, response, profiler, queries, duration_ms):
+    """Write the pstats dump and JSON metadata, then trim the ring buffer."""
+    directory = profiler_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    # Ids sort chronologically (microsecond resolution), which the pruning relies on.
+    capture_id = f"{timezone.now().strftime('%Y%m%d-%H%M%S%f')}-{uuid.uuid4().hex[:6]}"
+
+    profiler.dump_stats(str(directory / f'{capture_id}.prof'))
+    stats_text = io.StringIO()
+    pstats.Stats(profiler, stream=stats_text).sort_stats('cumulative').print_stats(40)
+
+    meta = {
+        'id': capture_id,
+        'created_at': timezone.now().isoformat(),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'user': request.user.get_username(),
+        'status': response.status_code,
+        'duration_ms': round(duration_ms, 3),
+        'query_count': len(queries),
+        'sql_ms': round(sum(q['duration_ms'] for q in queries), 3),
+        'queries': queries,
+        'stats': stats_text.getvalue(),
+    }
+    # Write then rename so readers never see a half-written capture.
+    tmp_path = directory / f'.{capture_id}.json.tmp'
+    with tmp_path.open('w') as fh:
+        json.dump(meta, fh)
+    os.replace(tmp_path, directory / f'{capture_id}.json')
+
+    prune_captures(getattr(settings, 'REQUEST_PROFILER_MAX_CAPTURES', 50))
+    return capture_id
+
+
+def prune_captures(keep):
+    """Delete the oldest captures so at most ``keep`` remain."""
+    ids = sorted(p.stem for p in profiler_dir().glob('*.json'))
+    for capture_id in ids[:max(0, len(ids) - keep)]:
+        for suffix in ('.json', '.prof'):
+            try:
+                (profiler_dir() / f'{capture_id}{suffix}').unlink()
+            except FileNotFoundError:
+                pass
+
+
+def list_captures():
+    """Capture summaries, newest first (without the SQL timeline and stats text)."""
+    rows = []
+    directory = profiler_dir()
+    if not directory.exists():
+        return rows
+    for path in sorted(directory.glob('*.json'), reverse=True):
+        try:
+            with path.open() as fh:
+                meta = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        meta.pop('queries', None)
+        meta.pop('stats', None)
+        rows.append(meta)
+    return rows
+
+
+def capture_path(capture_id, suffix):
+    """Path to a stored capture file; ``None`` for malformed ids or missing files."""
+    if not _CAPTURE_ID_RE.match(capture_id or ''):
+        return None
+    path = profiler_dir() / f'{capture_id}{suffix}'
+    return path if path.exists() else None
+
+
+def load_capture(capture_id):
+    path = capture_path(capture_id, '.json')
+    if path is None:
+        return None
+    with path.open() as fh:
+        return json.load(fh)
@@ -0,0 +1,39 @@
+"""
+Request-scoped database execute wrappers that also reach async views.
+
+``connection.execute_wrapper()`` only affects the connection object of the
+thread that installs it. Under ASGI the middleware runs on the event loop
+while the view's queries run in ``sync_to_async`` worker threads, each with
+its own connections, so per-connection wrappers would miss them. Instead
+every connection gets one permanent ``dispatch`` wrapper (installed from
+``connection_created``) that runs whatever hooks the current context holds;
+context variables follow a request into ``sync_to_async`` threads.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+_active_hooks = ContextVar('query_hooks', default=())
+
+
+def dispatch(execute, sql, params, many, context):
+    hooks = _active_hooks.get()
+    for hook in reversed(hooks):
+        execute = partial(hook, execute)
+    return execute(sql, params, many, context)
+
+
+def attach(connection):
+    if dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(dispatch)
+
+
+@contextmanager
+def installed(hook):
+    """Run ``hook`` (an execute-wrapper callable) around every query made in this context."""
+    token = _active_hooks.set(_active_hooks.get() + (hook,))
+    try:
+        yield hook
+    finally:
+        _active_hooks.reset(token)
@@ -0,0 +1,184 @@
+"""
+Daily sales facts.
+
+``DailySalesFact`` holds one row per (local finalized date, salesperson,
+customer, item type) with the number of sales that have lines of that type,
+their quantity and amount, and the sales' payments prorated by that type's
+share of each sale (as ``sale_list`` does for its item-type totals). The sales
+report reads these rows, so a date range, salesperson or customer drill-down
+sums a handful of indexed rows instead of scanning sales, items and payments.
+
+A (date, salesperson, customer) slice holds at most one row per item type and
+is cheap to rebuild, so it is recomputed rather than adjusted, in the writer's
+transaction. ``core.signals`` refreshes the slice of a sale when it is
+finalized, un-finalized, re-totalled or deleted (and the slice it moved out
+of), and when one of its payments is saved or deleted.
+``payment_allocation`` refreshes the slices of the sales it pays in bulk.
+``manage.py rebuild_sales_facts`` rebuilds a date range, or everything, from
+the sales after writes that skip signals.
+
+``sale_count`` counts a sale once per item type it has, so summed across item
+types it can exceed the number of distinct sales.
+"""
+
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Max, Min, Sum
+
+FIELDS = ('sale_count', 'quantity', 'amount', 'paid')
+# Sale columns a save must touch to change the facts.
+SALE_FIELDS = frozenset({'status', 'finalized_at', 'finalized_date', 'created_by', 'customer', 'total_amount'})
+
+_CENT = Decimal('0.01')
+
+Slice = namedtuple('Slice', 'date created_by_id customer_id')
+
+# ?by= of the sales report: grouping columns and their ordering.
+BREAKDOWNS = {
+    'day': (('date',), ('-date',)),
+    'salesperson': (('created_by', 'created_by__username', 'created_by__first_name', 'created_by__last_name'), ('-amount',)),
+    'customer': (('customer', 'customer__name', 'customer__customer_id'), ('-amount',)),
+    'item_type': (('item_type',), ('-amount',)),
+}
+
+
+def empty_totals():
+    return {'sale_count': 0, 'quantity': Decimal('0'), 'amount': Decimal('0'), 'paid': Decimal('0')}
+
+
+def slice_of(sale):
+    """The slice a sale counts in, or None while it is not finalized."""
+    if sale.status != 'finalized' or sale.finalized_date is None:
+        return None
+    return Slice(sale.finalized_date, sale.created_by_id, sale.customer_id)
+
+
+def stored_slice(sale, update_fields=None):
+    """The slice the sale's stored row counts in, read before a save that may move it elsewhere."""
+    from .models import Sale
+
+    if sale._state.adding or sale.pk is None:
+        return None
+    if update_fields is not None and not SALE_FIELDS.intersection(update_fields):
+        return None
+    row = (
+        Sale.objects.filter(pk=sale.pk, status='finalized')
+        .values_list('finalized_date', 'created_by_id', 'customer_id').first()
+    )
+    return Slice(*row) if row and row[0] is not None else None
+
+
+def compute(sale_model, item_model, payment_model, sales):
+    """Fact values keyed by ``(date, created_by_id, customer_id, item_type)`` for the finalized ``sales``.
+
+    Takes the model classes as arguments so data migrations can pass their historical models.
+    """
+    sales = sales.filter(status='finalized', finalized_date__isnull=False)
+    headers = {
+        row['pk']: row
+        for row in sales.values('pk', 'finalized_date', 'created_by_id', 'customer_id', 'total_amount')
+    }
+    if not headers:
+        return {}
+    paid = dict(
+        payment_model.objects.filter(sale__in=sales).order_by()
+        .values('sale_id').annotate(total=Sum('amount')).values_list('sale_id', 'total')
+    )
+    lines = (
+        item_model.objects.filter(sale__in=sales).order_by()
+        .values('sale_id', 'item_type').annotate(amount=Sum('line_total'), quantity=Sum('quantity'))
+    )
+
+    facts = {}
+    for line in lines:
+        sale = headers[line['sale_id']]
+        key = (sale['finalized_date'], sale['created_by_id'], sale['customer_id'], line['item_type'])
+        fact = facts.setdefault(key, empty_totals())
+        amount = line['amount'] or Decimal('0')
+        fact['sale_count'] += 1
+        fact['quantity'] += line['quantity'] or Decimal('0')
+        fact['amount'] += amount
+        total = sale['total_amount'] or Decimal('0')
+        if total > 0:
+            fact['paid'] += (paid.get(line['sale_id']) or Decimal('0')) * amount / total
+    for fact in facts.values():
+        fact['paid'] = fact['paid'].quantize(_CENT)
+    return facts
+
+
+def _rows(fact_model, facts):
+    return [
+        fact_model(date=day, created_by_id=user_id, customer_id=customer_id, item_type=item_type, **values)
+        for (day, user_id, customer_id, item_type), values in facts.items()
+    ]
+
+
+def refresh(slice_):
+    """Recompute one (date, salesperson, customer) slice from its sales."""
+    from .models import CustomerAccount, DailySalesFact, Sale, SaleItem, SalePayment
+
+    day, user_id, customer_id = slice_
+    with transaction.atomic():
+        # The customer's account row (which customer_accounts.refresh locks as
+        # well) serializes concurrent refreshes of the customer's slices.
+        list(CustomerAccount.objects.select_for_update().filter(customer_id=customer_id).values_list('pk', flat=True))
+        sales = Sale.objects.filter(finalized_date=day, created_by_id=user_id, customer_id=customer_id)
+        facts = compute(Sale, SaleItem, SalePayment, sales)
+        DailySalesFact.objects.filter(date=day, created_by_id=user_id, customer_id=customer_id).delete()
+        DailySalesFact.objects.bulk_create(_rows(DailySalesFact, facts))
+
+
+def refresh_slices(slices):
+    for slice_ in {s for s in slices if s is not None}:
+        refresh(slice_)
+
+
+def rebuild(sale_model, item_model, payment_model, fact_model, start=None, end=None, days_per_batch=31):
+    """Replace the facts of ``start``..``end`` (inclusive; all dates by default); returns the rows written."""
+    finalized = sale_model.objects.filter(status='finalized', finalized_date__isnull=False)
+    if start:
+        finalized = finalized.filter(finalized_date__gte=start)
+    if end:
+        finalized = finalized.filter(finalized_date__lte=end)
+    bounds = finalized.aggregate(first=Min('finalized_date'), last=Max('finalized_date'))
+
+    written = 0
+    with transaction.atomic():
+        stale = fact_model.objects.all()
+        if start:
+            stale = stale.filter(date__gte=start)
+        if end:
+            stale = stale.filter(date__lte=end)
+        stale.delete()
+        day = bounds['first']
+        while day is not None and day <= bounds['last']:
+            last = day + timedelta(days=days_per_batch - 1)
+            facts = compute(sale_model, item_model, payment_model, finalized.filter(finalized_date__range=(day, last)))
+            rows = fact_model.objects.bulk_create(_rows(fact_model, facts), batch_size=500)
+            written += len(rows)
+            day = last + timedelta(days=1)
+    return written
+
+
+def report(start, end, by='day', created_by=None, customer=None, item_type=None):
+    """Fact totals for ``start``..``end`` grouped by a ``BREAKDOWNS`` key, with the grand total."""
+    from .models import DailySalesFact
+
+    facts = DailySalesFact.objects.filter(date__range=(start, end))
+    if created_by:
+        facts = facts.filter(created_by_id=created_by)
+    if customer:
+        facts = facts.filter(customer_id=customer)
+    if item_type:
+        facts = facts.filter(item_type=item_type)
+    sums = {field: Sum(field) for field in FIELDS}
+    columns, ordering = BREAKDOWNS.get(by, BREAKDOWNS['day'])
+    rows = list(facts.values(*columns).annotate(**sums).order_by(*ordering))
+    totals = facts.aggregate(**sums)
+    totals = {field: totals[field] or empty_totals()[field] for field in FIELDS}
+    for row in [*rows, totals]:
+        row['due'] = (row['amount'] or Decimal('0')) - (row['paid'] or Decimal('0'))
+    return {'rows': rows, 'totals': totals}
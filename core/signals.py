@@ -1,9 +1,16 @@
 import logging
 
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from .models import Expense, SalePayment, LedgerEntry, Payment, SupplierPurchasePayment
+from . import cache as model_cache
+from . import customer_accounts, db_connections, metrics, query_hooks, sales_facts, supplier_accounts
+from .models import (
+    Customer, Expense, Sale, SalePayment, LedgerEntry, Payment, Supplier, SupplierPurchase, SupplierPurchasePayment,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +31,7 @@ def _safe_create_ledger(entry_type: str, source: str, reference: str, descriptio
             )
     except Exception:
         logger.exception('Failed to create ledger entry: source=%s ref=%s', source, reference)
+        metrics.ledger_write_failed(source)
 
 
 @receiver(post_save, sender=Expense)
@@ -46,6 +54,7 @@ def create_ledger_for_expense(sender, instance: Expense, created, **kwargs):
             )
     except Exception:
         logger.exception('Ledger entry failed for Expense id=%s', instance.pk)
+        metrics.ledger_write_failed('expense')
 
 
 @receiver(post_save, sender=SalePayment)
@@ -65,6 +74,7 @@ def create_ledger_for_sale_payment(sender, instance: SalePayment, created, **kwa
             )
     except Exception:
         logger.exception('Ledger entry failed for SalePayment id=%s', instance.pk)
+        metrics.ledger_write_failed('sale_payment')
 
 
 @receiver(post_save, sender=Payment)
@@ -89,6 +99,7 @@ def create_ledger_for_payment(sender, instance: Payment, created, **kwargs):
             )
     except Exception:
         logger.exception('Ledger entry failed for Payment id=%s', instance.pk)
+        metrics.ledger_write_failed('other')
 
 
 @receiver(post_save, sender=SupplierPurchasePayment)
@@ -107,3 +118,140 @@ def create_ledger_for_supplier_purchase_payment(sender, instance: SupplierPurcha
             )
     except Exception:
         logger.exception('Ledger entry failed for SupplierPurchasePayment id=%s', instance.pk)
+        metrics.ledger_write_failed('supplier_payment')
+
+
+def _deleted_along_with(origin, *models):
+    """Whether a delete cascaded from an instance or queryset of one of ``models``."""
+    model = getattr(origin, 'model', None) or type(origin)
+    return issubclass(model, models)
+
+
+@receiver(post_save, sender=Customer)
+def create_customer_account(sender, instance: Customer, created, **kwargs):
+    if created:
+        customer_accounts.refresh(instance.pk)
+
+
+def _counts_as_finalized(sale, created=False):
+    """Whether the sale is finalized, or its stored row was before this save or delete.
+
+    Runs before ``Sale.save`` records the new status; a row never loaded counts as finalized.
+    """
+    stored_status = None if created else getattr(sale, '_db_status', 'finalized')
+    return 'finalized' in (sale.status, stored_status)
+
+
+@receiver(post_save, sender=Sale)
+@receiver(post_delete, sender=Sale)
+def refresh_customer_account_for_sale(sender, instance: Sale, update_fields=None, **kwargs):
+    """Keep the customer's account totals in step with its sales (see core.customer_accounts)."""
+    if _deleted_along_with(kwargs.get('origin'), Customer):
+        return  # The account goes with the customer.
+    if update_fields is not None and not customer_accounts.SALE_FIELDS.intersection(update_fields):
+        return
+    if not _counts_as_finalized(instance, kwargs.get('created', False)):
+        return  # Drafts and quotes are not in the account.
+    customer_accounts.refresh(instance.customer_id)
+
+
+@receiver(post_save, sender=SalePayment)
+@receiver(post_delete, sender=SalePayment)
+def refresh_customer_account_for_payment(sender, instance: SalePayment, **kwargs):
+    if _deleted_along_with(kwargs.get('origin'), Customer, Sale):
+        return  # Refreshed by the sale's own delete, or removed with the customer.
+    customer_id = Sale.objects.filter(pk=instance.sale_id).values_list('customer_id', flat=True).first()
+    if customer_id is not None:
+        customer_accounts.refresh(customer_id)
+
+
+@receiver(pre_save, sender=Sale)
+def remember_sales_fact_slice(sender, instance: Sale, update_fields=None, **kwargs):
+    # A save can move the sale out of its slice (un-finalize, new date or customer).
+    if getattr(instance, '_db_status', 'finalized') != 'finalized':
+        instance._stored_sales_fact_slice = None  # The stored row is a draft or quote: in no slice.
+    else:
+        instance._stored_sales_fact_slice = sales_facts.stored_slice(instance, update_fields)
+
+
+@receiver(post_save, sender=Sale)
+@receiver(post_delete, sender=Sale)
+def refresh_sales_facts_for_sale(sender, instance: Sale, update_fields=None, **kwargs):
+    """Keep the daily sales facts in step with finalized sales (see core.sales_facts)."""
+    if _deleted_along_with(kwargs.get('origin'), Customer):
+        return  # The facts go with the customer.
+    if update_fields is not None and not sales_facts.SALE_FIELDS.intersection(update_fields):
+        return
+    sales_facts.refresh_slices([getattr(instance, '_stored_sales_fact_slice', None), sales_facts.slice_of(instance)])
+
+
+@receiver(post_save, sender=SalePayment)
+@receiver(post_delete, sender=SalePayment)
+def refresh_sales_facts_for_payment(sender, instance: SalePayment, **kwargs):
+    if _deleted_along_with(kwargs.get('origin'), Customer, Sale):
+        return
+    row = (
+        Sale.objects.filter(pk=instance.sale_id, status='finalized')
+        .values_list('finalized_date', 'created_by_id', 'customer_id').first()
+    )
+    if row and row[0] is not None:
+        sales_facts.refresh(sales_facts.Slice(*row))
+
+
+@receiver(post_save, sender=Supplier)
+def create_supplier_account(sender, instance: Supplier, created, **kwargs):
+    if created:
+        supplier_accounts.refresh(instance.pk)
+
+
+@receiver(post_save, sender=SupplierPurchase)
+@receiver(post_delete, sender=SupplierPurchase)
+def refresh_supplier_account(sender, instance: SupplierPurchase, **kwargs):
+    """Keep the supplier's totals in step with its purchases (see core.supplier_accounts)."""
+    if _deleted_along_with(kwargs.get('origin'), Supplier):
+        return  # The account goes with the supplier.
+    supplier_accounts.refresh(instance.supplier_id)
+
+
+def bump_model_version(sender, **kwargs):
+    """Invalidate values cached against this model (see core.cache)."""
+    model_cache.bump_versions(sender.__name__)
+
+
+for _label in model_cache.TRACKED_MODELS:
+    post_save.connect(bump_model_version, sender=f'core.{_label}', dispatch_uid=f'bump_model_version_save_{_label}')
+    post_delete.connect(bump_model_version, sender=f'core.{_label}', dispatch_uid=f'bump_model_version_delete_{_label}')
+
+# Role map (core.permissions.role_map): groups and who belongs to them.
+post_save.connect(bump_model_version, sender='auth.Group', dispatch_uid='bump_model_version_save_Group')
+post_delete.connect(bump_model_version, sender='auth.Group', dispatch_uid='bump_model_version_delete_Group')
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def bump_role_map_on_membership_change(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        model_cache.bump_versions('Group')
+        # The group names core.permissions memoized on this user object.
+        instance.__dict__.pop('_group_names', None)
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Apply the SQLite performance profile (settings.SQLITE_PRAGMAS) to each new connection."""
+    if connection.vendor != 'sqlite' or not getattr(settings, 'SQLITE_TUNING', False):
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def apply_statement_timeout(sender, connection, **kwargs):
+    """Give connections opened mid-request the current view's statement timeout."""
+    db_connections.apply_on_connect(connection)
+
+
+@receiver(connection_created)
+def attach_query_hooks(sender, connection, **kwargs):
+    """Let request-scoped hooks (core.query_hooks) see this connection's queries."""
+    query_hooks.attach(connection)
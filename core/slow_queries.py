@@ -0,0 +1,196 @@
+"""
+Slow-query capture.
+
+``SlowQueryRecorder`` is installed as a database execute wrapper around each
+request by ``SlowQueryLogMiddleware``. Statements slower than
+``SLOW_QUERY_THRESHOLD_MS`` are fingerprinted (literals stripped, ``IN``
+lists collapsed) and handed to a background writer thread through a bounded
+queue, so the request never waits on the insert. When the queue is full the
+record is dropped rather than blocking. The ``SlowQuery`` table is trimmed to
+``SLOW_QUERY_LOG_MAX_ROWS`` rows.
+"""
+
+import hashlib
+import logging
+import math
+import queue
+import re
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST_RE = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_queue = queue.Queue(maxsize=1000)
+_writer = None
+_writer_lock = threading.Lock()
+# Set while this thread writes slow-query rows so those inserts are not recorded.
+_local = threading.local()
+
+
+def threshold_ms():
+    return float(getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 0) or 0)
+
+
+def normalize_sql(sql):
+    """Reduce a statement to its shape so equal queries share a fingerprint."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _PLACEHOLDER_LIST_RE.sub('(...)', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized):
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+def _project_stack(limit=8):
+    """Innermost project frames (skipping Django, site-packages and this module)."""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()[:-3]
+        if frame.filename.startswith(base_dir)
+        and 'site-packages' not in frame.filename
+        and not frame.filename.endswith('slow_queries.py')
+    ]
+    return ''.join(traceback.format_list(frames[-limit:]))
+
+
+class SlowQueryRecorder:
+    """Execute wrapper that records statements slower than the threshold."""
+
+    def __init__(self, request, threshold):
+        self.request = request
+        self.threshold = threshold
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            if duration_ms >= self.threshold and not getattr(_local, 'writing', False):
+                match = getattr(self.request, 'resolver_match', None)
+                normalized = normalize_sql(sql)
+                record(
+                    fingerprint=fingerprint(normalized),
+                    normalized_sql=normalized,
+                    sql=sql,
+                    view_name=(match.view_name if match else '') or '',
+                    duration_ms=duration_ms,
+                    stack=_project_stack(),
+                    created_at=timezone.now(),
+                )
+
+
+def record(**fields):
+    """Queue a slow-query row for the writer thread (or write it inline in sync mode)."""
+    if getattr(settings, 'SLOW_QUERY_LOG_SYNC', False):
+        try:
+            write_records([fields])
+        except Exception:
+            logger.exception('Failed to write slow query record')
+        return
+    try:
+        _queue.put_nowait(fields)
+    except queue.Full:
+        return
+    _ensure_writer()
+
+
+def _ensure_writer():
+    global _writer
+    if _writer is not None and _writer.is_alive():
+        return
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_writer_loop, name='slow-query-writer', daemon=True)
+            _writer.start()
+
+
+def _writer_loop():
+    while True:
+        batch = [_queue.get()]
+        while len(batch) < 100:
+            try:
+                batch.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        close_old_connections()
+        try:
+            write_records(batch)
+        except Exception:
+            logger.exception('Failed to write %d slow query record(s)', len(batch))
+
+
+def write_records(rows):
+    """Insert rows and trim the table to SLOW_QUERY_LOG_MAX_ROWS."""
+    from .models import SlowQuery
+
+    _local.writing = True
+    try:
+        SlowQuery.objects.bulk_create([SlowQuery(**row) for row in rows])
+        max_rows = int(getattr(settings, 'SLOW_QUERY_LOG_MAX_ROWS', 5000))
+        cutoff = list(SlowQuery.objects.order_by('-id').values_list('id', flat=True)[max_rows:max_rows + 1])
+        if cutoff:
+            SlowQuery.objects.filter(id__lte=cutoff[0]).delete()
+    finally:
+        _local.writing = False
+
+
+def _percentile(values, pct):
+    # Nearest-rank percentile; exact for the small per-fingerprint samples here.
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+
+def aggregate_by_fingerprint(queryset):
+    """Group captured rows by fingerprint: count, p95, total and max time, views involved."""
+    groups = {}
+    for row in queryset.values_list('fingerprint', 'normalized_sql', 'view_name', 'duration_ms').iterator():
+        key, normalized, view_name, duration_ms = row
+        group = groups.setdefault(key, {
+            'fingerprint': key,
+            'normalized_sql': normalized,
+            'durations': [],
+            'views': set(),
+        })
+        group['durations'].append(duration_ms)
+        if view_name:
+            group['views'].add(view_name)
+
+    rows = []
+    for group in groups.values():
+        durations = group.pop('durations')
+        rows.append({
+            **group,
+            'views': sorted(group['views']),
+            'count': len(durations),
+            'total_ms': sum(durations),
+            'max_ms': max(durations),
+            'p95_ms': _percentile(durations, 95),
+        })
+    rows.sort(key=lambda r: r['total_ms'], reverse=True)
+    return rows
+
+
+def aggregate_by_view(queryset):
+    """Total slow-query time per view name, largest first."""
+    totals = {}
+    for view_name, duration_ms in queryset.values_list('view_name', 'duration_ms').iterator():
+        entry = totals.setdefault(view_name or '-', {'view_name': view_name or '-', 'count': 0, 'total_ms': 0.0})
+        entry['count'] += 1
+        entry['total_ms'] += duration_ms
+    return sorted(totals.values(), key=lambda r: r['total_ms'], reverse=True)
@@ -0,0 +1,182 @@
+"""
+Stock movements.
+
+Every change to an item's ``quantity`` or ``box_count`` goes through
+``apply``. Each movement is a single conditional statement::
+
+    UPDATE core_inventoryitem
+       SET quantity = ROUND(quantity + %s, 3), box_count = box_count + %s, updated_at = %s
+     WHERE id = %s AND ROUND(quantity, 3) >= ROUND(%s, 3) AND box_count >= %s
+    RETURNING quantity, box_count
+
+The guard is the amount being taken out, so a movement that would take the
+stock below zero matches no row and raises ``InsufficientStock`` instead. The
+row is never read into Python, changed and saved back, so two concurrent sales
+cannot overwrite each other's decrement, and the row is only locked for the
+length of the statement. SQLite does the arithmetic in floating point
+(0.3 - 0.1 is stored as 0.19999999999999998), so both the new value and the
+guard are rounded to the column's three decimals. The new values come back
+from ``RETURNING``, and the previous values follow from them and the delta.
+Elsewhere (MySQL/MariaDB cannot ``UPDATE ... RETURNING``) the same UPDATE is
+followed by a primary-key read inside the transaction.
+
+The ``StockHistory`` rows of all movements in a call are written with one
+``bulk_create``. The UPDATE sends no ``post_save``, so ``apply`` bumps the
+``InventoryItem`` cache version itself.
+"""
+
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from . import cache as model_cache
+
+_QUANTITY = Decimal('0.001')
+
+Movement = namedtuple('Movement', 'item quantity boxes transaction_type reason', defaults=(0, 0, 'adjustment', ''))
+Movement.__doc__ = """Add ``quantity`` units and ``boxes`` boxes (negative to take them out) to the ``item`` instance."""
+
+
+class InsufficientStock(ValueError):
+    """A movement would take an item's units or boxes below zero."""
+
+    def __init__(self, item, available, required, boxes=False):
+        self.item = item
+        self.available = available
+        self.required = required
+        if boxes:
+            message = (
+                f"Insufficient box stock for {item.part_name} ({item.part_code}). "
+                f"Available boxes: {available}, required: {required}"
+            )
+        else:
+            message = (
+                f"Insufficient unit stock for {item.part_name} ({item.part_code}). "
+                f"Available: {available}, required: {required}"
+            )
+        super().__init__(message)
+
+
+def _decimal(value):
+    if not isinstance(value, Decimal):
+        # SQLite hands back arithmetic on decimal columns as floats.
+        value = Decimal(str(value))
+    return value.quantize(_QUANTITY)
+
+
+def _update_returns_rows(connection):
+    # can_return_columns_from_insert is about INSERT: MariaDB sets it but has no UPDATE ... RETURNING.
+    # SQLite has both since 3.35, the version that flag checks for.
+    if connection.vendor == 'sqlite':
+        return connection.features.can_return_columns_from_insert
+    return connection.vendor == 'postgresql'
+
+
+def _update(cursor, connection, movement, now):
+    """Run one guarded UPDATE; returns ``(quantity, box_count)`` after it, or None if the guard failed."""
+    from .models import InventoryItem
+
+    table = connection.ops.quote_name(InventoryItem._meta.db_table)
+    quantity = Decimal(movement.quantity or 0)
+    boxes = int(movement.boxes or 0)
+    params = [
+        connection.ops.adapt_decimalfield_value(quantity, 12, 3),
+        boxes,
+        connection.ops.adapt_datetimefield_value(now),
+        movement.item.pk,
+        connection.ops.adapt_decimalfield_value(max(-quantity, Decimal('0')), 12, 3),
+        max(-boxes, 0),
+    ]
+    sql = (
+        f'UPDATE {table} SET quantity = ROUND(quantity + %s, 3), box_count = box_count + %s, updated_at = %s '
+        f'WHERE id = %s AND ROUND(quantity, 3) >= ROUND(%s, 3) AND box_count >= %s'
+    )
+    if _update_returns_rows(connection):
+        cursor.execute(f'{sql} RETURNING quantity, box_count', params)
+        return cursor.fetchone()
+    cursor.execute(sql, params)
+    if not cursor.rowcount:
+        return None
+    return InventoryItem.objects.using(connection.alias).values_list('quantity', 'box_count').get(pk=movement.item.pk)
+
+
+def _insufficient(movement, using):
+    from .models import InventoryItem
+
+    current = InventoryItem.objects.using(using).values_list('quantity', 'box_count').get(pk=movement.item.pk)
+    quantity, boxes = _decimal(current[0]), current[1]
+    if movement.boxes and boxes + movement.boxes < 0:
+        return InsufficientStock(movement.item, boxes, -movement.boxes, boxes=True)
+    return InsufficientStock(movement.item, quantity, -Decimal(movement.quantity))
+
+
+def _history(movement, previous_quantity, previous_boxes, created_by):
+    """The StockHistory rows for one movement: one for the boxes, one for the units, as the views always wrote."""
+    from .models import StockHistory
+
+    item = movement.item
+    rows = []
+    if movement.boxes:
+        rows.append(StockHistory(
+            item=item,
+            transaction_type=movement.transaction_type,
+            quantity=0,
+            previous_quantity=0,
+            new_quantity=0,
+            box_quantity=abs(movement.boxes),
+            previous_box_quantity=previous_boxes,
+            new_box_quantity=item.box_count,
+            reason=f"{movement.reason} (boxes)",
+            created_by=created_by,
+        ))
+    if movement.quantity:
+        rows.append(StockHistory(
+            item=item,
+            transaction_type=movement.transaction_type,
+            quantity=abs(Decimal(movement.quantity)),
+            previous_quantity=previous_quantity,
+            new_quantity=item.quantity,
+            box_quantity=0,
+            previous_box_quantity=0,
+            new_box_quantity=0,
+            reason=movement.reason,
+            created_by=created_by,
+        ))
+    return rows
+
+
+def apply(movements, user=None):
+    """Apply ``movements`` in order, all or none, and log them; returns the StockHistory rows.
+
+    Each movement's ``item`` instance gets its new ``quantity`` and
+    ``box_count``. Raises ``InsufficientStock`` (a ``ValueError``) for the first
+    movement that would go below zero; the ones before it are rolled back.
+    """
+    from .models import InventoryItem, StockHistory
+
+    movements = [m for m in movements if m.quantity or m.boxes]
+    if not movements:
+        return []
+    using = router.db_for_write(InventoryItem)
+    connection = connections[using]
+    created_by = getattr(user, 'username', user) or ''
+    now = timezone.now()
+
+    history = []
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            for movement in movements:
+                row = _update(cursor, connection, movement, now)
+                if row is None:
+                    raise _insufficient(movement, using)
+                item = movement.item
+                item.quantity, item.box_count = _decimal(row[0]), row[1]
+                item.updated_at = now
+                previous_quantity = item.quantity - Decimal(movement.quantity)
+                previous_boxes = item.box_count - movement.boxes
+                history.extend(_history(movement, previous_quantity, previous_boxes, created_by))
+        StockHistory.objects.using(using).bulk_create(history)
+    model_cache.bump_versions('InventoryItem')
+    return history
@@ -0,0 +1,279 @@
+"""
+Concurrent POS stress harness.
+
+Fires sale creation, finalization and payment workloads from a thread or
+process pool against the hot rows that contend in production: the
+``SaleIdSequence`` singleton, per-customer ``select_for_update`` locks in the
+payment views and the inventory rows decremented by ``Sale.finalize``.
+After the run the database is checked for lost updates. Driven by the
+``stress_pos`` management command.
+"""
+
+import random
+import statistics
+import time
+import traceback
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from decimal import Decimal
+import multiprocessing
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, transaction
+from django.db.models import Sum
+from django.db.utils import OperationalError, IntegrityError
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import (
+    Customer, InventoryItem, Sale, SaleItem, SalePayment, StockHistory, LedgerEntry,
+)
+
+WORKLOADS = ('create', 'finalize', 'payment', 'customer_payment')
+
+STRESS_PREFIX = 'STRESS'
+STARTING_STOCK = Decimal('1000000')
+
+
+def seed_stress_data(hot_customers=3, hot_items=3, drafts=200, finalized=50):
+    """Create the small set of hot rows every worker will fight over."""
+    User = get_user_model()
+    user, _ = User.objects.get_or_create(
+        username='stress_admin',
+        defaults={'is_superuser': True, 'is_staff': True},
+    )
+    customers = [
+        Customer.objects.create(name=f'{STRESS_PREFIX} Customer {i}', phone=f'0190000{i:04d}')
+        for i in range(hot_customers)
+    ]
+    items = [
+        InventoryItem.objects.create(
+            part_name=f'{STRESS_PREFIX} Part {i}',
+            part_code=f'{STRESS_PREFIX}-{i:04d}-{random.randint(0, 10**6)}',
+            quantity=STARTING_STOCK,
+            box_count=0,
+            unit_price=Decimal('10.00'),
+            minimum_stock=0,
+        )
+        for i in range(hot_items)
+    ]
+
+    def _sale(idx):
+        sale = Sale.objects.create(customer=customers[idx % len(customers)], created_by=user)
+        SaleItem.objects.create(
+            sale=sale,
+            item_type='inventory',
+            inventory_item=items[idx % len(items)],
+            quantity=Decimal('1'),
+            unit_price=Decimal('1000.00'),
+        )
+        return sale
+
+    draft_ids = [_sale(i).pk for i in range(drafts)]
+    finalized_ids = []
+    for i in range(finalized):
+        sale = _sale(i)
+        sale.finalize(user=user)
+        finalized_ids.append(sale.pk)
+
+    return {
+        'user_id': user.pk,
+        'customer_ids': [c.pk for c in customers],
+        'item_ids': [i.pk for i in items],
+        'draft_ids': draft_ids,
+        'finalized_ids': finalized_ids,
+    }
+
+
+def _classify_error(exc):
+    text = str(exc).lower()
+    if 'deadlock' in text:
+        return 'deadlock'
+    if 'locked' in text or 'could not obtain lock' in text or 'lock timeout' in text:
+        return 'lock_timeout'
+    if 'serializ' in text:
+        return 'serialization_failure'
+    if isinstance(exc, IntegrityError):
+        return 'integrity_error'
+    return type(exc).__name__
+
+
+def _op_create(client, rng, seed):
+    with transaction.atomic():
+        sale = Sale(customer_id=rng.choice(seed['customer_ids']), created_by_id=seed['user_id'])
+        sale.save()
+        SaleItem.objects.create(
+            sale=sale,
+            item_type='inventory',
+            inventory_item_id=rng.choice(seed['item_ids']),
+            quantity=Decimal('1'),
+            unit_price=Decimal('10.00'),
+        )
+        sale.recalc_total(save=True)
+    return 200
+
+
+def _op_finalize(client, rng, seed):
+    response = client.post(reverse('sale_finalize', args=[rng.choice(seed['draft_ids'])]))
+    return response.status_code
+
+
+def _op_payment(client, rng, seed):
+    response = client.post(reverse('sale_add_payment', args=[rng.choice(seed['finalized_ids'])]), {
+        'amount': '1.00',
+        'payment_date': timezone.localdate().isoformat(),
+        'method': 'cash',
+    })
+    return response.status_code
+
+
+def _op_customer_payment(client, rng, seed):
+    response = client.post(reverse('customer_add_payment', args=[rng.choice(seed['customer_ids'])]), {
+        'amount': '1.00',
+        'payment_date': timezone.localdate().isoformat(),
+        'method': 'cash',
+    })
+    return response.status_code
+
+
+_OPERATIONS = {
+    'create': _op_create,
+    'finalize': _op_finalize,
+    'payment': _op_payment,
+    'customer_payment': _op_customer_payment,
+}
+
+
+def run_batch(batch):
+    """Run one worker's share of operations; returns ``[(workload, ms, outcome)]``.
+
+    Top-level so it can be pickled into a process pool. Each worker uses its
+    own test client and closes its own database connection when done.
+    """
+    rng = random.Random(batch['rng_seed'])
+    seed = batch['seed']
+    client = Client()
+    client.force_login(get_user_model().objects.get(pk=seed['user_id']))
+    results = []
+    try:
+        for _ in range(batch['ops']):
+            workload = rng.choice(batch['workloads'])
+            started = time.perf_counter()
+            try:
+                status_code = _OPERATIONS[workload](client, rng, seed)
+                outcome = 'ok' if status_code < 400 else f'http_{status_code}'
+            except (OperationalError, IntegrityError) as exc:
+                outcome = _classify_error(exc)
+            except Exception as exc:  # keep the harness running; report the type
+                outcome = type(exc).__name__
+                if batch.get('verbose'):
+                    traceback.print_exc()
+            results.append((workload, (time.perf_counter() - started) * 1000, outcome))
+    finally:
+        connection.close()
+    return results
+
+
+def run_stress(seed, workloads=WORKLOADS, ops=400, concurrency=8, mode='thread', verbose=False):
+    """Execute ``ops`` operations split across ``concurrency`` workers."""
+    per_worker = [ops // concurrency + (1 if i < ops % concurrency else 0) for i in range(concurrency)]
+    batches = [
+        {'seed': seed, 'workloads': list(workloads), 'ops': n, 'rng_seed': i, 'verbose': verbose}
+        for i, n in enumerate(per_worker) if n
+    ]
+    if mode == 'process':
+        # Children must not share the parent's open socket/file handle.
+        connections.close_all()
+        executor = ProcessPoolExecutor(max_workers=len(batches), mp_context=multiprocessing.get_context('fork'))
+    else:
+        executor = ThreadPoolExecutor(max_workers=len(batches))
+
+    started = time.perf_counter()
+    with executor:
+        samples = [row for rows in executor.map(run_batch, batches) for row in rows]
+    elapsed = time.perf_counter() - started
+    return samples, elapsed
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1]
+
+
+def summarize(samples, elapsed):
+    """Throughput and latency percentiles per workload plus outcome counts."""
+    by_workload = defaultdict(list)
+    outcomes = Counter()
+    for workload, ms, outcome in samples:
+        outcomes[outcome] += 1
+        if outcome == 'ok':
+            by_workload[workload].append(ms)
+    ok = sum(len(v) for v in by_workload.values())
+    return {
+        'elapsed_s': elapsed,
+        'operations': len(samples),
+        'throughput_ops_s': ok / elapsed if elapsed else 0.0,
+        'outcomes': dict(outcomes),
+        'latency_ms': {
+            workload: {
+                'count': len(values),
+                'p50': _percentile(sorted(values), 50),
+                'p99': _percentile(sorted(values), 99),
+            }
+            for workload, values in sorted(by_workload.items())
+        },
+    }
+
+
+def check_invariants(seed):
+    """Return ``{check_name: [violations]}`` for lost-update style corruption."""
+    violations = defaultdict(list)
+
+    # Stock on hand must equal the starting stock replayed through StockHistory.
+    for item in InventoryItem.objects.filter(pk__in=seed['item_ids']):
+        expected = STARTING_STOCK
+        for row in item.stock_history.all():
+            if row.transaction_type == 'out':
+                expected -= row.quantity
+            elif row.transaction_type == 'in':
+                expected += row.quantity
+            else:
+                expected += row.new_quantity - row.previous_quantity
+        if expected != item.quantity:
+            violations['stock_vs_history'].append(
+                f'{item.part_code}: quantity={item.quantity} history implies {expected}'
+            )
+
+    sales = Sale.objects.filter(customer_id__in=seed['customer_ids'])
+    item_totals = dict(
+        SaleItem.objects.filter(sale__in=sales).values('sale_id').annotate(total=Sum('line_total')).values_list('sale_id', 'total')
+    )
+    paid_totals = dict(
+        SalePayment.objects.filter(sale__in=sales).values('sale_id').annotate(total=Sum('amount')).values_list('sale_id', 'total')
+    )
+    for sale in sales.only('pk', 'sale_number', 'status', 'total_amount'):
+        items_total = item_totals.get(sale.pk) or Decimal('0')
+        if sale.total_amount != items_total:
+            violations['sale_total_vs_items'].append(f'{sale.sale_number}: total={sale.total_amount} items={items_total}')
+        paid = paid_totals.get(sale.pk) or Decimal('0')
+        if paid > sale.total_amount:
+            violations['overpaid_sales'].append(f'{sale.sale_number}: paid={paid} total={sale.total_amount}')
+        if sale.status == 'finalized':
+            finalize_rows = StockHistory.objects.filter(reason=f'Sale {sale.sale_number}').count()
+            if finalize_rows > 1:
+                violations['double_finalize'].append(f'{sale.sale_number}: {finalize_rows} stock-out rows')
+
+    payments = SalePayment.objects.filter(sale__in=sales)
+    ledger = dict(
+        LedgerEntry.objects.filter(source='sale_payment', reference__in=payments.values('receipt_number'))
+        .values('reference').annotate(total=Sum('amount')).values_list('reference', 'total')
+    )
+    for receipt, amount in payments.values_list('receipt_number', 'amount'):
+        if ledger.get(receipt) != amount:
+            violations['ledger_vs_payments'].append(f'{receipt}: payment={amount} ledger={ledger.get(receipt)}')
+
+    return dict(violations)
@@ -0,0 +1,115 @@
+"""
+Per-supplier purchase totals.
+
+``supplier_list`` used to sum every supplier's purchases on each page view and
+``supplier_detail`` ran three more aggregates. ``SupplierAccount`` keeps the
+purchase count, amounts purchased, paid and due, and the date of the oldest
+purchase that is not fully paid, one row per supplier.
+
+A purchase's ``paid_amount`` is the sum of its payments
+(``_recalculate_supplier_purchase_paid_amount`` saves it after every payment
+write), so every change that matters is a ``SupplierPurchase`` save or delete.
+``core.signals`` calls ``refresh`` on those, inside the writer's transaction.
+As with ``core.customer_accounts``, the row is recomputed rather than
+adjusted; ``manage.py verify_supplier_accounts --repair`` rebuilds rows after
+writes that skip signals.
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Min, Q, Sum
+
+FIELDS = ('purchase_count', 'total_purchased', 'total_paid', 'total_due', 'oldest_unpaid_date')
+
+
+def empty_totals():
+    return {
+        'purchase_count': 0,
+        'total_purchased': Decimal('0.00'),
+        'total_paid': Decimal('0.00'),
+        'total_due': Decimal('0.00'),
+        'oldest_unpaid_date': None,
+    }
+
+
+def compute(purchase_model, supplier_ids=None):
+    """Purchase totals keyed by supplier id (suppliers without purchases are absent).
+
+    Takes the model class as an argument so data migrations can pass their historical model.
+    """
+    purchases = purchase_model.objects.all()
+    if supplier_ids is not None:
+        purchases = purchases.filter(supplier_id__in=supplier_ids)
+    rows = purchases.values('supplier_id').annotate(
+        count=Count('id'),
+        purchased=Sum('price'),
+        paid=Sum('paid_amount'),
+        oldest_unpaid=Min('purchase_date', filter=Q(price__gt=F('paid_amount'))),
+    ).order_by()
+
+    totals = {}
+    for row in rows:
+        purchased = row['purchased'] or Decimal('0.00')
+        paid = row['paid'] or Decimal('0.00')
+        totals[row['supplier_id']] = {
+            'purchase_count': row['count'],
+            'total_purchased': purchased,
+            'total_paid': paid,
+            'total_due': purchased - paid,
+            'oldest_unpaid_date': row['oldest_unpaid'],
+        }
+    return totals
+
+
+def refresh(supplier_id):
+    """Recompute and store one supplier's account row under a row lock; returns it."""
+    from .models import SupplierAccount, SupplierPurchase
+
+    with transaction.atomic():
+        account, _created = SupplierAccount.objects.select_for_update().get_or_create(supplier_id=supplier_id)
+        values = compute(SupplierPurchase, [supplier_id]).get(supplier_id) or empty_totals()
+        changed = [field for field, value in values.items() if getattr(account, field) != value]
+        if changed:
+            for field in changed:
+                setattr(account, field, values[field])
+            account.save(update_fields=[*changed, 'updated_at'])
+    return account
+
+
+def account_for(supplier):
+    """The supplier's account row, created on first use for suppliers that predate it."""
+    from .models import SupplierAccount
+
+    try:
+        return supplier.account
+    except SupplierAccount.DoesNotExist:
+        return refresh(supplier.pk)
+
+
+def verify(supplier_model, account_model, purchase_model, repair=False, batch_size=500):
+    """Compare every stored account with freshly computed totals; see ``customer_accounts.verify``."""
+    expected = compute(purchase_model)
+    stored = {account.supplier_id: account for account in account_model.objects.all()}
+
+    mismatches = {}
+    to_update, to_create = [], []
+    for supplier_id in supplier_model.objects.order_by('pk').values_list('pk', flat=True).iterator():
+        values = expected.get(supplier_id) or empty_totals()
+        account = stored.get(supplier_id)
+        if account is None:
+            mismatches[supplier_id] = {field: (None, value) for field, value in values.items()}
+            to_create.append(account_model(supplier_id=supplier_id, **values))
+            continue
+        diff = {field: (getattr(account, field), value) for field, value in values.items() if getattr(account, field) != value}
+        if diff:
+            mismatches[supplier_id] = diff
+            for field, (_stored, value) in diff.items():
+                setattr(account, field, value)
+            to_update.append(account)
+
+    if repair:
+        with transaction.atomic():
+            account_model.objects.bulk_create(to_create, batch_size=batch_size)
+            account_model.objects.bulk_update(to_update, list(FIELDS), batch_size=batch_size)
+    return mismatches
@@ -0,0 +1,16 @@
+from django import template
+
+from core.cache import versioned_key
+
+register = template.Library()
+
+
+@register.simple_tag
+def model_versions(*labels):
+    """Version token for ``{% cache %}`` fragments that depend on these models.
+
+    {% load cache model_cache %}
+    {% model_versions 'Sale' 'SalePayment' as versions %}
+    {% cache 3600 recent_sales versions %}...{% endcache %}
+    """
+    return versioned_key('fragment', labels)
@@ -1,5 +1,7 @@
 from django import template
 
+from core.permissions import user_in_group
+
 register = template.Library()
 
 @register.filter
@@ -9,6 +11,6 @@ def has_role(user, role_name: str) -> bool:
             return False
         if user.is_superuser:
             return True
-        return user.groups.filter(name=role_name).exists()
+        return user_in_group(user, role_name)
     except Exception:
         return False
@@ -0,0 +1,212 @@
+"""
+In-process stand-in for a redis server.
+
+Speaks enough of the redis protocol (RESP2 and RESP3) for Django's
+``RedisCache`` and redis-py: strings with expiry, counters, MGET/MSET,
+DEL/EXISTS, FLUSHDB and MULTI/EXEC pipelines. Tests point ``CACHES`` at
+``RedisStandIn().start().url`` to run against the redis backend without a
+redis server; ``python -m core.tests.redis_standin [port]`` serves one for
+local development.
+"""
+
+import socketserver
+import sys
+import threading
+import time
+
+
+class _Status(str):
+    pass
+
+
+class _Error(str):
+    pass
+
+
+OK = _Status('OK')
+_NOT_INTEGER = _Error('ERR value is not an integer or out of range')
+
+
+class _Store:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def _live(self, key):
+        entry = self.values.get(key)
+        if entry and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.values[key]
+            return None
+        return entry
+
+    def _expire_in(self, key, seconds):
+        if not self._live(key):
+            return 0
+        self.values[key] = (self.values[key][0], time.monotonic() + seconds)
+        return 1
+
+    def _incr(self, key, delta):
+        entry = self._live(key)
+        try:
+            value = int(entry[0] if entry else b'0') + delta
+        except ValueError:
+            return _NOT_INTEGER
+        self.values[key] = (str(value).encode(), entry[1] if entry else None)
+        return value
+
+    def _set(self, key, value, *options):
+        options = [option.upper() for option in options]
+        expires = None
+        if b'EX' in options:
+            expires = time.monotonic() + int(options[options.index(b'EX') + 1])
+        elif b'PX' in options:
+            expires = time.monotonic() + int(options[options.index(b'PX') + 1]) / 1000
+        exists = self._live(key) is not None
+        if (b'NX' in options and exists) or (b'XX' in options and not exists):
+            return None
+        self.values[key] = (value, expires)
+        return OK
+
+    def execute(self, name, args):
+        with self.lock:
+            if name == b'PING':
+                return _Status('PONG')
+            if name in (b'SELECT', b'AUTH', b'CLIENT'):
+                return OK
+            if name == b'GET':
+                entry = self._live(args[0])
+                return entry[0] if entry else None
+            if name == b'SET':
+                return self._set(*args)
+            if name == b'MGET':
+                return [entry[0] if entry else None for entry in map(self._live, args)]
+            if name == b'MSET':
+                for key, value in zip(args[::2], args[1::2]):
+                    self.values[key] = (value, None)
+                return OK
+            if name == b'DEL':
+                removed = [key for key in args if self._live(key)]
+                for key in removed:
+                    del self.values[key]
+                return len(removed)
+            if name == b'EXISTS':
+                return sum(1 for key in args if self._live(key))
+            if name == b'EXPIRE':
+                return self._expire_in(args[0], int(args[1]))
+            if name == b'PEXPIRE':
+                return self._expire_in(args[0], int(args[1]) / 1000)
+            if name == b'PERSIST':
+                entry = self._live(args[0])
+                if not entry or entry[1] is None:
+                    return 0
+                self.values[args[0]] = (entry[0], None)
+                return 1
+            if name == b'TTL':
+                entry = self._live(args[0])
+                if not entry:
+                    return -2
+                return -1 if entry[1] is None else int(entry[1] - time.monotonic())
+            if name in (b'INCR', b'DECR'):
+                return self._incr(args[0], 1 if name == b'INCR' else -1)
+            if name in (b'INCRBY', b'DECRBY'):
+                delta = int(args[1])
+                return self._incr(args[0], delta if name == b'INCRBY' else -delta)
+            if name in (b'FLUSHDB', b'FLUSHALL'):
+                self.values.clear()
+                return OK
+        return _Error(f"ERR unknown command '{name.decode()}'")
+
+
+def _encode(reply, resp3=False):
+    if reply is None:
+        return b'_\r\n' if resp3 else b'$-1\r\n'
+    if isinstance(reply, _Error):
+        return f'-{reply}\r\n'.encode()
+    if isinstance(reply, _Status):
+        return f'+{reply}\r\n'.encode()
+    if isinstance(reply, int):
+        return f':{reply}\r\n'.encode()
+    if isinstance(reply, list):
+        return f'*{len(reply)}\r\n'.encode() + b''.join(_encode(item, resp3) for item in reply)
+    if isinstance(reply, dict):
+        return f'%{len(reply)}\r\n'.encode() + b''.join(
+            _encode(key, resp3) + _encode(value, resp3) for key, value in reply.items()
+        )
+    return b'$%d\r\n%s\r\n' % (len(reply), reply)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        queued = None
+        resp3 = False
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            if not command:
+                continue
+            name, args = command[0].upper(), command[1:]
+            if name == b'HELLO':
+                # redis-py negotiates RESP3 by default; only the reply encoding differs.
+                resp3 = bool(args) and args[0] == b'3'
+                reply = {b'server': b'redis', b'proto': 3 if resp3 else 2}
+                if not resp3:
+                    reply = [item for pair in reply.items() for item in pair]
+            elif name == b'MULTI':
+                queued, reply = [], OK
+            elif name == b'EXEC' and queued is not None:
+                reply = [self.server.store.execute(*queued_command) for queued_command in queued]
+                queued = None
+            elif name == b'DISCARD' and queued is not None:
+                queued, reply = None, OK
+            elif queued is not None:
+                queued.append((name, args))
+                reply = _Status('QUEUED')
+            else:
+                reply = self.server.store.execute(name, args)
+            self.wfile.write(_encode(reply, resp3))
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class RedisStandIn:
+    """A stand-in server on 127.0.0.1; ``port=0`` picks a free port."""
+
+    def __init__(self, port=0):
+        self._server = _Server(('127.0.0.1', port), _Handler)
+        self._server.store = _Store()
+        self._thread = None
+
+    @property
+    def url(self):
+        return f'redis://127.0.0.1:{self._server.server_address[1]}/1'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == '__main__':
+    server = RedisStandIn(int(sys.argv[1]) if len(sys.argv) > 1 else 6379)
+    print(f'Serving a redis stand-in at {server.url}')
+    server._server.serve_forever()
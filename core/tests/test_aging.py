@@ -0,0 +1,100 @@
+import csv
+import io
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import aging
+from core.models import Customer, Sale, SalePayment
+
+_LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'aging-tests'}}
+
+
+def _days_ago(days):
+    return timezone.make_aware(datetime.combine(timezone.localdate() - timedelta(days=days), time(12)))
+
+
+@override_settings(CACHES=_LOCMEM)
+class ReceivablesAgingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.acme = Customer.objects.create(name='Acme Ltd', phone='1')
+        self.beta = Customer.objects.create(name='Beta', phone='2')
+        self.old = self.sale(self.acme, '100.00', 100)
+        self.sale(self.acme, '50.00', 40)
+        self.recent = self.sale(self.acme, '30.00', 5)
+        self.sale(self.beta, '80.00', 95)
+        Sale.objects.create(customer=self.beta, total_amount=Decimal('999.00'))  # draft: not receivable
+        # Paid against the newest sale, but applied to the oldest ones first.
+        SalePayment.objects.create(sale=self.recent, amount=Decimal('120.00'), payment_date=timezone.localdate())
+
+    def sale(self, customer, amount, days_ago):
+        return Sale.objects.create(
+            customer=customer, status='finalized', total_amount=Decimal(amount), finalized_at=_days_ago(days_ago),
+        )
+
+    def test_payments_are_applied_oldest_sale_first(self):
+        report = aging.receivables()
+        beta, acme = report['rows']  # Largest total first.
+        self.assertEqual(acme['pk'], self.acme.pk)
+        self.assertEqual([acme[key] for key in aging.BUCKET_KEYS], [Decimal('30.00'), Decimal('30.00'), 0, 0])
+        self.assertEqual(acme['total'], Decimal('60.00'))
+        self.assertEqual([beta[key] for key in aging.BUCKET_KEYS], [0, 0, 0, Decimal('80.00')])
+        self.assertEqual(report['totals']['total'], Decimal('140.00'))
+
+    def test_report_is_one_query_and_cached_until_a_write(self):
+        with self.assertNumQueries(1):
+            aging.receivables()
+        with self.assertNumQueries(0):
+            aging.receivables()
+
+        SalePayment.objects.create(sale=self.old, amount=Decimal('60.00'))
+        self.assertEqual(aging.receivables()['totals']['total'], Decimal('80.00'))
+
+    def test_as_of_ignores_later_sales_and_payments(self):
+        report = aging.receivables(timezone.localdate() - timedelta(days=50))
+        acme = next(row for row in report['rows'] if row['pk'] == self.acme.pk)
+        self.assertEqual((acme['days_30'], acme['total']), (Decimal('100.00'), Decimal('100.00')))
+
+    def test_settled_customers_are_left_out(self):
+        SalePayment.objects.create(sale=self.old, amount=Decimal('60.00'))
+        self.assertEqual([row['pk'] for row in aging.receivables()['rows']], [self.beta.pk])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=_LOCMEM)
+class ReceivablesAgingViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_superuser(username='aging', password='x')
+        self.client.force_login(user)
+        customer = Customer.objects.create(name='Acme Ltd', phone='1')
+        Sale.objects.create(customer=customer, status='finalized', total_amount=Decimal('75.00'), finalized_at=_days_ago(65))
+
+    def test_page_lists_buckets(self):
+        response = self.client.get(reverse('receivables_aging'))
+        self.assertContains(response, 'Acme Ltd')
+        self.assertContains(response, '60–89 days')
+        self.assertEqual(response.context['report']['totals']['days_60'], Decimal('75.00'))
+
+    def test_csv_export_streams_rows_and_totals(self):
+        response = self.client.get(reverse('receivables_aging_export'), {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:2], ['Customer ID', 'Customer'])
+        self.assertEqual(rows[1][1], 'Acme Ltd')
+        self.assertEqual(rows[-1][0], 'TOTAL')
+        self.assertEqual(rows[-1][-1], '75.00')
+
+    def test_xlsx_export(self):
+        import openpyxl
+
+        response = self.client.get(reverse('receivables_aging_export'), {'format': 'xlsx'})
+        workbook = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        sheet = workbook.worksheets[0]
+        self.assertEqual(sheet.cell(row=2, column=2).value, 'Acme Ltd')
+        self.assertEqual(sheet.max_row, 3)
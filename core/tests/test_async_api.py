@@ -0,0 +1,97 @@
+import asyncio
+import threading
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import async_db, views
+from core.models import Customer, InventoryItem, Sale, SaleItem, SalePayment
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class AsyncReadOnlyEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_superuser(username='async_admin', password='pass12345', email='a@example.com')
+        cls.clerk = User.objects.create_user(username='async_clerk', password='pass12345')
+        cls.clerk.user_permissions.add(Permission.objects.get(codename='view_salepayment'))
+        cls.customer = Customer.objects.create(name='Async Customer', phone='01700000010')
+        cls.bolt = InventoryItem.objects.create(part_name='Bolt', part_code='ASY-1', quantity=Decimal('2'), minimum_stock=5, unit_price=Decimal('3.00'))
+        InventoryItem.objects.create(part_name='Washer', part_code='ASY-2', quantity=Decimal('50'), minimum_stock=5, unit_price=Decimal('1.00'))
+        cls.sale = Sale.objects.create(customer=cls.customer, created_by=cls.admin)
+        SaleItem.objects.create(sale=cls.sale, item_type='inventory', inventory_item=cls.bolt, quantity=Decimal('1'), unit_price=Decimal('3.00'))
+        cls.sale.finalize(user=cls.admin)
+        cls.payment = SalePayment.objects.create(sale=cls.sale, amount=Decimal('1.00'), method='cash')
+
+    async def _login(self, user):
+        await sync_to_async(self.async_client.force_login)(user)
+
+    async def test_dashboard_metrics_require_login(self):
+        response = await self.async_client.get(reverse('dashboard_metrics_api'))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_dashboard_metrics(self):
+        await self._login(self.admin)
+        response = await self.async_client.get(reverse('dashboard_metrics_api'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['total_inventory_items'], 2)
+        self.assertEqual(data['low_stock_items'], 1)
+        self.assertEqual(data['finalized_sales'], 1)
+        self.assertEqual(Decimal(data['total_sales_due']), Decimal('2.00'))
+
+    async def test_dashboard_metrics_match_the_dashboard_page(self):
+        await self._login(self.admin)
+        data = (await self.async_client.get(reverse('dashboard_metrics_api'))).json()
+        await sync_to_async(self.client.force_login)(self.admin)
+        context = (await sync_to_async(self.client.get)(reverse('dashboard'))).context
+        for key, value in data.items():
+            if key != 'date':
+                self.assertEqual(Decimal(str(value)), Decimal(str(context[key])), key)
+
+    async def test_inventory_catalog_search_and_permission(self):
+        await self._login(self.clerk)
+        response = await self.async_client.get(reverse('inventory_catalog_api'))
+        self.assertEqual(response.status_code, 403)
+
+        await self._login(self.admin)
+        response = await self.async_client.get(reverse('inventory_catalog_api'), {'q': 'asy-1'})
+        data = response.json()
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['results'][0]['part_name'], 'Bolt')
+        self.assertTrue(data['results'][0]['is_low_stock'])
+
+    async def test_receipt_lookup_respects_sale_visibility(self):
+        url = reverse('receipt_lookup_api', args=[self.payment.receipt_number])
+        await self._login(self.admin)
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['sale']['sale_number'], self.sale.sale_number)
+        self.assertEqual(Decimal(data['sale']['balance_due']), Decimal('2.00'))
+
+        # The clerk may view payments, but not of sales created by someone else.
+        await self._login(self.clerk)
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+
+class AsyncPlumbingTests(SimpleTestCase):
+    def test_async_views_are_marked_as_coroutines(self):
+        self.assertTrue(asyncio.iscoroutinefunction(views.lazy('dashboard_metrics_api')))
+        self.assertFalse(asyncio.iscoroutinefunction(views.lazy('dashboard')))
+
+    @override_settings(ASYNC_DB_PARALLEL=True)
+    def test_gather_runs_callables_in_worker_threads_in_order(self):
+        main = threading.get_ident()
+        results = asyncio.run(async_db.gather(lambda: (1, threading.get_ident()), lambda: (2, threading.get_ident())))
+        self.assertEqual([value for value, _thread in results], [1, 2])
+        self.assertNotIn(main, [thread for _value, thread in results])
@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.management.commands import prepare_container
+from core.models import InventoryItem
+from core.permissions import ROLE_MANAGER, role_map, user_in_group
+from core.views.api import inventory_catalog
+from core.warmup import warm_caches
+
+_LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'container-startup-tests'}}
+_SHARED = {'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': os.path.join(tempfile.gettempdir(), 'orgms-container-startup-tests'),
+}}
+
+
+class PrepareContainerTests(TestCase):
+    def setUp(self):
+        self.sources = Path(tempfile.mkdtemp())
+        self.static_root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.sources)
+        self.addCleanup(shutil.rmtree, self.static_root)
+        (self.sources / 'app.css').write_text('body { color: black; }')
+        self.settings_override = override_settings(
+            STATICFILES_DIRS=[self.sources],
+            STATIC_ROOT=self.static_root,
+            STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def run_command(self):
+        out = StringIO()
+        call_command('prepare_container', stdout=out, verbosity=0)
+        return out.getvalue()
+
+    def test_test_database_has_no_pending_migrations(self):
+        self.assertEqual(prepare_container.pending_migrations(), [])
+
+    def test_collectstatic_runs_only_when_sources_change(self):
+        with mock.patch.object(prepare_container, 'call_command', wraps=call_command) as command:
+            output = self.run_command()
+            self.assertIn('No pending migrations.', output)
+            self.assertIn('Static files changed', output)
+            self.assertTrue((self.static_root / 'app.css').exists())
+
+            self.assertIn('skipping collectstatic', self.run_command())
+
+            (self.sources / 'app.css').write_text('body { color: red; }')
+            # collectstatic only replaces files older than their source.
+            later = time.time() + 5
+            os.utime(self.sources / 'app.css', (later, later))
+            self.assertIn('Static files changed', self.run_command())
+
+        self.assertEqual([c.args[0] for c in command.call_args_list], ['collectstatic', 'collectstatic'])
+        self.assertEqual((self.static_root / 'app.css').read_text(), 'body { color: red; }')
+
+    def test_missing_hash_file_forces_collection(self):
+        self.run_command()
+        (self.static_root / prepare_container.HASH_FILE).unlink()
+        self.assertIn('Static files changed', self.run_command())
+
+
+@override_settings(CACHES=_SHARED)
+class RoleMapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.manager_group = Group.objects.create(name=ROLE_MANAGER)
+        self.user = get_user_model().objects.create_user(username='rolemap', password='x')
+
+    def test_membership_changes_invalidate_the_role_map(self):
+        self.assertFalse(user_in_group(self.user, ROLE_MANAGER))
+
+        self.user.groups.add(self.manager_group)
+        self.assertEqual(role_map()[ROLE_MANAGER], frozenset({self.user.pk}))
+        self.assertTrue(user_in_group(self.user, ROLE_MANAGER))
+
+        self.user.groups.remove(self.manager_group)
+        self.assertFalse(user_in_group(self.user, ROLE_MANAGER))
+
+    def test_cached_role_map_answers_without_queries(self):
+        self.user.groups.add(self.manager_group)
+        role_map()
+        with self.assertNumQueries(0):
+            self.assertTrue(user_in_group(self.user, ROLE_MANAGER))
+
+    def test_per_process_cache_is_not_trusted_for_roles(self):
+        self.user.groups.add(self.manager_group)
+        with self.settings(CACHES=_LOCMEM):
+            role_map()
+            # Revoked without signals, as another process's cache would not see it.
+            get_user_model().groups.through.objects.filter(customuser=self.user).delete()
+            user = get_user_model().objects.get(pk=self.user.pk)
+            with self.assertNumQueries(1):
+                self.assertFalse(user_in_group(user, ROLE_MANAGER))
+                self.assertFalse(user_in_group(user, ROLE_MANAGER))
+
+    def test_warm_caches_fills_role_map_and_catalog(self):
+        InventoryItem.objects.create(part_name='Belt', part_code='WU-1', quantity=Decimal('3'), unit_price=Decimal('1.00'))
+        timings = warm_caches()
+        self.assertEqual(set(timings), {'role_map', 'inventory_catalog'})
+        with self.assertNumQueries(0):
+            self.assertEqual([row['part_code'] for row in inventory_catalog()], ['WU-1'])
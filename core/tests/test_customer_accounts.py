@@ -0,0 +1,142 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Customer, CustomerAccount, InventoryItem, Sale, SaleItem, SalePayment
+
+
+class CustomerAccountMaintenanceTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name='Acme Ltd', phone='123456')
+        self.inv = InventoryItem.objects.create(
+            part_name='Gear', part_code='CA-1', quantity=50, unit='pcs', unit_price=100, minimum_stock=1
+        )
+
+    def finalized_sale(self, quantity=2):
+        sale = Sale.objects.create(customer=self.customer)
+        SaleItem.objects.create(sale=sale, item_type='inventory', inventory_item=self.inv, quantity=quantity, unit_price=100)
+        sale.finalize()
+        return sale
+
+    def account(self):
+        return CustomerAccount.objects.get(customer=self.customer)
+
+    def test_new_customer_starts_with_an_empty_account(self):
+        account = self.account()
+        self.assertEqual((account.total_amount, account.total_paid, account.total_due), (0, 0, 0))
+        self.assertIsNone(account.last_sale_date)
+
+    def test_drafts_do_not_count_until_finalized(self):
+        sale = Sale.objects.create(customer=self.customer)
+        SaleItem.objects.create(sale=sale, item_type='inventory', inventory_item=self.inv, quantity=1, unit_price=100)
+        self.assertEqual(self.account().total_amount, 0)
+
+        sale.finalize()
+        account = self.account()
+        self.assertEqual(account.total_amount, Decimal('100.00'))
+        self.assertEqual(account.total_due, Decimal('100.00'))
+        self.assertEqual(account.last_sale_date, sale.finalized_date)
+
+    def test_draft_saves_skip_the_refresh(self):
+        sale = Sale.objects.create(customer=self.customer)
+        with mock.patch('core.customer_accounts.refresh') as refresh:
+            sale.notes = 'Call before delivery'
+            sale.save()
+            Sale.objects.get(pk=sale.pk).save()
+        refresh.assert_not_called()
+
+        stored = Sale.objects.get(pk=self.finalized_sale().pk)
+        self.assertEqual(self.account().total_amount, Decimal('200.00'))
+        stored.status = 'draft'
+        stored.save()
+        self.assertEqual(self.account().total_amount, 0)
+
+    def test_payment_create_edit_and_delete(self):
+        sale = self.finalized_sale()
+        payment = SalePayment.objects.create(sale=sale, amount=Decimal('50.00'), payment_date=date(2026, 3, 1))
+        account = self.account()
+        self.assertEqual((account.total_paid, account.total_due), (Decimal('50.00'), Decimal('150.00')))
+        self.assertEqual(account.last_payment_date, date(2026, 3, 1))
+
+        payment.amount = Decimal('80.00')
+        payment.save()
+        self.assertEqual(self.account().total_due, Decimal('120.00'))
+
+        payment.delete()
+        account = self.account()
+        self.assertEqual((account.total_paid, account.total_due), (0, Decimal('200.00')))
+        self.assertIsNone(account.last_payment_date)
+
+    def test_item_edits_and_sale_delete(self):
+        sale = self.finalized_sale()
+        SaleItem.objects.create(sale=sale, item_type='non_inventory', description='Service', quantity=1, unit_price=25)
+        self.assertEqual(self.account().total_amount, Decimal('225.00'))
+
+        sale.delete()
+        self.assertEqual(self.account().total_amount, 0)
+
+    def test_customer_delete_removes_the_account(self):
+        sale = self.finalized_sale()
+        SalePayment.objects.create(sale=sale, amount=Decimal('10.00'))
+        self.customer.delete()
+        self.assertFalse(CustomerAccount.objects.exists())
+
+    def test_verify_command_reports_and_repairs_drift(self):
+        self.finalized_sale()
+        CustomerAccount.objects.filter(customer=self.customer).update(total_due=0)
+        other = Customer.objects.create(name='Beta', phone='999')
+        CustomerAccount.objects.filter(customer=other).delete()
+
+        with self.assertRaisesMessage(CommandError, '2 customer account(s) differ'):
+            call_command('verify_customer_accounts', stdout=StringIO())
+
+        out = StringIO()
+        call_command('verify_customer_accounts', '--repair', stdout=out)
+        self.assertIn('Customer accounts repaired: 2', out.getvalue())
+        self.assertEqual(self.account().total_due, Decimal('200.00'))
+        self.assertTrue(CustomerAccount.objects.filter(customer=other).exists())
+
+        out = StringIO()
+        call_command('verify_customer_accounts', stdout=out)
+        self.assertIn('All customer accounts match.', out.getvalue())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CustomerAccountViewTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_superuser(username='accounts', password='x')
+        self.client.force_login(user)
+        self.owing = Customer.objects.create(name='Owing', phone='1')
+        self.settled = Customer.objects.create(name='Settled', phone='2')
+        for customer, paid in ((self.owing, Decimal('10.00')), (self.settled, Decimal('40.00'))):
+            sale = Sale.objects.create(customer=customer)
+            SaleItem.objects.create(sale=sale, item_type='non_inventory', description='Service', quantity=1, unit_price=40)
+            sale.finalize()
+            SalePayment.objects.create(sale=sale, amount=paid)
+
+    def test_customer_list_filters_and_sorts_by_due(self):
+        response = self.client.get(reverse('customer_list'), {'due': 'outstanding'})
+        self.assertEqual(list(response.context['customers']), [self.owing])
+
+        response = self.client.get(reverse('customer_list'), {'sort': 'due'})
+        self.assertEqual(list(response.context['customers']), [self.owing, self.settled])
+
+    def test_customer_detail_reads_totals_from_the_account(self):
+        response = self.client.get(reverse('customer_detail', args=[self.owing.pk]))
+        self.assertEqual(response.context['total_amount'], Decimal('40.00'))
+        self.assertEqual(response.context['total_paid'], Decimal('10.00'))
+        self.assertEqual(response.context['total_due'], Decimal('30.00'))
+
+    def test_customer_payment_updates_the_account(self):
+        self.client.post(reverse('customer_add_payment', args=[self.owing.pk]), {
+            'amount': '30', 'payment_date': '2026-03-02', 'method': 'cash', 'notes': '',
+        })
+        account = CustomerAccount.objects.get(customer=self.owing)
+        self.assertEqual((account.total_paid, account.total_due), (Decimal('40.00'), 0))
@@ -0,0 +1,116 @@
+import os
+import subprocess
+import sys
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from django.urls import resolve, reverse
+
+from core import db_connections
+
+
+def _fake_postgres_connection():
+    conn = mock.MagicMock()
+    conn.vendor = 'postgresql'
+    conn.statement_timeout_ms = None
+    conn.statement_timeout_commit = None
+    conn.in_atomic_block = False
+    conn.run_on_commit = []
+    conn.on_commit.side_effect = lambda func: conn.run_on_commit.append((set(), func, False))
+    return conn
+
+
+@override_settings(DB_STATEMENT_TIMEOUTS={'default': 30000, 'pos': 5000, 'export': 300000})
+class StatementTimeoutTests(SimpleTestCase):
+    def test_views_are_classified_through_other_decorators(self):
+        self.assertEqual(db_connections.timeout_for(resolve(reverse('sale_create')).func), 5000)
+        self.assertEqual(db_connections.timeout_for(resolve(reverse('sales_export_csv')).func), 300000)
+        self.assertEqual(db_connections.timeout_for(resolve(reverse('dashboard')).func), 30000)
+
+    def test_set_is_only_sent_when_the_timeout_changes(self):
+        conn = _fake_postgres_connection()
+        context = {'connection': conn, 'cursor': mock.MagicMock()}
+        raw_execute = context['cursor'].cursor.execute
+        execute = mock.MagicMock()
+        db_connections.activate(5000)
+        db_connections._apply_current_timeout(execute, 'SELECT 1', None, False, context)
+        db_connections._apply_current_timeout(execute, 'SELECT 1', None, False, context)
+        self.assertEqual(raw_execute.call_count, 1)
+        raw_execute.assert_called_with('SET statement_timeout = %s', [5000])
+        self.assertEqual(execute.call_count, 2)
+        db_connections.activate(300000)
+        db_connections._apply_current_timeout(execute, 'SELECT 1', None, False, context)
+        self.assertEqual(raw_execute.call_count, 2)
+        db_connections.activate(None)
+
+    def test_set_undone_by_a_rollback_is_sent_again(self):
+        conn = _fake_postgres_connection()
+        conn.in_atomic_block = True
+        context = {'connection': conn, 'cursor': mock.MagicMock()}
+        raw_execute = context['cursor'].cursor.execute
+        execute = mock.MagicMock()
+        db_connections.activate(5000)
+        db_connections._apply_current_timeout(execute, 'SELECT 1', None, False, context)
+        db_connections._apply_current_timeout(execute, 'SELECT 1', None, False, context)
+        self.assertEqual(raw_execute.call_count, 1)
+
+        # The transaction rolls back (e.g. InsufficientStock): Postgres reverts the SET.
+        conn.run_on_commit = []
+        conn.in_atomic_block = False
+        db_connections._apply_current_timeout(execute, 'SELECT 1', None, False, context)
+        self.assertEqual(raw_execute.call_count, 2)
+
+        # Sent outside a transaction, the SET sticks.
+        db_connections._apply_current_timeout(execute, 'SELECT 1', None, False, context)
+        self.assertEqual(raw_execute.call_count, 2)
+
+        # Sent in a transaction that commits, it sticks too.
+        conn.statement_timeout_ms = None
+        conn.in_atomic_block = True
+        db_connections._apply_current_timeout(execute, 'SELECT 1', None, False, context)
+        for _sids, func, _robust in conn.run_on_commit:
+            func()
+        conn.run_on_commit = []
+        conn.in_atomic_block = False
+        db_connections._apply_current_timeout(execute, 'SELECT 1', None, False, context)
+        self.assertEqual(raw_execute.call_count, 3)
+        db_connections.activate(None)
+
+    def test_disabled_on_sqlite_and_behind_pgbouncer(self):
+        self.assertFalse(db_connections.enabled())
+        with override_settings(DB_PGBOUNCER=True):
+            self.assertFalse(db_connections.enabled())
+
+    def test_new_connection_forgets_previous_value(self):
+        conn = _fake_postgres_connection()
+        conn.statement_timeout_ms = 5000
+        conn.execute_wrappers = []
+        with mock.patch.object(db_connections, 'enabled', return_value=True):
+            db_connections.apply_on_connect(conn)
+            db_connections.apply_on_connect(conn)
+        self.assertIsNone(conn.statement_timeout_ms)
+        self.assertEqual(conn.execute_wrappers, [db_connections._apply_current_timeout])
+
+
+class PersistentConnectionSettingsTests(SimpleTestCase):
+    def test_default_database_keeps_connections_with_health_checks(self):
+        default = settings.DATABASES['default']
+        self.assertEqual(default['CONN_MAX_AGE'], settings.DB_CONN_MAX_AGE)
+        self.assertEqual(default['CONN_HEALTH_CHECKS'], settings.DB_CONN_HEALTH_CHECKS)
+
+    def test_asgi_disables_persistent_connections_and_vercel_serves_wsgi(self):
+        script = (
+            "import {module}; from django.conf import settings; "
+            "print(type({module}.{app}).__name__, settings.DATABASES['default']['CONN_MAX_AGE'])"
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='org_management.settings', DB_CONN_MAX_AGE='60')
+        for module, app, expected in (
+            ('org_management.asgi', 'application', 'ASGIHandler 0'),
+            ('api.index', 'app', 'WSGIHandler 60'),
+        ):
+            proc = subprocess.run(
+                [sys.executable, '-c', script.format(module=module, app=app)],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+            )
+            self.assertEqual(proc.stdout.strip(), expected)
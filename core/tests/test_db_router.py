@@ -0,0 +1,79 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.db import router
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import cache as model_cache
+from core import db_router
+from core.middleware import ReplicaLagGuardMiddleware
+from core.models import Sale
+
+TWO_SQLITE_DATABASES = {
+    'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': 'primary.sqlite3'},
+    'replica': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': 'replica.sqlite3'},
+}
+
+
+def _read_alias_view(request):
+    return HttpResponse(router.db_for_read(Sale))
+
+
+@override_settings(DATABASES=TWO_SQLITE_DATABASES, REPLICA_LAG_GUARD_SECONDS=10)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def _request(self, method='get'):
+        request = getattr(self.factory, method)('/reports/')
+        request.session = SessionStore()
+        return request
+
+    def test_decorated_view_reads_from_replica(self):
+        response = db_router.use_replica(_read_alias_view)(self._request())
+        self.assertEqual(response.content, b'replica')
+        # Outside the decorated view reads go back to the primary.
+        self.assertEqual(router.db_for_read(Sale), 'default')
+
+    def test_writes_always_go_to_primary(self):
+        def view(request):
+            return HttpResponse(router.db_for_write(Sale))
+        self.assertEqual(db_router.use_replica(view)(self._request()).content, b'default')
+
+    def test_recent_write_keeps_user_on_primary(self):
+        post = self._request('post')
+        ReplicaLagGuardMiddleware(lambda request: HttpResponse())(post)
+
+        request = self._request()
+        request.session = post.session
+        self.assertEqual(db_router.use_replica(_read_alias_view)(request).content, b'default')
+
+        request.session[db_router.LAST_WRITE_SESSION_KEY] = time.time() - 60
+        self.assertEqual(db_router.use_replica(_read_alias_view)(request).content, b'replica')
+
+    def test_streaming_body_is_generated_on_replica(self):
+        def view(request):
+            return StreamingHttpResponse(router.db_for_read(Sale) for _ in range(2))
+        response = db_router.use_replica(view)(self._request())
+        self.assertEqual(b''.join(response.streaming_content), b'replicareplica')
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'router-tests'}})
+    def test_version_cached_values_are_computed_on_primary(self):
+        def view(request):
+            cached = model_cache.get_or_compute('read_alias', ('Sale',), lambda: router.db_for_read(Sale))
+            return HttpResponse(f'{cached} {router.db_for_read(Sale)}')
+        self.assertEqual(db_router.use_replica(view)(self._request()).content, b'default replica')
+
+    def test_replica_never_migrates(self):
+        self.assertFalse(db_router.ReplicaRouter().allow_migrate('replica', 'core'))
+        self.assertIsNone(db_router.ReplicaRouter().allow_migrate('default', 'core'))
+
+
+class ReplicaNotConfiguredTests(SimpleTestCase):
+    def test_views_use_primary_without_replica_alias(self):
+        self.assertNotIn('replica', settings.DATABASES)
+        request = RequestFactory().get('/reports/')
+        request.session = SessionStore()
+        self.assertEqual(db_router.use_replica(_read_alias_view)(request).content, b'default')
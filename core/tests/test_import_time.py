@@ -0,0 +1,28 @@
+from django.test import SimpleTestCase
+
+from core import benchmarks
+
+
+class ColdStartImportTests(SimpleTestCase):
+    """The serverless entry point must boot without the export libraries or view modules."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.result = benchmarks.measure_import_time()
+
+    def test_heavy_modules_are_deferred(self):
+        self.assertEqual(benchmarks.deferred_modules_loaded(self.result['modules']), [])
+
+    def test_import_time_within_budget(self):
+        self.assertLessEqual(
+            self.result['total_ms'],
+            benchmarks.IMPORT_TIME_BUDGET_MS,
+            f"cold start imports took {self.result['total_ms']:.0f} ms (budget {benchmarks.IMPORT_TIME_BUDGET_MS} ms)",
+        )
+
+    def test_views_load_on_first_use(self):
+        from core import views
+
+        self.assertEqual(views.lazy('sales_export_csv').statement_timeout, 'export')
+        self.assertIs(views.sale_list, views.lazy('sale_list').view)
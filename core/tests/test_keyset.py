@@ -0,0 +1,85 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import keyset
+from core.models import InventoryItem, LedgerEntry, StockHistory
+
+
+class KeysetPaginateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        LedgerEntry.objects.bulk_create([
+            LedgerEntry(entry_type='credit', source='sale_payment', reference=f'R{n}', amount=Decimal(n))
+            for n in range(1, 8)
+        ])
+        # Two rows share a timestamp, so the id breaks the tie.
+        now = timezone.now()
+        for n, entry in enumerate(LedgerEntry.objects.order_by('pk')):
+            LedgerEntry.objects.filter(pk=entry.pk).update(timestamp=now - timedelta(minutes=min(n, 5)))
+
+    def refs(self, page):
+        return [entry.reference for entry in page]
+
+    def test_walks_forward_and_back_without_gaps_or_repeats(self):
+        qs = LedgerEntry.objects.all()
+        first = keyset.paginate(qs, 'timestamp', None, 3)
+        self.assertEqual(self.refs(first), ['R1', 'R2', 'R3'])
+        self.assertFalse(first.has_previous)
+
+        second = keyset.paginate(qs, 'timestamp', first.next_cursor, 3)
+        third = keyset.paginate(qs, 'timestamp', second.next_cursor, 3)
+        self.assertEqual(self.refs(second), ['R4', 'R5', 'R7'])
+        self.assertEqual(self.refs(third), ['R6'])
+        self.assertIsNone(third.next_cursor)
+
+        back = keyset.paginate(qs, 'timestamp', third.previous_cursor, 3)
+        self.assertEqual(self.refs(back), ['R4', 'R5', 'R7'])
+        self.assertEqual(self.refs(keyset.paginate(qs, 'timestamp', back.previous_cursor, 3)), ['R1', 'R2', 'R3'])
+
+    def test_deep_page_is_one_limited_query_and_bad_cursors_restart(self):
+        page = keyset.paginate(LedgerEntry.objects.all(), 'timestamp', None, 3)
+        with self.assertNumQueries(1) as ctx:
+            list(keyset.paginate(LedgerEntry.objects.all(), 'timestamp', page.next_cursor, 3))
+        sql = ctx.captured_queries[0]['sql']
+        self.assertIn('LIMIT 4', sql)
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('COUNT', sql)
+        self.assertEqual(self.refs(keyset.paginate(LedgerEntry.objects.all(), 'timestamp', 'not-a-cursor', 3)), ['R1', 'R2', 'R3'])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class KeysetViewTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_superuser(username='keyset', password='x')
+        self.client.force_login(user)
+
+    def test_ledger_json_variant_pages_by_cursor(self):
+        LedgerEntry.objects.bulk_create([
+            LedgerEntry(entry_type='debit', source='expense', reference=f'E{n}', amount=Decimal('1.00'))
+            for n in range(15)
+        ])
+        body = self.client.get(reverse('ledger'), {'format': 'json'}).json()
+        self.assertEqual(len(body['results']), 10)
+        self.assertIsNone(body['previous'])
+        body = self.client.get(reverse('ledger'), {'format': 'json', 'cursor': body['next']}).json()
+        self.assertEqual((len(body['results']), body['next']), (5, None))
+
+        response = self.client.get(reverse('ledger'))
+        self.assertContains(response, 'Older')
+        self.assertEqual(response.context['debit_total'], Decimal('15.00'))
+
+    def test_stock_history_page_is_scoped_to_the_item(self):
+        item = InventoryItem.objects.create(part_name='Bolt', part_code='B-1', quantity=Decimal('5'))
+        other = InventoryItem.objects.create(part_name='Nut', part_code='N-1', quantity=Decimal('5'))
+        for target in (item, other):
+            StockHistory.objects.create(
+                item=target, transaction_type='in', quantity=5, previous_quantity=0, new_quantity=5, reason='Initial stock',
+            )
+        response = self.client.get(reverse('inventory_stock_history', args=[item.pk]), {'format': 'json'})
+        self.assertEqual([row['reason'] for row in response.json()['results']], ['Initial stock'])
+        self.assertContains(self.client.get(reverse('inventory_stock_history', args=[item.pk])), 'Initial stock')
@@ -0,0 +1,82 @@
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import local_dates
+from core.models import Customer, Expense, Sale
+
+
+class LocalDateColumnTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name='Acme Ltd', phone='123456')
+
+    def test_dates_are_set_on_create_and_finalize(self):
+        # 20:30 UTC is 02:30 the next morning in Dhaka (UTC+6).
+        late_evening_utc = datetime(2026, 3, 9, 20, 30, tzinfo=dt_timezone.utc)
+        sale = Sale.objects.create(customer=self.customer, created_at=late_evening_utc)
+        self.assertEqual(sale.created_date, date(2026, 3, 10))
+        self.assertIsNone(sale.finalized_date)
+
+        sale.finalized_at = late_evening_utc
+        sale.status = 'finalized'
+        sale.save(update_fields=['status', 'finalized_at'])
+        sale.refresh_from_db()
+        self.assertEqual(sale.finalized_date, date(2026, 3, 10))
+
+        sale.finalized_at = None
+        sale.save(update_fields=['finalized_at'])
+        sale.refresh_from_db()
+        self.assertIsNone(sale.finalized_date)
+
+    def test_backfill_command_repairs_rows_written_around_save(self):
+        sale = Sale.objects.create(customer=self.customer)
+        Sale.objects.filter(pk=sale.pk).update(created_date=None, finalized_at=datetime(2026, 1, 31, 19, 0, tzinfo=dt_timezone.utc))
+
+        out = StringIO()
+        call_command('backfill_local_dates', stdout=out)
+        self.assertIn('Sales updated: 1', out.getvalue())
+        sale.refresh_from_db()
+        self.assertEqual(sale.created_date, local_dates.local_date(sale.created_at))
+        self.assertEqual(sale.finalized_date, date(2026, 2, 1))
+
+        call_command('backfill_local_dates', stdout=out)
+        self.assertIn('Sales updated: 0', out.getvalue())
+
+    def test_month_range_is_half_open(self):
+        self.assertEqual(local_dates.month_range(2026, 12), (date(2026, 12, 1), date(2027, 1, 1)))
+        self.assertEqual(local_dates.month_range(2028, 2), (date(2028, 2, 1), date(2028, 3, 1)))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SargableDateFilterTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_superuser(username='dates', password='x')
+        self.client.force_login(user)
+        self.customer = Customer.objects.create(name='Acme Ltd', phone='123456')
+
+    def assert_no_per_row_date_conversion(self, ctx):
+        for query in ctx.captured_queries:
+            self.assertNotIn('django_datetime_cast_date', query['sql'])
+            self.assertNotIn('django_date_extract', query['sql'])
+
+    def test_sale_list_date_range_uses_created_date(self):
+        Sale.objects.create(customer=self.customer, created_at=datetime(2026, 3, 9, 20, 30, tzinfo=dt_timezone.utc))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('sale_list'), {'start_date': '2026-03-10', 'end_date': '2026-03-10'})
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+        self.assert_no_per_row_date_conversion(ctx)
+
+    def test_expense_month_filter_includes_the_whole_month_only(self):
+        for day in (date(2026, 4, 30), date(2026, 5, 1), date(2026, 3, 31)):
+            Expense.objects.create(category='transport', description=f'Fuel {day}', amount=Decimal('10.00'), date=day)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('expense_list'), {'month': '2026-04'})
+        self.assertEqual(response.context['total_expenses'], Decimal('10.00'))
+        self.assert_no_per_row_date_conversion(ctx)
@@ -0,0 +1,102 @@
+from decimal import Decimal
+from unittest import skipUnless
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import metrics
+from core.models import Customer, InventoryItem, Sale, SaleItem, SalePayment
+
+
+@skipUnless(metrics.enabled(), 'prometheus_client is not installed')
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    METRICS_TOKEN='scrape-secret',
+)
+class PrometheusMetricsTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(username='metrics_admin', password='pass12345', email='m@example.com')
+
+    def _sample(self, name, labels):
+        from prometheus_client import REGISTRY
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_endpoint_requires_token_or_superuser(self):
+        self.assertEqual(self.client.get(reverse('prometheus_metrics')).status_code, 403)
+        response = self.client.get(reverse('prometheus_metrics'), HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(reverse('prometheus_metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'orgms_request_duration_seconds', response.content)
+
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(reverse('prometheus_metrics')).status_code, 200)
+
+    def test_requests_are_observed_by_url_name(self):
+        self.client.force_login(self.admin)
+        labels = {'view': 'dashboard', 'method': 'GET', 'status': '200'}
+        before = self._sample('orgms_request_duration_seconds_count', labels)
+        queries_before = self._sample('orgms_request_db_queries_sum', {'view': 'dashboard'})
+        self.client.get(reverse('dashboard'))
+        self.assertEqual(self._sample('orgms_request_duration_seconds_count', labels), before + 1)
+        self.assertGreater(self._sample('orgms_request_db_queries_sum', {'view': 'dashboard'}), queries_before)
+
+    def test_exports_and_finalize_locks_are_timed(self):
+        self.client.force_login(self.admin)
+        before = self._sample('orgms_export_duration_seconds_count', {'export': 'sales_csv'})
+        self.client.get(reverse('sales_export_csv'))
+        self.assertEqual(self._sample('orgms_export_duration_seconds_count', {'export': 'sales_csv'}), before + 1)
+
+        customer = Customer.objects.create(name='Metrics Customer', phone='01700000001')
+        item = InventoryItem.objects.create(part_name='Bolt', part_code='MET-1', quantity=Decimal('5'), unit_price=Decimal('2.00'))
+        sale = Sale.objects.create(customer=customer, created_by=self.admin)
+        SaleItem.objects.create(sale=sale, item_type='inventory', inventory_item=item, quantity=Decimal('1'), unit_price=Decimal('2.00'))
+        before = self._sample('orgms_lock_wait_seconds_count', {'lock': 'finalize'})
+        sale.finalize(user=self.admin)
+        self.assertEqual(self._sample('orgms_lock_wait_seconds_count', {'lock': 'finalize'}), before + 1)
+
+    def test_payment_locks_are_timed_separately(self):
+        customer = Customer.objects.create(name='Lock Customer', phone='01700000003')
+        sale = Sale.objects.create(customer=customer, created_by=self.admin)
+        SaleItem.objects.create(sale=sale, item_type='non_inventory', description='Service', quantity=Decimal('1'), unit_price=Decimal('50.00'))
+        sale.recalc_total(save=True)
+        before = {lock: self._sample('orgms_lock_wait_seconds_count', {'lock': lock}) for lock in ('sale', 'customer')}
+        self.client.force_login(self.admin)
+        self.client.post(reverse('sale_add_payment', args=[sale.pk]), {
+            'amount': '20', 'payment_date': timezone.localdate().isoformat(), 'method': 'cash', 'notes': '',
+        })
+        self.assertTrue(SalePayment.objects.filter(sale=sale).exists())
+        for lock in ('sale', 'customer'):
+            self.assertEqual(self._sample('orgms_lock_wait_seconds_count', {'lock': lock}), before[lock] + 1)
+
+    def test_stale_copy_cannot_finalize_twice(self):
+        customer = Customer.objects.create(name='Race Customer', phone='01700000002')
+        item = InventoryItem.objects.create(part_name='Nut', part_code='MET-2', quantity=Decimal('5'), unit_price=Decimal('2.00'))
+        sale = Sale.objects.create(customer=customer, created_by=self.admin)
+        SaleItem.objects.create(sale=sale, item_type='inventory', inventory_item=item, quantity=Decimal('1'), unit_price=Decimal('2.00'))
+        stale = Sale.objects.get(pk=sale.pk)
+        sale.finalize(user=self.admin)
+        with self.assertRaises(ValueError):
+            stale.finalize(user=self.admin)
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, Decimal('4'))
+
+    def test_connection_reuse_is_counted(self):
+        self.client.force_login(self.admin)
+        before = sum(self._sample('orgms_db_connections_total', {'alias': 'default', 'result': r}) for r in ('new', 'reused'))
+        self.client.get(reverse('dashboard'))
+        after = sum(self._sample('orgms_db_connections_total', {'alias': 'default', 'result': r}) for r in ('new', 'reused'))
+        self.assertEqual(after, before + 1)
+
+    async def test_async_view_queries_are_counted(self):
+        await sync_to_async(self.async_client.force_login)(self.admin)
+        before = self._sample('orgms_request_db_queries_sum', {'view': 'dashboard_metrics_api'})
+        response = await self.async_client.get(reverse('dashboard_metrics_api'))
+        self.assertEqual(response.status_code, 200)
+        # Eleven aggregates run in sync_to_async threads, plus session and user lookups.
+        self.assertGreaterEqual(self._sample('orgms_request_db_queries_sum', {'view': 'dashboard_metrics_api'}) - before, 11)
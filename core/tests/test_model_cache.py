@@ -0,0 +1,139 @@
+import os
+import subprocess
+import sys
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCache
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import cache as model_cache
+from core.models import Expense, InventoryItem
+from core.tests.redis_standin import RedisStandIn
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'model-cache-tests'}},
+)
+class ModelVersionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_save_and_delete_bump_the_model_version(self):
+        before = model_cache.model_versions('InventoryItem', 'Expense')
+        item = InventoryItem.objects.create(part_name='Belt', part_code='MC-1', quantity=Decimal('3'), unit_price=Decimal('1.00'))
+        after_save = model_cache.model_versions('InventoryItem', 'Expense')
+        self.assertGreater(after_save['InventoryItem'], before['InventoryItem'])
+        self.assertEqual(after_save['Expense'], before['Expense'])
+
+        item.delete()
+        self.assertGreater(model_cache.model_versions('InventoryItem')['InventoryItem'], after_save['InventoryItem'])
+
+    def test_get_or_compute_reuses_until_a_dependency_changes(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return Expense.objects.count()
+
+        self.assertEqual(model_cache.get_or_compute('expense_count', ('Expense',), compute), 0)
+        self.assertEqual(model_cache.get_or_compute('expense_count', ('Expense',), compute), 0)
+        self.assertEqual(len(calls), 1)
+
+        # Unrelated writes keep the cached value.
+        InventoryItem.objects.create(part_name='Gear', part_code='MC-2', quantity=Decimal('1'), unit_price=Decimal('1.00'))
+        model_cache.get_or_compute('expense_count', ('Expense',), compute)
+        self.assertEqual(len(calls), 1)
+
+        Expense.objects.create(category='transport', description='Taxi', amount=Decimal('5.00'))
+        self.assertEqual(model_cache.get_or_compute('expense_count', ('Expense',), compute), 1)
+        self.assertEqual(len(calls), 2)
+
+    def test_evicted_counter_does_not_reuse_old_versions(self):
+        old = model_cache.model_versions('Sale')['Sale']
+        cache.delete('modelver:Sale')
+        self.assertNotEqual(model_cache.model_versions('Sale')['Sale'], old)
+
+    def test_fragment_tag_changes_with_versions(self):
+        template = Template("{% load model_cache %}{% model_versions 'Expense' as v %}{{ v }}")
+        first = template.render(Context())
+        self.assertEqual(first, template.render(Context()))
+        Expense.objects.create(category='transport', description='Bus', amount=Decimal('2.00'))
+        self.assertNotEqual(first, template.render(Context()))
+
+    def test_dashboard_reflects_writes_immediately(self):
+        admin = get_user_model().objects.create_superuser(username='cache_admin', password='pass12345', email='c@example.com')
+        self.client.force_login(admin)
+        self.client.get(reverse('dashboard'))
+        InventoryItem.objects.create(part_name='Chain', part_code='MC-3', quantity=Decimal('2'), unit_price=Decimal('10.00'))
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total_inventory_items'], 1)
+        self.assertEqual(response.context['total_inventory_value'], Decimal('20.00'))
+
+    def test_no_backend_computes_every_time(self):
+        calls = []
+        with self.settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            self.assertFalse(model_cache.enabled())
+            for _ in range(2):
+                model_cache.get_or_compute('expense_count', ('Expense',), lambda: calls.append(1))
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(model_cache.shared())
+
+    def test_unknown_backend_is_rejected(self):
+        env = dict(os.environ, CACHE_BACKEND='memcache', DJANGO_SETTINGS_MODULE='org_management.settings')
+        proc = subprocess.run(
+            [sys.executable, '-c', 'import django; django.setup()'],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=False,
+        )
+        self.assertNotEqual(proc.returncode, 0)
+        self.assertIn('ImproperlyConfigured', proc.stderr)
+
+
+@skipUnless(redis, 'the redis package is not installed')
+@override_settings(SECURE_SSL_REDIRECT=False)
+class RedisModelCacheTests(TestCase):
+    """The version cache against the redis backend, served by the in-process stand-in."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = RedisStandIn().start()
+        cls.addClassCleanup(cls.server.stop)
+        cls.enterClassContext(override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': cls.server.url},
+        }))
+        super().setUpClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_versions_are_shared_between_processes(self):
+        self.assertTrue(model_cache.shared())
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return Expense.objects.count()
+
+        model_cache.get_or_compute('expense_count', ('Expense',), compute)
+        model_cache.get_or_compute('expense_count', ('Expense',), compute)
+        self.assertEqual(len(calls), 1)
+
+        # Another worker has its own connection to the same server.
+        other_worker = RedisCache(self.server.url, {})
+        before = other_worker.get('modelver:Expense')
+        Expense.objects.create(category='transport', description='Taxi', amount=Decimal('5.00'))
+        self.assertGreater(other_worker.get('modelver:Expense'), before)
+        self.assertEqual(model_cache.get_or_compute('expense_count', ('Expense',), compute), 1)
+        self.assertEqual(len(calls), 2)
@@ -0,0 +1,75 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import pagination
+from core.models import Customer, Expense, Supplier
+
+_LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'pagination-tests'}}
+
+
+def _counts(ctx):
+    return [q['sql'] for q in ctx.captured_queries if 'COUNT(' in q['sql']]
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=_LOCMEM)
+class CountedPaginatorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for n in range(12):
+            Supplier.objects.create(name=f'Supplier {n}', phone=f'0170000{n:04d}')
+
+    def test_count_is_cached_until_the_model_changes(self):
+        paginator = pagination.CountedPaginator(Supplier.objects.filter(name__startswith='Supplier'), 10)
+        self.assertEqual(paginator.count, 12)
+        with CaptureQueriesContext(connection) as ctx:
+            again = pagination.CountedPaginator(Supplier.objects.filter(name__startswith='Supplier'), 10)
+            self.assertEqual((again.count, again.num_pages), (12, 2))
+        self.assertEqual(_counts(ctx), [])
+        # Another filter is another key.
+        self.assertEqual(pagination.CountedPaginator(Supplier.objects.filter(name='Supplier 1'), 10).count, 1)
+
+        Supplier.objects.create(name='Supplier 12', phone='1')
+        self.assertEqual(pagination.CountedPaginator(Supplier.objects.filter(name__startswith='Supplier'), 10).count, 13)
+
+    def test_joins_to_models_without_versions_are_counted_every_time(self):
+        qs = Customer.objects.filter(account__total_due__gt=0)
+        pagination.CountedPaginator(qs, 10).count
+        with CaptureQueriesContext(connection) as ctx:
+            pagination.CountedPaginator(qs, 10).count
+        self.assertEqual(len(_counts(ctx)), 1)
+
+    def test_known_count_and_planner_estimate_skip_the_count(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(pagination.CountedPaginator(Supplier.objects.all(), 10, count=12).num_pages, 2)
+        self.assertIsNone(pagination.planner_estimate(Supplier.objects.all()))
+
+        with override_settings(PAGINATION_ESTIMATE_THRESHOLD=1000), \
+                mock.patch.object(pagination, 'planner_estimate', return_value=250000):
+            paginator = pagination.CountedPaginator(Supplier.objects.all(), 10)
+            self.assertEqual((paginator.count, paginator.estimated), (250000, True))
+
+    def test_list_page_reads_the_cached_count(self):
+        user = get_user_model().objects.create_superuser(username='pager', password='x')
+        self.client.force_login(user)
+        self.client.get(reverse('supplier_list'))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('supplier_list'), {'page': 2})
+        self.assertFalse([sql for sql in _counts(ctx) if 'core_supplier' in sql])
+        self.assertContains(response, 'of 12')
+        self.assertEqual(len(response.context['suppliers']), 2)
+
+    def test_expense_list_reuses_its_aggregate(self):
+        user = get_user_model().objects.create_superuser(username='pager2', password='x')
+        self.client.force_login(user)
+        Expense.objects.create(category='rent', description='Shop rent', amount=Decimal('100.00'))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('expense_list'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+        self.assertFalse([sql for sql in _counts(ctx) if 'core_expense' in sql and 'SUM(' not in sql])
@@ -0,0 +1,129 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core import payment_allocation
+from core.models import (
+    Customer, CustomerAccount, CustomerPaymentBatch, LedgerEntry, Sale, SalePayment, Supplier, SupplierAccount,
+    SupplierPurchase, SupplierPurchasePayment,
+)
+
+
+class FifoSplitTests(SimpleTestCase):
+    def test_split_fills_oldest_first_and_stops(self):
+        split = payment_allocation.fifo_split(Decimal('70'), [('a', Decimal('50')), ('b', Decimal('30')), ('c', Decimal('10'))])
+        self.assertEqual(split, [('a', Decimal('50')), ('b', Decimal('20'))])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CustomerPaymentAllocationTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_superuser(username='fifo', password='x')
+        self.client.force_login(user)
+        self.customer = Customer.objects.create(name='Acme Ltd', phone='1')
+
+    def sale(self, amount, paid='0'):
+        sale = Sale.objects.create(
+            customer=self.customer, status='finalized', total_amount=Decimal(amount), finalized_at=timezone.now(),
+        )
+        if Decimal(paid):
+            SalePayment.objects.create(sale=sale, amount=Decimal(paid))
+        return sale
+
+    def pay(self, amount):
+        return self.client.post(reverse('customer_add_payment', args=[self.customer.pk]), {
+            'amount': amount, 'payment_date': timezone.localdate().isoformat(), 'method': 'cash', 'notes': 'counter',
+        })
+
+    def test_payment_is_split_over_due_sales_oldest_first(self):
+        settled = self.sale('40.00', paid='40.00')
+        first = self.sale('100.00', paid='30.00')
+        second = self.sale('50.00')
+        third = self.sale('25.00')
+
+        response = self.pay('100')
+        batch = CustomerPaymentBatch.objects.get()
+        self.assertRedirects(
+            response, reverse('customer_payment_receipt', args=[self.customer.pk, batch.batch_ref]),
+            fetch_redirect_response=False,
+        )
+        allocations = {a.sale_id: a.amount for a in batch.allocations.all()}
+        self.assertEqual(allocations, {first.pk: Decimal('70.00'), second.pk: Decimal('30.00')})
+        self.assertFalse(settled.payments.exclude(amount=Decimal('40.00')).exists())
+        self.assertFalse(third.payments.exists())
+
+        # One ledger row per generated payment, no duplicates from the post_save signal.
+        for allocation in batch.allocations.select_related('sale_payment'):
+            receipt = allocation.sale_payment.receipt_number
+            self.assertEqual(LedgerEntry.objects.filter(source='sale_payment', reference=receipt).count(), 1)
+            self.assertIn(f'[Batch:{batch.batch_ref}]', allocation.sale_payment.notes)
+
+        account = CustomerAccount.objects.get(customer=self.customer)
+        self.assertEqual(account.total_due, Decimal('45.00'))
+
+    def test_overpayment_is_rejected_without_writing(self):
+        self.sale('20.00')
+        self.pay('25')
+        self.assertFalse(CustomerPaymentBatch.objects.exists())
+        self.assertEqual(SalePayment.objects.count(), 0)
+        self.assertIn('Payment exceeds customer total due (Tk 20.00).', self.client.session['customer_payment_error'])
+
+    def test_query_count_does_not_grow_with_the_number_of_sales(self):
+        def queries_for(sale_count):
+            for _ in range(sale_count):
+                self.sale('10.00')
+            with CaptureQueriesContext(connection) as ctx:
+                self.pay(str(10 * sale_count))
+            return len(ctx.captured_queries)
+
+        self.assertEqual(queries_for(2), queries_for(12))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SupplierPaymentAllocationTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_superuser(username='fifo_supplier', password='x')
+        self.client.force_login(user)
+        self.supplier = Supplier.objects.create(name='ABC Supplier', phone='01700000000')
+
+    def purchase(self, price, purchase_date, paid='0.00'):
+        return SupplierPurchase.objects.create(
+            supplier=self.supplier, product_name='Thread', price=Decimal(price), paid_amount=Decimal(paid),
+            purchase_date=purchase_date,
+        )
+
+    def pay(self, purchase, amount):
+        return self.client.post(reverse('supplier_add_payment', args=[self.supplier.pk, purchase.pk]), {
+            'amount': amount, 'payment_date': '2026-04-20', 'method': 'cash', 'reference_number': '', 'notes': '',
+            'source': 'supplier_detail',
+        })
+
+    def test_payment_is_split_oldest_purchase_first_in_bulk(self):
+        newer = self.purchase('300.00', date(2026, 2, 1))
+        older = self.purchase('200.00', date(2026, 1, 1), paid='50.00')
+        self.purchase('80.00', date(2025, 12, 1), paid='80.00')
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.pay(newer, '250')
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "core_supplierpurchase"')]
+        self.assertEqual(len(updates), 1)
+
+        older.refresh_from_db()
+        newer.refresh_from_db()
+        self.assertEqual((older.paid_amount, newer.paid_amount), (Decimal('200.00'), Decimal('100.00')))
+        self.assertEqual([p.amount for p in older.payments.all()], [Decimal('150.00')])
+        receipts = SupplierPurchasePayment.objects.values_list('receipt_number', flat=True)
+        self.assertEqual(LedgerEntry.objects.filter(source='supplier_payment', reference__in=receipts).count(), 2)
+        self.assertEqual(SupplierAccount.objects.get(supplier=self.supplier).total_due, Decimal('200.00'))
+
+    def test_overpayment_is_rejected(self):
+        purchase = self.purchase('100.00', date(2026, 1, 1))
+        self.pay(purchase, '150')
+        self.assertFalse(SupplierPurchasePayment.objects.exists())
+        self.assertEqual(self.client.session['supplier_payment_error'], 'Payment exceeds total remaining due amount.')
@@ -0,0 +1,48 @@
+from collections import deque
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import benchmarks
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class HotViewQueryBudgetTests(TestCase):
+    """Each hot view must stay within its query budget on the benchmark dataset."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fixtures = benchmarks.seed_benchmark_data(scale=1)
+
+    def setUp(self):
+        self.client.force_login(self.fixtures['user'])
+
+    def test_hot_views_stay_within_query_budgets(self):
+        for label, budget_key, url, params in benchmarks.hot_view_requests(self.fixtures):
+            with self.subTest(view=label):
+                status_code, queries, _wall_ms = benchmarks.measure_view(self.client, url, params)
+                self.assertEqual(status_code, 200)
+                self.assertLessEqual(
+                    queries,
+                    benchmarks.QUERY_BUDGETS[budget_key],
+                    f'{label} ran {queries} queries (budget {benchmarks.QUERY_BUDGETS[budget_key]})',
+                )
+
+    def test_every_hot_view_has_a_budget(self):
+        budget_keys = {budget_key for _label, budget_key, _url, _params in benchmarks.hot_view_requests(self.fixtures)}
+        self.assertEqual(budget_keys - set(benchmarks.QUERY_BUDGETS), set())
+
+    def test_repeated_measurements_keep_counting_queries(self):
+        connection.queries_log.extend({'sql': 'SELECT 1', 'time': '0'} for _ in range(connection.queries_log.maxlen))
+        _status, queries, _wall_ms = benchmarks.measure_view(self.client, reverse('dashboard'), repeat=2)
+        self.assertGreater(queries, 0)
+
+    def test_overflowing_the_query_log_fails_the_measurement(self):
+        with mock.patch.object(connection, 'queries_log', deque(maxlen=3)):
+            with self.assertRaises(benchmarks.QueryLogOverflow):
+                benchmarks.measure_view(self.client, reverse('dashboard'))
@@ -0,0 +1,80 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import profiling
+
+
+class RequestProfilerTests(TestCase):
+    def setUp(self):
+        self.profile_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.profile_dir, ignore_errors=True)
+        self.settings_override = override_settings(
+            SECURE_SSL_REDIRECT=False,
+            STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+            REQUEST_PROFILER_ENABLED=True,
+            REQUEST_PROFILER_DIR=self.profile_dir,
+            REQUEST_PROFILER_MAX_CAPTURES=2,
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(username='prof_admin', password='pass12345', email='a@example.com')
+        self.staff = User.objects.create_user(username='prof_staff', password='pass12345', is_staff=True)
+
+    def test_superuser_with_token_gets_profiled(self):
+        self.client.force_login(self.admin)
+        token = profiling.make_profile_token(self.admin)
+        response = self.client.get(reverse('dashboard'), HTTP_X_PROFILE_TOKEN=token)
+        self.assertEqual(response.status_code, 200)
+        capture = profiling.load_capture(response['X-Profile-Id'])
+        self.assertEqual(capture['path'], reverse('dashboard'))
+        self.assertEqual(capture['query_count'], len(capture['queries']))
+        self.assertGreater(capture['query_count'], 0)
+        self.assertIn('cumulative', capture['stats'])
+        self.assertIsNotNone(profiling.capture_path(capture['id'], '.prof'))
+
+    def test_requests_without_valid_token_are_not_profiled(self):
+        self.client.force_login(self.admin)
+        self.assertNotIn('X-Profile-Id', self.client.get(reverse('dashboard')))
+        self.assertNotIn('X-Profile-Id', self.client.get(reverse('dashboard'), {'_profile': 'forged'}))
+
+        # A token minted for someone else (or a non-superuser) is rejected.
+        self.client.force_login(self.staff)
+        token = profiling.make_profile_token(self.admin)
+        self.assertNotIn('X-Profile-Id', self.client.get(reverse('dashboard'), {'_profile': token}))
+
+    def test_ring_buffer_keeps_newest_captures(self):
+        self.client.force_login(self.admin)
+        token = profiling.make_profile_token(self.admin)
+        ids = [self.client.get(reverse('dashboard'), {'_profile': token})['X-Profile-Id'] for _ in range(3)]
+        kept = {row['id'] for row in profiling.list_captures()}
+        self.assertEqual(kept, set(ids[1:]))
+
+    def test_admin_pages_list_and_show_captures(self):
+        self.client.force_login(self.admin)
+        token = profiling.make_profile_token(self.admin)
+        capture_id = self.client.get(reverse('dashboard'), {'_profile': token})['X-Profile-Id']
+
+        response = self.client.get(reverse('admin-request-profiles'))
+        self.assertContains(response, capture_id)
+        response = self.client.get(reverse('admin-request-profile-detail', args=[capture_id]))
+        self.assertContains(response, 'SQL timeline')
+        response = self.client.get(reverse('admin-request-profile-download', args=[capture_id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(reverse('admin-request-profile-detail', args=['..%2Fsecret'])).status_code, 404)
+
+    def test_disabled_profiler_is_removed_from_middleware_chain(self):
+        with self.settings(REQUEST_PROFILER_ENABLED=False):
+            from django.test import Client
+            client = Client()
+            client.force_login(self.admin)
+            token = profiling.make_profile_token(self.admin)
+            response = client.get(reverse('dashboard'), {'_profile': token})
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(list(self.profile_dir.glob('*.json')), [])
@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Customer, InventoryItem, Sale, SaleItem
+
+XHR = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SaleFragmentTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_superuser(username='counter', password='x')
+        self.client.force_login(user)
+        self.inv = InventoryItem.objects.create(
+            part_name='Gear', part_code='G001', quantity=50, unit='pcs', unit_price=75, minimum_stock=5
+        )
+        customer = Customer.objects.create(name='Acme Ltd', phone='123456')
+        self.sale = Sale.objects.create(customer=customer, created_by=user)
+
+    def add_item(self, **extra):
+        return self.client.post(reverse('sale_add_item', args=[self.sale.pk]), {
+            'item_type': 'inventory', 'inventory_item': str(self.inv.pk),
+            'quantity': '2', 'boxes': '0', 'unit_price': '75',
+        }, **extra)
+
+    def test_plain_post_still_redirects_to_the_sale_page(self):
+        response = self.add_item()
+        self.assertRedirects(response, reverse('sale_detail', args=[self.sale.pk]), fetch_redirect_response=False)
+
+    def test_add_item_returns_updated_fragments_and_messages(self):
+        response = self.add_item(**XHR)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(set(data['fragments']), {'totals', 'payments', 'items'})
+        self.assertEqual(data['status'], 'draft')
+        self.assertIn('Gear (G001)', data['fragments']['items'])
+        self.assertIn('150.00', data['fragments']['totals'])
+        self.assertEqual(data['messages'], [{'level': 'success', 'text': 'Item added to sale.'}])
+
+        # The messages went out with the fragments, not with the next page.
+        page = self.client.get(reverse('sale_detail', args=[self.sale.pk]))
+        self.assertNotContains(page, 'Item added to sale.')
+
+    def test_fragments_are_smaller_than_the_page(self):
+        self.add_item()
+        page = self.client.get(reverse('sale_detail', args=[self.sale.pk]))
+        data = self.client.get(reverse('sale_fragments', args=[self.sale.pk])).json()
+        self.assertLess(sum(len(html) for html in data['fragments'].values()), len(page.content) / 2)
+
+    def test_delete_item_and_add_payment(self):
+        item = SaleItem.objects.create(sale=self.sale, item_type='inventory', inventory_item=self.inv, quantity=2, unit_price=75)
+        self.sale.recalc_total(save=True)
+
+        data = self.client.post(reverse('sale_add_payment', args=[self.sale.pk]), {
+            'amount': '100', 'payment_date': timezone.localdate().isoformat(), 'method': 'cash', 'notes': '',
+        }, **XHR).json()
+        receipt = self.sale.payments.get().receipt_number
+        self.assertIn(receipt, data['fragments']['payments'])
+        self.assertIn('50.00', data['fragments']['totals'])
+
+        data = self.client.post(reverse('sale_delete_item', args=[self.sale.pk, item.pk]), **XHR).json()
+        self.assertIn('No items yet.', data['fragments']['items'])
+        self.sale.refresh_from_db()
+        self.assertEqual(self.sale.total_amount, Decimal('0'))
+
+    def test_invalid_payment_reports_the_error(self):
+        data = self.client.post(reverse('sale_add_payment', args=[self.sale.pk]), {
+            'amount': '10', 'payment_date': timezone.localdate().isoformat(), 'method': 'cash', 'notes': '',
+        }, **XHR).json()
+        self.assertEqual(data['messages'], [{'level': 'error', 'text': 'Payment exceeds remaining balance.'}])
+        self.assertIn('No payments recorded.', data['fragments']['payments'])
@@ -0,0 +1,110 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import sales_facts
+from core.models import Customer, DailySalesFact, InventoryItem, Sale, SaleItem, SalePayment
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class DailySalesFactTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_superuser(username='facts', password='x', first_name='Rina')
+        self.client.force_login(self.user)
+        self.customer = Customer.objects.create(name='Acme Ltd', phone='1')
+        self.item = InventoryItem.objects.create(part_name='Gear', part_code='G-1', quantity=Decimal('100'), unit_price=100)
+
+    def sale(self, inventory_qty=2, machine_price=None, finalize=True):
+        sale = Sale.objects.create(customer=self.customer, created_by=self.user)
+        SaleItem.objects.create(sale=sale, item_type='inventory', inventory_item=self.item, quantity=inventory_qty, unit_price=100)
+        if machine_price:
+            SaleItem.objects.create(sale=sale, item_type='non_inventory', description='Machine', quantity=1, unit_price=machine_price)
+        sale.recalc_total(save=True)
+        if finalize:
+            sale.finalize(user=self.user)
+        return sale
+
+    def facts(self):
+        return {
+            fact.item_type: (fact.sale_count, fact.quantity, fact.amount, fact.paid)
+            for fact in DailySalesFact.objects.filter(customer=self.customer)
+        }
+
+    def test_finalize_and_payments_keep_the_facts_current(self):
+        self.sale(finalize=False)
+        self.assertEqual(self.facts(), {})
+
+        sale = self.sale(inventory_qty=2, machine_price=600)
+        self.sale(inventory_qty=1)
+        self.assertEqual(self.facts(), {
+            'inventory': (2, Decimal('3.000'), Decimal('300.00'), Decimal('0.00')),
+            'non_inventory': (1, Decimal('1.000'), Decimal('600.00'), Decimal('0.00')),
+        })
+        fact = DailySalesFact.objects.filter(item_type='inventory').get()
+        self.assertEqual((fact.date, fact.created_by_id), (timezone.localdate(), self.user.pk))
+
+        payment = SalePayment.objects.create(sale=sale, amount=Decimal('400.00'))
+        # 200 of the sale's 800 is inventory: a quarter of the payment.
+        self.assertEqual(self.facts()['inventory'][3], Decimal('100.00'))
+        self.assertEqual(self.facts()['non_inventory'][3], Decimal('300.00'))
+        payment.delete()
+        self.assertEqual(self.facts()['non_inventory'][3], Decimal('0.00'))
+
+    def test_unfinalizing_or_deleting_a_sale_removes_it(self):
+        sale = self.sale(machine_price=500)
+        other = self.sale()
+        sale.status, sale.finalized_at = 'draft', None
+        sale.save(update_fields=['status', 'finalized_at', 'updated_at'])
+        self.assertEqual(self.facts(), {'inventory': (1, Decimal('2.000'), Decimal('200.00'), Decimal('0.00'))})
+        other.delete()
+        self.assertEqual(self.facts(), {})
+
+    def test_draft_saves_do_not_look_up_the_stored_slice(self):
+        draft = Sale.objects.get(pk=self.sale(finalize=False).pk)
+        draft.notes = 'Deliver on Monday'
+        # The UPDATE only: no stored-slice SELECT, no fact or account refresh.
+        with self.assertNumQueries(1):
+            draft.save(update_fields=['notes', 'updated_at'])
+        with self.assertNumQueries(1):
+            draft.save()
+
+    def test_bulk_customer_payment_refreshes_the_facts(self):
+        self.sale()
+        self.client.post(reverse('customer_add_payment', args=[self.customer.pk]), {
+            'amount': '150', 'payment_date': timezone.localdate().isoformat(), 'method': 'cash', 'notes': '',
+        })
+        self.assertEqual(self.facts()['inventory'][3], Decimal('150.00'))
+
+    def test_rebuild_command_matches_incremental_facts(self):
+        self.sale(machine_price=300)
+        self.sale(inventory_qty=5)
+        expected = self.facts()
+        DailySalesFact.objects.update(amount=0)
+        Sale.objects.filter(status='finalized').update(finalized_date=date(2020, 1, 1))
+        call_command('rebuild_sales_facts', '--from', '2020-01-01', '--to', '2020-01-31', stdout=StringIO())
+        self.assertEqual(DailySalesFact.objects.filter(date=date(2020, 1, 1)).count(), 2)
+        Sale.objects.filter(status='finalized').update(finalized_date=timezone.localdate())
+        call_command('rebuild_sales_facts', stdout=StringIO())
+        self.assertEqual(self.facts(), expected)
+
+    def test_report_groups_and_drills_down(self):
+        self.sale(machine_price=300)
+        today = timezone.localdate()
+        with self.assertNumQueries(2):
+            report = sales_facts.report(today - timedelta(days=7), today, by='item_type')
+        self.assertEqual([row['item_type'] for row in report['rows']], ['non_inventory', 'inventory'])
+        self.assertEqual((report['totals']['amount'], report['totals']['due']), (Decimal('500.00'), Decimal('500.00')))
+
+        response = self.client.get(reverse('sales_report'), {'by': 'salesperson'})
+        self.assertContains(response, 'Rina')
+        row, = response.context['report']['rows']
+        self.assertIn(f'created_by={self.user.pk}', row['drill'])
+        response = self.client.get(reverse('sales_report') + '?' + row['drill'])
+        self.assertEqual(response.context['by'], 'day')
+        self.assertEqual(response.context['report']['rows'][0]['date'], today)
@@ -187,7 +187,7 @@ class SalesFeatureTests(TestCase):
         )
 
         old_dt = timezone.now() - timedelta(days=10)
-        Sale.objects.filter(pk=old_sale.pk).update(created_at=old_dt)
+        Sale.objects.filter(pk=old_sale.pk).update(created_at=old_dt, created_date=timezone.localdate(old_dt))
 
         self.client.logout()
         self.client.login(username='sales_date', password='pass123')
@@ -1,10 +1,12 @@
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.db.models import DecimalField
 from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from core.models import Customer, InventoryItem, Sale, SaleItem, SalePayment
+from core.views import sales as sales_views
 
 
 @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
@@ -67,3 +69,27 @@ class SalesItemFilteringTotalsTests(TestCase):
         self.assertEqual(total_sales, expected_sales)
         self.assertAlmostEqual(float(total_paid), float(expected_paid), places=2)
         self.assertAlmostEqual(float(total_due), float(expected_due), places=2)
+
+    def test_item_type_totals_are_one_query_over_all_sales(self):
+        def sale(status, inventory_qty, machine_price, paid):
+            sale = Sale.objects.create(customer=self.customer, created_by=self.user, status=status)
+            SaleItem.objects.create(sale=sale, item_type='inventory', inventory_item=self.inv, quantity=inventory_qty, unit_price=100)
+            if machine_price:
+                SaleItem.objects.create(sale=sale, item_type='non_inventory', description='Machine', quantity=1, unit_price=machine_price)
+            sale.recalc_total(save=True)
+            if paid:
+                SalePayment.objects.create(sale=sale, payment_date='2024-01-01', amount=paid)
+
+        sale('finalized', 1, 300, 200)    # machine share 3/4 of 200
+        sale('finalized', 2, 0, 100)      # no machine lines: left out
+        sale('draft', 1, 900, 0)          # drafts are not totalled
+        for _ in range(5):
+            sale('finalized', 1, 100, 0)
+
+        sales = sales_views._visible_sales_queryset(self.user).filter(items__item_type='non_inventory').distinct()
+        with self.assertNumQueries(1):
+            amount, paid = sales_views._item_type_totals(sales.exclude(status__in=['draft', 'quote']), 'non_inventory')
+        self.assertEqual((amount, paid), (Decimal('800.00'), Decimal('150.00')))
+
+    def test_prorated_payments_stay_decimal_outside_sqlite(self):
+        self.assertIsInstance(sales_views._prorated_paid('postgresql').output_field, DecimalField)
@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import slow_queries
+from core.models import SlowQuery
+
+
+class SlowQueryNormalizationTests(TestCase):
+    def test_literals_and_in_lists_share_a_fingerprint(self):
+        first = slow_queries.normalize_sql("SELECT * FROM core_sale WHERE id IN (%s, %s, %s) AND status = 'draft' LIMIT 21")
+        second = slow_queries.normalize_sql("SELECT  *  FROM core_sale WHERE id IN (%s) AND status = 'finalized' LIMIT 5")
+        self.assertEqual(first, second)
+        self.assertEqual(first, 'SELECT * FROM core_sale WHERE id IN (...) AND status = ? LIMIT ?')
+        self.assertEqual(slow_queries.fingerprint(first), slow_queries.fingerprint(second))
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    SLOW_QUERY_THRESHOLD_MS=0.000001,
+    SLOW_QUERY_LOG_SYNC=True,
+    SLOW_QUERY_LOG_MAX_ROWS=25,
+)
+class SlowQueryCaptureTests(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(username='sq_admin', password='pass12345', email='a@example.com')
+        self.client.force_login(self.admin)
+
+    def test_queries_over_threshold_are_recorded_with_view_name(self):
+        self.client.get(reverse('dashboard'))
+        rows = SlowQuery.objects.filter(view_name='dashboard')
+        self.assertTrue(rows.exists())
+        self.assertTrue(all(len(row.fingerprint) == 16 for row in rows))
+        self.assertIn('core/views/', rows.first().stack)
+
+    def test_table_is_capped(self):
+        for _ in range(3):
+            self.client.get(reverse('dashboard'))
+        self.assertLessEqual(SlowQuery.objects.count(), 25)
+
+    def test_admin_report_aggregates_by_fingerprint(self):
+        self.client.get(reverse('dashboard'))
+        response = self.client.get(reverse('admin-slow-queries'), {'view': 'dashboard'})
+        self.assertEqual(response.status_code, 200)
+        by_fingerprint = response.context['by_fingerprint']
+        self.assertTrue(by_fingerprint)
+        self.assertEqual({'dashboard'}, set(by_fingerprint[0]['views']))
+        self.assertGreaterEqual(by_fingerprint[0]['total_ms'], by_fingerprint[-1]['total_ms'])
+
+        response = self.client.post(reverse('admin-slow-queries'), {'action': 'clear'})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(SlowQuery.objects.filter(view_name='dashboard').exists())
+
+    def test_non_superuser_is_rejected(self):
+        staff = get_user_model().objects.create_user(username='sq_staff', password='pass12345', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(reverse('admin-slow-queries')).status_code, 403)
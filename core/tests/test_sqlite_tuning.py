@@ -0,0 +1,36 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.conf import settings
+
+from core.models import Expense
+
+
+@skipUnless(connection.vendor == 'sqlite' and settings.SQLITE_TUNING, 'SQLite tuning profile not active')
+class SQLiteTuningTests(TestCase):
+    def test_connection_pragmas_are_applied(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['cache_size'])
+
+    def test_maintenance_command_runs(self):
+        out = StringIO()
+        call_command('sqlite_maintenance', stdout=out)
+        self.assertIn('SQLite maintenance complete.', out.getvalue())
+
+
+@skipUnless(connection.vendor == 'sqlite' and settings.SQLITE_TUNING, 'SQLite tuning profile not active')
+class SQLiteImmediateTransactionTests(TransactionTestCase):
+    def test_write_transactions_begin_immediate(self):
+        with CaptureQueriesContext(connection) as ctx:
+            with transaction.atomic():
+                Expense.objects.create(category='transport', description='Fuel', amount='10.00')
+        self.assertEqual(ctx.captured_queries[0]['sql'], 'BEGIN IMMEDIATE')
@@ -0,0 +1,84 @@
+import importlib.util
+import json
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.models import InventoryItem
+
+# <script> blocks the browser would execute: no src and not a JSON data block.
+INLINE_SCRIPT = re.compile(r'<script(?![^>]*\bsrc=)(?![^>]*type="application/json")[^>]*>', re.IGNORECASE)
+INLINE_HANDLER = re.compile(r'<[^>]*\son[a-z]+\s*=', re.IGNORECASE)
+
+
+def _project_templates():
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        yield from Path(directory).rglob('*.html')
+
+
+class InlineScriptTests(TestCase):
+    def test_templates_have_no_inline_scripts_or_event_handlers(self):
+        offenders = []
+        for path in _project_templates():
+            source = path.read_text()
+            if INLINE_SCRIPT.search(source) or INLINE_HANDLER.search(source):
+                offenders.append(str(path))
+        self.assertEqual(offenders, [])
+
+    def test_csp_disallows_inline_scripts(self):
+        response = self.client.get(reverse('login'))
+        policy = dict(
+            directive.strip().split(' ', 1)
+            for directive in response['Content-Security-Policy'].split(';') if directive.strip()
+        )
+        self.assertNotIn("'unsafe-inline'", policy['script-src'])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SaleBuilderDataTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='builder', password='x', is_superuser=True)
+        self.client.force_login(user)
+        self.item = InventoryItem.objects.create(
+            part_name='Belt <B>', part_code='SB-1', quantity=5, unit='pcs', unit_price=12, minimum_stock=1
+        )
+
+    def test_page_data_is_passed_through_json_script(self):
+        response = self.client.get(reverse('sale_create_unified'))
+        self.assertContains(response, 'js/sale_create.js')
+        self.assertEqual(response.context['inventory_prices'], {str(self.item.pk): 12.0})
+        match = re.search(r'<script id="inv_items_data" type="application/json">(.*?)</script>', response.content.decode(), re.S)
+        self.assertEqual(json.loads(match.group(1)), [{'id': str(self.item.pk), 'name': 'Belt <B> (SB-1)', 'unit': 'Pieces'}])
+
+
+@skipUnless(importlib.util.find_spec('whitenoise'), 'whitenoise not installed')
+class FingerprintedStaticTests(TestCase):
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root)
+
+    def test_hashed_bundles_are_served_as_immutable(self):
+        from django.contrib.staticfiles.storage import staticfiles_storage
+        from whitenoise.middleware import WhiteNoiseMiddleware
+
+        with override_settings(
+            STATIC_ROOT=self.static_root,
+            STATICFILES_STORAGE='whitenoise.storage.CompressedManifestStaticFilesStorage',
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            url = staticfiles_storage.url('js/base.js')
+            middleware = WhiteNoiseMiddleware(lambda request: HttpResponse())
+
+        self.assertRegex(url, r'/js/base\.[0-9a-f]{12}\.js$')
+        response = middleware(RequestFactory().get(url))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
@@ -0,0 +1,153 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.shortcuts import get_object_or_404
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import stock
+from core.models import Customer, InventoryItem, Sale, SaleItem, StockHistory
+
+
+def _item(code, quantity, boxes=0):
+    return InventoryItem.objects.create(
+        part_name=f'Part {code}', part_code=code, quantity=Decimal(quantity), box_count=boxes,
+        unit_price=Decimal('10.00'), minimum_stock=2,
+    )
+
+
+class StockMovementTests(TestCase):
+    def test_movements_update_in_place_and_log_in_one_insert(self):
+        bolt, nut = _item('B-1', '10', boxes=3), _item('N-1', '5')
+        with CaptureQueriesContext(connection) as ctx:
+            history = stock.apply([
+                stock.Movement(bolt, Decimal('-2.5'), -1, 'out', 'Sale S-1'),
+                stock.Movement(nut, Decimal('4'), 0, 'in', 'Restock'),
+                stock.Movement(bolt, Decimal('-1'), 0, 'out', 'Sale S-2'),
+            ], user='clerk')
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "core_stockhistory"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith('SELECT "core_inventoryitem"')])
+
+        self.assertEqual((bolt.quantity, bolt.box_count), (Decimal('6.500'), 2))
+        bolt.refresh_from_db()
+        nut.refresh_from_db()
+        self.assertEqual((bolt.quantity, bolt.box_count, nut.quantity), (Decimal('6.500'), 2, Decimal('9.000')))
+
+        rows = [(h.reason, h.quantity, h.previous_quantity, h.new_quantity, h.new_box_quantity) for h in history]
+        self.assertEqual(rows, [
+            ('Sale S-1 (boxes)', 0, 0, 0, 2),
+            ('Sale S-1', Decimal('2.5'), Decimal('10.000'), Decimal('7.500'), 0),
+            ('Restock', Decimal('4'), Decimal('5.000'), Decimal('9.000'), 0),
+            ('Sale S-2', Decimal('1'), Decimal('7.500'), Decimal('6.500'), 0),
+        ])
+        self.assertEqual(StockHistory.objects.filter(created_by='clerk').count(), 4)
+
+    def test_short_movement_raises_and_rolls_back_the_call(self):
+        bolt, nut = _item('B-1', '10'), _item('N-1', '1', boxes=1)
+        with self.assertRaisesMessage(stock.InsufficientStock, 'Insufficient box stock for Part N-1 (N-1). Available boxes: 1, required: 2'):
+            stock.apply([stock.Movement(bolt, -4, 0, 'out'), stock.Movement(nut, -1, -2, 'out')])
+        with self.assertRaisesMessage(stock.InsufficientStock, 'Available: 10.000, required: 11'):
+            stock.apply([stock.Movement(bolt, -11, 0, 'out')])
+        bolt.refresh_from_db()
+        self.assertEqual(bolt.quantity, Decimal('10.000'))
+        self.assertFalse(StockHistory.objects.exists())
+
+
+    def test_fractional_quantities_do_not_drift(self):
+        oil = _item('O-1', '0.3')
+        stock.apply([stock.Movement(oil, Decimal('-0.1'), 0, 'out')])
+        stock.apply([stock.Movement(oil, Decimal('-0.2'), 0, 'out')])
+        self.assertEqual(oil.quantity, Decimal('0.000'))
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT quantity FROM core_inventoryitem WHERE id = %s', [oil.pk])
+            self.assertEqual(Decimal(str(cursor.fetchone()[0])), Decimal('0'))
+
+    def test_backends_without_update_returning_read_the_row_back(self):
+        bolt = _item('B-1', '10')
+        with mock.patch.object(connection, 'vendor', 'mysql'):
+            stock.apply([stock.Movement(bolt, Decimal('-2.5'), 0, 'out')])
+            with self.assertRaises(stock.InsufficientStock):
+                stock.apply([stock.Movement(bolt, -8, 0, 'out')])
+        self.assertEqual(bolt.quantity, Decimal('7.500'))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class StockViewTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_superuser(username='stock', password='x')
+        self.client.force_login(user)
+        self.customer = Customer.objects.create(name='Acme Ltd', phone='1')
+        self.item = _item('B-1', '5', boxes=2)
+
+    def sale(self, quantity, boxes=0):
+        sale = Sale.objects.create(customer=self.customer)
+        SaleItem.objects.create(
+            sale=sale, item_type='inventory', inventory_item=self.item, quantity=Decimal(quantity), boxes=boxes,
+            unit_price=Decimal('10.00'),
+        )
+        return sale
+
+    def test_finalize_decrements_and_refuses_to_oversell(self):
+        first, second = self.sale('4', boxes=1), self.sale('4')
+        self.client.post(reverse('sale_finalize', args=[first.pk]))
+        self.client.post(reverse('sale_finalize', args=[second.pk]))
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantity, self.item.box_count), (Decimal('1.000'), 1))
+        second.refresh_from_db()
+        self.assertEqual(second.status, 'draft')
+
+    def test_deleting_an_item_from_a_finalized_sale_restores_stock(self):
+        sale = self.sale('3', boxes=1)
+        sale.finalize()
+        line = sale.items.get()
+        self.client.post(reverse('sale_delete_item', args=[sale.pk, line.pk]))
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantity, self.item.box_count), (Decimal('5.000'), 2))
+
+    def test_repeated_item_delete_restores_stock_once(self):
+        sale = self.sale('3', boxes=1)
+        SaleItem.objects.create(sale=sale, item_type='non_inventory', description='Labour', quantity=1, unit_price=50)
+        sale.finalize()
+        line = sale.items.get(item_type='inventory')
+        self.client.post(reverse('sale_delete_item', args=[sale.pk, line.pk]))
+
+        # A second POST that loaded the line before the first one deleted it.
+        real_get = get_object_or_404
+        with mock.patch(
+            'core.views.sales.get_object_or_404',
+            side_effect=lambda model, *args, **kw: line if model is SaleItem else real_get(model, *args, **kw),
+        ):
+            self.client.post(reverse('sale_delete_item', args=[sale.pk, line.pk]))
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantity, self.item.box_count), (Decimal('5.000'), 2))
+
+    def test_inventory_edit_applies_the_difference_as_a_movement(self):
+        data = {
+            'part_name': 'Part B-1', 'part_code': 'B-1', 'description': '', 'category': '', 'quantity': '8',
+            'box_count': '2', 'unit': 'pcs', 'purchase_price': '', 'unit_price': '10.00', 'location': 'A1',
+            'minimum_stock': '2', 'supplier': '',
+        }
+        self.client.post(reverse('inventory_edit', args=[self.item.pk]), data)
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantity, self.item.location), (Decimal('8.000'), 'A1'))
+        entry = StockHistory.objects.get()
+        self.assertEqual((entry.transaction_type, entry.quantity, entry.previous_quantity), ('in', Decimal('3'), Decimal('5')))
+
+    def test_inventory_edit_logs_units_and_boxes_in_their_own_direction(self):
+        data = {
+            'part_name': 'Part B-1', 'part_code': 'B-1', 'description': '', 'category': '', 'quantity': '3',
+            'box_count': '4', 'unit': 'pcs', 'purchase_price': '', 'unit_price': '10.00', 'location': '',
+            'minimum_stock': '2', 'supplier': '',
+        }
+        self.client.post(reverse('inventory_edit', args=[self.item.pk]), data)
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantity, self.item.box_count), (Decimal('3.000'), 4))
+        entries = {
+            entry.transaction_type: (entry.quantity, entry.box_quantity)
+            for entry in StockHistory.objects.all()
+        }
+        self.assertEqual(entries, {'adjustment': (Decimal('2'), 0), 'in': (Decimal('0'), 2)})
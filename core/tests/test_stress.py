@@ -0,0 +1,35 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core import stress
+from core.models import InventoryItem, Sale
+
+
+class StressInvariantTests(TestCase):
+    """The invariant checker must stay quiet on clean data and catch lost updates."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = stress.seed_stress_data(hot_customers=2, hot_items=2, drafts=4, finalized=4)
+
+    def test_seeded_data_satisfies_invariants(self):
+        self.assertEqual(stress.check_invariants(self.seed), {})
+
+    def test_lost_stock_update_is_reported(self):
+        InventoryItem.objects.filter(pk=self.seed['item_ids'][0]).update(quantity=stress.STARTING_STOCK)
+        violations = stress.check_invariants(self.seed)
+        self.assertIn('stock_vs_history', violations)
+
+    def test_stale_sale_total_is_reported(self):
+        Sale.objects.filter(pk=self.seed['draft_ids'][0]).update(total_amount=Decimal('1.00'))
+        violations = stress.check_invariants(self.seed)
+        self.assertIn('sale_total_vs_items', violations)
+
+    def test_summarize_reports_percentiles_and_outcomes(self):
+        samples = [('payment', float(ms), 'ok') for ms in range(1, 101)] + [('payment', 5.0, 'lock_timeout')]
+        summary = stress.summarize(samples, elapsed=2.0)
+        self.assertEqual(summary['outcomes'], {'ok': 100, 'lock_timeout': 1})
+        self.assertEqual(summary['latency_ms']['payment']['count'], 100)
+        self.assertAlmostEqual(summary['latency_ms']['payment']['p50'], 50.5)
+        self.assertEqual(summary['throughput_ops_s'], 50.0)
@@ -0,0 +1,119 @@
+import csv
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import aging
+from core.models import Supplier, SupplierAccount, SupplierPurchase
+
+_LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'supplier-account-tests'}}
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SupplierAccountTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_superuser(username='payables', password='x')
+        self.client.force_login(user)
+        self.supplier = Supplier.objects.create(name='ABC Supplier', phone='01700000000')
+
+    def purchase(self, price, purchase_date):
+        return SupplierPurchase.objects.create(
+            supplier=self.supplier, product_name='Thread Roll', price=Decimal(price), purchase_date=purchase_date,
+        )
+
+    def account(self):
+        return SupplierAccount.objects.get(supplier=self.supplier)
+
+    def pay(self, purchase, amount, **extra):
+        return self.client.post(reverse('supplier_add_payment', args=[self.supplier.pk, purchase.pk]), {
+            'amount': amount, 'payment_date': '2026-04-20', 'method': 'cash', 'reference_number': '', 'notes': '',
+            **extra,
+        })
+
+    def test_purchases_and_payments_keep_the_account_current(self):
+        first = self.purchase('1000.00', date(2026, 1, 5))
+        self.purchase('400.00', date(2026, 2, 5))
+        account = self.account()
+        self.assertEqual((account.purchase_count, account.total_purchased, account.total_due), (2, Decimal('1400.00'), Decimal('1400.00')))
+        self.assertEqual(account.oldest_unpaid_date, date(2026, 1, 5))
+
+        # Supplier-level payment from the detail page: FIFO, settles the January purchase.
+        self.pay(first, '1100.00', source='supplier_detail')
+        account = self.account()
+        self.assertEqual((account.total_paid, account.total_due), (Decimal('1100.00'), Decimal('300.00')))
+        self.assertEqual(account.oldest_unpaid_date, date(2026, 2, 5))
+
+        payment = first.payments.get()
+        self.client.post(reverse('supplier_delete_payment', args=[self.supplier.pk, first.pk, payment.pk]))
+        self.assertEqual(self.account().total_due, Decimal('1300.00'))
+
+        self.client.post(reverse('supplier_delete_purchase', args=[self.supplier.pk, first.pk]))
+        account = self.account()
+        self.assertEqual((account.purchase_count, account.total_due), (1, Decimal('300.00')))
+
+    def test_supplier_pages_read_the_account(self):
+        self.purchase('250.00', date(2026, 3, 1))
+        response = self.client.get(reverse('supplier_list'))
+        self.assertContains(response, '৳ 250.00')
+        response = self.client.get(reverse('supplier_detail', args=[self.supplier.pk]))
+        self.assertEqual((response.context['total_due'], response.context['purchase_count']), (Decimal('250.00'), 1))
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+
+    def test_verify_command_repairs_drift(self):
+        self.purchase('250.00', date(2026, 3, 1))
+        SupplierAccount.objects.filter(supplier=self.supplier).update(total_due=0, purchase_count=0)
+        with self.assertRaisesMessage(CommandError, '1 supplier account(s) differ'):
+            call_command('verify_supplier_accounts', stdout=StringIO())
+        call_command('verify_supplier_accounts', '--repair', stdout=StringIO())
+        self.assertEqual((self.account().total_due, self.account().purchase_count), (Decimal('250.00'), 1))
+
+    def test_supplier_delete_removes_the_account(self):
+        self.purchase('250.00', date(2026, 3, 1))
+        self.supplier.delete()
+        self.assertFalse(SupplierAccount.objects.exists())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=_LOCMEM)
+class PayablesAgingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_superuser(username='aging_payables', password='x')
+        self.client.force_login(user)
+        self.supplier = Supplier.objects.create(name='ABC Supplier', phone='01700000000')
+        today = timezone.localdate()
+        SupplierPurchase.objects.create(
+            supplier=self.supplier, product_name='Old', price=Decimal('500.00'), paid_amount=Decimal('200.00'),
+            purchase_date=today - timedelta(days=120),
+        )
+        SupplierPurchase.objects.create(
+            supplier=self.supplier, product_name='New', price=Decimal('100.00'), purchase_date=today - timedelta(days=3),
+        )
+        SupplierPurchase.objects.create(
+            supplier=self.supplier, product_name='Settled', price=Decimal('80.00'), paid_amount=Decimal('80.00'),
+            purchase_date=today - timedelta(days=45),
+        )
+
+    def test_unpaid_amounts_are_bucketed_by_purchase_date(self):
+        with self.assertNumQueries(1):
+            report = aging.payables()
+        row, = report['rows']
+        self.assertEqual([row[key] for key in aging.BUCKET_KEYS], [Decimal('100.00'), 0, 0, Decimal('300.00')])
+        self.assertEqual(report['totals']['total'], Decimal('400.00'))
+
+    def test_page_and_csv_export(self):
+        response = self.client.get(reverse('payables_aging'))
+        self.assertContains(response, 'ABC Supplier')
+
+        response = self.client.get(reverse('payables_aging_export'), {'format': 'csv'})
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[1][:2], ['ABC Supplier', '01700000000'])
+        self.assertEqual(rows[-1][-1], '400.00')
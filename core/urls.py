@@ -8,83 +8,97 @@ urlpatterns = [
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
     
     # Dashboard
-    path('', views.dashboard, name='dashboard'),
+    path('', views.lazy('dashboard'), name='dashboard'),
     
     # Customer URLs
-    path('customers/', views.customer_list, name='customer_list'),
-    path('customers/add/', views.customer_add, name='customer_add'),
-    path('customers/<int:pk>/', views.customer_detail, name='customer_detail'),
-    path('customers/<int:customer_id>/add-payment/', views.customer_add_payment, name='customer_add_payment'),
-    path('customers/<int:customer_id>/payments/receipt/<str:batch_ref>/', views.customer_payment_receipt, name='customer_payment_receipt'),
-    path('customers/<int:pk>/edit/', views.customer_edit, name='customer_edit'),
-    path('customers/<int:pk>/delete/', views.customer_delete, name='customer_delete'),
-    path('customers/quick-add/', views.customer_quick_add, name='customer_quick_add'),
+    path('customers/', views.lazy('customer_list'), name='customer_list'),
+    path('customers/add/', views.lazy('customer_add'), name='customer_add'),
+    path('customers/<int:pk>/', views.lazy('customer_detail'), name='customer_detail'),
+    path('customers/<int:customer_id>/add-payment/', views.lazy('customer_add_payment'), name='customer_add_payment'),
+    path('customers/<int:customer_id>/payments/receipt/<str:batch_ref>/', views.lazy('customer_payment_receipt'), name='customer_payment_receipt'),
+    path('customers/<int:pk>/edit/', views.lazy('customer_edit'), name='customer_edit'),
+    path('customers/<int:pk>/delete/', views.lazy('customer_delete'), name='customer_delete'),
+    path('customers/quick-add/', views.lazy('customer_quick_add'), name='customer_quick_add'),
     
     # Inventory URLs
-    path('inventory/', views.inventory_list, name='inventory_list'),
-    path('inventory/add/', views.inventory_add, name='inventory_add'),
-    path('inventory/<int:pk>/edit/', views.inventory_edit, name='inventory_edit'),
-    path('inventory/<int:pk>/delete/', views.inventory_delete, name='inventory_delete'),
-    path('inventory/<int:pk>/history/', views.inventory_stock_history, name='inventory_stock_history'),
+    path('inventory/', views.lazy('inventory_list'), name='inventory_list'),
+    path('inventory/add/', views.lazy('inventory_add'), name='inventory_add'),
+    path('inventory/<int:pk>/edit/', views.lazy('inventory_edit'), name='inventory_edit'),
+    path('inventory/<int:pk>/delete/', views.lazy('inventory_delete'), name='inventory_delete'),
+    path('inventory/<int:pk>/history/', views.lazy('inventory_stock_history'), name='inventory_stock_history'),
     
     # Expense URLs
-    path('expenses/', views.expense_list, name='expense_list'),
-    path('expenses/add/', views.expense_add, name='expense_add'),
-    path('expenses/<int:pk>/', views.expense_detail, name='expense_detail'),
-    path('expenses/<int:pk>/edit/', views.expense_edit, name='expense_edit'),
-    path('expenses/<int:pk>/delete/', views.expense_delete, name='expense_delete'),
+    path('expenses/', views.lazy('expense_list'), name='expense_list'),
+    path('expenses/add/', views.lazy('expense_add'), name='expense_add'),
+    path('expenses/<int:pk>/', views.lazy('expense_detail'), name='expense_detail'),
+    path('expenses/<int:pk>/edit/', views.lazy('expense_edit'), name='expense_edit'),
+    path('expenses/<int:pk>/delete/', views.lazy('expense_delete'), name='expense_delete'),
 
     # Supplier URLs
-    path('suppliers/', views.supplier_list, name='supplier_list'),
-    path('suppliers/add/', views.supplier_add, name='supplier_add'),
-    path('suppliers/<int:pk>/', views.supplier_detail, name='supplier_detail'),
-    path('suppliers/<int:pk>/edit/', views.supplier_edit, name='supplier_edit'),
-    path('suppliers/<int:pk>/delete/', views.supplier_delete, name='supplier_delete'),
-    path('suppliers/<int:pk>/add-purchase/', views.supplier_add_purchase, name='supplier_add_purchase'),
-    path('suppliers/<int:pk>/purchases/<int:purchase_pk>/', views.supplier_purchase_detail, name='supplier_purchase_detail'),
-    path('suppliers/<int:pk>/purchases/<int:purchase_pk>/add-payment/', views.supplier_add_payment, name='supplier_add_payment'),
-    path('suppliers/<int:pk>/purchases/<int:purchase_pk>/edit/', views.supplier_edit_purchase, name='supplier_edit_purchase'),
-    path('suppliers/<int:pk>/purchases/<int:purchase_pk>/delete/', views.supplier_delete_purchase, name='supplier_delete_purchase'),
-    path('suppliers/<int:pk>/purchases/<int:purchase_pk>/payments/<int:payment_pk>/edit/', views.supplier_edit_payment, name='supplier_edit_payment'),
-    path('suppliers/<int:pk>/purchases/<int:purchase_pk>/payments/<int:payment_pk>/delete/', views.supplier_delete_payment, name='supplier_delete_payment'),
+    path('suppliers/', views.lazy('supplier_list'), name='supplier_list'),
+    path('suppliers/add/', views.lazy('supplier_add'), name='supplier_add'),
+    path('suppliers/<int:pk>/', views.lazy('supplier_detail'), name='supplier_detail'),
+    path('suppliers/<int:pk>/edit/', views.lazy('supplier_edit'), name='supplier_edit'),
+    path('suppliers/<int:pk>/delete/', views.lazy('supplier_delete'), name='supplier_delete'),
+    path('suppliers/<int:pk>/add-purchase/', views.lazy('supplier_add_purchase'), name='supplier_add_purchase'),
+    path('suppliers/<int:pk>/purchases/<int:purchase_pk>/', views.lazy('supplier_purchase_detail'), name='supplier_purchase_detail'),
+    path('suppliers/<int:pk>/purchases/<int:purchase_pk>/add-payment/', views.lazy('supplier_add_payment'), name='supplier_add_payment'),
+    path('suppliers/<int:pk>/purchases/<int:purchase_pk>/edit/', views.lazy('supplier_edit_purchase'), name='supplier_edit_purchase'),
+    path('suppliers/<int:pk>/purchases/<int:purchase_pk>/delete/', views.lazy('supplier_delete_purchase'), name='supplier_delete_purchase'),
+    path('suppliers/<int:pk>/purchases/<int:purchase_pk>/payments/<int:payment_pk>/edit/', views.lazy('supplier_edit_payment'), name='supplier_edit_payment'),
+    path('suppliers/<int:pk>/purchases/<int:purchase_pk>/payments/<int:payment_pk>/delete/', views.lazy('supplier_delete_payment'), name='supplier_delete_payment'),
     
     # Payment URLs - DEPRECATED: Legacy payment system, replaced by SalePayment
-    # path('payments/', views.payment_list, name='payment_list'),
-    # path('payments/add/', views.payment_add, name='payment_add'),
-    # path('payments/<int:pk>/edit/', views.payment_edit, name='payment_edit'),
-    # path('payments/<int:pk>/delete/', views.payment_delete, name='payment_delete'),
+    # path('payments/', views.lazy('payment_list'), name='payment_list'),
+    # path('payments/add/', views.lazy('payment_add'), name='payment_add'),
+    # path('payments/<int:pk>/edit/', views.lazy('payment_edit'), name='payment_edit'),
+    # path('payments/<int:pk>/delete/', views.lazy('payment_delete'), name='payment_delete'),
 
     # Bill Claim URLs
-    path('claims/', views.list_bill_claims, name='list_bill_claims'),
-    path('claims/my/', views.my_bill_claims, name='my_bill_claims'),
-    path('claims/submit/', views.submit_bill_claim, name='submit_bill_claim'),
-    path('claims/<int:pk>/approve/', views.approve_bill_claim, name='approve_bill_claim'),
-    path('claims/<int:pk>/reject/', views.reject_bill_claim, name='reject_bill_claim'),
+    path('claims/', views.lazy('list_bill_claims'), name='list_bill_claims'),
+    path('claims/my/', views.lazy('my_bill_claims'), name='my_bill_claims'),
+    path('claims/submit/', views.lazy('submit_bill_claim'), name='submit_bill_claim'),
+    path('claims/<int:pk>/approve/', views.lazy('approve_bill_claim'), name='approve_bill_claim'),
+    path('claims/<int:pk>/reject/', views.lazy('reject_bill_claim'), name='reject_bill_claim'),
     
     # Reports
-    path('reports/', views.reports, name='reports'),
-    path('reports/ledger/', views.ledger, name='ledger'),
-    path('reports/export-excel/', views.export_excel, name='export_excel'),
-    path('reports/customer-report-excel/', views.customer_report_excel, name='customer_report_excel'),
+    path('reports/', views.lazy('reports'), name='reports'),
+    path('reports/ledger/', views.lazy('ledger'), name='ledger'),
+    path('reports/export-excel/', views.lazy('export_excel'), name='export_excel'),
+    path('reports/customer-report-excel/', views.lazy('customer_report_excel'), name='customer_report_excel'),
+    path('reports/receivables-aging/', views.lazy('receivables_aging'), name='receivables_aging'),
+    path('reports/receivables-aging/export/', views.lazy('receivables_aging_export'), name='receivables_aging_export'),
+    path('reports/payables-aging/', views.lazy('payables_aging'), name='payables_aging'),
+    path('reports/payables-aging/export/', views.lazy('payables_aging_export'), name='payables_aging_export'),
+    path('reports/sales/', views.lazy('sales_report'), name='sales_report'),
 
     # Sales URLs
-    path('sales/', views.sale_list, name='sale_list'),
-    path('sales/new/', views.sale_create, name='sale_create'),
-    path('sales/new/unified/', views.sale_create_unified, name='sale_create_unified'),
-    path('sales/new/quote/', views.sale_quote_create, name='sale_quote_create'),
-    path('sales/<int:pk>/', views.sale_detail, name='sale_detail'),
-    path('sales/<int:pk>/convert/', views.sale_convert_to_invoice, name='sale_convert_to_invoice'),
-    path('sales/<int:pk>/invoice/', views.sale_invoice, name='sale_invoice'),
-    path('sales/<int:pk>/add-item/', views.sale_add_item, name='sale_add_item'),
-    path('sales/<int:pk>/items/<int:item_pk>/delete/', views.sale_delete_item, name='sale_delete_item'),
-    path('sales/<int:pk>/delete/', views.sale_delete, name='sale_delete'),
-    path('sales/<int:pk>/finalize/', views.sale_finalize, name='sale_finalize'),
-    path('sales/<int:pk>/add-payment/', views.sale_add_payment, name='sale_add_payment'),
-    path('sales/<int:pk>/payments/<int:payment_pk>/edit/', views.sale_edit_payment, name='sale_edit_payment'),
-    path('sales/<int:pk>/payments/<int:payment_pk>/delete/', views.sale_delete_payment, name='sale_delete_payment'),
-    path('sales/<int:pk>/payments/export.csv', views.sale_payments_export, name='sale_payments_export'),
-    path('sales/<int:pk>/payments/export.pdf', views.sale_payments_export_pdf, name='sale_payments_export_pdf'),
-    path('sales/<int:sale_pk>/payments/<int:payment_pk>/receipt/', views.sale_payment_receipt, name='sale_payment_receipt'),
-    path('sales/export.csv', views.sales_export_csv, name='sales_export_csv'),
-    path('sales/export.pdf', views.sales_export_pdf, name='sales_export_pdf'),
+    path('sales/', views.lazy('sale_list'), name='sale_list'),
+    path('sales/new/', views.lazy('sale_create'), name='sale_create'),
+    path('sales/new/unified/', views.lazy('sale_create_unified'), name='sale_create_unified'),
+    path('sales/new/quote/', views.lazy('sale_quote_create'), name='sale_quote_create'),
+    path('sales/<int:pk>/', views.lazy('sale_detail'), name='sale_detail'),
+    path('sales/<int:pk>/fragments/', views.lazy('sale_fragments'), name='sale_fragments'),
+    path('sales/<int:pk>/convert/', views.lazy('sale_convert_to_invoice'), name='sale_convert_to_invoice'),
+    path('sales/<int:pk>/invoice/', views.lazy('sale_invoice'), name='sale_invoice'),
+    path('sales/<int:pk>/add-item/', views.lazy('sale_add_item'), name='sale_add_item'),
+    path('sales/<int:pk>/items/<int:item_pk>/delete/', views.lazy('sale_delete_item'), name='sale_delete_item'),
+    path('sales/<int:pk>/delete/', views.lazy('sale_delete'), name='sale_delete'),
+    path('sales/<int:pk>/finalize/', views.lazy('sale_finalize'), name='sale_finalize'),
+    path('sales/<int:pk>/add-payment/', views.lazy('sale_add_payment'), name='sale_add_payment'),
+    path('sales/<int:pk>/payments/<int:payment_pk>/edit/', views.lazy('sale_edit_payment'), name='sale_edit_payment'),
+    path('sales/<int:pk>/payments/<int:payment_pk>/delete/', views.lazy('sale_delete_payment'), name='sale_delete_payment'),
+    path('sales/<int:pk>/payments/export.csv', views.lazy('sale_payments_export'), name='sale_payments_export'),
+    path('sales/<int:pk>/payments/export.pdf', views.lazy('sale_payments_export_pdf'), name='sale_payments_export_pdf'),
+    path('sales/<int:sale_pk>/payments/<int:payment_pk>/receipt/', views.lazy('sale_payment_receipt'), name='sale_payment_receipt'),
+    path('sales/export.csv', views.lazy('sales_export_csv'), name='sales_export_csv'),
+    path('sales/export.pdf', views.lazy('sales_export_pdf'), name='sales_export_pdf'),
+
+    # Read-only JSON endpoints (async views)
+    path('api/dashboard/metrics/', views.lazy('dashboard_metrics_api'), name='dashboard_metrics_api'),
+    path('api/inventory/', views.lazy('inventory_catalog_api'), name='inventory_catalog_api'),
+    path('api/receipts/<str:receipt_number>/', views.lazy('receipt_lookup_api'), name='receipt_lookup_api'),
+
+    # Monitoring
+    path('metrics', views.lazy('prometheus_metrics'), name='prometheus_metrics'),
 ]
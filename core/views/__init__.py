@@ -0,0 +1,93 @@
+"""
+Views, split by domain and imported on first use.
+
+``core.urls`` routes to ``lazy('name')`` proxies, so loading the URLconf
+imports none of the view modules; each module (and what it pulls in, such as
+openpyxl or reportlab for the exports) is imported by the first request that
+needs it. ``core.views.<name>`` keeps working for code that imports a view
+directly. Views in ``_ASYNC_MODULES`` are coroutine functions, and their
+proxies are marked as such so Django awaits them natively under ASGI.
+"""
+
+from importlib import import_module
+
+from asgiref.sync import markcoroutinefunction
+
+_VIEW_MODULES = {
+    'dashboard': ('dashboard',),
+    'customers': (
+        'customer_list', 'customer_add', 'customer_edit', 'customer_delete', 'customer_detail',
+        'customer_add_payment', 'customer_payment_receipt', 'customer_quick_add',
+    ),
+    'inventory': ('inventory_list', 'inventory_add', 'inventory_edit', 'inventory_delete', 'inventory_stock_history'),
+    'expenses': ('expense_list', 'expense_add', 'expense_edit', 'expense_delete', 'expense_detail'),
+    'claims': ('submit_bill_claim', 'my_bill_claims', 'list_bill_claims', 'approve_bill_claim', 'reject_bill_claim'),
+    'reports': ('reports', 'ledger', 'export_excel', 'customer_report_excel'),
+    'aging': ('receivables_aging', 'receivables_aging_export', 'payables_aging', 'payables_aging_export'),
+    'sales_report': ('sales_report',),
+    'sales': (
+        'sale_list', 'sale_create_unified', 'sale_create', 'sale_quote_create', 'sale_convert_to_invoice',
+        'sale_detail', 'sale_fragments', 'sale_invoice', 'sale_add_item', 'sale_finalize', 'sale_delete_item',
+        'sale_add_payment', 'sale_edit_payment', 'sale_delete_payment', 'sale_payment_receipt', 'sale_delete',
+    ),
+    'sales_exports': ('sale_payments_export', 'sale_payments_export_pdf', 'sales_export_csv', 'sales_export_pdf'),
+    'suppliers': (
+        'supplier_list', 'supplier_add', 'supplier_edit', 'supplier_detail', 'supplier_purchase_detail',
+        'supplier_delete', 'supplier_add_purchase', 'supplier_add_payment', 'supplier_edit_purchase',
+        'supplier_edit_payment', 'supplier_delete_purchase', 'supplier_delete_payment',
+    ),
+    'monitoring': ('prometheus_metrics',),
+    'api': ('dashboard_metrics_api', 'inventory_catalog_api', 'receipt_lookup_api'),
+}
+
+_ASYNC_MODULES = {'api'}
+
+_MODULE_FOR_VIEW = {view: module for module, views in _VIEW_MODULES.items() for view in views}
+
+
+def __getattr__(name):
+    module = _MODULE_FOR_VIEW.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    return getattr(import_module(f'.{module}', __name__), name)
+
+
+class LazyView:
+    """URLconf callback that imports its view on first call.
+
+    Attribute lookups (``csrf_exempt``, ``statement_timeout``, ...) are
+    forwarded to the real view, so middleware sees it unchanged.
+    """
+
+    def __init__(self, name):
+        if name not in _MODULE_FOR_VIEW:
+            raise ValueError(f'Unknown view {name!r}')
+        self.__name__ = self.__qualname__ = name
+        self._view = None
+        if _MODULE_FOR_VIEW[name] in _ASYNC_MODULES:
+            # __call__ then returns the view's coroutine for Django to await.
+            markcoroutinefunction(self)
+
+    @property
+    def view(self):
+        if self._view is None:
+            self._view = __getattr__(self.__name__)
+        return self._view
+
+    def __call__(self, request, *args, **kwargs):
+        return self.view(request, *args, **kwargs)
+
+    def __getattr__(self, attr):
+        # The URL resolver probes every callback for ``view_class`` when it builds
+        # its reverse map; answering from here keeps that from importing every
+        # view module. All proxied views are plain functions.
+        if attr.startswith('__') or attr in ('_view', 'view_class'):
+            raise AttributeError(attr)
+        return getattr(self.view, attr)
+
+    def __repr__(self):
+        return f'<LazyView {self.__name__}>'
+
+
+def lazy(name):
+    return LazyView(name)
@@ -0,0 +1,118 @@
+import csv
+import tempfile
+from datetime import date
+
+from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import render
+
+from .. import aging, metrics
+from ..db_connections import statement_timeout
+from ..db_router import use_replica
+from .common import manager_required
+
+RECEIVABLE_COLUMNS = (('customer_id', 'Customer ID'), ('name', 'Customer'), ('company', 'Company'))
+PAYABLE_COLUMNS = (('name', 'Supplier'), ('phone', 'Phone'))
+
+
+class _Echo:
+    """File-like object whose write() hands the line back, so csv.writer can feed a streaming response."""
+
+    def write(self, value):
+        return value
+
+
+def _as_of(request):
+    """The ``?as_of=YYYY-MM-DD`` date, or None (today) when missing or invalid."""
+    try:
+        return date.fromisoformat(request.GET.get('as_of', ''))
+    except ValueError:
+        return None
+
+
+def _export_rows(report, columns):
+    header = [label for _key, label in columns] + [label for _key, label, _days in aging.BUCKETS] + ['Total']
+    yield header
+    for row in report['rows']:
+        yield [row[key] or '' for key, _label in columns] + [row[key] for key in (*aging.BUCKET_KEYS, 'total')]
+    yield ['TOTAL'] + [''] * (len(columns) - 1) + [report['totals'][key] for key in (*aging.BUCKET_KEYS, 'total')]
+
+
+def aging_export_response(report, columns, filename, export_format):
+    """Stream an aging report as CSV, or as an .xlsx built in write-only mode and sent in chunks."""
+    rows = _export_rows(report, columns)
+    if export_format == 'xlsx':
+        import openpyxl
+
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet(f"As of {report['as_of']:%d-%m-%Y}")
+        for row in rows:
+            sheet.append(row)
+        # Spills to disk past 1 MB; FileResponse streams it back in blocks.
+        buffer = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        workbook.save(buffer)
+        buffer.seek(0)
+        return FileResponse(
+            buffer, as_attachment=True, filename=f'{filename}.xlsx',
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+
+    writer = csv.writer(_Echo())
+    response = StreamingHttpResponse((writer.writerow(row) for row in rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+@login_required
+@manager_required
+@use_replica
+def receivables_aging(request):
+    """Outstanding customer balances by age of the sale (see core.aging)."""
+    report = aging.receivables(_as_of(request))
+    paginator = Paginator(report['rows'], 25)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'core/receivables_aging.html', {
+        'report': report,
+        'rows': page_obj.object_list,
+        'page_obj': page_obj,
+        'buckets': aging.BUCKETS,
+    })
+
+
+@login_required
+@manager_required
+@metrics.timed_export('receivables_aging')
+@use_replica
+@statement_timeout('export')
+def receivables_aging_export(request):
+    report = aging.receivables(_as_of(request))
+    filename = f"receivables_aging_{report['as_of']:%Y%m%d}"
+    return aging_export_response(report, RECEIVABLE_COLUMNS, filename, request.GET.get('format', 'csv'))
+
+
+@login_required
+@manager_required
+@use_replica
+def payables_aging(request):
+    """Unpaid supplier purchases by age (see core.aging)."""
+    report = aging.payables()
+    paginator = Paginator(report['rows'], 25)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'core/payables_aging.html', {
+        'report': report,
+        'rows': page_obj.object_list,
+        'page_obj': page_obj,
+        'buckets': aging.BUCKETS,
+    })
+
+
+@login_required
+@manager_required
+@metrics.timed_export('payables_aging')
+@use_replica
+@statement_timeout('export')
+def payables_aging_export(request):
+    report = aging.payables()
+    filename = f"payables_aging_{report['as_of']:%Y%m%d}"
+    return aging_export_response(report, PAYABLE_COLUMNS, filename, request.GET.get('format', 'csv'))
@@ -0,0 +1,122 @@
+from decimal import Decimal
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db.models import Sum, Q
+from django.http import JsonResponse
+from django.utils import timezone
+from ..models import InventoryItem, SalePayment
+from .. import async_db
+from .. import cache as model_cache
+from ..db_router import use_replica
+from . import dashboard
+from .common import _visible_sales_queryset
+
+CATALOG_DEFAULT_LIMIT = 200
+CATALOG_MAX_LIMIT = 1000
+
+def _check_access(request, permission):
+    # Runs in a worker thread: the user and their permissions load lazily from the database.
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    return permission is None or user.has_perm(permission)
+
+
+def json_login_required(permission=None):
+    """Async counterpart of ``login_required``/``permission_required`` answering 401/403 as JSON."""
+    def decorator(view_func):
+        @wraps(view_func)
+        async def _wrapped(request, *args, **kwargs):
+            allowed = await sync_to_async(_check_access)(request, permission)
+            if allowed is None:
+                return JsonResponse({'detail': 'Authentication required.'}, status=401)
+            if not allowed:
+                return JsonResponse({'detail': 'Permission denied.'}, status=403)
+            return await view_func(request, *args, **kwargs)
+        return _wrapped
+    return decorator
+
+
+@json_login_required()
+@use_replica
+async def dashboard_metrics_api(request):
+    """The dashboard's headline numbers as JSON; the independent aggregates run concurrently."""
+    today = timezone.localdate()
+    metrics = {'date': today.isoformat()}
+    for group in await async_db.gather(*dashboard.headline_metrics(today)):
+        metrics.update(group)
+    return JsonResponse(metrics)
+
+
+CATALOG_FIELDS = ('id', 'part_code', 'part_name', 'category', 'unit', 'quantity', 'unit_price', 'minimum_stock', 'location')
+
+
+def _catalog_rows(items):
+    rows = list(items.values(*CATALOG_FIELDS)[:CATALOG_MAX_LIMIT])
+    for row in rows:
+        row['is_low_stock'] = row['quantity'] <= row['minimum_stock']
+    return rows
+
+
+def inventory_catalog():
+    """The unfiltered catalog (first CATALOG_MAX_LIMIT items), cached until inventory changes."""
+    return model_cache.get_or_compute(
+        'inventory_catalog', ('InventoryItem',),
+        lambda: _catalog_rows(InventoryItem.objects.order_by('part_name', 'id')),
+    )
+
+
+@json_login_required('core.view_inventoryitem')
+async def inventory_catalog_api(request):
+    """Inventory catalog for pickers and lookups: ``?q=`` searches name/code, ``?limit=`` caps rows."""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', CATALOG_DEFAULT_LIMIT)), 1), CATALOG_MAX_LIMIT)
+    except ValueError:
+        limit = CATALOG_DEFAULT_LIMIT
+
+    if not query:
+        catalog = (await sync_to_async(inventory_catalog)())[:limit]
+        return JsonResponse({'count': len(catalog), 'results': catalog})
+
+    items = (
+        InventoryItem.objects.order_by('part_name', 'id')
+        .filter(Q(part_name__icontains=query) | Q(part_code__icontains=query))
+        .values(*CATALOG_FIELDS)[:limit]
+    )
+    catalog = []
+    async for row in items:
+        row['is_low_stock'] = row['quantity'] <= row['minimum_stock']
+        catalog.append(row)
+    return JsonResponse({'count': len(catalog), 'results': catalog})
+
+
+@json_login_required('core.view_salepayment')
+async def receipt_lookup_api(request, receipt_number):
+    """Look a payment receipt up by its number, limited to sales the user may see."""
+    try:
+        payment = await SalePayment.objects.select_related('sale__customer').aget(
+            receipt_number=receipt_number,
+            sale__in=_visible_sales_queryset(request.user),
+        )
+    except SalePayment.DoesNotExist:
+        return JsonResponse({'detail': 'Receipt not found.'}, status=404)
+
+    sale = payment.sale
+    paid = (await sale.payments.aaggregate(total=Sum('amount')))['total'] or Decimal('0')
+    return JsonResponse({
+        'receipt_number': payment.receipt_number,
+        'amount': payment.amount,
+        'payment_date': payment.payment_date,
+        'method': payment.method,
+        'sale': {
+            'id': sale.pk,
+            'sale_number': sale.sale_number,
+            'status': sale.status,
+            'customer': sale.customer.name,
+            'total_amount': sale.total_amount,
+            'total_paid': paid,
+            'balance_due': sale.total_amount - paid,
+        },
+    })
@@ -0,0 +1,159 @@
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required, permission_required
+from django.contrib import messages
+from django.db.models import Sum, Q
+from django.utils import timezone
+from ..models import Expense, BillClaim
+from ..forms import BillClaimForm
+from .common import manager_required
+
+
+# Bill Claim Views
+@login_required
+@permission_required('core.submit_bill', raise_exception=True)
+def submit_bill_claim(request):
+    """Employee submits a new bill claim"""
+    if request.method == 'POST':
+        form = BillClaimForm(request.POST, request.FILES)
+        if form.is_valid():
+            bill_claim = form.save(commit=False)
+            bill_claim.submitter = request.user
+            bill_claim.status = 'pending'
+            bill_claim.save()
+            messages.success(request, 'Bill claim submitted successfully!')
+            return redirect('my_bill_claims')
+    else:
+        form = BillClaimForm()
+
+    return render(request, 'core/bill_claim_form.html', {'form': form, 'title': 'Submit Bill Claim'})
+
+
+@login_required
+def my_bill_claims(request):
+    """Employee views their own submitted claims"""
+    status_filter = request.GET.get('status', '')
+    bill_claims = BillClaim.objects.filter(submitter=request.user).order_by('-created_at')
+
+    if status_filter:
+        bill_claims = bill_claims.filter(status=status_filter)
+
+    context = {
+        'bill_claims': bill_claims,
+        'status_filter': status_filter,
+        'title': 'My Bill Claims',
+        'is_manager_view': False,
+    }
+    return render(request, 'core/bill_claim_list.html', context)
+
+
+@login_required
+@manager_required
+def list_bill_claims(request):
+    """Manager views all claims from all employees"""
+    status_filter = request.GET.get('status', '')
+    query = request.GET.get('q', '')
+    
+    bill_claims = BillClaim.objects.all().order_by('-created_at')
+
+    if status_filter:
+        bill_claims = bill_claims.filter(status=status_filter)
+    
+    if query:
+        bill_claims = bill_claims.filter(
+            Q(submitter__username__icontains=query) |
+            Q(submitter__first_name__icontains=query) |
+            Q(submitter__last_name__icontains=query) |
+            Q(description__icontains=query)
+        )
+
+    # Calculate totals
+    total_pending = bill_claims.filter(status='pending').aggregate(total=Sum('amount'))['total'] or 0
+    total_approved = bill_claims.filter(status='approved').aggregate(total=Sum('amount'))['total'] or 0
+    total_rejected = bill_claims.filter(status='rejected').aggregate(total=Sum('amount'))['total'] or 0
+
+    context = {
+        'bill_claims': bill_claims,
+        'status_filter': status_filter,
+        'query': query,
+        'title': 'All Bill Claims',
+        'is_manager_view': True,
+        'total_pending': total_pending,
+        'total_approved': total_approved,
+        'total_rejected': total_rejected,
+    }
+    return render(request, 'core/bill_claim_list.html', context)
+
+
+@login_required
+@manager_required
+def approve_bill_claim(request, pk):
+    """Manager approves a bill claim and creates expense"""
+    bill_claim = get_object_or_404(BillClaim, pk=pk)
+    
+    if bill_claim.status != 'pending':
+        messages.warning(request, 'This claim has already been processed.')
+        return redirect('list_bill_claims')
+
+    if request.method == 'POST':
+        from django.utils import timezone
+        
+        bill_claim.status = 'approved'
+        bill_claim.approved_by = request.user
+        bill_claim.approval_date = timezone.now().date()
+        
+        # Get employee name (fallback to username if no full name)
+        employee_name = bill_claim.submitter.get_full_name().strip()
+        if not employee_name:
+            employee_name = bill_claim.submitter.username
+        
+        # Create a new Expense entry
+        expense = Expense.objects.create(
+            date=bill_claim.bill_date,
+            category='other',
+            description=f"Bill Claim by {employee_name}: {bill_claim.description}",
+            amount=bill_claim.amount,
+            paid_to=employee_name,
+            payment_method='bank_transfer',
+            notes=f"Approved bill claim (ID: {bill_claim.pk})",
+        )
+        bill_claim.expense = expense
+        bill_claim.save()
+        
+        messages.success(request, f'Bill claim approved and expense created! Amount: ৳ {bill_claim.amount}')
+        return redirect('list_bill_claims')
+
+    context = {
+        'bill_claim': bill_claim,
+        'title': 'Approve Bill Claim',
+        'action': 'approve',
+    }
+    return render(request, 'core/bill_claim_review.html', context)
+
+
+@login_required
+@manager_required
+def reject_bill_claim(request, pk):
+    """Manager rejects a bill claim"""
+    bill_claim = get_object_or_404(BillClaim, pk=pk)
+    
+    if bill_claim.status != 'pending':
+        messages.warning(request, 'This claim has already been processed.')
+        return redirect('list_bill_claims')
+
+    if request.method == 'POST':
+        from django.utils import timezone
+        
+        bill_claim.status = 'rejected'
+        bill_claim.approved_by = request.user
+        bill_claim.approval_date = timezone.now().date()
+        bill_claim.save()
+        
+        messages.warning(request, f'Bill claim rejected for {bill_claim.submitter.get_full_name()}.')
+        return redirect('list_bill_claims')
+
+    context = {
+        'bill_claim': bill_claim,
+        'title': 'Reject Bill Claim',
+        'action': 'reject',
+    }
+    return render(request, 'core/bill_claim_review.html', context)
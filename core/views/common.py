@@ -0,0 +1,91 @@
+import logging
+from django.shortcuts import get_object_or_404
+from django.core.exceptions import PermissionDenied
+from django.contrib.auth.views import redirect_to_login
+from functools import wraps
+from ..models import Sale
+from ..permissions import ROLE_MANAGER, user_in_group
+
+logger = logging.getLogger(__name__)
+
+
+def _can_view_all_sales(user):
+    return bool(user.is_superuser or getattr(user, 'is_manager', False))
+
+
+def _visible_sales_queryset(user):
+    qs = Sale.objects.select_related('customer').all()
+    if _can_view_all_sales(user):
+        return qs
+    return qs.filter(created_by=user)
+
+
+def _get_visible_sale_or_404(request, pk):
+    return get_object_or_404(_visible_sales_queryset(request.user), pk=pk)
+
+
+def is_manager(user):
+    if not user.is_authenticated:
+        return False
+    return bool(
+        user.is_superuser
+        or getattr(user, 'is_manager', False)
+        or user_in_group(user, ROLE_MANAGER)
+    )
+
+
+# Custom decorator: redirect unauthenticated to login, raise 403 for authenticated non-managers
+def manager_required(view_func):
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        user = request.user
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path(), login_url='/login/')
+        if not is_manager(user):
+            raise PermissionDenied
+        return view_func(request, *args, **kwargs)
+    return _wrapped
+
+
+def _collect_form_errors(*, sale_form=None, item_formset=None, payment_form=None, limit=4):
+    parts = []
+
+    def _flatten_errors(errors_dict):
+        msgs = []
+        for field, errs in errors_dict.items():
+            if field == '__all__':
+                label = 'General'
+            else:
+                label = str(field).replace('_', ' ').title()
+            for e in errs:
+                msgs.append(f"{label}: {e}")
+        return msgs
+
+    if sale_form is not None and getattr(sale_form, 'errors', None):
+        msgs = _flatten_errors(sale_form.errors)
+        if msgs:
+            parts.append("Customer - " + "; ".join(msgs[:limit]))
+
+    if item_formset is not None:
+        msgs = []
+        try:
+            non_form = list(item_formset.non_form_errors())
+            msgs.extend(non_form)
+        except Exception:
+            logger.exception('Error reading non_form_errors from item_formset')
+        for i, f in enumerate(getattr(item_formset, 'forms', []) or []):
+            if getattr(f, 'errors', None):
+                row_msgs = _flatten_errors(f.errors)
+                for m in row_msgs:
+                    msgs.append(f"Item {i + 1} - {m}")
+            if len(msgs) >= limit:
+                break
+        if msgs:
+            parts.append("Items - " + "; ".join(msgs[:limit]))
+
+    if payment_form is not None and getattr(payment_form, 'errors', None):
+        msgs = _flatten_errors(payment_form.errors)
+        if msgs:
+            parts.append("Payment - " + "; ".join(msgs[:limit]))
+
+    return parts
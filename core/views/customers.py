@@ -0,0 +1,317 @@
+import logging
+from decimal import Decimal, InvalidOperation
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required, permission_required
+from django.views.decorators.http import require_POST
+from django.core.exceptions import PermissionDenied
+from django.contrib import messages
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.utils import OperationalError, ProgrammingError
+from django.utils import timezone
+from django.http import JsonResponse
+from django.urls import reverse
+from ..models import Customer, CustomerPaymentBatch
+from django.core.paginator import Paginator
+from .. import customer_accounts, metrics, payment_allocation
+from ..pagination import CountedPaginator
+from ..db_connections import statement_timeout
+from ..forms import CustomerForm, SalePaymentForm
+
+logger = logging.getLogger(__name__)
+
+# customer_list ?sort= values; the account columns come from CustomerAccount.
+CUSTOMER_SORTS = {
+    'due': (F('account__total_due').desc(nulls_last=True), '-created_at'),
+    'last_sale': (F('account__last_sale_date').desc(nulls_last=True), '-created_at'),
+    'last_payment': (F('account__last_payment_date').desc(nulls_last=True), '-created_at'),
+}
+
+
+# Customer Views
+@login_required
+@permission_required('core.view_customer', raise_exception=True)
+def customer_list(request):
+    query = request.GET.get('q', '')
+    status_filter = request.GET.get('status', '')
+    due_filter = request.GET.get('due', '')
+    sort = request.GET.get('sort', '')
+    qs = Customer.objects.select_related('account')
+    if query:
+        qs = qs.filter(
+            Q(name__icontains=query) |
+            Q(customer_id__icontains=query) |
+            Q(company__icontains=query) |
+            Q(phone__icontains=query)
+        )
+    if status_filter:
+        qs = qs.filter(status=status_filter)
+    if due_filter == 'outstanding':
+        qs = qs.filter(account__total_due__gt=0)
+    elif due_filter == 'settled':
+        qs = qs.exclude(account__total_due__gt=0)
+    if sort in CUSTOMER_SORTS:
+        qs = qs.order_by(*CUSTOMER_SORTS[sort])
+    paginator = CountedPaginator(qs, 10)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'core/customer_list.html', {
+        'customers': page_obj.object_list,
+        'page_obj': page_obj,
+        'query': query,
+        'status_filter': status_filter,
+        'due_filter': due_filter,
+        'sort': sort,
+    })
+
+
+@login_required
+@permission_required('core.add_customer', raise_exception=True)
+def customer_add(request):
+    if request.method == 'POST':
+        form = CustomerForm(request.POST)
+        if form.is_valid():
+            form.save()
+            messages.success(request, 'Customer added successfully!')
+            return redirect('customer_list')
+    else:
+        form = CustomerForm()
+    return render(request, 'core/customer_form.html', {'form': form, 'title': 'Add Customer'})
+
+
+@login_required
+@permission_required('core.change_customer', raise_exception=True)
+def customer_edit(request, pk):
+    customer = get_object_or_404(Customer, pk=pk)
+    if request.method == 'POST':
+        form = CustomerForm(request.POST, instance=customer)
+        if form.is_valid():
+            form.save()
+            messages.success(request, 'Customer updated successfully!')
+            return redirect('customer_list')
+    else:
+        form = CustomerForm(instance=customer)
+    return render(request, 'core/customer_form.html', {'form': form, 'title': 'Edit Customer'})
+
+
+@login_required
+@permission_required('core.delete_customer', raise_exception=True)
+def customer_delete(request, pk):
+    customer = get_object_or_404(Customer, pk=pk)
+    
+    # Collect counts of related data
+    sales_count = customer.sales.count()
+    payments_count = customer.payments.count()
+    payment_batches_count = customer.payment_batches.count()
+    
+    context = {
+        'object': customer,
+        'type': 'Customer',
+        'sales_count': sales_count,
+        'payments_count': payments_count,
+        'payment_batches_count': payment_batches_count,
+        'has_related_data': sales_count > 0 or payments_count > 0 or payment_batches_count > 0,
+    }
+    
+    if request.method == 'POST':
+        acknowledge = request.POST.get('acknowledge_deletion') == 'on'
+        
+        # If customer has related data, require acknowledgment
+        if context['has_related_data'] and not acknowledge:
+            context['error_message'] = 'You must acknowledge the data loss before deleting.'
+            return render(request, 'core/confirm_delete.html', context)
+        
+        customer.delete()
+        messages.success(request, 'Customer deleted successfully!')
+        return redirect('customer_list')
+    
+    return render(request, 'core/confirm_delete.html', context)
+
+
+@login_required
+@permission_required('core.view_customer', raise_exception=True)
+def customer_detail(request, pk):
+    customer = get_object_or_404(Customer, pk=pk)
+    sales_qs = customer.sales.filter(status='finalized').select_related().prefetch_related('items__inventory_item', 'payments').order_by('-created_at')
+    
+    account = customer_accounts.account_for(customer)
+    total_due = account.total_due
+    
+    paginator = Paginator(sales_qs, 10)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    can_view_customer_payment_receipts = bool(
+        request.user.is_superuser
+        or request.user.has_perm('core.view_salepayment')
+        or request.user.has_perm('core.add_salepayment')
+    )
+    can_record_customer_payment = bool(
+        total_due > 0 and (
+            request.user.is_superuser
+            or request.user.has_perm('core.add_salepayment')
+        )
+    )
+    payment_batches = []
+    latest_payment_batch = None
+    if can_view_customer_payment_receipts:
+        try:
+            payment_batches = list(
+                customer.payment_batches
+                .annotate(allocation_count=Count('allocations'))
+                .order_by('-created_at')[:10]
+            )
+            if payment_batches:
+                latest_payment_batch = payment_batches[0]
+        except (OperationalError, ProgrammingError):
+            # New receipt tables may not exist before migrations are applied.
+            payment_batches = []
+            latest_payment_batch = None
+    context = {
+        'customer': customer,
+        'sales': page_obj.object_list,
+        'page_obj': page_obj,
+        'title': 'Customer Details',
+        'account': account,
+        'total_amount': account.total_amount,
+        'total_paid': account.total_paid,
+        'total_due': total_due,
+        'add_payment_form': SalePaymentForm(initial={'payment_date': timezone.localdate()}),
+        'customer_payment_error': request.session.pop('customer_payment_error', ''),
+        'payment_batches': payment_batches,
+        'latest_payment_batch': latest_payment_batch,
+        'can_view_customer_payment_receipts': can_view_customer_payment_receipts,
+        'can_record_customer_payment': can_record_customer_payment,
+    }
+    return render(request, 'core/customer_detail.html', context)
+
+
+@login_required
+@permission_required('core.add_salepayment', raise_exception=True)
+@require_POST
+@statement_timeout('pos')
+def customer_add_payment(request, customer_id):
+    form = SalePaymentForm(request.POST)
+
+    if not form.is_valid():
+        errors = []
+        for field, errs in form.errors.items():
+            label = form.fields.get(field).label if field in form.fields else field
+            for err in errs:
+                errors.append(f"{label}: {err}")
+        customer = get_object_or_404(Customer, pk=customer_id)
+        customer_url = reverse('customer_detail', kwargs={'pk': customer.pk})
+        request.session['customer_payment_error'] = ' '.join(errors) if errors else 'Please correct the highlighted fields.'
+        return redirect(f"{customer_url}?open_customer_payment=1#orders")
+
+    cleaned = form.cleaned_data
+    try:
+        incoming_amount = Decimal(cleaned.get('amount') or 0)
+    except (TypeError, InvalidOperation):
+        incoming_amount = Decimal('0')
+
+    customer = get_object_or_404(Customer, pk=customer_id)
+    customer_url = reverse('customer_detail', kwargs={'pk': customer.pk})
+
+    if incoming_amount <= 0:
+        request.session['customer_payment_error'] = 'Amount must be greater than zero.'
+        return redirect(f"{customer_url}?open_customer_payment=1#orders")
+
+    base_notes = (cleaned.get('notes') or '').strip()
+    note_prefix = 'Payment via customer account - FIFO allocation'
+    composed_notes = note_prefix if not base_notes else f"{note_prefix} | {base_notes}"
+
+    with transaction.atomic():
+        # Serialize customer-level allocations per customer in a Postgres-safe way.
+        with metrics.lock_wait('customer'):
+            customer = Customer.objects.select_for_update().get(pk=customer.pk)
+
+        payment_date = cleaned.get('payment_date')
+        method = cleaned.get('method')
+        try:
+            batch = CustomerPaymentBatch.objects.create(
+                customer=customer,
+                payment_date=payment_date,
+                method=method,
+                total_amount=incoming_amount,
+                notes=base_notes,
+                created_by=request.user,
+            )
+        except (OperationalError, ProgrammingError):
+            request.session['customer_payment_error'] = 'Customer payment receipt tables are not ready yet. Please run migrations and try again.'
+            return redirect(f"{customer_url}?open_customer_payment=1#orders")
+
+        due_sales = payment_allocation.due_sales(customer)
+        total_due = sum((sale.due_amount for sale in due_sales), Decimal('0'))
+
+        if total_due <= 0:
+            batch.delete()
+            request.session['customer_payment_error'] = 'No unpaid finalized sales found for this customer.'
+            return redirect(f"{customer_url}#orders")
+
+        if incoming_amount > total_due:
+            batch.delete()
+            request.session['customer_payment_error'] = f'Payment exceeds customer total due (Tk {total_due:.2f}).'
+            return redirect(f"{customer_url}?open_customer_payment=1#orders")
+
+        payment_allocation.allocate_customer_payment(batch, due_sales, composed_notes)
+
+    return redirect(
+        reverse('customer_payment_receipt', kwargs={'customer_id': customer.pk, 'batch_ref': batch.batch_ref})
+    )
+
+
+@login_required
+def customer_payment_receipt(request, customer_id, batch_ref):
+    if not (
+        request.user.is_superuser
+        or request.user.has_perm('core.view_salepayment')
+        or request.user.has_perm('core.add_salepayment')
+    ):
+        raise PermissionDenied
+
+    customer = get_object_or_404(Customer, pk=customer_id)
+    try:
+        batch = get_object_or_404(
+            CustomerPaymentBatch.objects.select_related('customer'),
+            customer=customer,
+            batch_ref=batch_ref,
+        )
+    except (OperationalError, ProgrammingError):
+        messages.error(request, 'Customer payment receipt tables are not ready yet. Please run migrations.')
+        return redirect(f"{reverse('customer_detail', kwargs={'pk': customer.pk})}#orders")
+    allocations = list(
+        batch.allocations.select_related('sale', 'sale_payment')
+        .order_by('sale__finalized_at', 'sale_id', 'id')
+    )
+
+    if not allocations:
+        messages.error(request, 'No payment records found for this receipt batch.')
+        return redirect(f"{reverse('customer_detail', kwargs={'pk': customer.pk})}#orders")
+
+    account = customer_accounts.account_for(customer)
+
+    context = {
+        'customer': customer,
+        'batch': batch,
+        'allocations': allocations,
+        'customer_total_amount': account.total_amount,
+        'customer_total_paid': account.total_paid,
+        'customer_total_due': account.total_due,
+    }
+    return render(request, 'core/customer_payment_receipt.html', context)
+
+
+@login_required
+@permission_required('core.add_customer', raise_exception=True)
+def customer_quick_add(request):
+    """AJAX endpoint to quickly add a customer and return JSON for select update."""
+    if request.method != 'POST' or request.headers.get('x-requested-with') != 'XMLHttpRequest':
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    form = CustomerForm(request.POST)
+    if form.is_valid():
+        cust = form.save()
+        return JsonResponse({
+            'id': cust.pk,
+            'name': cust.name,
+            'customer_id': cust.customer_id,
+            'display': f"{cust.name} ({cust.customer_id})"
+        })
+    return JsonResponse({'errors': form.errors}, status=422)
@@ -0,0 +1,161 @@
+from django.shortcuts import render
+from django.contrib.auth.decorators import login_required
+from django.db.models import Sum, F, Value, DecimalField, ExpressionWrapper
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from accounts.models import CustomUser
+from ..models import Customer, InventoryItem, Expense, BillClaim, Sale, SaleItem
+from .. import cache as model_cache
+from .. import local_dates
+from ..db_router import use_replica
+
+
+def _machine_label_from_description(text: str) -> str:
+    # Common patterns in this project: free-text, "Machine: <name> - <details>", or multi-line.
+    if not text:
+        return ''
+    label = str(text).strip().splitlines()[0].strip()
+    # Strip common prefixes
+    for prefix in ('machine:', 'Machine:', 'MACHINE:'):
+        if label.startswith(prefix):
+            label = label[len(prefix):].strip()
+            break
+    # If it looks like "Name - details" or "Name — details", keep only the name.
+    for sep in (' - ', ' — ', ' – '):
+        if sep in label:
+            label = label.split(sep, 1)[0].strip()
+            break
+    return label
+
+
+def _top_products():
+    # Top selling products (all time) by quantity, across inventory + machine items
+    inventory_top = (
+        SaleItem.objects.filter(sale__status='finalized', item_type='inventory', inventory_item__isnull=False)
+        .values('inventory_item__part_name')
+        .annotate(total_qty=Sum('quantity'))
+    )
+
+    machine_qty_by_label = {}
+    for desc, qty in (
+        SaleItem.objects.filter(sale__status='finalized', item_type='non_inventory')
+        .exclude(description='')
+        .values_list('description', 'quantity')
+    ):
+        label = _machine_label_from_description(desc)
+        if not label:
+            continue
+        machine_qty_by_label[label] = (machine_qty_by_label.get(label) or 0) + (qty or 0)
+
+    top_products = [
+        {'label': row['inventory_item__part_name'], 'item_type': 'inventory', 'total_qty': row['total_qty'] or 0}
+        for row in inventory_top
+        if row.get('inventory_item__part_name')
+    ] + [
+        {'label': label, 'item_type': 'machine', 'total_qty': total_qty}
+        for label, total_qty in machine_qty_by_label.items()
+    ]
+    top_products = sorted(top_products, key=lambda r: r['total_qty'], reverse=True)[:10]
+    return top_products
+
+
+def _inventory_metrics():
+    return {
+        'total_inventory_items': InventoryItem.objects.count(),
+        'low_stock_items': InventoryItem.objects.filter(quantity__lte=F('minimum_stock')).count(),
+        # Ensure mixed int/decimal multiplication resolves to decimal via ExpressionWrapper
+        'total_inventory_value': InventoryItem.objects.aggregate(
+            total=Sum(
+                ExpressionWrapper(
+                    F('quantity') * Coalesce(F('unit_price'), Value(0, output_field=DecimalField(max_digits=12, decimal_places=2))),
+                    output_field=DecimalField(max_digits=12, decimal_places=2)
+                )
+            )
+        )['total'] or 0,
+    }
+
+
+def _sale_metrics(today):
+    # Sale metrics (replacing legacy Payment metrics)
+    return {
+        'pending_sales': Sale.objects.filter(status='draft').count(),
+        'finalized_sales': Sale.objects.filter(status='finalized').count(),
+        'today_sales_total': Sale.objects.filter(status='finalized', finalized_date=today).aggregate(
+            total=Sum('total_amount')
+        )['total'] or 0,
+        'total_sales_due': Sale.objects.filter(status='finalized').annotate(
+            balance=F('total_amount') - Coalesce(Sum('payments__amount'), Value(0, output_field=DecimalField(max_digits=12, decimal_places=2)))
+        ).aggregate(total=Sum('balance'))['total'] or 0,
+    }
+
+
+def _monthly_expenses(today):
+    month_start, next_month = local_dates.month_range(today.year, today.month)
+    return Expense.objects.filter(
+        date__gte=month_start,
+        date__lt=next_month,
+    ).aggregate(total=Sum('amount'))['total'] or 0
+
+
+# Aggregates are cached per model version (core.cache), so any write to the
+# underlying tables invalidates them; date-dependent values key on the date.
+
+def top_products():
+    return model_cache.get_or_compute('dashboard_top_products', ('Sale', 'SaleItem', 'InventoryItem'), _top_products)
+
+
+def inventory_metrics():
+    return model_cache.get_or_compute('dashboard_inventory', ('InventoryItem',), _inventory_metrics)
+
+
+def sale_metrics(today):
+    return model_cache.get_or_compute('dashboard_sales', ('Sale', 'SalePayment'), lambda: _sale_metrics(today), today.isoformat())
+
+
+def monthly_expenses(today):
+    return model_cache.get_or_compute(
+        'dashboard_monthly_expenses', ('Expense',), lambda: _monthly_expenses(today), today.strftime('%Y-%m')
+    )
+
+
+def activity_counts():
+    return {
+        'total_employees': CustomUser.objects.filter(status='active').count(),
+        'total_customers': Customer.objects.filter(status='active').count(),
+        'pending_bill_claims': BillClaim.objects.filter(status='pending').count(),
+    }
+
+
+def headline_metrics(today):
+    """The dashboard's headline numbers as independent callables returning dicts.
+
+    Shared by the dashboard page and ``dashboard_metrics_api``, which runs them concurrently.
+    """
+    return (
+        activity_counts,
+        inventory_metrics,
+        lambda: sale_metrics(today),
+        lambda: {'monthly_expenses': monthly_expenses(today)},
+    )
+
+
+@login_required
+@use_replica
+def dashboard(request):
+    """Dashboard with key metrics"""
+    today = timezone.localdate()
+    products = top_products()
+
+    context = {}
+    for metrics in headline_metrics(today):
+        context.update(metrics())
+    context.update({
+        'top_products': products,
+        'top_products_max_qty': max([p['total_qty'] for p in products], default=0),
+        'recent_expenses': Expense.objects.all()[:5],
+        'recent_sales': Sale.objects.select_related('customer').all()[:5],
+        'low_stock_alerts': InventoryItem.objects.filter(
+            quantity__lte=F('minimum_stock')
+        )[:5],
+    })
+    return render(request, 'core/dashboard.html', context)
@@ -0,0 +1,156 @@
+import logging
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required, permission_required
+from django.contrib import messages
+from django.db.models import Count, Sum, Q
+from ..models import Expense, BillClaim, LedgerEntry
+from .. import local_dates
+from ..pagination import CountedPaginator
+from ..forms import ExpenseForm
+from .common import manager_required
+
+logger = logging.getLogger(__name__)
+
+
+# Expense Views
+@login_required
+@permission_required('core.view_expense', raise_exception=True)
+def expense_list(request):
+    query = request.GET.get('q', '')
+    category_filter = request.GET.get('category', '')
+    month_filter = request.GET.get('month', '')
+    start_date = request.GET.get('start_date', '')
+    end_date = request.GET.get('end_date', '')
+    qs = Expense.objects.all()
+    if query:
+        qs = qs.filter(
+            Q(description__icontains=query) |
+            Q(paid_to__icontains=query) |
+            Q(receipt_number__icontains=query)
+        )
+    if category_filter:
+        qs = qs.filter(category=category_filter)
+    # Month filter (accept both YYYY-MM from input type="month" and MM-YYYY)
+    if month_filter and not (start_date or end_date):  # prioritize explicit date range
+        try:
+            parts = month_filter.split('-')
+            if len(parts) == 2:
+                # Detect ordering: if first part length == 4 treat as year-month
+                if len(parts[0]) == 4:
+                    year = int(parts[0])
+                    month = int(parts[1])
+                else:
+                    month = int(parts[0])
+                    year = int(parts[1])
+                month_start, next_month = local_dates.month_range(year, month)
+                qs = qs.filter(date__gte=month_start, date__lt=next_month)
+        except Exception:
+            logger.exception('Failed to parse month_filter: %s', month_filter)
+
+    # Specific date or date range filtering
+    from django.utils.dateparse import parse_date
+    sd = parse_date(start_date) if start_date else None
+    ed = parse_date(end_date) if end_date else None
+    if sd and ed:
+        qs = qs.filter(date__range=(sd, ed))
+    elif sd:
+        qs = qs.filter(date=sd)
+    elif ed:
+        qs = qs.filter(date=ed)
+    expense_summary = qs.aggregate(total=Sum('amount'), count=Count('pk'))
+    total_expenses = expense_summary['total'] or 0
+    credit_total = LedgerEntry.objects.filter(entry_type='credit').aggregate(total=Sum('amount'))['total'] or 0
+    debit_total = LedgerEntry.objects.filter(entry_type='debit').aggregate(total=Sum('amount'))['total'] or 0
+    current_balance = (credit_total or 0) - (debit_total or 0)
+    paginator = CountedPaginator(qs, 10, count=expense_summary['count'])
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'core/expense_list.html', {
+        'expenses': page_obj.object_list,
+        'page_obj': page_obj,
+        'query': query,
+        'category_filter': category_filter,
+        'month_filter': month_filter,
+        'start_date': start_date,
+        'end_date': end_date,
+        'total_expenses': total_expenses,
+        'balance': current_balance,
+    })
+
+
+@login_required
+@permission_required('core.add_expense', raise_exception=True)
+def expense_add(request):
+    if request.method == 'POST':
+        form = ExpenseForm(request.POST)
+        if form.is_valid():
+            exp = form.save()  # Ledger entry now created exclusively by post_save signal
+            messages.success(request, 'Expense added successfully!')
+            return redirect('expense_list')
+    else:
+        form = ExpenseForm()
+    return render(request, 'core/expense_form.html', {'form': form, 'title': 'Add Expense'})
+
+
+@login_required
+@manager_required
+def expense_edit(request, pk):
+    expense = get_object_or_404(Expense, pk=pk)
+    if request.method == 'POST':
+        form = ExpenseForm(request.POST, instance=expense)
+        if form.is_valid():
+            form.save()
+            messages.success(request, 'Expense updated successfully!')
+            return redirect('expense_list')
+    else:
+        form = ExpenseForm(instance=expense)
+    return render(request, 'core/expense_form.html', {'form': form, 'title': 'Edit Expense'})
+
+
+@login_required
+@manager_required
+def expense_delete(request, pk):
+    expense = get_object_or_404(Expense, pk=pk)
+    if request.method == 'POST':
+        expense.delete()
+        messages.success(request, 'Expense deleted successfully!')
+        return redirect('expense_list')
+    return render(request, 'core/confirm_delete.html', {'object': expense, 'type': 'Expense'})
+
+
+@login_required
+@permission_required('core.view_expense', raise_exception=True)
+def expense_detail(request, pk):
+    """View expense details"""
+    expense = get_object_or_404(Expense, pk=pk)
+    
+    # Check if this expense was created from a bill claim
+    related_claim = None
+    related_claim_submitter = None
+    related_claim_approver = None
+    related_claim_approval_date = None
+    try:
+        related_claim = BillClaim.objects.get(expense=expense)
+    except BillClaim.DoesNotExist:
+        pass
+    else:
+        submitter_name = related_claim.submitter.get_full_name().strip()
+        if not submitter_name:
+            submitter_name = related_claim.submitter.username
+        related_claim_submitter = submitter_name
+
+        if related_claim.approved_by:
+            approver_name = related_claim.approved_by.get_full_name().strip()
+            if not approver_name:
+                approver_name = related_claim.approved_by.username
+            related_claim_approver = approver_name
+        related_claim_approval_date = related_claim.approval_date
+    
+    context = {
+        'expense': expense,
+        'related_claim': related_claim,
+        'related_claim_submitter': related_claim_submitter,
+        'related_claim_approver': related_claim_approver,
+        'related_claim_approval_date': related_claim_approval_date,
+        'title': 'Expense Details'
+    }
+    return render(request, 'core/expense_detail.html', context)
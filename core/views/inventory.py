@@ -0,0 +1,161 @@
+from decimal import Decimal
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required, permission_required
+from django.contrib import messages
+from django.http import JsonResponse
+from django.db import transaction
+from django.db.models import Sum, Count, Q, F, DecimalField, ExpressionWrapper
+from .. import keyset, stock
+from ..models import InventoryItem
+from ..pagination import CountedPaginator
+from ..forms import InventoryItemForm
+
+# Changed only through core.stock movements.
+STOCK_FIELDS = ('quantity', 'box_count')
+STOCK_HISTORY_PAGE_SIZE = 20
+
+
+# Inventory Views
+@login_required
+@permission_required('core.view_inventoryitem', raise_exception=True)
+def inventory_list(request):
+    query = request.GET.get('q', '')
+    category_filter = request.GET.get('category', '')
+    low_stock = request.GET.get('low_stock', '')
+    qs = InventoryItem.objects.all()
+    if query:
+        qs = qs.filter(
+            Q(part_name__icontains=query) |
+            Q(part_code__icontains=query) |
+            Q(category__icontains=query)
+        )
+    if category_filter:
+        qs = qs.filter(category__icontains=category_filter)
+    if low_stock:
+        qs = qs.filter(quantity__lte=F('minimum_stock'))
+
+    inventory_summary = qs.aggregate(
+        matching_items=Count('pk'),
+        total_quantity=Sum('quantity'),
+        total_boxes=Sum('box_count'),
+        total_stock_value=Sum(
+            ExpressionWrapper(
+                F('quantity') * F('unit_price'),
+                output_field=DecimalField(max_digits=20, decimal_places=2),
+            )
+        ),
+    )
+
+    paginator = CountedPaginator(qs, 10, count=inventory_summary['matching_items'])
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'core/inventory_list.html', {
+        'items': page_obj.object_list,
+        'page_obj': page_obj,
+        'query': query,
+        'category_filter': category_filter,
+        'low_stock': low_stock,
+        'inventory_summary': {
+            'matching_items': inventory_summary['matching_items'] or 0,
+            'total_quantity': inventory_summary['total_quantity'] or Decimal('0'),
+            'total_boxes': inventory_summary['total_boxes'] or 0,
+            'total_stock_value': inventory_summary['total_stock_value'] or Decimal('0'),
+        },
+    })
+
+
+@login_required
+@permission_required('core.add_inventoryitem', raise_exception=True)
+def inventory_add(request):
+    if request.method == 'POST':
+        form = InventoryItemForm(request.POST)
+        if form.is_valid():
+            item = form.save(commit=False)
+            initial = stock.Movement(item, item.quantity, item.box_count, 'in', 'Initial stock')
+            item.quantity, item.box_count = 0, 0
+            with transaction.atomic():
+                item.save()
+                stock.apply([initial], user=request.user)
+            messages.success(request, 'Inventory item added successfully!')
+            return redirect('inventory_list')
+    else:
+        form = InventoryItemForm()
+    return render(request, 'core/inventory_form.html', {'form': form, 'title': 'Add Inventory Item'})
+
+
+@login_required
+@permission_required('core.change_inventoryitem', raise_exception=True)
+def inventory_edit(request, pk):
+    item = get_object_or_404(InventoryItem, pk=pk)
+    previous_quantity, previous_boxes = item.quantity, item.box_count
+    if request.method == 'POST':
+        form = InventoryItemForm(request.POST, instance=item)
+        if form.is_valid():
+            # Stock is not saved from the form: the difference from what was on
+            # hand is applied as a movement, so sales made meanwhile are kept.
+            quantity_delta = item.quantity - previous_quantity
+            box_delta = item.box_count - previous_boxes
+            item.quantity, item.box_count = previous_quantity, previous_boxes
+            # One movement per unit, so adding boxes while removing units (or the
+            # reverse) logs each under its own direction; zero deltas are skipped.
+            movements = [
+                stock.Movement(
+                    item, quantity, boxes,
+                    'in' if quantity + boxes > 0 else 'adjustment',
+                    'Stock added via edit' if quantity + boxes > 0 else 'Stock adjusted via edit',
+                )
+                for quantity, boxes in ((quantity_delta, 0), (0, box_delta))
+            ]
+            try:
+                with transaction.atomic():
+                    item.save(update_fields=[*(f for f in form._meta.fields if f not in STOCK_FIELDS), 'updated_at'])
+                    stock.apply(movements, user=request.user)
+            except stock.InsufficientStock as e:
+                form.add_error('quantity', str(e))
+                return render(request, 'core/inventory_form.html', {'form': form, 'title': 'Edit Inventory Item'})
+            messages.success(request, 'Inventory item updated successfully!')
+            return redirect('inventory_list')
+    else:
+        form = InventoryItemForm(instance=item)
+    return render(request, 'core/inventory_form.html', {'form': form, 'title': 'Edit Inventory Item'})
+
+
+@login_required
+@permission_required('core.delete_inventoryitem', raise_exception=True)
+def inventory_delete(request, pk):
+    item = get_object_or_404(InventoryItem, pk=pk)
+    if request.method == 'POST':
+        item.delete()
+        messages.success(request, 'Inventory item deleted successfully!')
+        return redirect('inventory_list')
+    return render(request, 'core/confirm_delete.html', {'object': item, 'type': 'Inventory Item'})
+
+
+def _history_row(entry):
+    return {
+        'id': entry.pk,
+        'created_at': entry.created_at.isoformat(),
+        'transaction_type': entry.transaction_type,
+        'quantity': str(entry.quantity),
+        'previous_quantity': str(entry.previous_quantity),
+        'new_quantity': str(entry.new_quantity),
+        'box_quantity': str(entry.box_quantity),
+        'previous_box_quantity': str(entry.previous_box_quantity),
+        'new_box_quantity': str(entry.new_box_quantity),
+        'reason': entry.reason,
+        'created_by': entry.created_by,
+    }
+
+
+@login_required
+@permission_required('core.view_inventoryitem', raise_exception=True)
+def inventory_stock_history(request, pk):
+    """An item's stock movements, newest first, paged by cursor (``?format=json`` for infinite scroll)."""
+    item = get_object_or_404(InventoryItem, pk=pk)
+    page = keyset.paginate(item.stock_history.all(), 'created_at', request.GET.get('cursor'), STOCK_HISTORY_PAGE_SIZE)
+    if request.GET.get('format') == 'json':
+        return JsonResponse(keyset.page_json(page, _history_row))
+    return render(request, 'core/inventory_stock_history.html', {
+        'item': item,
+        'history': page.object_list,
+        'page': page,
+    })
@@ -0,0 +1,24 @@
+from django.utils.crypto import constant_time_compare
+from django.http import HttpResponse, Http404
+from .. import metrics
+
+
+def prometheus_metrics(request):
+    """Prometheus scrape endpoint.
+
+    Accepts ``Authorization: Bearer <METRICS_TOKEN>`` when a token is configured;
+    otherwise (or additionally) a logged-in superuser may read it.
+    """
+    from django.conf import settings
+
+    if not metrics.enabled():
+        raise Http404('Metrics are not available (prometheus_client is not installed).')
+
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+    token_ok = bool(token) and auth_header.startswith('Bearer ') and constant_time_compare(auth_header[7:], token)
+    if not token_ok and not (request.user.is_authenticated and request.user.is_superuser):
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+
+    body, content_type = metrics.render_latest()
+    return HttpResponse(body, content_type=content_type)
@@ -0,0 +1,246 @@
+from django.shortcuts import render
+from django.contrib.auth.decorators import login_required
+from django.db.models import Q, Sum
+from django.http import HttpResponse, JsonResponse
+from datetime import date, datetime
+from django.utils import timezone
+from accounts.models import CustomUser
+from ..models import Customer, InventoryItem, Expense, Payment, LedgerEntry
+from .. import keyset, metrics
+from ..db_connections import statement_timeout
+from ..db_router import use_replica
+from .common import manager_required
+
+LEDGER_PAGE_SIZE = 10
+
+
+# Reports
+@login_required
+@manager_required
+@use_replica
+def reports(request):
+    """Reports page with various statistics"""
+    # Monthly expense breakdown (this year)
+    year = timezone.localdate().year
+    monthly_expenses = Expense.objects.filter(
+        date__gte=date(year, 1, 1), date__lt=date(year + 1, 1, 1)
+    ).values('category').annotate(total=Sum('amount')).order_by('-total')
+    
+    # Payment statistics
+    payment_stats = {
+        'pending': Payment.objects.filter(status='pending').count(),
+        'completed': Payment.objects.filter(status='completed').count(),
+        'overdue': Payment.objects.filter(status='overdue').count(),
+    }
+    
+    # Current balance from ledger
+    credit_total = LedgerEntry.objects.filter(entry_type='credit').aggregate(total=Sum('amount'))['total'] or 0
+    debit_total = LedgerEntry.objects.filter(entry_type='debit').aggregate(total=Sum('amount'))['total'] or 0
+    current_balance = (credit_total or 0) - (debit_total or 0)
+
+    context = {
+        'monthly_expenses': monthly_expenses,
+        'payment_stats': payment_stats,
+        'balance': current_balance,
+    }
+    return render(request, 'core/reports.html', context)
+
+
+def _ledger_row(entry):
+    return {
+        'id': entry.pk,
+        'timestamp': entry.timestamp.isoformat(),
+        'entry_type': entry.entry_type,
+        'source': entry.get_source_display(),
+        'reference': entry.reference,
+        'description': entry.description,
+        'amount': str(entry.amount),
+    }
+
+
+@login_required
+@manager_required
+@use_replica
+def ledger(request):
+    """Simple ledger listing showing credits and debits with current balance.
+
+    Pages by cursor (core.keyset) rather than page number; ``?format=json``
+    returns one page of entries and the next cursor for infinite scroll.
+    """
+    page = keyset.paginate(LedgerEntry.objects.all(), 'timestamp', request.GET.get('cursor'), LEDGER_PAGE_SIZE)
+    if request.GET.get('format') == 'json':
+        return JsonResponse(keyset.page_json(page, _ledger_row))
+    totals = LedgerEntry.objects.aggregate(
+        credit_total=Sum('amount', filter=Q(entry_type='credit')),
+        debit_total=Sum('amount', filter=Q(entry_type='debit')),
+    )
+    credit_total = totals['credit_total'] or 0
+    debit_total = totals['debit_total'] or 0
+    current_balance = credit_total - debit_total
+    context = {
+        'entries': page.object_list,
+        'page': page,
+        'balance': current_balance,
+        'credit_total': credit_total,
+        'debit_total': debit_total,
+    }
+    return render(request, 'core/ledger.html', context)
+
+
+@login_required
+@manager_required
+@metrics.timed_export('export_excel')
+@use_replica
+@statement_timeout('export')
+def export_excel(request):
+    import openpyxl
+
+    """Export all data to Excel"""
+    wb = openpyxl.Workbook()
+    
+    # Remove default sheet
+    wb.remove(wb.active)
+    
+    # Export Employees
+    ws_employees = wb.create_sheet("Employees")
+    ws_employees.append(['ID', 'Name', 'Position', 'Department', 'Salary', 'Status', 'Join Date'])
+    for emp in CustomUser.objects.all():
+        ws_employees.append([
+            emp.employee_id, emp.get_full_name(), emp.position, emp.department, 
+            float(emp.salary) if emp.salary else 0, emp.status, emp.join_date
+        ])
+    
+    # Export Customers
+    ws_customers = wb.create_sheet("Customers")
+    ws_customers.append(['ID', 'Name', 'Company', 'Phone', 'City', 'Status'])
+    for cust in Customer.objects.all():
+        ws_customers.append([
+            cust.customer_id, cust.name, cust.company, cust.phone, cust.city, cust.status
+        ])
+    
+    # Export Inventory
+    ws_inventory = wb.create_sheet("Inventory")
+    ws_inventory.append(['Product Code', 'Product Name', 'Category', 'Quantity', 'Unit Price', 'Total Value'])
+    for item in InventoryItem.objects.all():
+        ws_inventory.append([
+            item.part_code, item.part_name, item.category, item.quantity,
+            float(item.unit_price or 0), float(item.total_value)
+        ])
+    
+    # Export Expenses
+    ws_expenses = wb.create_sheet("Expenses")
+    ws_expenses.append(['Date', 'Category', 'Description', 'Amount', 'Paid To'])
+    for exp in Expense.objects.all():
+        ws_expenses.append([
+            exp.date, exp.category, exp.description, float(exp.amount), exp.paid_to
+        ])
+    
+    # Export Payments
+    ws_payments = wb.create_sheet("Payments")
+    ws_payments.append(['Invoice', 'Customer', 'Type', 'Total Amount', 'Paid Amount', 'Remaining', 'Status'])
+    for pay in Payment.objects.all():
+        ws_payments.append([
+            pay.invoice_number, pay.customer.name, pay.payment_type, 
+            float(pay.total_amount), float(pay.paid_amount), 
+            float(pay.remaining_amount), pay.status
+        ])
+    
+    # Save to response
+    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    response['Content-Disposition'] = f'attachment; filename=org_management_export_{datetime.now().strftime("%Y%m%d")}.xlsx'
+    wb.save(response)
+    
+    return response
+
+
+@login_required
+@manager_required
+@metrics.timed_export('customer_report_excel')
+@use_replica
+@statement_timeout('export')
+def customer_report_excel(request):
+    import openpyxl
+    from openpyxl.styles import Font, Alignment, PatternFill
+    """Export customer financial summary to Excel with Total, Paid, and Due amounts"""
+    # Totals come from each customer's CustomerAccount row (core.customer_accounts).
+    customers = Customer.objects.select_related('account').order_by('customer_id')
+    
+    # Create workbook
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Customer Report"
+    
+    # Header styling
+    header_fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
+    header_font = Font(bold=True, color='FFFFFF', size=12)
+    header_alignment = Alignment(horizontal='center', vertical='center')
+    
+    # Add headers
+    headers = ['Name', 'Company', 'Phone', 'Total', 'Paid', 'Due']
+    ws.append(headers)
+    
+    # Style header row
+    for cell in ws[1]:
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = header_alignment
+    
+    # Add data rows
+    total_amount_sum = 0
+    total_paid_sum = 0
+    total_due_sum = 0
+    
+    for customer in customers.iterator(chunk_size=500):
+        account = getattr(customer, 'account', None)
+        total_amount = account.total_amount if account else 0
+        total_paid = account.total_paid if account else 0
+        balance_due = account.total_due if account else 0
+        
+        # Add to grand totals
+        total_amount_sum += total_amount
+        total_paid_sum += total_paid
+        total_due_sum += balance_due
+        
+        # Add row
+        ws.append([
+            customer.name,
+            customer.company or '-',
+            customer.phone,
+            float(total_amount),
+            float(total_paid),
+            float(balance_due)
+        ])
+    
+    # Add totals row
+    ws.append([])
+    total_row = ws.max_row + 1
+    ws.append(['TOTAL', '', '', float(total_amount_sum), float(total_paid_sum), float(total_due_sum)])
+    
+    # Style totals row
+    total_fill = PatternFill(start_color='E7E6E6', end_color='E7E6E6', fill_type='solid')
+    total_font = Font(bold=True, size=11)
+    for cell in ws[total_row]:
+        cell.fill = total_fill
+        cell.font = total_font
+        cell.alignment = Alignment(horizontal='center' if cell.column <= 3 else 'right')
+    
+    # Format currency columns (D, E, F) with alignment and number format
+    for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=4, max_col=6):
+        for cell in row:
+            cell.alignment = Alignment(horizontal='right')
+            cell.number_format = '#,##0.00'
+    
+    # Adjust column widths
+    ws.column_dimensions['A'].width = 25
+    ws.column_dimensions['B'].width = 25
+    ws.column_dimensions['C'].width = 15
+    ws.column_dimensions['D'].width = 15
+    ws.column_dimensions['E'].width = 15
+    ws.column_dimensions['F'].width = 15
+    
+    # Create response
+    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    response['Content-Disposition'] = f'attachment; filename=customer_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+    wb.save(response)
+    
+    return response
@@ -0,0 +1,1041 @@
+import logging
+from decimal import Decimal, InvalidOperation
+from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from django.contrib.auth.decorators import login_required, permission_required
+from django.views.decorators.http import require_POST
+from django.contrib import messages
+from django.db import connections, transaction
+from django.db.models import Case, DecimalField, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.forms import formset_factory
+from datetime import datetime, timedelta
+from accounts.models import CustomUser
+from ..models import Customer, InventoryItem, Sale, SaleItem, SalePayment, LedgerEntry
+from ..pagination import CountedPaginator
+from .. import metrics, stock
+from ..db_connections import statement_timeout
+from ..forms import SaleForm, SaleItemForm, SalePaymentForm
+from .common import _can_view_all_sales, _visible_sales_queryset, _get_visible_sale_or_404, _collect_form_errors
+
+logger = logging.getLogger(__name__)
+
+# Parts of the sale page the edit views can re-render on their own (templates/partials/sale_<name>.html).
+SALE_FRAGMENTS = ('totals', 'payments', 'items')
+
+_MONEY = DecimalField(max_digits=14, decimal_places=2)
+_ZERO = Value(Decimal('0'), output_field=_MONEY)
+_CENT = Decimal('0.01')
+
+
+def _prorated_paid(vendor):
+    """A sale's payments times its ``type_total`` share of the sale total, as an expression."""
+    if vendor == 'sqlite':
+        # SQLite has no decimal arithmetic anyway, and divides integer-valued
+        # decimals as integers unless one operand is a float.
+        share, output_field = Cast('type_total', FloatField()) * F('paid_total') / F('total_amount'), FloatField()
+    else:
+        share, output_field = F('type_total') * F('paid_total') / F('total_amount'), DecimalField()
+    return Case(When(total_amount__gt=0, then=share), default=Value(0), output_field=output_field)
+
+
+def _item_type_totals(sales, item_type):
+    """Amount and paid totals of ``sales`` counting only their ``item_type`` lines, in one query.
+
+    Each sale contributes the sum of its matching lines, and its payments
+    prorated by that share of the sale total (matching / total * paid).
+    """
+    line_totals = (
+        SaleItem.objects.filter(sale=OuterRef('pk'), item_type=item_type)
+        .order_by().values('sale').annotate(total=Sum('line_total')).values('total')
+    )
+    paid = (
+        SalePayment.objects.filter(sale=OuterRef('pk'))
+        .order_by().values('sale').annotate(total=Sum('amount')).values('total')
+    )
+    matching = Sale.objects.filter(pk__in=sales.values('pk'))
+    totals = (
+        matching
+        .annotate(
+            type_total=Coalesce(Subquery(line_totals, output_field=_MONEY), _ZERO),
+            paid_total=Coalesce(Subquery(paid, output_field=_MONEY), _ZERO),
+        )
+        .filter(type_total__gt=0)
+        .aggregate(amount=Sum('type_total'), paid=Sum(_prorated_paid(connections[matching.db].vendor)))
+    )
+    amount = totals['amount'] or Decimal('0')
+    paid = totals['paid'] or Decimal('0')
+    return Decimal(amount).quantize(_CENT), Decimal(str(paid)).quantize(_CENT)
+
+
+@login_required
+@permission_required('core.view_sale', raise_exception=True)
+def sale_list(request):
+    query = request.GET.get('q', '')
+    status = request.GET.get('status', '')
+    item_type = request.GET.get('item_type', '')  # 'inventory' or 'machine'
+    start_date = request.GET.get('start_date', '').strip()
+    end_date = request.GET.get('end_date', '').strip()
+    selected_user_id = request.GET.get('user_id', '').strip()
+    can_filter_by_user = _can_view_all_sales(request.user)
+    qs = _visible_sales_queryset(request.user).order_by('-created_at')
+    if query:
+        qs = qs.filter(
+            Q(sale_number__icontains=query) |
+            Q(customer__name__icontains=query) |
+            Q(customer__customer_id__icontains=query)
+        )
+    if status:
+        qs = qs.filter(status=status)
+    if start_date:
+        try:
+            start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
+            qs = qs.filter(created_date__gte=start_date_obj)
+        except ValueError:
+            start_date = ''
+    if end_date:
+        try:
+            end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
+            qs = qs.filter(created_date__lte=end_date_obj)
+        except ValueError:
+            end_date = ''
+    mapped = None
+    if item_type in ['inventory', 'machine']:
+        # Map 'machine' to non_inventory sale items
+        mapped = 'non_inventory' if item_type == 'machine' else 'inventory'
+        qs = qs.filter(items__item_type=mapped).distinct()
+    if can_filter_by_user and selected_user_id:
+        try:
+            qs = qs.filter(created_by_id=int(selected_user_id))
+        except (TypeError, ValueError):
+            selected_user_id = ''
+    paginator = CountedPaginator(qs, 10)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    # Sales overview metrics
+    # Business rule: exclude Draft & Quotation from aggregate totals and dues
+    totals_qs = qs.exclude(status__in=['draft', 'quote'])  # after filters
+    if mapped:
+        total_sales_amount, total_paid_amount = _item_type_totals(totals_qs, mapped)
+        total_due_amount = total_sales_amount - total_paid_amount
+    else:
+        total_sales_amount = totals_qs.aggregate(total=Sum('total_amount'))['total'] or 0
+        total_paid_amount = (
+            totals_qs.annotate(paid=Sum('payments__amount')).aggregate(total=Sum('paid'))['total'] or 0
+        )
+        total_due_amount = (total_sales_amount or 0) - (total_paid_amount or 0)
+    sales_users = []
+    if can_filter_by_user:
+        sales_users = CustomUser.objects.filter(status='active').order_by('first_name', 'username')
+    return render(request, 'core/sale_list.html', {
+        'sales': page_obj.object_list,
+        'page_obj': page_obj,
+        'query': query,
+        'status': status,
+        'item_type': item_type,
+        'start_date': start_date,
+        'end_date': end_date,
+        'sales_users': sales_users,
+        'selected_user_id': selected_user_id,
+        'can_filter_by_user': can_filter_by_user,
+        'total_sales_amount': total_sales_amount,
+        'total_paid_amount': total_paid_amount,
+        'total_due_amount': total_due_amount,
+    })
+
+
+def _sale_builder_inventory_data():
+    """Price map and item list for the sale builder's script (rendered with ``json_script``)."""
+    inventory_items = list(InventoryItem.objects.all())
+    return {
+        'inventory_prices': {str(i.id): float(i.unit_price or 0) for i in inventory_items},
+        'inventory_items_data': [
+            {'id': str(i.id), 'name': f'{i.part_name} ({i.part_code})', 'unit': i.get_unit_display()}
+            for i in inventory_items
+        ],
+    }
+
+
+@login_required
+@permission_required('core.add_sale', raise_exception=True)
+@statement_timeout('pos')
+def sale_create_unified(request):
+    """Unified sale creation: customer + multiple items + optional initial payment.
+    Steps 1-6 implementation (no finalize toggle yet).
+    """
+    SaleItemFormSet = formset_factory(SaleItemForm, extra=1, can_delete=True)
+    if request.method == 'POST':
+        # Preprocess: copy machine quantity/unit price into hidden fields; description already bound in template
+        post_data = request.POST.copy()
+        try:
+            total_forms = int(post_data.get('items-TOTAL_FORMS', '0'))
+        except ValueError:
+            total_forms = 0
+        
+        for i in range(total_forms):
+            t = post_data.get(f'items-{i}-item_type')
+            
+            if t == 'non_inventory':
+                desc_key = f'items-{i}-description'
+                qty_key = f'items-{i}-quantity'
+                qty_machine_key = f'items-{i}-quantity_machine'
+                price_key = f'items-{i}-unit_price'
+                price_machine_key = f'items-{i}-unit_price_machine'
+                
+                # Description already posted via textarea bound to formset
+                
+                # Copy machine quantity
+                qty_val = post_data.get(qty_key, '').strip()
+                qty_machine_val = post_data.get(qty_machine_key, '').strip()
+                if not qty_val and qty_machine_val:
+                    post_data[qty_key] = qty_machine_val
+                
+                # Copy machine price
+                price_val = post_data.get(price_key, '').strip()
+                price_machine_val = post_data.get(price_machine_key, '').strip()
+                if not price_val and price_machine_val:
+                    post_data[price_key] = price_machine_val
+
+        sale_form = SaleForm(post_data)
+        item_formset = SaleItemFormSet(post_data, prefix='items')
+        payment_form = SalePaymentForm(request.POST, prefix='pay')
+        
+        valid = True
+        if not sale_form.is_valid():
+            valid = False
+        # Note: We build items directly from POST, not from formset
+        if payment_form.is_valid():
+            pass
+        else:
+            # Allow empty payment section (all fields blank) -> treat as no payment
+            # If user entered amount but form invalid, block with a specific message
+            amt_raw = request.POST.get('pay-amount')
+            if amt_raw:
+                payment_form.add_error('amount', 'Enter a valid payment amount.')
+                valid = False
+        # Basic item presence validation - build items directly from POST data
+        cleaned_items = []
+        
+        for idx in range(total_forms):
+            item_type = post_data.get(f'items-{idx}-item_type', '').strip()
+            
+            # Skip completely blank rows
+            if not item_type:
+                continue
+                
+            if item_type == 'inventory':
+                inv_id = post_data.get(f'items-{idx}-inventory_item')
+                qty = post_data.get(f'items-{idx}-quantity', post_data.get(f'items-{idx}-quantity_inv', '1'))
+                price = post_data.get(f'items-{idx}-unit_price', post_data.get(f'items-{idx}-unit_price_inv', '0'))
+                
+                if not inv_id:
+                    messages.error(request, 'Inventory item must be selected')
+                    valid = False
+                    continue
+                    
+                try:
+                    inv_item = InventoryItem.objects.get(pk=inv_id)
+                    from decimal import Decimal as _D, InvalidOperation
+                    try:
+                        qty_dec = _D(str(qty)) if qty else _D('1')
+                    except InvalidOperation:
+                        qty_dec = _D('1')
+                    try:
+                        price_dec = _D(str(price)) if price else None
+                    except InvalidOperation:
+                        price_dec = None
+                    cleaned_items.append({
+                        'item_type': 'inventory',
+                        'inventory_item': inv_item,
+                        'description': inv_item.name,
+                        'quantity': qty_dec,
+                        'unit_price': price_dec if price_dec is not None else inv_item.unit_price
+                    })
+                except InventoryItem.DoesNotExist:
+                    messages.error(request, 'Invalid inventory item')
+                    valid = False
+                    
+            elif item_type == 'non_inventory':
+                machine_desc = post_data.get(f'items-{idx}-description', '').strip()
+                qty = post_data.get(f'items-{idx}-quantity', post_data.get(f'items-{idx}-quantity_machine', '1'))
+                price = post_data.get(f'items-{idx}-unit_price', post_data.get(f'items-{idx}-unit_price_machine', '0'))
+                
+                if not machine_desc:
+                    messages.error(request, 'Machine details are required')
+                    valid = False
+                    continue
+                
+                from decimal import Decimal as _D, InvalidOperation
+                try:
+                    qty_dec = _D(str(qty)) if qty else _D('1')
+                except InvalidOperation:
+                    qty_dec = _D('1')
+                try:
+                    price_dec = _D(str(price)) if price else _D('0')
+                except InvalidOperation:
+                    price_dec = _D('0')
+                item_dict = {
+                    'item_type': 'non_inventory',
+                    'inventory_item': None,
+                    'description': machine_desc,
+                    'quantity': qty_dec,
+                    'unit_price': price_dec
+                }
+                cleaned_items.append(item_dict)
+        if not cleaned_items:
+            valid = False
+            messages.error(request, 'Add at least one valid item.')
+        # Compute total from items (unit_price fallback to inventory price if missing)
+        from decimal import Decimal as _D
+        total_amount = _D('0')
+        if cleaned_items:
+            for cd in cleaned_items:
+                unit_price = cd.get('unit_price') or _D('0')
+                # If inventory and unit_price zero, fallback
+                if cd.get('item_type') == 'inventory' and cd.get('inventory_item') and (unit_price is None or unit_price <= 0):
+                    unit_price = _D(str(cd['inventory_item'].unit_price or 0))
+                qty = cd.get('quantity') or _D('0')
+                total_amount += _D(str(unit_price)) * _D(str(qty))
+        # Payment validation (if provided)
+        payment_amount = None
+        if payment_form.is_valid():
+            payment_amount = payment_form.cleaned_data.get('amount')
+            if payment_amount is not None and payment_amount < 0:
+                payment_form.add_error('amount', 'Payment cannot be negative.')
+                valid = False
+            elif cleaned_items and payment_amount and payment_amount > 0:
+                if payment_amount > total_amount:
+                    payment_form.add_error('amount', 'Payment exceeds total.')
+                    valid = False
+        if valid:
+            from django.db import transaction
+            with transaction.atomic():
+                sale = sale_form.save(commit=False)
+                sale.created_by = request.user
+                # status stays draft for now
+                sale.save()
+                for cd in cleaned_items:
+                    unit_price = cd.get('unit_price') or 0
+                    if cd.get('item_type') == 'inventory' and cd.get('inventory_item') and (unit_price is None or unit_price <= 0):
+                        unit_price = cd['inventory_item'].unit_price or 0
+                    SaleItem.objects.create(
+                        sale=sale,
+                        item_type=cd['item_type'],
+                        inventory_item=cd.get('inventory_item') if cd['item_type'] == 'inventory' else None,
+                        description=(cd.get('description') or '') if cd['item_type'] != 'inventory' else (
+                            f"{cd['inventory_item'].part_name} ({cd['inventory_item'].part_code})" if cd.get('inventory_item') else ''
+                        ),
+                        quantity=cd.get('quantity') or 0,
+                        boxes=cd.get('boxes') or 0,
+                        unit_price=unit_price,
+                    )
+                sale.recalc_total(save=True)
+                payment = None
+                if payment_amount and payment_amount > 0:
+                    payment = payment_form.save(commit=False)
+                    payment.sale = sale
+                    payment.save()
+                messages.success(request, 'Sale created successfully.')
+                if payment:
+                    messages.success(request, f'Payment recorded (Receipt {payment.receipt_number}).')
+                return redirect('sale_detail', pk=sale.pk)
+        else:
+            parts = _collect_form_errors(sale_form=sale_form, payment_form=payment_form)
+            messages.error(request, " | ".join(parts) if parts else 'Please correct the highlighted fields.')
+    else:
+        sale_form = SaleForm()
+        item_formset = formset_factory(SaleItemForm, extra=1, can_delete=True)(prefix='items')
+        payment_form = SalePaymentForm(prefix='pay')
+    return render(request, 'core/sale_create_unified.html', {
+        'sale_form': sale_form,
+        'item_formset': item_formset,
+        'payment_form': payment_form,
+        **_sale_builder_inventory_data(),
+        'title': 'Create Sale'
+    })
+
+
+@login_required
+@permission_required('core.add_sale', raise_exception=True)
+@statement_timeout('pos')
+def sale_create(request):
+    """Unified multi-item + optional payment create (invoice mode)."""
+    SaleItemFormSet = formset_factory(SaleItemForm, extra=1, can_delete=True)
+    if request.method == 'POST':
+        sale_form = SaleForm(request.POST)
+        item_formset = SaleItemFormSet(request.POST, prefix='items')
+        payment_form = SalePaymentForm(request.POST, prefix='pay')
+        valid = True
+        if not sale_form.is_valid():
+            valid = False
+        if not item_formset.is_valid():
+            valid = False
+        if not payment_form.is_valid():
+            amt_raw = request.POST.get('pay-amount')
+            if amt_raw:
+                payment_form.add_error('amount', 'Enter a valid payment amount.')
+                valid = False
+        cleaned_items = []
+        if item_formset.is_valid():
+            for f in item_formset.forms:
+                if f.cleaned_data.get('DELETE'): continue
+                cd = f.cleaned_data
+                if not cd.get('item_type') and not cd.get('inventory_item') and not cd.get('description'):
+                    continue
+                if not cd.get('item_type'):
+                    f.add_error('item_type', 'Select type'); valid = False; continue
+                if cd.get('item_type') == 'non_inventory' and not cd.get('description'):
+                    f.add_error('description', 'Description required'); valid = False; continue
+                if cd.get('item_type') == 'inventory' and not cd.get('inventory_item'):
+                    f.add_error('inventory_item', 'Choose inventory item'); valid = False; continue
+                cleaned_items.append(cd)
+        if not cleaned_items:
+            messages.error(request, 'Add at least one valid item.'); valid = False
+        from decimal import Decimal as _D
+        total_amount = _D('0')
+        for cd in cleaned_items:
+            unit_price = cd.get('unit_price') or _D('0')
+            if cd.get('item_type') == 'inventory' and cd.get('inventory_item') and (unit_price is None or unit_price <= 0):
+                unit_price = _D(str(cd['inventory_item'].unit_price or 0))
+            qty = cd.get('quantity') or _D('0')
+            total_amount += _D(str(unit_price)) * _D(str(qty))
+        payment_amount = None
+        if payment_form.is_valid():
+            payment_amount = payment_form.cleaned_data.get('amount')
+            if payment_amount is not None and payment_amount < 0:
+                payment_form.add_error('amount', 'Payment cannot be negative.'); valid = False
+            elif cleaned_items and payment_amount and payment_amount > total_amount:
+                payment_form.add_error('amount', 'Payment exceeds total.'); valid = False
+        if valid:
+            from django.db import transaction
+            with transaction.atomic():
+                sale = sale_form.save(commit=False)
+                sale.created_by = request.user
+                sale.save()
+                for cd in cleaned_items:
+                    unit_price = cd.get('unit_price') or 0
+                    if cd.get('item_type') == 'inventory' and cd.get('inventory_item') and (unit_price is None or unit_price <= 0):
+                        unit_price = cd['inventory_item'].unit_price or 0
+                    SaleItem.objects.create(
+                        sale=sale,
+                        item_type=cd['item_type'],
+                        inventory_item=cd.get('inventory_item') if cd['item_type'] == 'inventory' else None,
+                        description=(cd.get('description') or '') if cd['item_type'] != 'inventory' else (
+                            f"{cd['inventory_item'].part_name} ({cd['inventory_item'].part_code})" if cd.get('inventory_item') else ''
+                        ),
+                        quantity=cd.get('quantity') or 0,
+                        boxes=cd.get('boxes') or 0,
+                        unit_price=unit_price,
+                    )
+                sale.recalc_total(save=True)
+                payment = None
+                if payment_amount and payment_amount > 0:
+                    payment = payment_form.save(commit=False)
+                    payment.sale = sale
+                    payment.save()
+                messages.success(request, 'Sale created successfully.')
+                if payment:
+                    messages.success(request, f'Payment recorded (Receipt {payment.receipt_number}).')
+                return redirect('sale_detail', pk=sale.pk)
+        else:
+            parts = _collect_form_errors(sale_form=sale_form, item_formset=item_formset, payment_form=payment_form)
+            messages.error(request, " | ".join(parts) if parts else 'Please correct the highlighted fields.')
+    else:
+        sale_form = SaleForm()
+        item_formset = formset_factory(SaleItemForm, extra=1, can_delete=True)(prefix='items')
+        payment_form = SalePaymentForm(prefix='pay')
+    return render(request, 'core/sale_create_unified.html', {
+        'sale_form': sale_form,
+        'item_formset': item_formset,
+        'payment_form': payment_form,
+        **_sale_builder_inventory_data(),
+        'title': 'Create Sale'
+    })
+
+
+@login_required
+@permission_required('core.add_sale', raise_exception=True)
+def sale_quote_create(request):
+    """Unified multi-item + optional payment create (quotation mode)."""
+    SaleItemFormSet = formset_factory(SaleItemForm, extra=1, can_delete=True)
+    if request.method == 'POST':
+        sale_form = SaleForm(request.POST)
+        item_formset = SaleItemFormSet(request.POST, prefix='items')
+        payment_form = SalePaymentForm(request.POST, prefix='pay')
+        valid = True
+        if not sale_form.is_valid(): valid = False
+        if not item_formset.is_valid(): valid = False
+        if not payment_form.is_valid():
+            if request.POST.get('pay-amount'):
+                payment_form.add_error('amount', 'Enter a valid payment amount.')
+                valid = False
+        cleaned_items = []
+        if item_formset.is_valid():
+            for f in item_formset.forms:
+                if f.cleaned_data.get('DELETE'): continue
+                cd = f.cleaned_data
+                if not cd.get('item_type') and not cd.get('inventory_item') and not cd.get('description'): continue
+                if not cd.get('item_type'):
+                    f.add_error('item_type', 'Select type'); valid = False; continue
+                if cd.get('item_type') == 'non_inventory' and not cd.get('description'):
+                    f.add_error('description', 'Description required'); valid = False; continue
+                if cd.get('item_type') == 'inventory' and not cd.get('inventory_item'):
+                    f.add_error('inventory_item', 'Choose inventory item'); valid = False; continue
+                cleaned_items.append(cd)
+        if not cleaned_items:
+            messages.error(request, 'Add at least one valid item.'); valid = False
+        from decimal import Decimal as _D
+        total_amount = _D('0')
+        for cd in cleaned_items:
+            unit_price = cd.get('unit_price') or _D('0')
+            if cd.get('item_type') == 'inventory' and cd.get('inventory_item') and (unit_price is None or unit_price <= 0):
+                unit_price = _D(str(cd['inventory_item'].unit_price or 0))
+            qty = cd.get('quantity') or _D('0')
+            total_amount += _D(str(unit_price)) * _D(str(qty))
+        payment_amount = None
+        if payment_form.is_valid():
+            payment_amount = payment_form.cleaned_data.get('amount')
+            if payment_amount is not None and payment_amount < 0:
+                payment_form.add_error('amount', 'Payment cannot be negative.'); valid = False
+            elif payment_amount and payment_amount > total_amount:
+                payment_form.add_error('amount', 'Payment exceeds total.'); valid = False
+        if valid:
+            from django.db import transaction
+            with transaction.atomic():
+                sale = sale_form.save(commit=False)
+                sale.created_by = request.user
+                sale.status = 'quote'
+                sale.save()
+                for cd in cleaned_items:
+                    unit_price = cd.get('unit_price') or 0
+                    if cd.get('item_type') == 'inventory' and cd.get('inventory_item') and (unit_price is None or unit_price <= 0):
+                        unit_price = cd['inventory_item'].unit_price or 0
+                    SaleItem.objects.create(
+                        sale=sale,
+                        item_type=cd['item_type'],
+                        inventory_item=cd.get('inventory_item') if cd['item_type'] == 'inventory' else None,
+                        description=(cd.get('description') or '') if cd['item_type'] != 'inventory' else (
+                            f"{cd['inventory_item'].part_name} ({cd['inventory_item'].part_code})" if cd.get('inventory_item') else ''
+                        ),
+                        quantity=cd.get('quantity') or 0,
+                        boxes=cd.get('boxes') or 0,
+                        unit_price=unit_price,
+                    )
+                sale.recalc_total(save=True)
+                # Usually quotations may not record payments; allow if provided
+                payment = None
+                if payment_amount and payment_amount > 0:
+                    payment = payment_form.save(commit=False)
+                    payment.sale = sale
+                    payment.save()
+                messages.success(request, 'Quotation created.')
+                if payment:
+                    messages.success(request, f'Payment recorded (Receipt {payment.receipt_number}).')
+                return redirect('sale_detail', pk=sale.pk)
+        else:
+            parts = _collect_form_errors(sale_form=sale_form, item_formset=item_formset, payment_form=payment_form)
+            messages.error(request, " | ".join(parts) if parts else 'Please correct the highlighted fields.')
+    else:
+        sale_form = SaleForm()
+        item_formset = formset_factory(SaleItemForm, extra=1, can_delete=True)(prefix='items')
+        payment_form = SalePaymentForm(prefix='pay')
+    return render(request, 'core/sale_create_unified.html', {
+        'sale_form': sale_form,
+        'item_formset': item_formset,
+        'payment_form': payment_form,
+        **_sale_builder_inventory_data(),
+        'title': 'Create Quotation'
+    })
+
+
+@login_required
+@permission_required('core.change_sale', raise_exception=True)
+def sale_convert_to_invoice(request, pk):
+    sale = _get_visible_sale_or_404(request, pk)
+    if sale.status != 'quote':
+        messages.info(request, 'This sale is not a quotation.')
+        return redirect('sale_detail', pk=sale.pk)
+    sale.status = 'draft'
+    sale.save(update_fields=['status', 'updated_at'])
+    messages.success(request, 'Quotation converted to invoice. You can now finalize when ready.')
+    return redirect('sale_detail', pk=sale.pk)
+
+
+@login_required
+@permission_required('core.view_sale', raise_exception=True)
+def sale_detail(request, pk):
+    sale = _get_visible_sale_or_404(request, pk)
+    items = sale.items.select_related('inventory_item').all()
+    payments = sale.payments.all()
+    add_item_form = None
+    add_payment_form = None
+    can_edit_items = _can_edit_items(request.user, sale)
+    if can_edit_items:
+        add_item_form = SaleItemForm()
+    if request.user.has_perm('core.add_salepayment') and sale.status != 'cancelled' and sale.status != 'quote':
+        add_payment_form = SalePaymentForm()
+    # Inventory prices for client-side autofill in add-item form
+    inv_qs = None
+    if add_item_form:
+        try:
+            inv_qs = add_item_form.fields['inventory_item'].queryset
+        except Exception:
+            logger.exception('Error retrieving inventory_item queryset')
+            inv_qs = InventoryItem.objects.none()
+    inventory_prices = {str(i.id): float(i.unit_price) for i in (inv_qs or [])}
+    context = {
+        'sale': sale,
+        'items': items,
+        'payments': payments,
+        'add_item_form': add_item_form,
+        'add_payment_form': add_payment_form,
+        'can_edit_items': can_edit_items,
+        'inventory_prices': inventory_prices,
+    }
+    return render(request, 'core/sale_detail.html', context)
+
+
+def _can_edit_items(user, sale):
+    # Allow admins to edit finalized sales, or allow regular users to edit drafts
+    return user.has_perm('core.add_saleitem') and (sale.status == 'draft' or user.is_superuser or user.is_staff)
+
+
+def _sale_fragments(request, sale):
+    """Render the sale page's totals, payments table and items table without the rest of the page."""
+    sale.refresh_from_db()
+    context = {
+        'sale': sale,
+        'items': sale.items.select_related('inventory_item'),
+        'payments': sale.payments.all(),
+        'can_edit_items': _can_edit_items(request.user, sale),
+    }
+    return {name: render_to_string(f'partials/sale_{name}.html', context, request=request) for name in SALE_FRAGMENTS}
+
+
+def _sale_change_response(request, sale):
+    """Response of the sale edit views: back to the sale page, or, for in-page
+    (``X-Requested-With: XMLHttpRequest``) requests, JSON with the re-rendered
+    fragments and the messages the edit produced."""
+    if request.headers.get('x-requested-with') != 'XMLHttpRequest':
+        return redirect('sale_detail', pk=sale.pk)
+    fragments = _sale_fragments(request, sale)
+    return JsonResponse({
+        'status': sale.status,
+        'messages': [{'level': message.tags, 'text': str(message)} for message in messages.get_messages(request)],
+        'fragments': fragments,
+    })
+
+
+@login_required
+@permission_required('core.view_sale', raise_exception=True)
+def sale_fragments(request, pk):
+    """The sale page's fragments as JSON, for refreshing them in place."""
+    sale = _get_visible_sale_or_404(request, pk)
+    fragments = _sale_fragments(request, sale)
+    return JsonResponse({'status': sale.status, 'fragments': fragments})
+
+
+@login_required
+@permission_required('core.view_sale', raise_exception=True)
+def sale_invoice(request, pk):
+    sale = _get_visible_sale_or_404(request, pk)
+    items = sale.items.select_related('inventory_item').all()
+    context = {
+        'sale': sale,
+        'items': items,
+    }
+    # For quotations, calculate valid_until date (30 days from creation)
+    if sale.status == 'quote':
+        from datetime import timedelta
+        context['valid_until'] = sale.created_at + timedelta(days=30)
+    # Render quotation template for quotes, invoice template for all others
+    template = 'core/sale_quotation.html' if sale.status == 'quote' else 'core/sale_invoice.html'
+    return render(request, template, context)
+
+
+@login_required
+@permission_required('core.add_saleitem', raise_exception=True)
+@statement_timeout('pos')
+def sale_add_item(request, pk):
+    sale = _get_visible_sale_or_404(request, pk)
+    # Allow admins to edit finalized sales
+    if sale.status != 'draft' and not (request.user.is_superuser or request.user.is_staff):
+        messages.warning(request, 'Cannot add items to a finalized sale.')
+        return _sale_change_response(request, sale)
+    
+    if request.method == 'POST':
+        form = SaleItemForm(request.POST)
+        if form.is_valid():
+            item = form.save(commit=False)
+            item.sale = sale
+            # Basic validation: require description for non-inventory items
+            if item.item_type == 'non_inventory' and not item.description:
+                messages.error(request, 'Description is required for non-inventory items.')
+            else:
+                # Allow override: use provided unit_price if > 0 else fallback to inventory price
+                if item.item_type == 'inventory' and item.inventory_item and (item.unit_price is None or item.unit_price <= 0):
+                    item.unit_price = item.inventory_item.unit_price
+                
+                # If adding to a finalized sale, check and adjust inventory
+                if sale.status == 'finalized' and item.item_type == 'inventory' and item.inventory_item:
+                    inv = item.inventory_item
+                    # Save the item and deduct its stock together; the UPDATE refuses to go below zero.
+                    try:
+                        with transaction.atomic():
+                            item.save()
+                            stock.apply([stock.Movement(
+                                inv, -item.quantity, -(item.boxes or 0), 'out',
+                                f"Added to finalized sale {sale.sale_number} by admin",
+                            )], user=request.user)
+                    except stock.InsufficientStock as e:
+                        messages.error(request, str(e))
+                        return _sale_change_response(request, sale)
+                    
+                    messages.success(request, f'Item added to finalized sale and inventory adjusted: {inv.part_name} ({inv.part_code})')
+                else:
+                    item.save()
+                    messages.success(request, 'Item added to sale.')
+                
+                # Recalculate sale total
+                try:
+                    sale.recalc_total(save=True)
+                except Exception:
+                    logger.exception('Failed to recalc total after adding item to Sale pk=%s', pk)
+                
+                return _sale_change_response(request, sale)
+        else:
+            for field, errs in form.errors.items():
+                for err in errs:
+                    messages.error(request, f"{field}: {err}")
+    return _sale_change_response(request, sale)
+
+
+@login_required
+@permission_required('core.finalize_sale', raise_exception=True)
+@require_POST
+@statement_timeout('pos')
+def sale_finalize(request, pk):
+    sale = _get_visible_sale_or_404(request, pk)
+    if sale.status == 'finalized':
+        messages.info(request, 'Sale already finalized.')
+        return redirect('sale_detail', pk=sale.pk)
+    try:
+        low_stock = sale.finalize(user=request.user)
+        if low_stock:
+            names = ', '.join([f"{i.part_name} ({i.part_code})" for i in low_stock])
+            messages.warning(request, f"Finalized. Low stock: {names}")
+        else:
+            messages.success(request, 'Sale finalized successfully.')
+    except ValueError as e:
+        messages.error(request, str(e))
+    return redirect('sale_detail', pk=sale.pk)
+
+
+@login_required
+@permission_required('core.delete_saleitem', raise_exception=True)
+@statement_timeout('pos')
+def sale_delete_item(request, pk, item_pk):
+    sale = _get_visible_sale_or_404(request, pk)
+    # Allow admins to edit finalized sales
+    if sale.status != 'draft' and not (request.user.is_superuser or request.user.is_staff):
+        messages.warning(request, 'Cannot delete items from a finalized sale.')
+        return _sale_change_response(request, sale)
+    
+    item = get_object_or_404(SaleItem, pk=item_pk, sale=sale)
+    
+    if request.method == 'POST':
+        with transaction.atomic():
+            # Delete first: of two concurrent or repeated POSTs only the one that
+            # removed the row restores its stock.
+            deleted = SaleItem.objects.filter(pk=item.pk, sale=sale).delete()[1].get(SaleItem._meta.label, 0)
+            # If deleting from a finalized sale, restore inventory
+            if deleted == 1 and sale.status == 'finalized' and item.item_type == 'inventory' and item.inventory_item:
+                inv = item.inventory_item
+                stock.apply([stock.Movement(
+                    inv, item.quantity, item.boxes or 0, 'adjustment',
+                    f"Reversed: Item deleted from finalized sale {sale.sale_number} by admin",
+                )], user=request.user)
+
+                messages.success(request, f'Item deleted and inventory restored: {inv.part_name} ({inv.part_code})')
+
+            try:
+                with transaction.atomic():
+                    sale.recalc_total(save=True)
+            except Exception:
+                logger.exception('Failed to recalc total after deleting item from Sale pk=%s', pk)
+
+            # Auto un-finalize if all items have been deleted from a finalized sale
+            if sale.status == 'finalized' and sale.items.count() == 0:
+                # Delete all payments to prevent orphaned overpaid state
+                payment_count = sale.payments.count()
+                sale.payments.all().delete()
+
+                # Revert sale to draft
+                sale.status = 'draft'
+                sale.finalized_at = None
+                sale.finalized_by = None
+                sale.save(update_fields=['status', 'finalized_at', 'finalized_by', 'updated_at'])
+
+                if payment_count > 0:
+                    messages.info(request, f'Sale reverted to Draft status (all items removed). {payment_count} payment(s) deleted. You can now modify or delete it.')
+                else:
+                    messages.info(request, 'Sale reverted to Draft status (all items removed). You can now modify or delete it.')
+
+    return _sale_change_response(request, sale)
+
+
+@login_required
+@permission_required('core.add_salepayment', raise_exception=True)
+@statement_timeout('pos')
+def sale_add_payment(request, pk):
+    sale = _get_visible_sale_or_404(request, pk)
+    if sale.status == 'cancelled':
+        messages.warning(request, 'Cannot record payments for a cancelled sale.')
+        return _sale_change_response(request, sale)
+
+    if request.method == 'POST':
+        form = SalePaymentForm(request.POST)
+        if form.is_valid():
+            payment = form.save(commit=False)
+            # Prevent overpayment beyond balance due
+            if payment.amount <= 0:
+                messages.error(request, 'Amount must be greater than zero.')
+            else:
+                with transaction.atomic():
+                    with metrics.lock_wait('sale'):
+                        locked_sale = _visible_sales_queryset(request.user).select_for_update().get(pk=sale.pk)
+                    with metrics.lock_wait('customer'):
+                        Customer.objects.select_for_update().get(pk=locked_sale.customer_id)
+
+                    if payment.amount > locked_sale.balance_due:
+                        messages.error(request, 'Payment exceeds remaining balance.')
+                    else:
+                        payment.sale = locked_sale
+                        payment.save()
+                        # Log to ledger as a credit (inflow)
+                        try:
+                            LedgerEntry.objects.update_or_create(
+                                source='sale_payment',
+                                reference=payment.receipt_number,
+                                defaults={
+                                    'entry_type': 'credit',
+                                    'description': f"Payment for {locked_sale.sale_number}",
+                                    'amount': payment.amount,
+                                }
+                            )
+                        except Exception:
+                            logger.exception('Non-blocking ledger write failure for SalePayment receipt=%s', payment.receipt_number)
+                            metrics.ledger_write_failed('sale_payment')
+                        messages.success(request, f'Payment recorded. Receipt: {payment.receipt_number}')
+        else:
+            for field, errs in form.errors.items():
+                for err in errs:
+                    messages.error(request, f"{field}: {err}")
+    return _sale_change_response(request, sale)
+
+
+@login_required
+@permission_required('core.change_salepayment', raise_exception=True)
+@statement_timeout('pos')
+def sale_edit_payment(request, pk, payment_pk):
+    sale = _get_visible_sale_or_404(request, pk)
+    payment = get_object_or_404(SalePayment, pk=payment_pk, sale=sale)
+
+    if not (request.user.is_superuser or request.user.is_staff):
+        messages.error(request, 'Only admin users can edit sale payments.')
+        return redirect('sale_detail', pk=sale.pk)
+
+    if request.method == 'POST':
+        form = SalePaymentForm(request.POST, instance=payment)
+        if form.is_valid():
+            updated_payment = form.save(commit=False)
+
+            if updated_payment.amount <= 0:
+                messages.error(request, 'Amount must be greater than zero.')
+                return redirect('sale_edit_payment', pk=sale.pk, payment_pk=payment.pk)
+
+            with transaction.atomic():
+                with metrics.lock_wait('sale'):
+                    locked_sale = _visible_sales_queryset(request.user).select_for_update().get(pk=sale.pk)
+                with metrics.lock_wait('customer'):
+                    Customer.objects.select_for_update().get(pk=locked_sale.customer_id)
+                locked_payment = get_object_or_404(SalePayment.objects.select_for_update(), pk=payment.pk, sale=locked_sale)
+
+                other_paid = locked_sale.payments.exclude(pk=locked_payment.pk).aggregate(total=Sum('amount')).get('total') or 0
+                max_allowed = locked_sale.total_amount - other_paid
+                if updated_payment.amount > max_allowed:
+                    messages.error(request, 'Payment exceeds remaining balance.')
+                    return redirect('sale_edit_payment', pk=locked_sale.pk, payment_pk=locked_payment.pk)
+
+                locked_payment.amount = updated_payment.amount
+                locked_payment.payment_date = updated_payment.payment_date
+                locked_payment.method = updated_payment.method
+                locked_payment.notes = updated_payment.notes
+                locked_payment.save()
+
+                try:
+                    LedgerEntry.objects.update_or_create(
+                        source='sale_payment',
+                        reference=locked_payment.receipt_number,
+                        defaults={
+                            'entry_type': 'credit',
+                            'description': f"Payment for {locked_sale.sale_number}",
+                            'amount': locked_payment.amount,
+                        }
+                    )
+                except Exception:
+                    logger.exception('Non-blocking ledger update failure for SalePayment receipt=%s', locked_payment.receipt_number)
+                    metrics.ledger_write_failed('sale_payment')
+
+                messages.success(request, f'Payment {locked_payment.receipt_number} updated successfully.')
+                return redirect('sale_detail', pk=locked_sale.pk)
+        else:
+            for field, errs in form.errors.items():
+                for err in errs:
+                    messages.error(request, f"{field}: {err}")
+    else:
+        form = SalePaymentForm(instance=payment)
+
+    context = {
+        'sale': sale,
+        'payment': payment,
+        'form': form,
+    }
+    return render(request, 'core/sale_payment_edit.html', context)
+
+
+@login_required
+@permission_required('core.delete_salepayment', raise_exception=True)
+@require_POST
+@statement_timeout('pos')
+def sale_delete_payment(request, pk, payment_pk):
+    sale = _get_visible_sale_or_404(request, pk)
+    payment = get_object_or_404(SalePayment, pk=payment_pk, sale=sale)
+
+    if not (request.user.is_superuser or request.user.is_staff):
+        messages.error(request, 'Only admin users can delete sale payments.')
+        return redirect('sale_detail', pk=sale.pk)
+
+    with transaction.atomic():
+        with metrics.lock_wait('sale'):
+            locked_sale = _visible_sales_queryset(request.user).select_for_update().get(pk=sale.pk)
+        with metrics.lock_wait('customer'):
+            Customer.objects.select_for_update().get(pk=locked_sale.customer_id)
+        locked_payment = get_object_or_404(SalePayment.objects.select_for_update(), pk=payment.pk, sale=locked_sale)
+        receipt_number = locked_payment.receipt_number
+        locked_payment.delete()
+
+    try:
+        LedgerEntry.objects.filter(source='sale_payment', reference=receipt_number).delete()
+    except Exception:
+        logger.exception('Non-blocking ledger cleanup failure for SalePayment receipt=%s', receipt_number)
+        metrics.ledger_write_failed('sale_payment')
+
+    messages.success(request, f'Payment {receipt_number} deleted successfully.')
+    return redirect('sale_detail', pk=sale.pk)
+
+
+@login_required
+@permission_required('core.view_salepayment', raise_exception=True)
+def sale_payment_receipt(request, sale_pk, payment_pk):
+    sale = _get_visible_sale_or_404(request, sale_pk)
+    payment = get_object_or_404(SalePayment, pk=payment_pk, sale=sale)
+    context = {
+        'sale': sale,
+        'payment': payment,
+    }
+    return render(request, 'core/sale_payment_receipt.html', context)
+
+
+@login_required
+@permission_required('core.delete_sale', raise_exception=True)
+def sale_delete(request, pk):
+    """Delete a sale safely.
+    Policy: allow deletion only for draft sales (payments allowed).
+    """
+    sale = _get_visible_sale_or_404(request, pk)
+    if request.method == 'POST':
+        if sale.status != 'draft':
+            messages.warning(request, 'Only draft sales can be deleted.')
+            return redirect('sale_detail', pk=sale.pk)
+        sale.delete()
+        messages.success(request, 'Sale deleted successfully.')
+        return redirect('sale_list')
+    # Confirm page reuse generic confirm template
+    return render(request, 'core/confirm_delete.html', {'object': sale, 'type': 'Sale'})
+
+
+# Payment Views - DEPRECATED: Legacy payment tracking system, replaced by SalePayment
+# All payment processing now goes through SalePayment which is directly linked to Sales
+# Keeping code commented for reference and potential data migration needs
+
+# @login_required
+# @user_passes_test(lambda u: u.is_superuser)
+# def payment_list(request):
+#     query = request.GET.get('q', '')
+#     status_filter = request.GET.get('status', '')
+#     payment_type = request.GET.get('payment_type', '')
+#     qs = Payment.objects.all()
+#     if query:
+#         qs = qs.filter(
+#             Q(invoice_number__icontains=query) |
+#             Q(customer__name__icontains=query) |
+#             Q(customer__customer_id__icontains=query)
+#         )
+#     if status_filter:
+#         qs = qs.filter(status=status_filter)
+#     if payment_type:
+#         qs = qs.filter(payment_type=payment_type)
+#     total_pending = qs.filter(status__in=['pending', 'overdue']).aggregate(
+#         total=Sum(F('total_amount') - F('paid_amount'))
+#     )['total'] or 0
+#     paginator = Paginator(qs, 10)
+#     page_obj = paginator.get_page(request.GET.get('page'))
+#     return render(request, 'core/payment_list.html', {
+#         'payments': page_obj.object_list,
+#         'page_obj': page_obj,
+#         'query': query,
+#         'status_filter': status_filter,
+#         'payment_type': payment_type,
+#         'total_pending': total_pending
+#     })
+
+
+# @login_required
+# @user_passes_test(lambda u: u.is_superuser)
+# def payment_add(request):
+#     if request.method == 'POST':
+#         form = PaymentForm(request.POST)
+#         if form.is_valid():
+#             form.save()
+#             messages.success(request, 'Payment added successfully!')
+#             return redirect('payment_list')
+#     else:
+#         form = PaymentForm()
+#     return render(request, 'core/payment_form.html', {'form': form, 'title': 'Add Payment'})
+
+
+# @login_required
+# @user_passes_test(lambda u: u.is_superuser)
+# def payment_edit(request, pk):
+#     payment = get_object_or_404(Payment, pk=pk)
+#     if request.method == 'POST':
+#         form = PaymentForm(request.POST, instance=payment)
+#         if form.is_valid():
+#             form.save()
+#             messages.success(request, 'Payment updated successfully!')
+#             return redirect('payment_list')
+#     else:
+#         form = PaymentForm(instance=payment)
+#     return render(request, 'core/payment_form.html', {'form': form, 'title': 'Edit Payment'})
+
+
+# @login_required
+# @user_passes_test(lambda u: u.is_superuser)
+# def payment_delete(request, pk):
+#     payment = get_object_or_404(Payment, pk=pk)
+#     if request.method == 'POST':
+#         payment.delete()
+#         messages.success(request, 'Payment deleted successfully!')
+#         return redirect('payment_list')
+#     return render(request, 'core/confirm_delete.html', {'object': payment, 'type': 'Payment'})
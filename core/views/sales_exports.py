@@ -0,0 +1,766 @@
+from django.contrib.auth.decorators import login_required, permission_required
+from django.db.models import Q
+from django.utils import timezone
+from django.http import HttpResponse
+from ..models import Customer
+from .. import metrics
+from ..db_connections import statement_timeout
+from ..db_router import use_replica
+from .common import _visible_sales_queryset, _get_visible_sale_or_404
+
+
+@login_required
+@permission_required('core.view_salepayment', raise_exception=True)
+@metrics.timed_export('sale_payments_csv')
+@statement_timeout('export')
+def sale_payments_export(request, pk):
+    import csv
+    from django.utils.encoding import smart_str
+    sale = _get_visible_sale_or_404(request, pk)
+    payments = sale.payments.all().order_by('-payment_date', '-created_at')
+    response = HttpResponse(content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{sale.sale_number}_payments.csv"'
+    writer = csv.writer(response)
+    writer.writerow(['Receipt', 'Date', 'Method', 'Amount'])
+    for p in payments:
+        writer.writerow([
+            smart_str(p.receipt_number),
+            p.payment_date,
+            smart_str(p.get_method_display()),
+            f"{p.amount}",
+        ])
+    return response
+
+
+@login_required
+@permission_required('core.view_salepayment', raise_exception=True)
+@metrics.timed_export('sale_payments_pdf')
+@statement_timeout('export')
+def sale_payments_export_pdf(request, pk):
+    """Export payment history for a sale as a professional PDF statement."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm, mm
+    from reportlab.lib import colors
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, HRFlowable
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
+    from io import BytesIO
+    from xml.sax.saxutils import escape as xml_escape
+    from django.conf import settings
+    from django.utils import timezone
+
+    sale = _get_visible_sale_or_404(request, pk)
+    payments = sale.payments.all().order_by('payment_date', 'created_at')
+
+    # Brand info from settings
+    brand_name = getattr(settings, 'BRAND_NAME', 'Organization')
+    brand_address = getattr(settings, 'BRAND_ADDRESS', '')
+    brand_phone = getattr(settings, 'BRAND_PHONE', '')
+    brand_email = getattr(settings, 'BRAND_EMAIL', '')
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, 
+        pagesize=A4, 
+        topMargin=2*cm, 
+        bottomMargin=2*cm, 
+        leftMargin=2*cm, 
+        rightMargin=2*cm
+    )
+    
+    page_width = A4[0] - 4*cm  # Available width
+    styles = getSampleStyleSheet()
+
+    # Modern color palette - clean and professional
+    accent_color = colors.HexColor('#2563EB')  # Modern blue accent
+    text_primary = colors.HexColor('#111827')  # Deep black
+    text_secondary = colors.HexColor('#6B7280')  # Medium gray
+    text_light = colors.HexColor('#9CA3AF')  # Light gray
+    divider_color = colors.HexColor('#E5E7EB')  # Light divider
+    success_color = colors.HexColor('#10B981')  # Green
+    danger_color = colors.HexColor('#EF4444')  # Red
+    bg_subtle = colors.HexColor('#F9FAFB')  # Very light gray
+
+    # Custom styles - modern typography
+    styles.add(ParagraphStyle(
+        name='BrandName',
+        fontSize=20,
+        textColor=text_primary,
+        fontName='Helvetica-Bold',
+        leading=24,
+        spaceAfter=4,
+        alignment=TA_LEFT
+    ))
+    styles.add(ParagraphStyle(
+        name='BrandInfo',
+        fontSize=9,
+        textColor=text_secondary,
+        fontName='Helvetica',
+        leading=13,
+        alignment=TA_LEFT
+    ))
+    styles.add(ParagraphStyle(
+        name='DocTitle',
+        fontSize=11,
+        textColor=text_secondary,
+        fontName='Helvetica',
+        spaceAfter=2,
+        alignment=TA_RIGHT,
+        textTransform='uppercase'
+    ))
+    styles.add(ParagraphStyle(
+        name='DocNumber',
+        fontSize=16,
+        textColor=text_primary,
+        fontName='Helvetica-Bold',
+        leading=20,
+        alignment=TA_RIGHT
+    ))
+    styles.add(ParagraphStyle(
+        name='DocDate',
+        fontSize=9,
+        textColor=text_secondary,
+        fontName='Helvetica',
+        alignment=TA_RIGHT
+    ))
+    styles.add(ParagraphStyle(
+        name='SectionLabel',
+        fontSize=8,
+        textColor=text_light,
+        fontName='Helvetica-Bold',
+        spaceBefore=12,
+        spaceAfter=6,
+        textTransform='uppercase',
+        letterSpacing=0.5
+    ))
+    styles.add(ParagraphStyle(
+        name='CustomerName',
+        fontSize=14,
+        textColor=text_primary,
+        fontName='Helvetica-Bold',
+        leading=18,
+        alignment=TA_LEFT
+    ))
+    styles.add(ParagraphStyle(
+        name='InfoText',
+        fontSize=9,
+        textColor=text_secondary,
+        fontName='Helvetica',
+        leading=14,
+        alignment=TA_LEFT
+    ))
+    styles.add(ParagraphStyle(
+        name='TableHeader',
+        fontSize=8,
+        textColor=text_secondary,
+        fontName='Helvetica-Bold',
+        leading=11,
+        textTransform='uppercase'
+    ))
+    styles.add(ParagraphStyle(
+        name='TableCell',
+        fontSize=9,
+        textColor=text_primary,
+        fontName='Helvetica',
+        leading=13
+    ))
+    styles.add(ParagraphStyle(
+        name='TableCellBold',
+        fontSize=9,
+        textColor=text_primary,
+        fontName='Helvetica-Bold',
+        leading=13
+    ))
+    styles.add(ParagraphStyle(
+        name='TotalLabel',
+        fontSize=10,
+        textColor=text_secondary,
+        fontName='Helvetica',
+        leading=14
+    ))
+    styles.add(ParagraphStyle(
+        name='TotalValue',
+        fontSize=13,
+        textColor=text_primary,
+        fontName='Helvetica-Bold',
+        leading=16,
+        alignment=TA_RIGHT
+    ))
+    styles.add(ParagraphStyle(
+        name='FooterNote',
+        fontSize=8,
+        textColor=text_light,
+        fontName='Helvetica',
+        leading=12,
+        alignment=TA_LEFT
+    ))
+
+    elements = []
+
+    def fmt_currency(val):
+        """Format currency without symbol"""
+        return f"{float(val):,.2f}"
+
+    # ============== HEADER SECTION ==============
+    # Two-column header: Brand on left, Document info on right
+    header_left = []
+    header_left.append(Paragraph(xml_escape(brand_name), styles['BrandName']))
+    if brand_address:
+        header_left.append(Paragraph(xml_escape(brand_address), styles['BrandInfo']))
+    contact_line = []
+    if brand_phone:
+        contact_line.append(f"{brand_phone}")
+    if brand_email:
+        contact_line.append(f"{brand_email}")
+    if contact_line:
+        header_left.append(Paragraph(" • ".join(contact_line), styles['BrandInfo']))
+    
+    header_right = []
+    header_right.append(Paragraph("PAYMENT STATEMENT", styles['DocTitle']))
+    header_right.append(Paragraph(f"#{sale.sale_number}", styles['DocNumber']))
+    header_right.append(Paragraph(timezone.now().strftime('%B %d, %Y'), styles['DocDate']))
+    
+    header_table = Table([
+        [
+            [p for p in header_left],
+            [p for p in header_right]
+        ]
+    ], colWidths=[page_width * 0.60, page_width * 0.40])
+    header_table.setStyle(TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('ALIGN', (0, 0), (0, 0), 'LEFT'),
+        ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 0),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+        ('TOPPADDING', (0, 0), (-1, -1), 0),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+    ]))
+    elements.append(header_table)
+    elements.append(Spacer(1, 0.6*cm))
+    elements.append(HRFlowable(width="100%", thickness=1, color=divider_color, spaceAfter=0.6*cm))
+
+    # ============== BILL TO SECTION ==============
+    customer_name = sale.customer.name if sale.customer else 'N/A'
+    customer_phone = getattr(sale.customer, 'phone', '') if sale.customer else ''
+    customer_address = getattr(sale.customer, 'address', '') if sale.customer else ''
+    
+    elements.append(Paragraph("BILL TO", styles['SectionLabel']))
+    elements.append(Paragraph(xml_escape(customer_name), styles['CustomerName']))
+    if customer_phone:
+        elements.append(Paragraph(f"Phone: {customer_phone}", styles['InfoText']))
+    if customer_address:
+        elements.append(Paragraph(xml_escape(customer_address), styles['InfoText']))
+    
+    elements.append(Spacer(1, 0.6*cm))
+
+    # ============== ORDER SUMMARY SECTION ==============
+    elements.append(Paragraph("ORDER SUMMARY", styles['SectionLabel']))
+    
+    # Get product names from sale items
+    sale_items = sale.items.all()
+    product_names = []
+    for item in sale_items:
+        if item.item_type == 'inventory' and item.inventory_item:
+            product_names.append(item.inventory_item.part_name)
+        elif item.description:
+            product_names.append(item.description[:60])
+    product_name_str = ", ".join(product_names) if product_names else "N/A"
+    
+    order_summary_data = [
+        [
+            Paragraph("PRODUCT", styles['TableHeader']),
+            Paragraph("ORDER DATE", styles['TableHeader']),
+            Paragraph("STATUS", styles['TableHeader']),
+            Paragraph("AMOUNT", styles['TableHeader']),
+        ],
+        [
+            Paragraph(xml_escape(product_name_str), styles['TableCell']),
+            Paragraph(sale.created_at.strftime('%Y-%m-%d') if sale.created_at else '-', styles['TableCell']),
+            Paragraph(sale.get_status_display(), styles['TableCellBold']),
+            Paragraph(fmt_currency(sale.total_amount), styles['TableCellBold']),
+        ],
+    ]
+    
+    order_table = Table(order_summary_data, colWidths=[
+        page_width * 0.40,
+        page_width * 0.20,
+        page_width * 0.20,
+        page_width * 0.20
+    ])
+    order_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), bg_subtle),
+        ('TOPPADDING', (0, 0), (-1, 0), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('TOPPADDING', (0, 1), (-1, 1), 12),
+        ('BOTTOMPADDING', (0, 1), (-1, 1), 12),
+        ('LEFTPADDING', (0, 0), (-1, -1), 10),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+        ('LINEBELOW', (0, 0), (-1, 0), 1, divider_color),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]))
+    elements.append(order_table)
+    elements.append(Spacer(1, 0.6*cm))
+
+    # ============== PAYMENT HISTORY TABLE ==============
+    elements.append(Paragraph("PAYMENT HISTORY", styles['SectionLabel']))
+
+    if payments.exists():
+        payment_data = [[
+            Paragraph("RECEIPT", styles['TableHeader']),
+            Paragraph("DATE", styles['TableHeader']),
+            Paragraph("METHOD", styles['TableHeader']),
+            Paragraph("NOTES", styles['TableHeader']),
+            Paragraph("AMOUNT", styles['TableHeader']),
+        ]]
+        
+        for p in payments:
+            notes_text = (p.notes[:45] + '...' if len(p.notes) > 45 else p.notes) if p.notes else '-'
+            payment_data.append([
+                Paragraph(p.receipt_number, styles['TableCell']),
+                Paragraph(str(p.payment_date), styles['TableCell']),
+                Paragraph(p.get_method_display(), styles['TableCell']),
+                Paragraph(xml_escape(notes_text), styles['TableCell']),
+                Paragraph(fmt_currency(p.amount), styles['TableCellBold']),
+            ])
+
+        payments_table = Table(payment_data, colWidths=[
+            page_width * 0.20,
+            page_width * 0.16,
+            page_width * 0.14,
+            page_width * 0.32,
+            page_width * 0.18
+        ])
+        
+        table_style = [
+            ('BACKGROUND', (0, 0), (-1, 0), bg_subtle),
+            ('TOPPADDING', (0, 0), (-1, 0), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+            ('TOPPADDING', (0, 1), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 1), (-1, -1), 10),
+            ('LEFTPADDING', (0, 0), (-1, -1), 10),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+            ('LINEBELOW', (0, 0), (-1, 0), 1, divider_color),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]
+        
+        # Subtle dividers between rows
+        for i in range(1, len(payment_data) - 1):
+            table_style.append(('LINEBELOW', (0, i), (-1, i), 0.5, divider_color))
+        
+        payments_table.setStyle(TableStyle(table_style))
+        elements.append(payments_table)
+    else:
+        elements.append(Paragraph("No payments recorded for this order.", styles['InfoText']))
+
+    elements.append(Spacer(1, 0.8*cm))
+
+    # ============== TOTALS SUMMARY ==============
+    totals_data = [
+        [
+            Paragraph("Total Amount", styles['TotalLabel']),
+            Paragraph(fmt_currency(sale.total_amount), styles['TotalValue']),
+        ],
+        [
+            Paragraph("Total Paid", styles['TotalLabel']),
+            Paragraph(f'<font color="{success_color}">{fmt_currency(sale.total_paid)}</font>', styles['TotalValue']),
+        ],
+    ]
+    
+    # Balance due row with color coding
+    balance_color = danger_color if sale.balance_due > 0 else success_color
+    totals_data.append([
+        Paragraph("<b>Balance Due</b>", styles['TotalLabel']),
+        Paragraph(f'<font color="{balance_color}"><b>{fmt_currency(sale.balance_due)}</b></font>', styles['TotalValue']),
+    ])
+    
+    totals_table = Table(totals_data, colWidths=[page_width * 0.50, page_width * 0.50])
+    totals_table.setStyle(TableStyle([
+        ('TOPPADDING', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+        ('LEFTPADDING', (0, 0), (-1, -1), 0),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+        ('LINEABOVE', (0, 0), (-1, 0), 1, divider_color),
+        ('LINEABOVE', (0, -1), (-1, -1), 2, text_primary),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]))
+    elements.append(totals_table)
+
+    # ============== FOOTER ==============
+    elements.append(Spacer(1, 0.8*cm))
+    elements.append(HRFlowable(width="100%", thickness=1, color=divider_color, spaceAfter=0.4*cm))
+    footer_note = f"This is a computer-generated document. Generated on {timezone.now().strftime('%B %d, %Y at %H:%M')}."
+    elements.append(Paragraph(footer_note, styles['FooterNote']))
+
+    doc.build(elements)
+    pdf_bytes = buffer.getvalue()
+    buffer.close()
+
+    response = HttpResponse(pdf_bytes, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="{sale.sale_number}_payment_statement.pdf"'
+    return response
+
+
+@login_required
+@permission_required('core.view_sale', raise_exception=True)
+@metrics.timed_export('sales_csv')
+@use_replica
+@statement_timeout('export')
+def sales_export_csv(request):
+    """Export sales/orders history as CSV, limited to Orders tab semantics (finalized only)."""
+    import csv
+    from django.utils.encoding import smart_str
+    # Optional filters similar to sale_list
+    query = request.GET.get('q', '')
+    status = request.GET.get('status', '')
+    item_type = request.GET.get('item_type', '')
+    qs = _visible_sales_queryset(request.user).filter(status='finalized').order_by('-created_at')
+    if query:
+        qs = qs.filter(Q(sale_number__icontains=query) | Q(customer__name__icontains=query))
+    if status:
+        qs = qs.filter(status=status)
+    if item_type:
+        qs = qs.filter(items__item_type=item_type).distinct()
+    response = HttpResponse(content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="sales_export.csv"'
+    writer = csv.writer(response)
+    writer.writerow(['Sale Number', 'Customer', 'Status', 'Created At', 'Total', 'Paid', 'Due'])
+    for s in qs:
+        writer.writerow([
+            smart_str(s.sale_number),
+            smart_str(getattr(s.customer, 'name', '')),
+            smart_str(s.status),
+            s.created_at,
+            f"{s.total_amount}",
+            f"{s.total_paid}",
+            f"{s.balance_due}",
+        ])
+    return response
+
+
+@login_required
+@permission_required('core.view_sale', raise_exception=True)
+@metrics.timed_export('sales_pdf')
+@use_replica
+@statement_timeout('export')
+def sales_export_pdf(request):
+    """Export orders (finalized sales) as a professional PDF built from HTML.
+    Uses a dedicated template with branding, layout, and typography.
+    """
+
+    query = request.GET.get('q', '')
+    status = 'finalized'  # enforce Orders tab semantics
+    item_type = request.GET.get('item_type', '')
+    customer_id = request.GET.get('customer_id')
+
+    qs = _visible_sales_queryset(request.user).prefetch_related('items__inventory_item').filter(status=status).order_by('-created_at')
+    if customer_id:
+        qs = qs.filter(customer_id=customer_id)
+    if query:
+        qs = qs.filter(Q(sale_number__icontains=query) | Q(customer__name__icontains=query))
+    if item_type:
+        qs = qs.filter(items__item_type=item_type).distinct()
+
+    sales = list(qs)
+    has_orders = len(sales) > 0
+
+    # Compute totals
+    total_total = sum((float(s.total_amount or 0) for s in sales), start=0.0)
+    total_paid = sum((float(s.total_paid or 0) for s in sales), start=0.0)
+    total_due = sum((float(s.balance_due or 0) for s in sales), start=0.0)
+
+    # Build Executive/Financial Report style PDF
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.units import cm, mm
+    from reportlab.lib import colors
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
+    from io import BytesIO
+    from xml.sax.saxutils import escape as xml_escape
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), topMargin=1.5*cm, bottomMargin=2*cm, leftMargin=2*cm, rightMargin=2*cm)
+    styles = getSampleStyleSheet()
+    
+    # Executive report styles with serif fonts
+    styles.add(ParagraphStyle(
+        name='CompanyHeader', 
+        fontSize=10, 
+        textColor=colors.HexColor('#334155'),
+        fontName='Times-Roman',
+        spaceAfter=2,
+        alignment=TA_LEFT
+    ))
+    styles.add(ParagraphStyle(
+        name='ReportTitle', 
+        fontSize=24, 
+        textColor=colors.HexColor('#1E293B'), 
+        fontName='Times-Bold', 
+        spaceAfter=8,
+        leading=28,
+        alignment=TA_LEFT,
+        leftIndent=0
+    ))
+    styles.add(ParagraphStyle(
+        name='ReportSubtitle', 
+        fontSize=11, 
+        textColor=colors.HexColor('#64748B'),
+        fontName='Times-Roman',
+        spaceAfter=2
+    ))
+    styles.add(ParagraphStyle(
+        name='SummaryLabel', 
+        fontSize=10, 
+        textColor=colors.HexColor('#64748B'),
+        fontName='Helvetica',
+        leading=12
+    ))
+    styles.add(ParagraphStyle(
+        name='SummaryValue', 
+        fontSize=26, 
+        textColor=colors.HexColor('#0F172A'), 
+        fontName='Helvetica-Bold',
+        leading=30
+    ))
+
+    elements = []
+
+    def fmt_currency(val):
+        # Keep plain numeric values to avoid unsupported glyph rendering blocks in PDF cells.
+        return f"{float(val):,.2f}"
+
+    def fmt_quantity(val):
+        qty = float(val or 0)
+        if qty.is_integer():
+            return f"{int(qty)}"
+        return f"{qty:.3f}".rstrip('0').rstrip('.')
+
+    text_cell_style = ParagraphStyle(
+        name='TextCell',
+        fontSize=9,
+        leading=11,
+        fontName='Helvetica',
+        alignment=TA_LEFT,
+        wordWrap='CJK',
+    )
+
+    money_cell_style = ParagraphStyle(
+        name='MoneyCell',
+        fontSize=8,
+        leading=9,
+        fontName='Helvetica',
+        alignment=TA_RIGHT,
+        # Do not wrap numbers; prefer single-line values.
+        splitLongWords=False,
+    )
+
+    def text_cell(value) -> Paragraph:
+        return Paragraph(xml_escape(str(value or '')), text_cell_style)
+
+    def money_cell(value) -> Paragraph:
+        return Paragraph(xml_escape(fmt_currency(value)), money_cell_style)
+
+    # Professional header with company area
+    customer_obj = Customer.objects.filter(pk=customer_id).first() if customer_id else None
+    
+    # Header box with company info
+    from django.utils import timezone as django_tz
+    local_now = django_tz.localtime(django_tz.now())
+    header_data = [[
+        Paragraph("<b>Fashion Express</b><br/><font size=8>Financial Report</font>", styles['CompanyHeader']),
+        Paragraph(f"<font size=8>Report Date: {local_now.strftime('%B %d, %Y')}<br/>Generated: {local_now.strftime('%I:%M %p')}</font>", 
+                 ParagraphStyle(name='HeaderRight', parent=styles['CompanyHeader'], alignment=TA_RIGHT))
+    ]]
+    header_table = Table(header_data, colWidths=[15*cm, 10*cm])
+    header_table.setStyle(TableStyle([
+        ('VALIGN', (0,0), (-1,-1), 'TOP'),
+        ('LEFTPADDING', (0,0), (-1,-1), 0),
+        ('RIGHTPADDING', (0,0), (-1,-1), 0),
+        ('TOPPADDING', (0,0), (-1,-1), 0),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 0),
+    ]))
+    elements.append(header_table)
+    elements.append(Spacer(1, 0.3*cm))
+    
+    # Title section
+    elements.append(Paragraph("Customer Orders Report", styles['ReportTitle']))
+    subtitle_parts = ["Finalized Sales"]
+    if customer_obj:
+        subtitle_parts.append(f"Customer: {customer_obj.name}")
+    elements.append(Paragraph(" | ".join(subtitle_parts), styles['ReportSubtitle']))
+    elements.append(Spacer(1, 0.5*cm))
+    
+    # Horizontal line separator
+    line_table = Table([['']], colWidths=[25*cm])
+    line_table.setStyle(TableStyle([
+        ('LINEABOVE', (0,0), (-1,0), 2, colors.HexColor('#CBD5E1')),
+        ('TOPPADDING', (0,0), (-1,-1), 0),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 0),
+    ]))
+    elements.append(line_table)
+    elements.append(Spacer(1, 0.6*cm))
+
+    # Professional data table with explicit item details per order line.
+    table_data = [['Date', 'Sale Number', 'Product Name', 'Quantity', 'Unit Price', 'Sub Total', 'Total', 'Paid', 'Due']]
+    span_configs = []  # Track which cells to span across multiple rows
+    
+    for s in sales:
+        sale_items = list(s.items.all())
+        start_row = len(table_data)
+        
+        if not sale_items:
+            table_data.append([
+                s.created_at.strftime('%Y-%m-%d'),
+                text_cell(s.sale_number),
+                text_cell('-'),
+                text_cell('0'),
+                money_cell(0),
+                money_cell(0),
+                money_cell(s.total_amount),
+                money_cell(s.total_paid),
+                money_cell(s.balance_due),
+            ])
+            continue
+
+        for idx, item in enumerate(sale_items):
+            if item.item_type == 'inventory' and item.inventory_item:
+                product_name = (item.inventory_item.part_name or '').strip()
+            else:
+                product_name = (item.description or '').strip()
+
+            row = [
+                s.created_at.strftime('%Y-%m-%d') if idx == 0 else '',
+                text_cell(s.sale_number) if idx == 0 else '',
+                text_cell(product_name or '-'),
+                text_cell(fmt_quantity(item.quantity)),
+                money_cell(item.unit_price),
+                money_cell(item.line_total),
+                money_cell(s.total_amount) if idx == 0 else '',
+                money_cell(s.total_paid) if idx == 0 else '',
+                money_cell(s.balance_due) if idx == 0 else '',
+            ]
+            table_data.append(row)
+            
+            # Record span config: (col_idx, start_row, end_row) for cell merging
+            if idx == 0 and len(sale_items) > 1:
+                span_configs.append((0, start_row, start_row + len(sale_items) - 1))  # Date column
+                span_configs.append((1, start_row, start_row + len(sale_items) - 1))  # Sale Number column
+                span_configs.append((6, start_row, start_row + len(sale_items) - 1))  # Total column
+                span_configs.append((7, start_row, start_row + len(sale_items) - 1))  # Paid column
+                span_configs.append((8, start_row, start_row + len(sale_items) - 1))  # Due column
+
+    if len(table_data) == 1:
+        table_data.append(['', '', 'No orders found', '', '', '', '', '', ''])
+
+    total_row_idx = None
+    if has_orders:
+        table_data.append(['TOTAL', '', '', '', '', '', money_cell(total_total), money_cell(total_paid), money_cell(total_due)])
+        total_row_idx = len(table_data) - 1
+
+    # Column widths tuned for landscape A4 so labels and numeric values do not overlap.
+    data_table = Table(table_data, colWidths=[2.2*cm, 3.2*cm, 5.5*cm, 1.5*cm, 2.5*cm, 2.5*cm, 2.5*cm, 2.5*cm, 2.6*cm], repeatRows=1)
+    data_table.setStyle(TableStyle([
+        # Header styling
+        ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#334155')),
+        ('TEXTCOLOR', (0,0), (-1,0), colors.white),
+        ('ALIGN', (0,0), (2,-1), 'LEFT'),
+        ('ALIGN', (3,0), (-1,-1), 'RIGHT'),
+        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+        ('FONTNAME', (0,1), (-1,-1), 'Helvetica'),
+        ('FONTSIZE', (0,0), (-1,0), 7),
+        ('FONTSIZE', (0,1), (-1,-1), 8),
+
+        # Thick borders
+        ('BOX', (0,0), (-1,-1), 2, colors.HexColor('#334155')),
+        ('LINEBELOW', (0,0), (-1,0), 2, colors.white),
+        ('INNERGRID', (0,0), (-1,-1), 0.5, colors.HexColor('#E2E8F0')),
+
+        # Row backgrounds
+        ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#F8FAFC')]),
+
+        # Padding (tighter header so labels don't clip)
+        ('TOPPADDING', (0,0), (-1,0), 7),
+        ('BOTTOMPADDING', (0,0), (-1,0), 7),
+        ('LEFTPADDING', (0,0), (-1,0), 3),
+        ('RIGHTPADDING', (0,0), (-1,0), 3),
+        ('TOPPADDING', (0,1), (-1,-1), 6),
+        ('BOTTOMPADDING', (0,1), (-1,-1), 6),
+        ('LEFTPADDING', (0,1), (-1,-1), 4),
+        ('RIGHTPADDING', (0,1), (-1,-1), 4),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+    ]))
+    
+    # Apply cell spanning for Date and Sale Number columns across multiple items
+    # Also add dividers between sale groups
+    divider_rows = []
+    for col_idx, start_row, end_row in span_configs:
+        data_table.setStyle(TableStyle([
+            ('SPAN', (col_idx, start_row), (col_idx, end_row)),
+        ]))
+        divider_rows.append(end_row)
+    
+    # Add divider lines after each sale group
+    for divider_row in divider_rows:
+        data_table.setStyle(TableStyle([
+            ('LINEBELOW', (0, divider_row), (-1, divider_row), 1.5, colors.HexColor('#9CA3AF')),
+        ]))
+
+    if total_row_idx is not None:
+        data_table.setStyle(TableStyle([
+            ('SPAN', (0, total_row_idx), (5, total_row_idx)),
+            ('ALIGN', (0, total_row_idx), (5, total_row_idx), 'RIGHT'),
+            ('FONTNAME', (0, total_row_idx), (-1, total_row_idx), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, total_row_idx), (-1, total_row_idx), colors.HexColor('#E2E8F0')),
+            ('LINEABOVE', (0, total_row_idx), (-1, total_row_idx), 1, colors.HexColor('#334155')),
+        ]))
+    elements.append(data_table)
+
+    # Professional footer with confidentiality notice
+    elements.append(Spacer(1, 1.2*cm))
+    
+    # Footer line
+    footer_line = Table([['']], colWidths=[25*cm])
+    footer_line.setStyle(TableStyle([
+        ('LINEABOVE', (0,0), (-1,0), 1, colors.HexColor('#E2E8F0')),
+        ('TOPPADDING', (0,0), (-1,-1), 0),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 0),
+    ]))
+    elements.append(footer_line)
+    elements.append(Spacer(1, 0.3*cm))
+    
+    footer_style = ParagraphStyle(
+        name='Footer', 
+        fontSize=8, 
+        textColor=colors.HexColor('#94A3B8'), 
+        alignment=TA_CENTER,
+        fontName='Times-Italic'
+    )
+    footer_text = f"<b>CONFIDENTIAL</b> · This report contains proprietary information · Fashion Express © {timezone.now().year}"
+    elements.append(Paragraph(footer_text, footer_style))
+    
+    # Page number placeholder
+    page_num_style = ParagraphStyle(
+        name='PageNum', 
+        fontSize=8, 
+        textColor=colors.HexColor('#CBD5E1'), 
+        alignment=TA_CENTER,
+        fontName='Helvetica'
+    )
+    elements.append(Spacer(1, 0.2*cm))
+    elements.append(Paragraph("Page 1", page_num_style))
+
+    doc.build(elements)
+    pdf_bytes = buffer.getvalue()
+    buffer.close()
+
+    # Generate filename with customer name if available
+    if customer_obj:
+        safe_customer_name = customer_obj.name.replace(' ', '_').replace('/', '_')
+        filename = f"orders_report_{safe_customer_name}.pdf"
+    else:
+        filename = "orders_report.pdf"
+
+    response = HttpResponse(content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.write(pdf_bytes)
+    return response
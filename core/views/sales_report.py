@@ -0,0 +1,82 @@
+from datetime import date
+
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render
+from django.utils import timezone
+from django.utils.http import urlencode
+
+from accounts.models import CustomUser
+from .. import sales_facts
+from ..db_router import use_replica
+from ..models import SaleItem
+from .common import manager_required
+
+ITEM_TYPES = dict(SaleItem.ITEM_TYPE_CHOICES)
+
+
+def _date_param(request, name, default):
+    try:
+        return date.fromisoformat(request.GET.get(name, ''))
+    except ValueError:
+        return default
+
+
+def _int_param(request, name):
+    value = request.GET.get(name, '')
+    return int(value) if value.isdigit() else None
+
+
+def _drill_down(row, by, filters):
+    """Query string of the next level down from ``row``: a day by salesperson, anything else by day."""
+    params = dict(filters)
+    if by == 'day':
+        params.update(start=row['date'].isoformat(), end=row['date'].isoformat(), by='salesperson')
+    elif by == 'salesperson':
+        params.update(created_by=row['created_by'] or '', by='day')
+    elif by == 'customer':
+        params.update(customer=row['customer'], by='day')
+    else:
+        params.update(item_type=row['item_type'], by='day')
+    return urlencode({key: value for key, value in params.items() if value not in (None, '')})
+
+
+@login_required
+@manager_required
+@use_replica
+def sales_report(request):
+    """Sales by day, salesperson, customer or item type, read from the daily sales facts (core.sales_facts)."""
+    today = timezone.localdate()
+    start = _date_param(request, 'start', today.replace(day=1))
+    end = _date_param(request, 'end', today)
+    by = request.GET.get('by', 'day')
+    if by not in sales_facts.BREAKDOWNS:
+        by = 'day'
+    item_type = request.GET.get('item_type', '')
+    if item_type not in ITEM_TYPES:
+        item_type = ''
+    filters = {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'created_by': _int_param(request, 'created_by'),
+        'customer': _int_param(request, 'customer'),
+        'item_type': item_type,
+    }
+
+    report = sales_facts.report(
+        start, end, by=by, created_by=filters['created_by'], customer=filters['customer'], item_type=item_type,
+    )
+    for row in report['rows']:
+        row['drill'] = _drill_down(row, by, filters)
+        if by == 'item_type':
+            row['item_type_label'] = ITEM_TYPES.get(row['item_type'], row['item_type'])
+
+    return render(request, 'core/sales_report.html', {
+        'report': report,
+        'by': by,
+        'breakdowns': list(sales_facts.BREAKDOWNS),
+        'filters': filters,
+        'start': start,
+        'end': end,
+        'item_types': ITEM_TYPES,
+        'sales_users': CustomUser.objects.filter(status='active').order_by('first_name', 'username'),
+    })
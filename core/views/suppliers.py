@@ -0,0 +1,473 @@
+import logging
+from decimal import Decimal
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required, permission_required
+from django.contrib import messages
+from django.db import transaction
+from django.db.models import Sum, Q, Value, DecimalField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.urls import reverse
+from ..models import LedgerEntry, Supplier, SupplierPurchase, SupplierPurchasePayment
+from .. import metrics, payment_allocation, supplier_accounts
+from ..pagination import CountedPaginator
+from ..forms import SupplierForm, SupplierPurchaseForm, SupplierPurchasePaymentForm
+
+logger = logging.getLogger(__name__)
+
+
+@login_required
+@permission_required('core.view_supplier', raise_exception=True)
+def supplier_list(request):
+    query = request.GET.get('q', '')
+    # Totals are read from each supplier's SupplierAccount row (core.supplier_accounts).
+    qs = Supplier.objects.select_related('account')
+    if query:
+        qs = qs.filter(Q(name__icontains=query) | Q(phone__icontains=query))
+
+    paginator = CountedPaginator(qs, 10)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
+    return render(request, 'core/supplier_list.html', {
+        'suppliers': page_obj.object_list,
+        'page_obj': page_obj,
+        'query': query,
+    })
+
+
+def _recalculate_supplier_purchase_paid_amount(purchase: SupplierPurchase):
+    total_paid = purchase.payments.aggregate(total=Coalesce(Sum('amount'), Value(0, output_field=DecimalField(max_digits=12, decimal_places=2))))['total'] or 0
+    if purchase.paid_amount != total_paid:
+        purchase.paid_amount = total_paid
+        purchase.save(update_fields=['paid_amount', 'updated_at'])
+
+
+@login_required
+@permission_required('core.add_supplier', raise_exception=True)
+def supplier_add(request):
+    if request.method == 'POST':
+        form = SupplierForm(request.POST)
+        if form.is_valid():
+            form.save()
+            messages.success(request, 'Supplier added successfully!')
+            return redirect('supplier_list')
+    else:
+        form = SupplierForm()
+
+    return render(request, 'core/supplier_form.html', {'form': form, 'title': 'Add Supplier'})
+
+
+@login_required
+@permission_required('core.change_supplier', raise_exception=True)
+def supplier_edit(request, pk):
+    supplier = get_object_or_404(Supplier, pk=pk)
+    if request.method == 'POST':
+        form = SupplierForm(request.POST, instance=supplier)
+        if form.is_valid():
+            form.save()
+            messages.success(request, 'Supplier updated successfully!')
+            return redirect('supplier_detail', pk=supplier.pk)
+    else:
+        form = SupplierForm(instance=supplier)
+
+    return render(request, 'core/supplier_form.html', {'form': form, 'title': 'Edit Supplier'})
+
+
+@login_required
+@permission_required('core.view_supplier', raise_exception=True)
+def supplier_detail(request, pk):
+    supplier = get_object_or_404(Supplier, pk=pk)
+    purchases_qs = supplier.purchases.all().order_by('-purchase_date', '-created_at')
+
+    account = supplier_accounts.account_for(supplier)
+
+    # The account row already counts the purchases: no COUNT(*) per page view.
+    paginator = CountedPaginator(purchases_qs, 10, count=account.purchase_count)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    purchases = list(page_obj.object_list)
+    due_purchases = [purchase for purchase in purchases if purchase.due > 0]
+
+    open_payment_purchase_id = request.GET.get('open_payment_purchase_id') or request.session.pop('supplier_payment_open_purchase_id', '')
+    supplier_payment_error = request.session.pop('supplier_payment_error', '')
+    supplier_payment_form_data = request.session.pop('supplier_payment_form_data', {})
+    if not isinstance(supplier_payment_form_data, dict):
+        supplier_payment_form_data = {}
+
+    return render(request, 'core/supplier_detail.html', {
+        'supplier': supplier,
+        'purchases': purchases,
+        'page_obj': page_obj,
+        'account': account,
+        'total_price': account.total_purchased,
+        'total_paid': account.total_paid,
+        'total_due': account.total_due,
+        'purchase_count': account.purchase_count,
+        'due_purchases': due_purchases,
+        'payment_method_choices': SupplierPurchasePayment.METHOD_CHOICES,
+        'today': timezone.localdate(),
+        'open_payment_purchase_id': str(open_payment_purchase_id or ''),
+        'supplier_payment_error': supplier_payment_error,
+        'supplier_payment_form_data': supplier_payment_form_data,
+    })
+
+
+@login_required
+@permission_required('core.view_supplierpurchase', raise_exception=True)
+def supplier_purchase_detail(request, pk, purchase_pk):
+    supplier = get_object_or_404(Supplier, pk=pk)
+    purchase = get_object_or_404(SupplierPurchase, pk=purchase_pk, supplier=supplier)
+    payments = purchase.payments.all().order_by('-payment_date', '-created_at')
+
+    return render(request, 'core/supplier_purchase_detail.html', {
+        'supplier': supplier,
+        'purchase': purchase,
+        'payments': payments,
+    })
+
+
+@login_required
+@permission_required('core.delete_supplier', raise_exception=True)
+def supplier_delete(request, pk):
+    supplier = get_object_or_404(Supplier, pk=pk)
+    if request.method == 'POST':
+        supplier.delete()
+        messages.success(request, 'Supplier deleted successfully!')
+        return redirect('supplier_list')
+
+    return render(request, 'core/confirm_delete.html', {'object': supplier, 'type': 'Supplier'})
+
+
+@login_required
+@permission_required('core.add_supplierpurchase', raise_exception=True)
+def supplier_add_purchase(request, pk):
+    supplier = get_object_or_404(Supplier, pk=pk)
+
+    def _configure_purchase_payment_form(payment_form):
+        method_field = payment_form.fields.get('method')
+        if method_field:
+            existing_choices = list(method_field.choices)
+            if not existing_choices or existing_choices[0][0] != '':
+                method_field.choices = [('', 'Select payment method')] + existing_choices
+
+    payment_field_names = ['amount', 'method', 'reference_number']
+
+    if request.method == 'POST':
+        post_data = request.POST.copy()
+        form = SupplierPurchaseForm(post_data)
+        payment_entered = any((post_data.get(f'pay-{name}') or '').strip() for name in payment_field_names)
+        if payment_entered and not (post_data.get('pay-payment_date') or '').strip():
+            post_data['pay-payment_date'] = (post_data.get('purchase_date') or '').strip() or timezone.localdate().isoformat()
+        payment_form = SupplierPurchasePaymentForm(post_data, prefix='pay')
+        _configure_purchase_payment_form(payment_form)
+
+        form_valid = form.is_valid()
+        payment_valid = True
+        if payment_entered:
+            payment_valid = payment_form.is_valid()
+
+        if form_valid and payment_entered and payment_valid:
+            payment_amount = payment_form.cleaned_data.get('amount') or Decimal('0')
+            purchase_amount = form.cleaned_data.get('price') or Decimal('0')
+            if payment_amount > purchase_amount:
+                payment_form.add_error('amount', 'Payment exceeds purchase amount.')
+                payment_valid = False
+
+        if form_valid and payment_valid:
+            with transaction.atomic():
+                purchase = form.save(commit=False)
+                purchase.supplier = supplier
+                purchase.save()
+
+                payment = None
+                if payment_entered:
+                    payment = payment_form.save(commit=False)
+                    payment.purchase = purchase
+                    payment.save()
+                    _recalculate_supplier_purchase_paid_amount(purchase)
+                    try:
+                        LedgerEntry.objects.update_or_create(
+                            source='supplier_payment',
+                            reference=payment.receipt_number,
+                            defaults={
+                                'entry_type': 'debit',
+                                'description': f"Payment to {purchase.supplier.name}",
+                                'amount': payment.amount,
+                            },
+                        )
+                    except Exception:
+                        logger.exception('Non-blocking ledger write failure for SupplierPurchasePayment receipt=%s', payment.receipt_number)
+                        metrics.ledger_write_failed('supplier_payment')
+
+            if payment:
+                messages.success(request, f'Supplier purchase and payment saved. Receipt: {payment.receipt_number}')
+            else:
+                messages.success(request, 'Supplier purchase added successfully!')
+            return redirect('supplier_detail', pk=supplier.pk)
+
+        messages.error(request, 'Please correct the highlighted fields.')
+    else:
+        form = SupplierPurchaseForm()
+        payment_form = SupplierPurchasePaymentForm(prefix='pay')
+        _configure_purchase_payment_form(payment_form)
+
+    return render(request, 'core/supplier_purchase_form.html', {
+        'form': form,
+        'payment_form': payment_form,
+        'supplier': supplier,
+        'title': 'Add Supplier Purchase',
+    })
+
+
+@login_required
+@permission_required('core.add_supplierpurchasepayment', raise_exception=True)
+def supplier_add_payment(request, pk, purchase_pk):
+    supplier = get_object_or_404(Supplier, pk=pk)
+    purchase = get_object_or_404(SupplierPurchase, pk=purchase_pk, supplier=supplier)
+
+    def _is_modal_source():
+        return (request.POST.get('source') or '').strip() == 'supplier_detail'
+
+    def _get_next_url():
+        next_url = (request.POST.get('next') or '').strip()
+        if next_url and url_has_allowed_host_and_scheme(
+            next_url,
+            allowed_hosts={request.get_host()},
+            require_https=request.is_secure(),
+        ):
+            return next_url
+        return reverse('supplier_detail', kwargs={'pk': supplier.pk})
+
+    def _redirect_modal_with_error(form_obj, message_text=''):
+        if message_text:
+            request.session['supplier_payment_error'] = message_text
+        else:
+            errors = []
+            if form_obj.non_field_errors():
+                errors.extend(str(err) for err in form_obj.non_field_errors())
+            for field, errs in form_obj.errors.items():
+                if field == '__all__':
+                    continue
+                label = form_obj.fields.get(field).label if field in form_obj.fields else field
+                for err in errs:
+                    errors.append(f"{label}: {err}")
+            request.session['supplier_payment_error'] = ' '.join(errors) if errors else 'Please correct the highlighted fields.'
+
+        request.session['supplier_payment_open_purchase_id'] = str(purchase.pk)
+        request.session['supplier_payment_form_data'] = {
+            'amount': (request.POST.get('amount') or '').strip(),
+            'payment_date': (request.POST.get('payment_date') or '').strip(),
+            'method': (request.POST.get('method') or '').strip(),
+            'reference_number': (request.POST.get('reference_number') or '').strip(),
+            'notes': (request.POST.get('notes') or '').strip(),
+        }
+
+        next_url = _get_next_url()
+        separator = '&' if '?' in next_url else '?'
+        return redirect(f"{next_url}{separator}open_payment_purchase_id={purchase.pk}")
+
+    if request.method == 'POST':
+        form = SupplierPurchasePaymentForm(request.POST)
+        if form.is_valid():
+            is_modal = _is_modal_source()
+            with transaction.atomic():
+                if is_modal:
+                    # FIFO allocation across multiple purchases
+                    incoming_amount = form.cleaned_data['amount']
+                    payment_date = form.cleaned_data['payment_date']
+                    method = form.cleaned_data['method']
+                    reference_number = form.cleaned_data.get('reference_number', '')
+                    notes = form.cleaned_data.get('notes', '')
+                    
+                    with metrics.lock_wait('supplier'):
+                        locked_supplier = get_object_or_404(
+                            Supplier.objects.select_for_update(),
+                            pk=supplier.pk
+                        )
+
+                    # Purchases with a due, oldest first (FIFO), locked in one query.
+                    candidate_purchases = payment_allocation.due_purchases(locked_supplier)
+                    total_supplier_due = sum((purch.due for purch in candidate_purchases), Decimal('0'))
+
+                    # Validate total payment doesn't exceed total due
+                    if incoming_amount > total_supplier_due:
+                        return _redirect_modal_with_error(form, 'Payment exceeds total remaining due amount.')
+
+                    new_payments = payment_allocation.allocate_supplier_payment(
+                        locked_supplier, candidate_purchases, incoming_amount, payment_date, method,
+                        reference_number=reference_number, notes=notes,
+                    )
+                    created_receipts = [new_payment.receipt_number for new_payment in new_payments]
+
+                    if created_receipts:
+                        messages.success(request, f'Payment recorded. Receipts: {", ".join(created_receipts)}')
+                    return redirect(_get_next_url())
+                else:
+                    # Single purchase payment (from purchase detail page)
+                    new_payment = form.save(commit=False)
+                    locked_purchase = get_object_or_404(
+                        SupplierPurchase.objects.select_for_update().select_related('supplier'),
+                        pk=purchase.pk,
+                        supplier=supplier,
+                    )
+                    if new_payment.amount > locked_purchase.due:
+                        messages.error(request, 'Payment exceeds remaining due amount.')
+                    else:
+                        new_payment.purchase = locked_purchase
+                        new_payment.save()
+                        _recalculate_supplier_purchase_paid_amount(locked_purchase)
+                        try:
+                            LedgerEntry.objects.update_or_create(
+                                source='supplier_payment',
+                                reference=new_payment.receipt_number,
+                                defaults={
+                                    'entry_type': 'debit',
+                                    'description': f"Payment to {locked_purchase.supplier.name}",
+                                    'amount': new_payment.amount,
+                                },
+                            )
+                        except Exception:
+                            logger.exception('Non-blocking ledger write failure for SupplierPurchasePayment receipt=%s', new_payment.receipt_number)
+                            metrics.ledger_write_failed('supplier_payment')
+
+                        messages.success(request, f'Payment recorded. Receipt: {new_payment.receipt_number}')
+                        return redirect('supplier_purchase_detail', pk=supplier.pk, purchase_pk=locked_purchase.pk)
+        elif _is_modal_source():
+            return _redirect_modal_with_error(form)
+    else:
+        form = SupplierPurchasePaymentForm()
+
+    return render(request, 'core/supplier_payment_form.html', {
+        'form': form,
+        'supplier': supplier,
+        'purchase': purchase,
+        'title': 'Add Supplier Payment',
+    })
+
+
+@login_required
+@permission_required('core.change_supplierpurchase', raise_exception=True)
+def supplier_edit_purchase(request, pk, purchase_pk):
+    supplier = get_object_or_404(Supplier, pk=pk)
+    purchase = get_object_or_404(SupplierPurchase, pk=purchase_pk, supplier=supplier)
+
+    if request.method == 'POST':
+        form = SupplierPurchaseForm(request.POST, instance=purchase)
+        if form.is_valid():
+            form.save()
+            messages.success(request, 'Supplier purchase updated successfully!')
+            return redirect('supplier_detail', pk=supplier.pk)
+    else:
+        form = SupplierPurchaseForm(instance=purchase)
+
+    return render(request, 'core/supplier_purchase_form.html', {
+        'form': form,
+        'supplier': supplier,
+        'title': 'Edit Supplier Purchase',
+    })
+
+
+@login_required
+@permission_required('core.change_supplierpurchasepayment', raise_exception=True)
+def supplier_edit_payment(request, pk, purchase_pk, payment_pk):
+    supplier = get_object_or_404(Supplier, pk=pk)
+    purchase = get_object_or_404(SupplierPurchase, pk=purchase_pk, supplier=supplier)
+    payment = get_object_or_404(SupplierPurchasePayment, pk=payment_pk, purchase=purchase)
+
+    if request.method == 'POST':
+        form = SupplierPurchasePaymentForm(request.POST, instance=payment)
+        if form.is_valid():
+            updated_payment = form.save(commit=False)
+            with transaction.atomic():
+                locked_purchase = get_object_or_404(
+                    SupplierPurchase.objects.select_for_update().select_related('supplier'),
+                    pk=purchase.pk,
+                    supplier=supplier,
+                )
+                locked_payment = get_object_or_404(SupplierPurchasePayment.objects.select_for_update(), pk=payment.pk, purchase=locked_purchase)
+
+                other_paid = locked_purchase.payments.exclude(pk=locked_payment.pk).aggregate(total=Coalesce(Sum('amount'), Value(0, output_field=DecimalField(max_digits=12, decimal_places=2))))['total'] or 0
+                max_allowed = (locked_purchase.price or 0) - other_paid
+                if updated_payment.amount > max_allowed:
+                    messages.error(request, 'Payment exceeds remaining due amount.')
+                    return redirect('supplier_edit_payment', pk=supplier.pk, purchase_pk=purchase.pk, payment_pk=payment.pk)
+
+                locked_payment.amount = updated_payment.amount
+                locked_payment.payment_date = updated_payment.payment_date
+                locked_payment.method = updated_payment.method
+                locked_payment.reference_number = updated_payment.reference_number
+                locked_payment.notes = updated_payment.notes
+                locked_payment.save()
+                _recalculate_supplier_purchase_paid_amount(locked_purchase)
+
+                try:
+                    LedgerEntry.objects.update_or_create(
+                        source='supplier_payment',
+                        reference=locked_payment.receipt_number,
+                        defaults={
+                            'entry_type': 'debit',
+                            'description': f"Payment to {locked_purchase.supplier.name}",
+                            'amount': locked_payment.amount,
+                        },
+                    )
+                except Exception:
+                    logger.exception('Non-blocking ledger update failure for SupplierPurchasePayment receipt=%s', locked_payment.receipt_number)
+                    metrics.ledger_write_failed('supplier_payment')
+
+                messages.success(request, f'Payment {locked_payment.receipt_number} updated successfully.')
+                return redirect('supplier_purchase_detail', pk=supplier.pk, purchase_pk=locked_purchase.pk)
+    else:
+        form = SupplierPurchasePaymentForm(instance=payment)
+
+    return render(request, 'core/supplier_payment_form.html', {
+        'form': form,
+        'supplier': supplier,
+        'purchase': purchase,
+        'payment': payment,
+        'title': 'Edit Supplier Payment',
+    })
+
+
+@login_required
+@permission_required('core.delete_supplierpurchase', raise_exception=True)
+def supplier_delete_purchase(request, pk, purchase_pk):
+    supplier = get_object_or_404(Supplier, pk=pk)
+    purchase = get_object_or_404(SupplierPurchase, pk=purchase_pk, supplier=supplier)
+
+    if request.method == 'POST':
+        purchase.delete()
+        messages.success(request, 'Supplier purchase deleted successfully!')
+        return redirect('supplier_detail', pk=supplier.pk)
+
+    return render(request, 'core/confirm_delete.html', {'object': purchase, 'type': 'Supplier Purchase'})
+
+
+@login_required
+@permission_required('core.delete_supplierpurchasepayment', raise_exception=True)
+def supplier_delete_payment(request, pk, purchase_pk, payment_pk):
+    supplier = get_object_or_404(Supplier, pk=pk)
+    purchase = get_object_or_404(SupplierPurchase, pk=purchase_pk, supplier=supplier)
+    payment = get_object_or_404(SupplierPurchasePayment, pk=payment_pk, purchase=purchase)
+
+    if request.method == 'POST':
+        with transaction.atomic():
+            locked_purchase = get_object_or_404(
+                SupplierPurchase.objects.select_for_update(),
+                pk=purchase.pk,
+                supplier=supplier,
+            )
+            locked_payment = get_object_or_404(SupplierPurchasePayment.objects.select_for_update(), pk=payment.pk, purchase=locked_purchase)
+            receipt_number = locked_payment.receipt_number
+            locked_payment.delete()
+            _recalculate_supplier_purchase_paid_amount(locked_purchase)
+
+        try:
+            LedgerEntry.objects.filter(source='supplier_payment', reference=receipt_number).delete()
+        except Exception:
+            logger.exception('Non-blocking ledger cleanup failure for SupplierPurchasePayment receipt=%s', receipt_number)
+            metrics.ledger_write_failed('supplier_payment')
+
+        messages.success(request, f'Payment {receipt_number} deleted successfully.')
+        return redirect('supplier_purchase_detail', pk=supplier.pk, purchase_pk=purchase.pk)
+
+    return render(request, 'core/confirm_delete.html', {'object': payment, 'type': 'Supplier Payment'})
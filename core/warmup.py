@@ -0,0 +1,64 @@
+"""
+Worker warmup for gunicorn (see gunicorn.conf.py).
+
+With ``preload_app`` the master imports the project once and forks workers
+that share that memory. ``preload_views`` also imports the lazily loaded view
+modules in the master, so no worker pays for them on its first request.
+``warm_caches`` runs in each worker right after the fork and fills the caches
+the first requests would otherwise compute (inventory catalog and role map);
+with a shared cache backend only the first worker actually computes them.
+"""
+
+import logging
+import time
+from importlib import import_module
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def preload_views():
+    from . import views
+
+    for module in views._VIEW_MODULES:
+        import_module(f'{views.__name__}.{module}')
+
+
+def _warm_role_map():
+    from . import cache as model_cache
+    from .permissions import role_map
+
+    # Authorization reads the role map only from a shared cache.
+    if model_cache.shared():
+        role_map()
+
+
+def _warm_inventory_catalog():
+    from .views.api import inventory_catalog
+
+    inventory_catalog()
+
+
+WARMUPS = (
+    ('role_map', _warm_role_map),
+    ('inventory_catalog', _warm_inventory_catalog),
+)
+
+
+def warm_caches():
+    """Fill the caches in ``WARMUPS``; failures are logged, never raised. Returns ms per step."""
+    timings = {}
+    try:
+        for name, func in WARMUPS:
+            started = time.perf_counter()
+            try:
+                func()
+            except Exception:
+                logger.exception('Cache warmup step %s failed', name)
+                continue
+            timings[name] = (time.perf_counter() - started) * 1000
+    finally:
+        # The warmup ran outside a request; don't leave its connection to a thread that may never serve one.
+        connections.close_all()
+    return timings
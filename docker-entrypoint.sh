@@ -15,11 +15,25 @@ if [ -n "$POSTGRES_HOST" ]; then
   fi
 fi
 
-echo "Running migrations..."
-python manage.py migrate --noinput
+if [ "${STARTUP_MODE:-fast}" = "full" ]; then
+  echo "Running migrations..."
+  python manage.py migrate --noinput
 
-echo "Collecting static files..."
-python manage.py collectstatic --noinput || true
+  echo "Collecting static files..."
+  python manage.py collectstatic --noinput || true
+else
+  # One Django process: migrate only if migrations are pending, collectstatic
+  # only if the static sources changed since the last collection.
+  echo "Preparing container..."
+  python manage.py prepare_container
+fi
+
+# Reset the Prometheus multiprocess store; files from a previous run would be
+# aggregated into the new workers' metrics.
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+  rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
 
 echo "Executing command: $@"
 exec "$@"
@@ -0,0 +1,57 @@
+"""Gunicorn settings (picked up automatically from the working directory).
+
+Every value can be overridden with an environment variable (GUNICORN_*) or
+on the command line.
+"""
+
+import os
+
+
+def _env_bool(name, default):
+    return os.getenv(name, default).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', '3'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+
+# Import Django once in the master and fork workers from it: faster start and
+# scale-out, and the code pages are shared between workers. Code changes then
+# need a full restart (HUP reloads workers from the preloaded code).
+preload_app = _env_bool('GUNICORN_PRELOAD', 'true')
+
+# Recycle each worker after this many requests (jittered so they don't all
+# restart together) to bound slow memory growth.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+
+def when_ready(server):
+    if preload_app:
+        from core.warmup import preload_views
+
+        preload_views()
+
+
+def pre_fork(server, worker):
+    # Never hand a database connection opened while preloading to the children.
+    if preload_app:
+        from django.db import connections
+
+        connections.close_all()
+
+
+def post_worker_init(worker):
+    # Runs in each freshly forked worker once the application is loaded.
+    if _env_bool('GUNICORN_WARMUP', 'true'):
+        from core.warmup import warm_caches
+
+        timings = warm_caches()
+        worker.log.info('Worker %s warmed up: %s', worker.pid, ', '.join(f'{k} {v:.0f} ms' for k, v in timings.items()))
+
+
+def child_exit(server, worker):
+    # Let the Prometheus multiprocess collector forget the dead worker's gauges.
+    from core.metrics import mark_worker_dead
+
+    mark_worker_dead(worker.pid)
@@ -4,8 +4,16 @@ ASGI config for org_management project.
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'org_management.settings')
 
 application = get_asgi_application()
+
+# Persistent connections belong to the thread that opened them, and under ASGI
+# sync code runs on executor threads that come and go, so connections kept
+# open would pile up instead of being reused. Close them after every request;
+# use a pooler (pgbouncer) for reuse.
+for _database in settings.DATABASES.values():
+    _database['CONN_MAX_AGE'] = 0
@@ -7,18 +7,25 @@ Django settings for org_management project.
 
 from pathlib import Path
 import os
+import sys
 import importlib.util
 
-# Load environment variables from .env if available (without hard import for linters)
-try:
-    _dotenv_spec = importlib.util.find_spec('dotenv')
-    if _dotenv_spec and _dotenv_spec.loader:
-        _dotenv = importlib.util.module_from_spec(_dotenv_spec)
-        _dotenv_spec.loader.exec_module(_dotenv)
-        _dotenv.load_dotenv(dotenv_path=Path(__file__).resolve().parent.parent / '.env')
-except Exception:
-    # Proceed without .env if python-dotenv isn't installed or file missing
-    pass
+from django.core.exceptions import ImproperlyConfigured
+
+# Load environment variables from .env if available (without hard import for linters).
+# Skipped when there is no .env file (e.g. serverless, where the platform sets the
+# environment), so cold starts don't pay for importing python-dotenv.
+_DOTENV_PATH = Path(__file__).resolve().parent.parent / '.env'
+if _DOTENV_PATH.is_file():
+    try:
+        _dotenv_spec = importlib.util.find_spec('dotenv')
+        if _dotenv_spec and _dotenv_spec.loader:
+            _dotenv = importlib.util.module_from_spec(_dotenv_spec)
+            _dotenv_spec.loader.exec_module(_dotenv)
+            _dotenv.load_dotenv(dotenv_path=_DOTENV_PATH)
+    except Exception:
+        # Proceed without .env if python-dotenv isn't installed
+        pass
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -89,11 +96,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.RequestProfilerMiddleware',
+    'core.middleware.ReplicaLagGuardMiddleware',
+    'core.middleware.SlowQueryLogMiddleware',
+    'core.middleware.StatementTimeoutMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'core.middleware.SecurityHeadersMiddleware',
@@ -104,7 +116,7 @@ MIDDLEWARE = [
 _HAS_WHITENOISE = importlib.util.find_spec('whitenoise') is not None
 if not DEBUG and _HAS_WHITENOISE:
     # Insert after SecurityMiddleware
-    MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
+    MIDDLEWARE.insert(MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1, 'whitenoise.middleware.WhiteNoiseMiddleware')
 
 ROOT_URLCONF = 'org_management.urls'
 
@@ -129,6 +141,38 @@ TEMPLATES = [
 WSGI_APPLICATION = 'org_management.wsgi.application'
 
 
+# SQLite performance profile (only used when running on SQLite). Applied per
+# connection by core.signals: WAL journal, synchronous=NORMAL, busy timeout,
+# mmap and page cache; write transactions start with BEGIN IMMEDIATE so
+# concurrent workers wait for the lock instead of failing with "database is locked".
+SQLITE_TUNING = os.getenv('SQLITE_TUNING', 'true').strip().lower() in ('1', 'true', 'yes', 'on')
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    # Negative values are KiB: 64 MiB of page cache per connection.
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', '-65536')),
+    'temp_store': 'MEMORY',
+}
+
+# Connection handling. DB_CONN_MAX_AGE keeps each worker's connection open for
+# that many seconds (0 = close after every request, "none" = no limit);
+# CONN_HEALTH_CHECKS pings a reused connection before the request uses it.
+# DB_PGBOUNCER=true makes the Postgres settings safe behind pgbouncer in
+# transaction pooling mode (no server-side cursors, no session-level SET).
+_conn_max_age = os.getenv('DB_CONN_MAX_AGE', '60').strip().lower()
+DB_CONN_MAX_AGE = None if _conn_max_age == 'none' else int(_conn_max_age)
+DB_CONN_HEALTH_CHECKS = os.getenv('DB_CONN_HEALTH_CHECKS', 'true').strip().lower() in ('1', 'true', 'yes', 'on')
+DB_PGBOUNCER = os.getenv('DB_PGBOUNCER', 'false').strip().lower() in ('1', 'true', 'yes', 'on')
+# Postgres statement timeouts (ms) per view class, set by StatementTimeoutMiddleware;
+# views opt into "pos" or "export" with @statement_timeout. 0 means no limit.
+DB_STATEMENT_TIMEOUTS = {
+    'default': int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '30000')),
+    'pos': int(os.getenv('DB_STATEMENT_TIMEOUT_POS_MS', '5000')),
+    'export': int(os.getenv('DB_STATEMENT_TIMEOUT_EXPORT_MS', '300000')),
+}
+
 # Database
 # Default: use SQLite for local development. If Postgres env vars are provided,
 # configure the default database to use Postgres so the app works under Docker.
@@ -141,15 +185,91 @@ if os.getenv('POSTGRES_DB'):
             'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'postgres'),
             'HOST': os.getenv('POSTGRES_HOST', 'db'),
             'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            # pgbouncer transaction pooling hands each transaction to any server
+            # connection, so cursors that outlive a transaction cannot work.
+            'DISABLE_SERVER_SIDE_CURSORS': DB_PGBOUNCER,
         }
     }
 else:
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
+            'ENGINE': 'core.db_backends.sqlite3' if SQLITE_TUNING else 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
+DATABASES['default']['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+DATABASES['default']['CONN_HEALTH_CHECKS'] = DB_CONN_HEALTH_CHECKS
+
+
+_RUNNING_TESTS = sys.argv[1:2] == ['test']
+
+# Optional read replica for heavy read-only views (see core.db_router). Configure
+# POSTGRES_REPLICA_HOST (Postgres) or SQLITE_REPLICA_PATH (SQLite, e.g. a copy
+# kept in sync by litestream/rsync). Never configured for test runs: the router
+# tests override DATABASES themselves.
+_replica_host = os.getenv('POSTGRES_REPLICA_HOST', '')
+_sqlite_replica_path = os.getenv('SQLITE_REPLICA_PATH', '')
+if os.getenv('POSTGRES_DB') and _replica_host and not _RUNNING_TESTS:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': _replica_host,
+        'PORT': os.getenv('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+        'USER': os.getenv('POSTGRES_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.getenv('POSTGRES_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+    }
+elif not os.getenv('POSTGRES_DB') and _sqlite_replica_path and not _RUNNING_TESTS:
+    DATABASES['replica'] = {**DATABASES['default'], 'NAME': _sqlite_replica_path}
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+# After a user's own write, keep their reads on the primary this long.
+REPLICA_LAG_GUARD_SECONDS = float(os.getenv('REPLICA_LAG_GUARD_SECONDS', '10'))
+# Async views (core.async_db.gather) run independent queries on separate worker
+# threads/connections. Defaults to on for Postgres, where each query mostly waits
+# on the network; with a local SQLite file the extra threads only add overhead.
+# Off in tests: their data is only visible to the test's connection.
+ASYNC_DB_PARALLEL = (
+    (os.getenv('ASYNC_DB_PARALLEL') or ('true' if os.getenv('POSTGRES_DB') else 'false')).strip().lower() in ('1', 'true', 'yes', 'on')
+    and not _RUNNING_TESTS
+)
+
+
+# Cache backend for core.cache, selected by CACHE_BACKEND: "file" (shared by
+# the workers on one host, CACHE_LOCATION directory) or "redis" (shared by every
+# host, CACHE_URL, e.g. redis://redis:6379/1; needs the redis package). Cached
+# values are invalidated through version counters kept in the cache itself, so a
+# per-process cache would keep serving stale values in every worker but the one
+# that handled the write. Unset means no cache: every value is computed per
+# request. "locmem" is per process and only suits a single-process server such
+# as runserver. Test runs use no cache unless CACHE_BACKEND is set, because the
+# test database is rolled back between tests but a cache is not.
+_CACHE_BACKEND = os.getenv('CACHE_BACKEND', '').strip().lower() or 'none'
+if _CACHE_BACKEND == 'redis' and importlib.util.find_spec('redis') is None:
+    raise ImproperlyConfigured('CACHE_BACKEND=redis needs the redis package (pip install redis).')
+
+if _CACHE_BACKEND == 'none':
+    _default_cache = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+elif _CACHE_BACKEND == 'file':
+    _default_cache = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', '') or str(BASE_DIR / '.cache'),
+    }
+elif _CACHE_BACKEND == 'redis':
+    _default_cache = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CACHE_URL', 'redis://127.0.0.1:6379/1'),
+    }
+elif _CACHE_BACKEND == 'locmem':
+    _default_cache = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'org-management',
+    }
+else:
+    raise ImproperlyConfigured(f'Unknown CACHE_BACKEND {_CACHE_BACKEND!r}; use file, redis or locmem.')
+_default_cache['KEY_PREFIX'] = os.getenv('CACHE_KEY_PREFIX', 'orgms')
+CACHES = {'default': _default_cache}
+
+# List pages (core.pagination) show the PostgreSQL planner's row estimate
+# instead of an exact count once it reaches this many rows; 0 always counts.
+PAGINATION_ESTIMATE_THRESHOLD = int(os.getenv('PAGINATION_ESTIMATE_THRESHOLD', '100000'))
 
 
 # Password validation
@@ -222,12 +342,34 @@ BRAND_PHONE = os.getenv('BRAND_PHONE', '')
 BRAND_EMAIL = os.getenv('BRAND_EMAIL', '')
 
 
+# On-demand request profiler (core.profiling). Disabled by default; when off the
+# middleware removes itself at startup. Captures live in a bounded ring buffer.
+REQUEST_PROFILER_ENABLED = os.getenv('REQUEST_PROFILER_ENABLED', 'false').strip().lower() in ('1', 'true', 'yes', 'on')
+REQUEST_PROFILER_DIR = Path(os.getenv('REQUEST_PROFILER_DIR', '') or BASE_DIR / 'profiles')
+REQUEST_PROFILER_MAX_CAPTURES = int(os.getenv('REQUEST_PROFILER_MAX_CAPTURES', '50'))
+
+# Slow-query log (core.slow_queries). Statements slower than the threshold are
+# written to the capped SlowQuery table in the background; 0 disables it.
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '250'))
+SLOW_QUERY_LOG_MAX_ROWS = int(os.getenv('SLOW_QUERY_LOG_MAX_ROWS', '5000'))
+SLOW_QUERY_LOG_SYNC = False
+
+# Prometheus metrics (core.metrics), served at /metrics when prometheus_client is
+# installed. Scrapers authenticate with "Authorization: Bearer <METRICS_TOKEN>";
+# without a token only logged-in superusers can read the endpoint. Set
+# PROMETHEUS_MULTIPROC_DIR to aggregate across gunicorn workers.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').strip().lower() in ('1', 'true', 'yes', 'on')
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+
 if not DEBUG:
     SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
     CSRF_COOKIE_SECURE = True
     SESSION_COOKIE_SECURE = True
     USE_X_FORWARDED_HOST = True
     SECURE_SSL_REDIRECT = True
+    # Prometheus usually scrapes over the internal network without TLS.
+    SECURE_REDIRECT_EXEMPT = [r'^metrics$']
     SECURE_HSTS_SECONDS = 31536000
     SECURE_HSTS_INCLUDE_SUBDOMAINS = True
     SECURE_HSTS_PRELOAD = True
@@ -9,6 +9,10 @@ from core import admin as core_admin
 
 urlpatterns = [
     path('admin/clean-all-data/', admin.site.admin_view(core_admin.clean_all_data_view), name='admin-clean-all-data'),
+    path('admin/request-profiles/', admin.site.admin_view(core_admin.request_profiles_view), name='admin-request-profiles'),
+    path('admin/request-profiles/<str:capture_id>/', admin.site.admin_view(core_admin.request_profile_detail_view), name='admin-request-profile-detail'),
+    path('admin/request-profiles/<str:capture_id>/download/', admin.site.admin_view(core_admin.request_profile_download_view), name='admin-request-profile-download'),
+    path('admin/slow-queries/', admin.site.admin_view(core_admin.slow_queries_view), name='admin-slow-queries'),
     path('admin/', admin.site.urls),
     path('', include('core.urls')),
 ]
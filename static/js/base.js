@@ -0,0 +1,68 @@
+// Behaviour shared by every page that extends base.html.
+
+// Sidebar toggle with localStorage persistence
+(function() {
+  var body = document.body;
+  var KEY = 'sidebarCollapsed';
+  var toggle = document.getElementById('sidebarToggle');
+  var overlay = document.getElementById('sidebarOverlay');
+  var isMobile = function() { return window.innerWidth <= 992; };
+
+  // Restore state on desktop
+  if (!isMobile() && localStorage.getItem(KEY) === 'true') {
+    body.classList.add('sidebar-collapsed');
+  }
+
+  if (toggle) {
+    toggle.addEventListener('click', function() {
+      if (isMobile()) {
+        body.classList.toggle('sidebar-open');
+      } else {
+        body.classList.toggle('sidebar-collapsed');
+        localStorage.setItem(KEY, body.classList.contains('sidebar-collapsed'));
+      }
+    });
+  }
+  if (overlay) {
+    overlay.addEventListener('click', function() {
+      body.classList.remove('sidebar-open');
+    });
+  }
+})();
+
+// Confirmation prompts: <form data-confirm="..."> or <button data-confirm="...">
+(function() {
+  document.addEventListener('click', function(e) {
+    var el = e.target.closest('button[data-confirm], input[data-confirm], a[data-confirm]');
+    if (el && !window.confirm(el.dataset.confirm)) {
+      e.preventDefault();
+      e.stopImmediatePropagation();
+    }
+  }, true);
+})();
+
+// Global form double-submit protection & button spinner feedback
+(function() {
+  function lockForm(form) {
+    const buttons = form.querySelectorAll('button[type="submit"], input[type="submit"]');
+    buttons.forEach(btn => {
+      btn.dataset.originalText = btn.innerHTML;
+      btn.innerHTML = '<span class="spinner-border spinner-border-sm me-2" role="status" aria-hidden="true"></span>' + (btn.textContent.trim() || 'Submitting');
+      btn.disabled = true;
+    });
+  }
+  document.addEventListener('submit', function(e) {
+    const form = e.target;
+    if (form.dataset.submitted) {
+      e.preventDefault();
+      return false;
+    }
+    // Ask before locking, so cancelling leaves the form usable.
+    if (form.dataset.confirm && !window.confirm(form.dataset.confirm)) {
+      e.preventDefault();
+      return false;
+    }
+    form.dataset.submitted = 'true';
+    lockForm(form);
+  }, true);
+})();
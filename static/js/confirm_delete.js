@@ -0,0 +1,11 @@
+// Deleting a record with related data needs the acknowledgement box ticked.
+(function() {
+  const checkbox = document.getElementById('acknowledgeDeleteCheckbox');
+  const deleteBtn = document.getElementById('deleteBtn');
+  if (!checkbox || !deleteBtn) {
+    return;
+  }
+  checkbox.addEventListener('change', function() {
+    deleteBtn.disabled = !this.checked;
+  });
+})();
@@ -0,0 +1,20 @@
+// Activate the correct tab based on URL hash on page load
+document.addEventListener('DOMContentLoaded', function() {
+  const hash = window.location.hash;
+  if (hash === '#orders') {
+    const ordersTab = document.getElementById('orders-tab');
+    if (ordersTab) {
+      const tab = new bootstrap.Tab(ordersTab);
+      tab.show();
+    }
+  }
+
+  const params = new URLSearchParams(window.location.search);
+  if (hash === '#orders' && params.get('open_customer_payment') === '1') {
+    const modalEl = document.getElementById('customerAddPaymentModal');
+    if (modalEl && typeof bootstrap !== 'undefined' && bootstrap.Modal) {
+      const modal = new bootstrap.Modal(modalEl);
+      modal.show();
+    }
+  }
+});
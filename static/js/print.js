@@ -0,0 +1,14 @@
+// Printable documents (receipts, invoices, quotations): <button data-print>
+// opens the print dialog; <body data-auto-print> opens it once the page loads.
+(function() {
+  document.addEventListener('click', function(e) {
+    if (e.target.closest('[data-print]')) {
+      window.print();
+    }
+  });
+  window.addEventListener('load', function() {
+    if (document.body.hasAttribute('data-auto-print')) {
+      window.print();
+    }
+  });
+})();
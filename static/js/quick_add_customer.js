@@ -0,0 +1,49 @@
+// "Add New Customer" modal on the sale forms. Posts #quickAddCustomerForm to
+// its data-url (customer_quick_add) and selects the new customer.
+(function(){
+  var modal = document.getElementById('quickAddCustomerModal');
+  var openBtn = document.getElementById('quickAddCustomerBtn');
+  var closeBtn = document.getElementById('quickAddCustomerClose');
+  var cancelBtn = document.getElementById('quickAddCustomerCancel');
+  var saveBtn = document.getElementById('quickAddCustomerSave');
+  var formEl = document.getElementById('quickAddCustomerForm');
+  var errorBox = document.getElementById('quickAddErrors');
+  var customerSelect = document.getElementById('id_customer');
+  if(!modal || !formEl) return;
+
+  function openModal(){ modal.style.display='block'; }
+  function closeModal(){ modal.style.display='none'; errorBox.classList.add('d-none'); errorBox.textContent=''; formEl.reset(); }
+  function getCsrf(){ var name='csrftoken'; var cookies=document.cookie.split(';'); for(var i=0;i<cookies.length;i++){ var c=cookies[i].trim(); if(c.indexOf(name+'=')===0) return c.substring(name.length+1); } var input=document.querySelector('input[name=csrfmiddlewaretoken]'); return input?input.value:''; }
+  function showErrors(lines){
+    errorBox.textContent='';
+    lines.forEach(function(line, i){
+      if(i) errorBox.appendChild(document.createElement('br'));
+      errorBox.appendChild(document.createTextNode(line));
+    });
+    errorBox.classList.remove('d-none');
+  }
+  function saveCustomer(){
+    errorBox.classList.add('d-none'); errorBox.textContent='';
+    var fd=new FormData(formEl);
+    fetch(formEl.dataset.url, {method:'POST', headers:{'X-Requested-With':'XMLHttpRequest','X-CSRFToken':getCsrf()}, body:fd})
+      .then(function(resp){ return resp.json().then(function(data){ return {ok:resp.ok, data:data}; }); })
+      .then(function(res){
+        if(!res.ok){
+          if(res.data.errors){
+            var msgs=[]; for(var field in res.data.errors){ if(Object.prototype.hasOwnProperty.call(res.data.errors,field)){ msgs.push(field+': '+res.data.errors[field].join(', ')); }}
+            showErrors(msgs);
+          } else { showErrors(['Error saving customer']); }
+          return;
+        }
+        var opt=document.createElement('option'); opt.value=res.data.id; opt.textContent=res.data.display; customerSelect.appendChild(opt); customerSelect.value=res.data.id;
+        // Let enhanced selects (Select2) pick up the new value.
+        customerSelect.dispatchEvent(new Event('change', {bubbles: true}));
+        closeModal();
+      })
+      .catch(function(){ showErrors(['Network error']); });
+  }
+  if(openBtn) openBtn.addEventListener('click', openModal);
+  if(closeBtn) closeBtn.addEventListener('click', closeModal);
+  if(cancelBtn) cancelBtn.addEventListener('click', closeModal);
+  if(saveBtn) saveBtn.addEventListener('click', saveCustomer);
+})();
@@ -0,0 +1,390 @@
+// Sale / quotation builder (sale_create_unified.html). Data comes from the
+// page: #inv_prices_data ({id: unit price}) and #inv_items_data ([{id, name,
+// unit}]), both rendered with json_script. Requires jQuery and Select2.
+(function(){
+  function qs(sel, ctx){ return (ctx||document).querySelector(sel); }
+  function qsa(sel, ctx){ return Array.from((ctx||document).querySelectorAll(sel)); }
+  function reindexItemCards(){
+    var cards = qsa('.item-card');
+    cards.forEach(function(card, newIndex){
+      var oldIndex = card.getAttribute('data-index');
+      if(oldIndex === null || oldIndex === String(newIndex)){
+        card.setAttribute('data-index', String(newIndex));
+        return;
+      }
+      // Update all name attributes from items-OLD-... to items-NEW-...
+      qsa('input[name^="items-"], select[name^="items-"], textarea[name^="items-"]', card).forEach(function(el){
+        var nm = el.getAttribute('name');
+        if(!nm) return;
+        el.setAttribute('name', nm.replace(new RegExp('^items-' + oldIndex + '-'), 'items-' + newIndex + '-'));
+      });
+      // Update common ids that include the index
+      qsa('[id]', card).forEach(function(el){
+        var id = el.getAttribute('id');
+        if(!id) return;
+        el.setAttribute('id', id.replace(new RegExp('_' + oldIndex + '$'), '_' + newIndex));
+      });
+      card.setAttribute('data-index', String(newIndex));
+    });
+    var totalForms = document.getElementById('id_items-TOTAL_FORMS');
+    if(totalForms){ totalForms.value = String(cards.length); }
+  }
+  var INVENTORY_PRICES = {};
+  var INVENTORY_ITEMS = [];
+  var INVENTORY_UNITS = {};
+  try { 
+    var el = document.getElementById('inv_prices_data'); 
+    if (el) INVENTORY_PRICES = JSON.parse(el.textContent); 
+  } catch(e){}
+  try { 
+    var el = document.getElementById('inv_items_data'); 
+    if (el) {
+      INVENTORY_ITEMS = JSON.parse(el.textContent);
+      INVENTORY_ITEMS.forEach(function(item){ INVENTORY_UNITS[item.id] = item.unit || ''; });
+    }
+  } catch(e){}
+  var paymentAmountInput = document.getElementById('id_pay-amount');
+  var summaryTotal = document.getElementById('summaryTotal');
+  var amountPaidSummary = document.getElementById('amountPaidSummary');
+  var balanceDueSummary = document.getElementById('balanceDueSummary');
+  var currentTotal = 0;
+
+  function validatePaymentAmount(){
+    if(!paymentAmountInput) return true;
+    var raw = (paymentAmountInput.value || '').trim();
+    if(!raw){
+      paymentAmountInput.setCustomValidity('');
+      paymentAmountInput.classList.remove('is-invalid');
+      return true;
+    }
+    var paid = Number(raw);
+    if(Number.isNaN(paid)){
+      paymentAmountInput.setCustomValidity('Enter a valid amount.');
+      paymentAmountInput.classList.add('is-invalid');
+      return false;
+    }
+    if(paid < 0){
+      paymentAmountInput.setCustomValidity('Amount cannot be negative.');
+      paymentAmountInput.classList.add('is-invalid');
+      return false;
+    }
+    if(paid > currentTotal){
+      paymentAmountInput.setCustomValidity('Payment exceeds total.');
+      paymentAmountInput.classList.add('is-invalid');
+      return false;
+    }
+    paymentAmountInput.setCustomValidity('');
+    paymentAmountInput.classList.remove('is-invalid');
+    return true;
+  }
+
+  function recalc(){
+    var total = 0;
+    qsa('.item-card').forEach(function(card){
+      var typeSel = card.querySelector('select[name$="item_type"]');
+      var type = typeSel ? typeSel.value : 'inventory';
+      var qty = 0, price = 0;
+      if(type === 'inventory' || type === '' || !type){
+        var qtyEl = card.querySelector('.quantity-inv');
+        var priceEl = card.querySelector('.unit-price-inv');
+        qty = parseFloat(qtyEl && qtyEl.value ? qtyEl.value : 0);
+        price = parseFloat(priceEl && priceEl.value ? priceEl.value : 0);
+      } else {
+        var qtyEl = card.querySelector('.quantity-machine');
+        var priceEl = card.querySelector('.unit-price-machine');
+        qty = parseFloat(qtyEl && qtyEl.value ? qtyEl.value : 0);
+        price = parseFloat(priceEl && priceEl.value ? priceEl.value : 0);
+      }
+      var lineTotal = (isNaN(qty) ? 0 : qty) * (isNaN(price) ? 0 : price);
+      total += lineTotal;
+      var ltEl = card.querySelector('.line-total-val');
+      if(ltEl) ltEl.textContent = lineTotal.toFixed(2);
+    });
+    currentTotal = total;
+    if(summaryTotal) summaryTotal.textContent = '৳\u00A0' + total.toFixed(2);
+    var paid = parseFloat(paymentAmountInput && paymentAmountInput.value ? paymentAmountInput.value : 0);
+    if(isNaN(paid)) paid = 0;
+    if(amountPaidSummary) amountPaidSummary.textContent = '৳\u00A0' + paid.toFixed(2);
+    var balance = total - paid;
+    if(balance < 0) balance = 0;
+    if(balanceDueSummary) balanceDueSummary.textContent = '৳\u00A0' + balance.toFixed(2);
+    validatePaymentAmount();
+  }
+
+  function wireCard(card){
+    var typeSel = card.querySelector('select[name$="item_type"]');
+    var invFields = card.querySelector('.inv-fields');
+    var machineFields = card.querySelector('.machine-fields');
+    var invSel = card.querySelector('select[name$="inventory_item"]');
+    var machineDescInput = card.querySelector('.machine-desc');
+    
+    // Visible input fields
+    var invQtyInput = card.querySelector('.quantity-inv');
+    var invPriceInput = card.querySelector('.unit-price-inv');
+    var invBoxesInput = card.querySelector('.boxes-inv');
+    var machineQtyInput = card.querySelector('.quantity-machine');
+    var machinePriceInput = card.querySelector('.unit-price-machine');
+
+    function syncType(){
+      var t = typeSel ? typeSel.value : 'inventory';
+      if(t === 'inventory' || t === '' || !t){
+        if(invFields) invFields.style.display='block';
+        if(machineFields) machineFields.style.display='none';
+        // Visible fields ARE the form inputs; just recompute
+        syncInventoryToFormFields();
+        // Auto-populate price from inventory
+        if(invSel && invSel.value && INVENTORY_PRICES[invSel.value] !== undefined && invPriceInput){
+          if(!invPriceInput.value || parseFloat(invPriceInput.value) <= 0){
+            invPriceInput.value = INVENTORY_PRICES[invSel.value];
+          }
+        }
+      } else { // machine
+        if(invFields) invFields.style.display='none';
+        if(machineFields) machineFields.style.display='block';
+        // Copy machine values to hidden form fields (quantity & price); description goes directly to formset
+        syncMachineToFormFields();
+      }
+      recalc();
+    }
+
+    function syncInv(){
+      if(invSel && invSel.value && INVENTORY_PRICES[invSel.value] !== undefined && invPriceInput){
+        if(!invPriceInput.value || parseFloat(invPriceInput.value) <= 0){
+          invPriceInput.value = INVENTORY_PRICES[invSel.value];
+        }
+      }
+      // Update unit label
+      var unitLabel = card.querySelector('.unit-label');
+      if(unitLabel){
+        unitLabel.textContent = (invSel && invSel.value && INVENTORY_UNITS[invSel.value]) ? '(' + INVENTORY_UNITS[invSel.value] + ')' : '';
+      }
+      recalc();
+    }
+
+    function syncInventoryToFormFields(){
+      // visible fields are the actual form fields; just recalc totals
+      recalc();
+    }
+
+    function syncMachineToFormFields(){
+      // visible fields are the actual form fields; just recalc totals
+      recalc();
+    }
+
+    // Wire up event listeners
+    if(typeSel){ typeSel.addEventListener('change', syncType); syncType(); }
+    if(invSel){ invSel.addEventListener('change', syncInv); }
+    
+    ['change','keyup'].forEach(function(evt){
+      if(invPriceInput) invPriceInput.addEventListener(evt, syncInventoryToFormFields);
+      if(invQtyInput) invQtyInput.addEventListener(evt, syncInventoryToFormFields);
+      if(invBoxesInput) invBoxesInput.addEventListener(evt, syncInventoryToFormFields);
+      if(machinePriceInput) machinePriceInput.addEventListener(evt, syncMachineToFormFields);
+      if(machineQtyInput) machineQtyInput.addEventListener(evt, syncMachineToFormFields);
+      if(machineDescInput) machineDescInput.addEventListener(evt, syncMachineToFormFields);
+    });
+
+    var removeBtn = card.querySelector('.remove-item-btn');
+    if(removeBtn){
+      removeBtn.addEventListener('click', function(){
+        card.remove();
+        reindexItemCards();
+        recalc();
+      });
+    }
+  }
+
+  qsa('.item-card').forEach(wireCard);
+
+  var addBtn = document.getElementById('addItemRowBtn');
+  if(addBtn){
+    addBtn.addEventListener('click', function(){
+    var totalForms = document.getElementById('id_items-TOTAL_FORMS');
+    var index = parseInt(totalForms.value, 10);
+    
+      var cardHtml = '<div class="item-card" data-index="'+index+'">'  
+        + '<button type="button" class="remove-item-btn" title="Remove">&times;</button>'
+        + '<div class="row g-3 mb-3">'
+        +   '<div class="col-md-4">'
+        +     '<label class="form-label mb-1" style="font-size:.85rem;">Type</label>'
+        +     '<select name="items-'+index+'-item_type" class="form-select form-select-sm">'
+        +       '<option value="inventory" selected>Inventory</option>'
+        +       '<option value="non_inventory">Machine</option>'
+        +     '</select>'
+        +   '</div>'
+        + '</div>'
+        + '<div class="inv-fields" style="display:block;">'
+        +   '<div class="row g-3 align-items-end mb-3">'
+        +     '<div class="col-md-8"><label class="form-label mb-1" style="font-size:.85rem;">Inventory Item</label>'
+        +       '<select name="items-'+index+'-inventory_item" class="form-select form-select-sm"></select>'
+        +     '</div>'
+        +     '<div class="col-md-4"><label class="form-label mb-1" style="font-size:.85rem;">Boxes</label>'
+        +       '<input type="number" min="0" name="items-'+index+'-boxes" value="0" class="form-control form-control-sm boxes-inv">'
+        +     '</div>'
+        +   '</div>'
+        + '</div>'
+        + '<div class="machine-fields" style="display:none;">'
+        +   '<div class="row g-3 mb-3">'
+        +     '<div class="col-12"><label class="form-label mb-1" style="font-size:.85rem;">Machine Details</label>'
+        +       '<textarea name="items-'+index+'-description" id="machine_desc_'+index+'" class="form-control form-control-sm machine-desc" placeholder="Example:\\n- Model: ABC-123\\n- Capacity: 500kg" rows="3" autocomplete="off"></textarea>'
+        +     '</div>'
+        +   '</div>'
+        + '</div>'
+        + '<div class="row g-3 align-items-end">'
+        +   '<div class="col-md-6"><label class="form-label mb-1" style="font-size:.85rem;">Qty <span class="unit-label text-primary" style="font-size:.78rem;"></span></label>'
+        +     '<input type="number" min="0" step="0.001" name="items-'+index+'-quantity" value="1" class="form-control form-control-sm quantity-inv quantity-machine">'
+        +   '</div>'
+        +   '<div class="col-md-6"><label class="form-label mb-1" style="font-size:.85rem;">Unit Price</label>'
+        +     '<input type="number" step="0.01" name="items-'+index+'-unit_price" value="0" class="form-control form-control-sm unit-price-inv unit-price-machine">'
+        +   '</div>'
+        + '</div>'
+        + '</div>';
+    
+    var temp = document.createElement('div');
+    temp.innerHTML = cardHtml;
+    var card = temp.firstElementChild;
+    
+    // Populate inventory dropdown
+    var invSelect = card.querySelector('select[name$="inventory_item"]');
+    if(invSelect){
+      invSelect.innerHTML = '<option value="">---------</option>';
+      INVENTORY_ITEMS.forEach(function(item){
+        invSelect.appendChild(new Option(item.name, item.id));
+      });
+    }
+    
+    document.getElementById('itemsContainer').appendChild(card);
+    totalForms.value = index + 1;
+    wireCard(card);
+    recalc();
+    });
+
+    // If there are no server-rendered item cards already, create one blank row
+    (function ensureInitialItem(){
+      var totalForms = document.getElementById('id_items-TOTAL_FORMS');
+      if(!totalForms) return;
+      var existingCards = qsa('.item-card').length;
+      if(existingCards === 0){
+        addBtn.click();
+      } else {
+        // Server rendered cards already exist; just update TOTAL_FORMS to match
+        totalForms.value = String(existingCards);
+      }
+    })();
+  }
+
+  if(paymentAmountInput){
+    ['keyup','change'].forEach(function(e){
+      paymentAmountInput.addEventListener(e, function(){
+        recalc();
+        validatePaymentAmount();
+      });
+    });
+  }
+
+  // Ensure form can submit - sync machine values before submission
+  var mainForm = document.getElementById('saleBuilderForm');
+  if(mainForm){
+    mainForm.addEventListener('submit', function(e){
+      function unlockGlobalSubmitLock(){
+        try {
+          delete mainForm.dataset.submitted;
+        } catch(_e) {
+          mainForm.dataset.submitted = '';
+          mainForm.removeAttribute('data-submitted');
+        }
+        var buttons = mainForm.querySelectorAll('button[type="submit"], input[type="submit"]');
+        buttons.forEach(function(btn){
+          if(btn.dataset && btn.dataset.originalText){
+            btn.innerHTML = btn.dataset.originalText;
+            delete btn.dataset.originalText;
+          }
+          btn.disabled = false;
+        });
+      }
+
+      // Block submit if payment is invalid (form has novalidate)
+      if(!validatePaymentAmount()){
+        e.preventDefault();
+        unlockGlobalSubmitLock();
+        try { paymentAmountInput.reportValidity(); } catch(_e) {}
+        return;
+      }
+      // Ensure formset indices are contiguous (items-0, items-1, ...)
+      reindexItemCards();
+      // Update TOTAL_FORMS to match actual item count
+      var totalForms = document.getElementById('id_items-TOTAL_FORMS');
+      var itemCards = qsa('.item-card');
+      if(totalForms) totalForms.value = itemCards.length;
+      
+    });
+  }
+
+  // Payment notes placeholder based on method
+  var methodSelect = document.getElementById('payment-method-select') || document.querySelector('[name="method"]');
+  var notesField = document.getElementById('payment-notes') || document.querySelector('[name="notes"]');
+  
+  function updateNotesPlaceholder() {
+    if (!methodSelect || !notesField) return;
+    var placeholders = {
+      'cash': 'Payment details (optional)',
+      'bank_transfer': 'Bank name, account details, reference number...',
+      'card': 'Card type, last 4 digits, approval code...',
+      'cheque': 'Cheque number, bank name, date...',
+      'other': 'Describe the payment method...'
+    };
+    notesField.placeholder = placeholders[methodSelect.value] || 'Payment details (optional)';
+  }
+  
+  if (methodSelect) {
+    methodSelect.addEventListener('change', updateNotesPlaceholder);
+    updateNotesPlaceholder();
+  }
+
+  recalc();
+})();
+
+// Select2 on the customer and inventory item dropdowns
+(function() {
+  // Initialize Select2 on customer dropdown
+  $('#id_customer').select2({
+    placeholder: 'Search or select customer...',
+    allowClear: true,
+    width: '100%'
+  });
+
+  // Initialize Select2 on existing inventory item dropdowns
+  function initInventorySelect2(element) {
+    if (element && !$(element).hasClass('select2-hidden-accessible')) {
+      $(element).select2({
+        placeholder: 'Search or select inventory item...',
+        allowClear: true,
+        width: '100%'
+      });
+    }
+  }
+
+  // Initialize on page load for existing items
+  document.querySelectorAll('select[name$="inventory_item"]').forEach(function(select) {
+    initInventorySelect2(select);
+  });
+
+  // Watch for new items being added and initialize Select2 on them
+  var observer = new MutationObserver(function(mutations) {
+    mutations.forEach(function(mutation) {
+      mutation.addedNodes.forEach(function(node) {
+        if (node.nodeType === 1) {
+          var invSelect = node.querySelector ? node.querySelector('select[name$="inventory_item"]') : null;
+          if (invSelect) {
+            initInventorySelect2(invSelect);
+          }
+        }
+      });
+    });
+  });
+
+  var itemsContainer = document.getElementById('itemsContainer');
+  if (itemsContainer) {
+    observer.observe(itemsContainer, { childList: true, subtree: true });
+  }
+})();
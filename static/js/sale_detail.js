@@ -0,0 +1,164 @@
+// "Add item" form on the sale detail page: show the fields for the item type
+// and prefill the unit price from the inventory price map (#inv_prices_data).
+document.addEventListener('DOMContentLoaded', function() {
+  // Initialize tooltips only if Bootstrap JS is present.
+  if (typeof bootstrap !== 'undefined' && bootstrap.Tooltip) {
+    document.querySelectorAll('[data-bs-toggle="tooltip"]').forEach(el => {
+      new bootstrap.Tooltip(el);
+    });
+  }
+
+  const typeEl = document.getElementById('id_item_type');
+  const inventoryEl = document.getElementById('id_inventory_item');
+  const descriptionEl = document.getElementById('id_description');
+  const unitPriceEl = document.getElementById('id_unit_price');
+  const boxesEl = document.getElementById('id_boxes');
+  const inventoryFieldCol = document.getElementById('inventoryFieldCol');
+  const descriptionRow = document.getElementById('descriptionRow');
+  const boxesCol = document.getElementById('boxesFieldCol');
+
+  if (!typeEl || !inventoryEl || !descriptionEl || !unitPriceEl || !inventoryFieldCol || !descriptionRow || !boxesCol) {
+    return;
+  }
+
+  let priceMap = {};
+  const priceDataEl = document.getElementById('inv_prices_data');
+  if (priceDataEl && priceDataEl.textContent) {
+    try {
+      priceMap = JSON.parse(priceDataEl.textContent);
+    } catch (e) {
+      priceMap = {};
+    }
+  }
+
+  function syncAddItemForm() {
+    const itemType = typeEl.value;
+    const isInventory = itemType === 'inventory';
+
+    inventoryFieldCol.style.display = isInventory ? '' : 'none';
+    boxesCol.style.display = isInventory ? '' : 'none';
+    descriptionRow.style.display = isInventory ? 'none' : '';
+
+    if (isInventory) {
+      const selectedId = inventoryEl.value;
+      if (selectedId && Object.prototype.hasOwnProperty.call(priceMap, selectedId)) {
+        unitPriceEl.value = priceMap[selectedId];
+      }
+      descriptionEl.required = false;
+    } else {
+      inventoryEl.value = '';
+      if (boxesEl) {
+        boxesEl.value = '0';
+      }
+      descriptionEl.required = true;
+    }
+  }
+
+  typeEl.addEventListener('change', syncAddItemForm);
+  inventoryEl.addEventListener('change', function() {
+    if (typeEl.value === 'inventory') {
+      const selectedId = inventoryEl.value;
+      if (selectedId && Object.prototype.hasOwnProperty.call(priceMap, selectedId)) {
+        unitPriceEl.value = priceMap[selectedId];
+      }
+    }
+  });
+
+  syncAddItemForm();
+});
+
+// Forms marked data-fragment-form (add item, delete item, add payment) post in
+// the background; the view answers with the re-rendered totals, payments and
+// items fragments, which replace their [data-fragment] containers in place.
+(function() {
+  const container = document.getElementById('saleDetail');
+  const messagesEl = document.getElementById('saleMessages');
+  if (!container) {
+    return;
+  }
+
+  function initTooltips(root) {
+    if (typeof bootstrap !== 'undefined' && bootstrap.Tooltip) {
+      root.querySelectorAll('[data-bs-toggle="tooltip"]').forEach(el => {
+        new bootstrap.Tooltip(el);
+      });
+    }
+  }
+
+  function unlock(form) {
+    delete form.dataset.submitted;
+    form.querySelectorAll('button[type="submit"], input[type="submit"]').forEach(btn => {
+      if (btn.dataset.originalText) {
+        btn.innerHTML = btn.dataset.originalText;
+        delete btn.dataset.originalText;
+      }
+      btn.disabled = false;
+    });
+  }
+
+  function showMessages(list) {
+    if (!messagesEl) {
+      return;
+    }
+    messagesEl.textContent = '';
+    list.forEach(message => {
+      const alert = document.createElement('div');
+      alert.className = 'alert alert-' + (message.level === 'error' ? 'danger' : message.level) + ' alert-dismissible fade show';
+      alert.setAttribute('role', 'alert');
+      alert.textContent = message.text;
+      const close = document.createElement('button');
+      close.type = 'button';
+      close.className = 'btn-close';
+      close.dataset.bsDismiss = 'alert';
+      alert.appendChild(close);
+      messagesEl.appendChild(alert);
+    });
+  }
+
+  document.addEventListener('submit', function(e) {
+    const form = e.target;
+    // Cancelled confirmations and repeated submits were already stopped by base.js.
+    if (e.defaultPrevented || !form.hasAttribute('data-fragment-form') || !window.fetch) {
+      return;
+    }
+    e.preventDefault();
+    fetch(form.action, {
+      method: 'POST',
+      headers: {'X-Requested-With': 'XMLHttpRequest'},
+      body: new FormData(form),
+      credentials: 'same-origin'
+    })
+      .then(resp => {
+        if (!resp.ok) {
+          throw new Error('HTTP ' + resp.status);
+        }
+        return resp.json();
+      })
+      .then(data => {
+        // A status change (e.g. the last item removed from a finalized sale) changes the whole page.
+        if (data.status !== container.dataset.saleStatus) {
+          window.location.reload();
+          return;
+        }
+        Object.keys(data.fragments).forEach(name => {
+          const target = container.querySelector('[data-fragment="' + name + '"]');
+          if (target) {
+            target.innerHTML = data.fragments[name];
+            initTooltips(target);
+          }
+        });
+        showMessages(data.messages);
+        if (document.body.contains(form)) {
+          unlock(form);
+          if (!data.messages.some(message => message.level === 'error')) {
+            form.reset();
+            form.querySelectorAll('select').forEach(el => el.dispatchEvent(new Event('change')));
+          }
+        }
+      })
+      .catch(() => {
+        // Never resubmit (the edit may have been applied): reload to show the current state.
+        window.location.reload();
+      });
+  });
+})();
@@ -0,0 +1,49 @@
+// Item fields on the single-item sale form (sale_form.html): inventory price prefill from #inv_prices_data.
+(function() {
+  function $(id){ return document.getElementById(id); }
+  var INVENTORY_PRICES = {};
+  try {
+    var el = document.getElementById('inv_prices_data');
+    if (el) { INVENTORY_PRICES = JSON.parse(el.textContent); }
+  } catch (e) {}
+  function onTypeChange() {
+    var type = document.querySelector('select[name="item_type"]').value;
+    var invWrap = $('inventoryItemWrap');
+    var nameWrap = $('machineNameWrap');
+    var descWrap = $('machineDescWrap');
+    var invSelect = document.querySelector('select[name="inventory_item"]');
+    var priceInput = document.querySelector('input[name="unit_price"]');
+
+    if (type === 'inventory') {
+      invWrap.style.display = '';
+      nameWrap.style.display = 'none';
+      descWrap.style.display = 'none';
+      // Autofill from inventory but keep editable
+      priceInput.readOnly = false;
+      if (invSelect) { onInventoryChange(); }
+    } else {
+      invWrap.style.display = 'none';
+      nameWrap.style.display = '';
+      descWrap.style.display = '';
+      priceInput.readOnly = false;
+    }
+  }
+
+  function onInventoryChange() {
+    var invSelect = document.querySelector('select[name="inventory_item"]');
+    var priceInput = document.querySelector('input[name="unit_price"]');
+    if (!invSelect) return;
+    var val = invSelect.value;
+    if (val && INVENTORY_PRICES[val] !== undefined) {
+      priceInput.value = INVENTORY_PRICES[val];
+    }
+  }
+
+  document.addEventListener('DOMContentLoaded', function() {
+    var typeEl = document.querySelector('select[name="item_type"]');
+    var invSelect = document.querySelector('select[name="inventory_item"]');
+    if (typeEl) { typeEl.addEventListener('change', onTypeChange); }
+    if (invSelect) { invSelect.addEventListener('change', onInventoryChange); }
+    onTypeChange();
+  });
+})();
@@ -0,0 +1,30 @@
+// Record-payment modal: reopen it with the error shown after a failed submission.
+document.addEventListener('DOMContentLoaded', function() {
+  const modalEl = document.getElementById('recordPaymentModal');
+  const errorAlertEl = document.getElementById('supplierPaymentErrorAlert');
+
+  let preserveErrorAlert = false;
+
+  if (modalEl) {
+    modalEl.addEventListener('show.bs.modal', function(event) {
+      if (errorAlertEl) {
+        errorAlertEl.style.display = preserveErrorAlert ? 'block' : 'none';
+      }
+      preserveErrorAlert = false;
+    });
+  }
+
+  // Show error alert if there was an error in session
+  if (errorAlertEl && errorAlertEl.textContent.trim()) {
+    const url = new URL(window.location.href);
+    if (url.searchParams.has('open_payment_purchase_id')) {
+      preserveErrorAlert = true;
+      if (modalEl && typeof bootstrap !== 'undefined' && bootstrap.Modal) {
+        const modal = bootstrap.Modal.getOrCreateInstance(modalEl);
+        modal.show();
+      }
+      url.searchParams.delete('open_payment_purchase_id');
+      window.history.replaceState({}, '', url.pathname + (url.searchParams.toString() ? '?' + url.searchParams.toString() : '') + url.hash);
+    }
+  }
+});
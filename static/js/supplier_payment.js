@@ -0,0 +1,37 @@
+// Supplier payment method select: relabel the reference field and require it
+// for LC, cheque, TT and bank payments. The help element's
+// data-optional-text is shown when the reference is optional.
+document.addEventListener('DOMContentLoaded', function() {
+  const methodEl = document.getElementById('supplier-payment-method');
+  const referenceEl = document.getElementById('supplier-reference-number');
+  const referenceLabel = document.getElementById('reference-label');
+  const referenceHelp = document.getElementById('reference-help');
+
+  if (!methodEl || !referenceEl || !referenceLabel || !referenceHelp) {
+    return;
+  }
+
+  const labels = {
+    lc: 'LC Number',
+    check: 'Cheque Number',
+    tt: 'TT Number',
+    bank: 'Bank Number',
+    cash: 'Reference Number (optional)'
+  };
+
+  function updateReferenceField() {
+    const method = methodEl.value;
+    referenceLabel.textContent = labels[method] || 'Reference Number';
+
+    if (method === 'lc' || method === 'check' || method === 'tt' || method === 'bank') {
+      referenceEl.required = true;
+      referenceHelp.textContent = 'Required for LC, Cheque, TT, and Bank payments.';
+    } else {
+      referenceEl.required = false;
+      referenceHelp.textContent = referenceHelp.dataset.optionalText || 'Optional for cash payments.';
+    }
+  }
+
+  methodEl.addEventListener('change', updateReferenceField);
+  updateReferenceField();
+});